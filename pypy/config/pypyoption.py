@@ -30,7 +30,8 @@ working_modules.update(dict.fromkeys(
       "rctime" , "select", "zipimport", "_lsprof",
      "crypt", "signal", "_rawffi", "termios", "zlib",
      "struct", "md5", "sha", "bz2", "_minimal_curses", "cStringIO",
-     "thread", "itertools", "pyexpat", "_ssl", "cpyext", "array"]
+     "thread", "itertools", "pyexpat", "_ssl", "cpyext", "array",
+     "_sampleprof"]
 ))
 
 working_oo_modules = default_modules.copy()
@@ -47,6 +48,7 @@ if sys.platform == "win32":
     del working_modules["fcntl"]
     del working_modules["termios"]
     del working_modules["_minimal_curses"]
+    del working_modules["_sampleprof"]
 
     # The _locale module is probably incomplete,
     # but enough for the tests to pass on Windows
@@ -59,10 +61,13 @@ if sys.platform == "sunos5":
     del working_modules['fcntl']  # LOCK_NB not defined
     del working_modules["_minimal_curses"]
     del working_modules["termios"]
+    del working_modules["_sampleprof"]  # needs the signal module
 
 
 
-module_dependencies = {}
+module_dependencies = {
+    "_sampleprof": [("objspace.usemodules.signal", True)],
+    }
 module_suggests = {
     # the reason you want _rawffi is for ctypes, which
     # itself needs the interp-level struct module
@@ -238,12 +243,29 @@ pypy_optiondescription = OptionDescription("objspace", "Object Space Options", [
                    default=False,
                    requires=[("objspace.std.withshadowtracking", False)]),
 
+        BoolOption("withmapdict",
+                   "make instances really small but slow without the JIT",
+                   default=False,
+                   requires=[("objspace.std.withshadowtracking", False),
+                             ("objspace.std.withinlineddict", False),
+                             ("objspace.std.withsharingdict", False)]),
+
         BoolOption("withrangelist",
                    "enable special range list implementation that does not "
                    "actually create the full list until the resulting "
                    "list is mutated",
                    default=False),
 
+        BoolOption("withliststrategies",
+                   "enable optimized ways to store lists of only integers, "
+                   "floats or strings without wrapping their items",
+                   default=False),
+
+        BoolOption("withsetstrategies",
+                   "enable optimized ways to store sets and frozensets of "
+                   "only integers or strings without wrapping their keys",
+                   default=False),
+
         BoolOption("withtypeversion",
                    "version type objects when changing them",
                    cmdline=None,
@@ -322,15 +344,19 @@ def set_pypy_opt_level(config, level):
     if level in ['2', '3', 'jit']:
         config.objspace.opcodes.suggest(CALL_METHOD=True)
         config.objspace.std.suggest(withrangelist=True)
+        config.objspace.std.suggest(withliststrategies=True)
+        config.objspace.std.suggest(withsetstrategies=True)
         config.objspace.std.suggest(withmethodcache=True)
         config.objspace.std.suggest(withprebuiltchar=True)
         config.objspace.std.suggest(builtinshortcut=True)
         config.objspace.std.suggest(optimized_list_getitem=True)
         config.objspace.std.suggest(getattributeshortcut=True)
         config.objspace.std.suggest(newshortcut=True)        
-        if type_system != 'ootype':
-            config.objspace.std.suggest(withsharingdict=True)
-        config.objspace.std.suggest(withinlineddict=True)
+        if level != 'jit':
+            # with the JIT, withmapdict is used instead (see below)
+            if type_system != 'ootype':
+                config.objspace.std.suggest(withsharingdict=True)
+            config.objspace.std.suggest(withinlineddict=True)
 
     # extra costly optimizations only go in level 3
     if level == '3':
@@ -342,6 +368,8 @@ def set_pypy_opt_level(config, level):
     if level == 'mem':
         config.objspace.std.suggest(withprebuiltint=True)
         config.objspace.std.suggest(withrangelist=True)
+        config.objspace.std.suggest(withliststrategies=True)
+        config.objspace.std.suggest(withsetstrategies=True)
         config.objspace.std.suggest(withprebuiltchar=True)
         config.objspace.std.suggest(withinlineddict=True)
         config.objspace.std.suggest(withstrslice=True)
@@ -359,6 +387,7 @@ def set_pypy_opt_level(config, level):
     # extra optimizations with the JIT
     if level == 'jit':
         config.objspace.std.suggest(withcelldict=True)
+        config.objspace.std.suggest(withmapdict=True)
 
 
 def enable_allworkingmodules(config):
@@ -49,6 +49,10 @@ def test_set_pypy_opt_level():
     set_pypy_opt_level(conf, '2')
     assert conf.objspace.std.withsharingdict
     conf = get_pypy_config()
+    set_pypy_opt_level(conf, 'jit')
+    assert conf.objspace.std.withmapdict
+    assert not conf.objspace.std.withsharingdict
+    conf = get_pypy_config()
     set_pypy_opt_level(conf, '0')
     assert not conf.objspace.std.newshortcut
 
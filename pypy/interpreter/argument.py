@@ -7,15 +7,27 @@ from pypy.rlib.debug import make_sure_not_resized
 from pypy.rlib import jit
 
 
+class KeywordsCache(object):
+    """The keyword names of the last call to a Signature that used keywords,
+    and their positions as computed by Signature.find_keywords().  This is a
+    separate object so that the Signature itself stays immutable."""
+    __slots__ = ("names", "positions")
+
+    def __init__(self):
+        self.names = None
+        self.positions = None
+
+
 class Signature(object):
     _immutable_ = True
     _immutable_fields_ = ["argnames[*]"]
-    __slots__ = ("argnames", "varargname", "kwargname")
+    __slots__ = ("argnames", "varargname", "kwargname", "kwcache")
 
     def __init__(self, argnames, varargname=None, kwargname=None):
         self.argnames = argnames
         self.varargname = varargname
         self.kwargname = kwargname
+        self.kwcache = KeywordsCache()
 
     @jit.purefunction
     def find_argname(self, name):
@@ -24,6 +36,34 @@ class Signature(object):
         except ValueError:
             return -1
 
+    def find_keywords(self, keywords):
+        """Return the list of the positions in argnames of the given
+        keyword names, or -1 for the names that are not argnames.  The
+        result is cached for the list of names of the most recent call,
+        because a function is usually called again and again with the
+        same keywords.  The returned list must not be modified, nor the
+        'keywords' list afterwards.
+        """
+        cache = self.kwcache
+        if not jit.we_are_jitted():
+            if self._same_names(cache.names, keywords):
+                return cache.positions
+        positions = [-1] * len(keywords)
+        for i in range(len(keywords)):
+            positions[i] = self.find_argname(keywords[i])
+        if not jit.we_are_jitted():
+            cache.names = keywords
+            cache.positions = positions
+        return positions
+
+    def _same_names(self, names, keywords):
+        if names is None or len(names) != len(keywords):
+            return False
+        for i in range(len(keywords)):
+            if names[i] != keywords[i]:
+                return False
+        return True
+
     def num_argnames(self):
         return len(self.argnames)
 
@@ -265,14 +305,15 @@ class Arguments(object):
             input_argcount += take
 
         # the code assumes that keywords can potentially be large, but that
-        # argnames is typically not too large
+        # argnames is typically not too large.  A keyword is used if its
+        # position is at least input_argcount; the other ones are left
+        # for the **kwarg.
         num_remainingkwds = num_kwds
-        used_keywords = None
+        kwd_positions = None
         if keywords:
-            used_keywords = [False] * num_kwds
+            kwd_positions = signature.find_keywords(keywords)
             for i in range(num_kwds):
-                name = keywords[i]
-                j = signature.find_argname(name)
+                j = kwd_positions[i]
                 if j < 0:
                     continue
                 elif j < input_argcount:
@@ -282,11 +323,10 @@ class Arguments(object):
                     # keywords do not conflict with the hidden extra argument
                     # bound by methods.
                     if blindargs <= j:
-                        raise ArgErrMultipleValues(name)
+                        raise ArgErrMultipleValues(keywords[i])
                 else:
                     assert scope_w[j] is None
                     scope_w[j] = keywords_w[i]
-                    used_keywords[i] = True # mark as used
                     num_remainingkwds -= 1
         missing = 0
         if input_argcount < co_argcount:
@@ -325,11 +365,14 @@ class Arguments(object):
             w_kwds = self.space.newdict()
             if num_remainingkwds:
                 for i in range(len(keywords)):
-                    if not used_keywords[i]:
+                    if kwd_positions[i] < input_argcount:
                         key = keywords[i]
                         self.space.setitem(w_kwds, self.space.wrap(key), keywords_w[i])
             scope_w[co_argcount + has_vararg] = w_kwds
         elif num_remainingkwds:
+            used_keywords = [False] * num_kwds
+            for i in range(num_kwds):
+                used_keywords[i] = kwd_positions[i] >= input_argcount
             raise ArgErrUnknownKwds(num_remainingkwds, keywords, used_keywords)
 
         if missing:
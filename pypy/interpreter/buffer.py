@@ -20,6 +20,7 @@ from pypy.interpreter.typedef import TypeDef
 from pypy.interpreter.gateway import interp2app, ObjSpace, W_Root
 from pypy.interpreter.error import OperationError
 from pypy.rlib.objectmodel import compute_hash
+from pypy.rpython.lltypesystem import lltype, rffi
 
 
 class Buffer(Wrappable):
@@ -43,6 +44,26 @@ class Buffer(Wrappable):
         # May be overridden.  No bounds checks.
         return ''.join([self.getitem(i) for i in range(start, stop)])
 
+    def get_raw_address(self):
+        """Returns the address of the raw memory holding the content of
+        the buffer, or NULL if there is none.  For a RWBuffer, the memory
+        can be written to directly, e.g. by a read() system call.  The
+        address is only valid as long as the buffer is alive and the
+        underlying object is not resized or closed, see pin()."""
+        # May be overridden.
+        return lltype.nullptr(rffi.CCHARP.TO)
+
+    def pin(self):
+        """Called before using the address returned by get_raw_address()
+        while other threads can run, e.g. around a system call that
+        releases the GIL.  Until the matching unpin(), the underlying
+        object refuses to be resized or closed."""
+        # May be overridden.
+
+    def unpin(self):
+        # May be overridden.
+        pass
+
     # __________ app-level support __________
 
     def descr_len(self, space):
@@ -288,6 +309,20 @@ class SubBufferMixin(object):
                           # out of bounds
         return self.buffer.getslice(self.offset + start, self.offset + stop)
 
+    def get_raw_address(self):
+        if self.offset > self.buffer.getlength():
+            return lltype.nullptr(rffi.CCHARP.TO)
+        address = self.buffer.get_raw_address()
+        if address:
+            address = rffi.ptradd(address, self.offset)
+        return address
+
+    def pin(self):
+        self.buffer.pin()
+
+    def unpin(self):
+        self.buffer.unpin()
+
 class SubBuffer(SubBufferMixin, Buffer):
     pass
 
@@ -0,0 +1,33 @@
+from sup import run
+
+def w(N, start):
+    def f3(a, b=None, c=None):
+        pass
+    def f5(a, b, c=None, d=None, e=None):
+        pass
+    def fkw(a, b=None, **kwds):
+        pass
+
+    start()
+
+    i = 0
+    while i < N:
+        f3(1, b=2)
+        f3(1, c=3)
+        f3(1, b=2, c=3)
+        f3(a=1, b=2, c=3)
+        f3(c=3, a=1)
+        f3(1, b=2, c=3)
+
+        f5(1, 2, e=5)
+        f5(1, 2, c=3, d=4, e=5)
+        f5(1, 2, e=5, d=4, c=3)
+        f5(a=1, b=2, c=3, d=4, e=5)
+        f5(1, 2, c=3, d=4, e=5)
+        f5(1, 2, c=3, d=4, e=5)
+
+        fkw(1, b=2, x=3, y=4)
+        fkw(1, x=3)
+        i+=1
+
+run(w, 1000)
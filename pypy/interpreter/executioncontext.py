@@ -31,6 +31,9 @@ class ExecutionContext(object):
         self.compiler = space.createcompiler()
         self.profilefunc = None        # if not None, no JIT
         self.w_profilefuncarg = None
+        # True if the actions currently being performed were triggered
+        # from JIT-compiled code
+        self.actions_from_jit = False
 
     def gettopframe(self):
         return self.topframeref()
@@ -173,6 +176,7 @@ class ExecutionContext(object):
             ticker += 1
             actionflag.set(ticker)
         if ticker & actionflag.interesting_bits:  # fast check
+            self.actions_from_jit = jit.we_are_jitted()
             actionflag.action_dispatcher(self, frame)     # slow path
     bytecode_trace._always_inline_ = True
 
@@ -181,6 +185,7 @@ class ExecutionContext(object):
         actionflag = self.space.actionflag
         ticker = actionflag.get()
         if ticker & actionflag.interesting_bits:  # fast check
+            self.actions_from_jit = jit.we_are_jitted()
             actionflag.action_dispatcher(self, frame)     # slow path
     bytecode_trace_after_exception._always_inline_ = True
 
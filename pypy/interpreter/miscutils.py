@@ -167,3 +167,11 @@ class ThreadLocals:
 
     def getmainthreadvalue(self):
         return self._value
+
+    def reinit_threads(self, space):
+        "Called in the child process after a fork()."
+
+    def switch_if_requested(self):
+        """Called by long-running builtins that cannot release the GIL,
+        between two chunks of work: hands the GIL over to another thread
+        if one asked for it."""
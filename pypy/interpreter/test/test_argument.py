@@ -45,6 +45,18 @@ class TestSignature(object):
         assert sig.find_argname("c") == 2
         assert sig.find_argname("d") == -1
 
+    def test_find_keywords(self):
+        sig = Signature(["a", "b", "c"], None, None)
+        res = sig.find_keywords(["c", "d", "a"])
+        assert res == [2, -1, 0]
+        assert sig.find_keywords(["c", "d", "a"]) is res    # cached
+        res1 = sig.find_keywords(["b"])
+        assert res1 == [1]
+        assert sig.find_keywords(["b"]) is res1
+        assert sig.find_keywords(["b", "a"]) == [1, 0]
+        assert sig.find_keywords(["b"]) is not res1
+        assert sig.find_keywords(["c", "d", "a"]) is not res
+
     def test_tuply(self):
         sig = Signature(["a", "b", "c"], "d", "e")
         x, y, z = sig
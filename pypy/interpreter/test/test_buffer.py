@@ -1,5 +1,7 @@
 import py
-from pypy.interpreter.buffer import Buffer
+from pypy.interpreter.buffer import Buffer, RWSubBuffer
+from pypy.interpreter.error import OperationError
+from pypy.conftest import gettestobjspace
 from pypy.tool.udir import udir
 
 testdir = udir.ensure('test_buffer', dir=1)
@@ -44,4 +46,52 @@ class TestBuffer:
                        space.bufferstr_w, space.wrap(u'\xe9'))
 
 
+class TestRawAddress:
+
+    def setup_class(cls):
+        cls.space = gettestobjspace(usemodules=('array', 'mmap'))
+
+    def test_subbuffer_past_the_end(self):
+        space = self.space
+        w_a = space.appexec([], """():
+            import array
+            return array.array('c', 'hello')
+        """)
+        buf = space.rwbuffer_w(w_a)
+        assert buf.get_raw_address()
+        assert RWSubBuffer(buf, 5, 0).get_raw_address()
+        assert not RWSubBuffer(buf, 6, 0).get_raw_address()
+
+    def test_pinned_array(self):
+        space = self.space
+        w_a = space.appexec([], """():
+            import array
+            return array.array('c', 'hello')
+        """)
+        buf = RWSubBuffer(space.rwbuffer_w(w_a), 1, 2)
+        buf.pin()
+        try:
+            space.setitem(w_a, space.wrap(0), space.wrap('j'))
+            err = py.test.raises(OperationError, space.call_method, w_a,
+                                 'append', space.wrap('!'))
+            assert err.value.match(space, space.w_ValueError)
+        finally:
+            buf.unpin()
+        space.call_method(w_a, 'append', space.wrap('!'))
+        assert space.str_w(space.call_method(w_a, 'tostring')) == 'jello!'
+
+    def test_pinned_mmap(self):
+        space = self.space
+        w_m = space.appexec([], "(): import mmap; return mmap.mmap(-1, 10)")
+        buf = space.rwbuffer_w(w_m)
+        buf.pin()
+        try:
+            err = py.test.raises(OperationError, space.call_method, w_m,
+                                 'close')
+            assert err.value.match(space, space.w_ValueError)
+        finally:
+            buf.unpin()
+        space.call_method(w_m, 'close')
+
+
 # Note: some app-level tests for buffer are in module/__builtin__/test/.
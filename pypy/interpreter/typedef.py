@@ -133,6 +133,15 @@ def _getusercls(config, cls, wants_dict, wants_slots, wants_del, weakrefable):
     typedef = cls.typedef
     if wants_dict and typedef.hasdict:
         wants_dict = False
+    if config.objspace.std.withmapdict and _is_object_class(cls):
+        # the map of the instances takes care of the dict, the slots and
+        # the weakrefs, so that only the classes with a __del__ differ
+        if wants_del:
+            parentcls = get_unique_interplevel_subclass(config, cls, True, True,
+                                                        False, True)
+            return _usersubclswithfeature(config, parentcls, "del")
+        return _usersubclswithfeature(config, cls, "user", "dict", "weakref",
+                                      "slots")
     # Forest of if's - see the comment above.
     if wants_del:
         if wants_dict:
@@ -186,9 +195,18 @@ def _builduserclswithfeature(config, supercls, *features):
 
     def add(Proto):
         for key, value in Proto.__dict__.items():
-            if not key.startswith('__') or key == '__del__':
+            if (not key.startswith('__') or key == '__del__') and (
+                    key != '_mixin_'):
                 body[key] = value
 
+    if (config.objspace.std.withmapdict and "user" in features and
+            _is_object_class(supercls)):
+        from pypy.objspace.std.mapdict import BaseMapdictObject, ObjectMixin
+        add(BaseMapdictObject)
+        add(ObjectMixin)
+        body["user_overridden_class"] = True
+        features = ()
+
     if "user" in features:     # generic feature needed by all subcls
         class Proto(object):
             user_overridden_class = True
@@ -288,6 +306,11 @@ def _builduserclswithfeature(config, supercls, *features):
     _allusersubcls_cache[subcls] = True
     return subcls
 
+def _is_object_class(cls):
+    "NOT_RPYTHON: initialization-time only"
+    from pypy.objspace.std.objectobject import W_ObjectObject
+    return cls is W_ObjectObject
+
 # a couple of helpers for the Proto classes above, factored out to reduce
 # the translated code size
 def check_new_dictionary(space, w_dict):
@@ -116,13 +116,18 @@ class CliCPU(model.AbstractCPU):
         self.loopcount += 1
         cliloop = CliLoop(name, inputargs, operations)
         looptoken.cliloop = cliloop
+        looptoken.compiled_loop_token = model.CompiledLoopToken(
+            self, looptoken.number)
         cliloop.funcbox = ConstFunction(cliloop.name)
         self._attach_token_to_faildescrs(cliloop, operations)
         meth = Method(self, cliloop)
         cliloop.funcbox.holder.SetFunc(meth.compile())
 
-    def compile_bridge(self, faildescr, inputargs, operations):
+    def compile_bridge(self, faildescr, inputargs, operations,
+                       original_loop_token=None):
         from pypy.jit.backend.cli.method import Method
+        if original_loop_token is not None:    # None only for tests
+            original_loop_token.compiled_loop_token.compiling_a_bridge()
         op = faildescr._guard_op
         token = faildescr._loop_token
         token.guard2ops[op] = (inputargs, operations)
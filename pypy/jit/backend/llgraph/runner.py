@@ -117,7 +117,11 @@ class BaseCPU(model.AbstractCPU):
             self._descrs[key] = descr
             return descr
 
-    def compile_bridge(self, faildescr, inputargs, operations):
+    def compile_bridge(self, faildescr, inputargs, operations,
+                       original_loop_token=None):
+        if original_loop_token is not None:    # None only for tests
+            clt = original_loop_token.compiled_loop_token
+            clt.compiling_a_bridge()
         c = llimpl.compile_start()
         self._compile_loop_or_bridge(c, inputargs, operations)
         old, oldindex = faildescr._compiled_fail
@@ -129,6 +133,8 @@ class BaseCPU(model.AbstractCPU):
         instance.  The code here is RPython, whereas the code in llimpl
         is not.
         """
+        clt = model.CompiledLoopToken(self, loopdescr.number)
+        loopdescr.compiled_loop_token = clt
         c = llimpl.compile_start()
         loopdescr._llgraph_compiled_version = c
         self._compile_loop_or_bridge(c, inputargs, operations)
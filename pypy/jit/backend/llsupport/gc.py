@@ -306,20 +306,47 @@ class GcRootMap_asmgcc:
 
 class WriteBarrierDescr(AbstractDescr):
     def __init__(self, gc_ll_descr):
+        GCClass = gc_ll_descr.GCClass
         self.llop1 = gc_ll_descr.llop1
         self.WB_FUNCPTR = gc_ll_descr.WB_FUNCPTR
-        self.fielddescr_tid = get_field_descr(gc_ll_descr,
-                                              gc_ll_descr.GCClass.HDR, 'tid')
-        self.jit_wb_if_flag = gc_ll_descr.GCClass.JIT_WB_IF_FLAG
+        self.WB_ARRAY_FUNCPTR = gc_ll_descr.WB_ARRAY_FUNCPTR
+        self.fielddescr_tid = get_field_descr(gc_ll_descr, GCClass.HDR, 'tid')
+        self.jit_wb_if_flag = GCClass.JIT_WB_IF_FLAG
         # if convenient for the backend, we also compute the info about
         # the flag as (byte-offset, single-byte-flag).
+        (self.jit_wb_if_flag_byteofs,
+         self.jit_wb_if_flag_singlebyte) = self.extract_flag_byte(
+            self.jit_wb_if_flag)
+        #
+        # card marking: if the GC uses it, COND_CALL_GC_WB_ARRAY checks
+        # the flag JIT_WB_CARDS_SET too, and if it is set, the backend
+        # can directly set the bit of the card, which is
+        #     (index >> jit_wb_card_page_shift) & 7
+        # in the byte at offset ~((index >> jit_wb_card_page_shift) >> 3)
+        # from the start of the object.
+        card_page_indices = GCClass.TRANSLATION_PARAMS.get(
+            'card_page_indices', 0)
+        if card_page_indices > 0 and hasattr(GCClass, 'JIT_WB_CARDS_SET'):
+            self.jit_wb_cards_set = GCClass.JIT_WB_CARDS_SET
+            self.jit_wb_card_page_shift = 0
+            while (1 << self.jit_wb_card_page_shift) < card_page_indices:
+                self.jit_wb_card_page_shift += 1
+            (self.jit_wb_cards_set_byteofs,
+             self.jit_wb_cards_set_singlebyte) = self.extract_flag_byte(
+                self.jit_wb_cards_set)
+        else:
+            self.jit_wb_cards_set = 0
+            self.jit_wb_card_page_shift = 0
+            self.jit_wb_cards_set_byteofs = 0
+            self.jit_wb_cards_set_singlebyte = 0
+
+    def extract_flag_byte(self, flag_word):
         import struct
-        value = struct.pack("l", self.jit_wb_if_flag)
+        value = struct.pack("l", flag_word)
         assert value.count('\x00') == len(value) - 1    # only one byte is != 0
         i = 0
         while value[i] == '\x00': i += 1
-        self.jit_wb_if_flag_byteofs = i
-        self.jit_wb_if_flag_singlebyte = struct.unpack('b', value[i])[0]
+        return (i, struct.unpack('b', value[i])[0])
 
     def get_write_barrier_fn(self, cpu):
         llop1 = self.llop1
@@ -327,6 +354,13 @@ class WriteBarrierDescr(AbstractDescr):
         funcaddr = llmemory.cast_ptr_to_adr(funcptr)
         return cpu.cast_adr_to_int(funcaddr)
 
+    def get_write_barrier_from_array_fn(self, cpu):
+        llop1 = self.llop1
+        funcptr = llop1.get_write_barrier_from_array_failing_case(
+            self.WB_ARRAY_FUNCPTR)
+        funcaddr = llmemory.cast_ptr_to_adr(funcptr)
+        return cpu.cast_adr_to_int(funcaddr)
+
 
 class GcLLDescr_framework(GcLLDescription):
     DEBUG = False    # forced to True by x86/test/test_zrpy_gc.py
@@ -395,6 +429,8 @@ class GcLLDescr_framework(GcLLDescription):
             [lltype.Signed, lltype.Signed], llmemory.GCREF))
         self.WB_FUNCPTR = lltype.Ptr(lltype.FuncType(
             [llmemory.Address, llmemory.Address], lltype.Void))
+        self.WB_ARRAY_FUNCPTR = lltype.Ptr(lltype.FuncType(
+            [llmemory.Address, lltype.Signed, llmemory.Address], lltype.Void))
         self.write_barrier_descr = WriteBarrierDescr(self)
         #
         def malloc_array(itemsize, tid, num_elem):
@@ -588,7 +624,8 @@ class GcLLDescr_framework(GcLLDescription):
                 v = op.args[2]
                 if isinstance(v, BoxPtr) or (isinstance(v, ConstPtr) and
                                              bool(v.value)): # store a non-NULL
-                    self._gen_write_barrier(newops, op.args[0], v)
+                    self._gen_write_barrier_array(newops, op.args[0],
+                                                  op.args[1], v)
                     op = ResOperation(rop.SETARRAYITEM_RAW, op.args, None,
                                       descr=op.descr)
             # ----------
@@ -601,6 +638,15 @@ class GcLLDescr_framework(GcLLDescription):
         newops.append(ResOperation(rop.COND_CALL_GC_WB, args, None,
                                    descr=self.write_barrier_descr))
 
+    def _gen_write_barrier_array(self, newops, v_base, v_index, v_value):
+        if self.write_barrier_descr.jit_wb_cards_set == 0:
+            # no card marking: use the regular write barrier
+            self._gen_write_barrier(newops, v_base, v_value)
+            return
+        args = [v_base, v_index, v_value]
+        newops.append(ResOperation(rop.COND_CALL_GC_WB_ARRAY, args, None,
+                                   descr=self.write_barrier_descr))
+
     def can_inline_malloc(self, descr):
         assert isinstance(descr, BaseSizeDescr)
         if descr.size < self.max_size_of_young_obj:
@@ -147,6 +147,13 @@ class FakeLLOp:
     def get_write_barrier_failing_case(self, FPTRTYPE):
         return llhelper(FPTRTYPE, self._write_barrier_failing_case)
 
+    def _write_barrier_from_array_failing_case(self, adr_array, index,
+                                               adr_newptr):
+        self.record.append(('barrier_array', adr_array, index, adr_newptr))
+
+    def get_write_barrier_from_array_failing_case(self, FPTRTYPE):
+        return llhelper(FPTRTYPE, self._write_barrier_from_array_failing_case)
+
 
 class TestFramework:
 
@@ -267,6 +274,35 @@ class TestFramework:
         assert isinstance(wbdescr.jit_wb_if_flag_byteofs, int)
         assert isinstance(wbdescr.jit_wb_if_flag_singlebyte, int)
 
+    def test_gen_write_barrier_array(self):
+        gc_ll_descr = self.gc_ll_descr
+        llop1 = self.llop1
+        #
+        newops = []
+        v_base = BoxPtr()
+        v_index = BoxInt()
+        v_value = BoxPtr()
+        gc_ll_descr._gen_write_barrier_array(newops, v_base, v_index, v_value)
+        assert llop1.record == []
+        assert len(newops) == 1
+        assert newops[0].opnum == rop.COND_CALL_GC_WB_ARRAY
+        assert newops[0].args == [v_base, v_index, v_value]
+        assert newops[0].result is None
+        wbdescr = newops[0].descr
+        # the hybrid GC uses card marking by default
+        assert wbdescr.jit_wb_cards_set != 0
+        assert wbdescr.jit_wb_card_page_shift == 7
+        assert isinstance(wbdescr.jit_wb_cards_set_byteofs, int)
+        assert isinstance(wbdescr.jit_wb_cards_set_singlebyte, int)
+        #
+        # without card marking, we get a regular COND_CALL_GC_WB
+        wbdescr.jit_wb_cards_set = 0
+        newops = []
+        gc_ll_descr._gen_write_barrier_array(newops, v_base, v_index, v_value)
+        assert len(newops) == 1
+        assert newops[0].opnum == rop.COND_CALL_GC_WB
+        assert newops[0].args == [v_base, v_value]
+
     def test_get_rid_of_debug_merge_point(self):
         operations = [
             ResOperation(rop.DEBUG_MERGE_POINT, [], None),
@@ -379,9 +415,8 @@ class TestFramework:
         gc_ll_descr.rewrite_assembler(self.fake_cpu, operations)
         assert len(operations) == 2
         #
-        assert operations[0].opnum == rop.COND_CALL_GC_WB
-        assert operations[0].args[0] == v_base
-        assert operations[0].args[1] == v_value
+        assert operations[0].opnum == rop.COND_CALL_GC_WB_ARRAY
+        assert operations[0].args == [v_base, v_index, v_value]
         assert operations[0].result is None
         #
         assert operations[1].opnum == rop.SETARRAYITEM_RAW
@@ -1,4 +1,6 @@
+from pypy.rlib.debug import debug_start, debug_print, debug_stop
 from pypy.jit.metainterp import history, compile
+from pypy.jit.metainterp.jitprof import jit_statistics
 
 
 class AbstractCPU(object):
@@ -8,16 +10,27 @@ class AbstractCPU(object):
     done_with_this_frame_ref_v = -1
     done_with_this_frame_float_v = -1
 
+    total_compiled_loops = 0
+    total_compiled_bridges = 0
+    total_freed_loops = 0
+    total_freed_bridges = 0
+
     def __init__(self):
         self.fail_descr_list = []
+        self.fail_descr_free_list = []
 
     def get_fail_descr_number(self, descr):
         assert isinstance(descr, history.AbstractFailDescr)
         n = descr.index
         if n < 0:
             lst = self.fail_descr_list
-            n = len(lst)
-            lst.append(descr)
+            if len(self.fail_descr_free_list) > 0:
+                n = self.fail_descr_free_list.pop()
+                assert lst[n] is None
+                lst[n] = descr
+            else:
+                n = len(lst)
+                lst.append(descr)
             descr.index = n
         return n
 
@@ -40,12 +53,35 @@ class AbstractCPU(object):
         """
         raise NotImplementedError
 
-    def compile_bridge(self, faildescr, inputargs, operations):
+    def compile_bridge(self, faildescr, inputargs, operations,
+                       original_loop_token):
         """Assemble the bridge.
         The FailDescr is the descr of the original guard that failed.
+        The 'original_loop_token' is the LoopToken of the loop that
+        the bridge belongs to.
         """
         raise NotImplementedError    
 
+    def free_loop_and_bridges(self, compiled_loop_token):
+        """This method is called to free resources (machine code,
+        references to resume guards, etc.) allocated by the compilation
+        of a loop and all bridges attached to it.  After this call, the
+        frontend cannot use this compiled loop any more; in fact, it
+        guarantees that at the point of the call to free_loop_and_bridges(),
+        none of the corresponding assembler is currently running.
+        """
+        # The base class provides a limited implementation: freeing the
+        # resume descrs.  This is already quite helpful, because the
+        # resume descrs are the largest consumers of memory (about 3x
+        # more than the assembler, in the case of the x86 backend).
+        lst = self.fail_descr_list
+        for n in compiled_loop_token.faildescr_indices:
+            lst[n] = None
+        self.fail_descr_free_list.extend(compiled_loop_token.faildescr_indices)
+        self.total_freed_loops += 1
+        self.total_freed_bridges += compiled_loop_token.bridges_count
+        # We expect 'compiled_loop_token' to be itself garbage-collected soon.
+
     def execute_token(self, looptoken):
         """Execute the generated code referenced by the looptoken.
         Returns the descr of the last executed operation: either the one
@@ -231,3 +267,38 @@ class AbstractCPU(object):
 
     def force(self, force_token):
         raise NotImplementedError
+
+
+class CompiledLoopToken(object):
+    """Attached by the backend as the 'compiled_loop_token' of a
+    LoopToken, it records what the compilation of the loop and of its
+    bridges allocated.  It only stays alive as long as the LoopToken.
+    """
+
+    def __init__(self, cpu, number):
+        cpu.total_compiled_loops += 1
+        self.cpu = cpu
+        self.number = number
+        self.bridges_count = 0
+        # The number of bytes of machine code of the loop and its bridges,
+        # for the statistics; left to 0 by backends that don't know.
+        self.asm_bytes = 0
+        # This growing list gives the 'descr_number' of all fail descrs
+        # that belong to this loop or to a bridge attached to it.
+        # Filled by the frontend calling record_faildescr_index().
+        self.faildescr_indices = []
+
+    def record_faildescr_index(self, n):
+        self.faildescr_indices.append(n)
+
+    def compiling_a_bridge(self):
+        self.cpu.total_compiled_bridges += 1
+        self.bridges_count += 1
+
+    def __del__(self):
+        debug_start("jit-mem-looptoken-free")
+        debug_print("freeing Loop #", self.number, 'with',
+                    self.bridges_count, 'attached bridges')
+        self.cpu.free_loop_and_bridges(self)
+        jit_statistics.loop_freed(self.number)
+        debug_stop("jit-mem-looptoken-free")
@@ -1,5 +1,6 @@
 import sys, os
 from pypy.jit.backend.llsupport import symbolic
+from pypy.jit.backend.model import CompiledLoopToken
 from pypy.jit.metainterp.history import Const, Box, BoxInt, BoxPtr, BoxFloat
 from pypy.jit.metainterp.history import AbstractFailDescr, INT, REF, FLOAT,\
      LoopToken
@@ -51,6 +52,13 @@ class MachineCodeBlockWrapper(object):
         self.function_name = None
         self.profile_agent = profile_agent
         self.reset_reserved_bytes()
+        # number of compiled loops that have code in each block; the
+        # first block is never released, because it contains the helpers
+        # built by Assembler386.setup()
+        self._block_users = {self._mc: 1}
+        self._recorded_blocks = None
+        self._recorded_start = 0
+        self.recorded_bytes = 0
 
     def _instantiate_mc(self): # hook for testing
         return codebuf.MachineCodeBlock(self.bigsize)
@@ -114,10 +122,50 @@ class MachineCodeBlockWrapper(object):
         self.assembler.write_pending_failure_recoveries()
 
         self._mc.done()
-        self.old_mcs.append(self._mc)
+        if self._recorded_blocks is not None:
+            self.recorded_bytes += (self._mc.get_relative_pos() -
+                                    self._recorded_start)
+            self._recorded_start = new_mc.get_relative_pos()
+            self._recorded_blocks.append(new_mc)
+            self.old_mcs.append(self._mc)
+        elif self._block_users.get(self._mc, 0) > 0:
+            self.old_mcs.append(self._mc)
+        # else: all loops with code in the old block were already freed
         self._mc = new_mc
     make_new_mc._dont_inline_ = True
 
+    def start_recording_blocks(self):
+        self._recorded_blocks = [self._mc]
+        self._recorded_start = self._mc.get_relative_pos()
+        self.recorded_bytes = 0
+
+    def stop_recording_blocks(self):
+        """Returns the list of blocks that received code since the
+        call to start_recording_blocks(), and count them as used by one
+        more compiled loop.  The number of bytes written in the meantime
+        is left in 'self.recorded_bytes'."""
+        blocks = self._recorded_blocks
+        assert blocks is not None
+        self._recorded_blocks = None
+        self.recorded_bytes += (self._mc.get_relative_pos() -
+                                self._recorded_start)
+        for mc in blocks:
+            self._block_users[mc] = self._block_users.get(mc, 0) + 1
+        return blocks
+
+    def release_blocks(self, blocks):
+        """Called when a compiled loop is freed.  The blocks that no
+        longer contain the code of any living loop are forgotten, which
+        lets MachineCodeBlock.__del__ unmap them."""
+        for mc in blocks:
+            n = self._block_users[mc] - 1
+            if n > 0:
+                self._block_users[mc] = n
+                continue
+            del self._block_users[mc]
+            if mc is not self._mc:
+                self.old_mcs.remove(mc)
+
     def tell(self):
         return self._mc.tell()
 
@@ -303,6 +351,9 @@ class Assembler386(object):
             assert len(set(inputargs)) == len(inputargs)
 
         self.setup()
+        clt = CompiledLoopToken(self.cpu, looptoken.number)
+        looptoken.compiled_loop_token = clt
+        self.mc.start_recording_blocks()
         funcname = self._find_debug_merge_point(operations)
 
         
@@ -332,13 +383,17 @@ class Assembler386(object):
                     looptoken._x86_loop_code, "to", self.mc.tell())
         self.mc.end_function()
         self.write_pending_failure_recoveries()
+        clt.asm_code_blocks = self.mc.stop_recording_blocks()
+        clt.asm_bytes = self.mc.recorded_bytes
         
-    def assemble_bridge(self, faildescr, inputargs, operations):
+    def assemble_bridge(self, faildescr, inputargs, operations,
+                        original_loop_token=None):
         if not we_are_translated():
             # Arguments should be unique
             assert len(set(inputargs)) == len(inputargs)
 
         self.setup()
+        self.mc.start_recording_blocks()
         funcname = self._find_debug_merge_point(operations)
 
         arglocs = self.rebuild_faillocs_from_descr(
@@ -372,6 +427,13 @@ class Assembler386(object):
                     "has address", adr_bridge, "to", self.mc.tell())
         self.mc.end_function()
         self.write_pending_failure_recoveries()
+        blocks = self.mc.stop_recording_blocks()
+        if original_loop_token is not None:    # None only for tests,
+            # in which case the blocks stay used forever
+            clt = original_loop_token.compiled_loop_token
+            clt.compiling_a_bridge()
+            clt.asm_code_blocks.extend(blocks)
+            clt.asm_bytes += self.mc.recorded_bytes
 
     def write_pending_failure_recoveries(self):
         for tok in self.pending_guard_tokens:
@@ -1749,8 +1811,67 @@ class Assembler386(object):
                 descr.jit_wb_if_flag_singlebyte)
         self.mc.J_il8(rx86.Conditions['Z'], 0) # patched later
         jz_location = self.mc.get_relative_pos()
+        self._emit_wb_slowpath(arglocs, 2, descr.get_write_barrier_fn(self.cpu))
+        # patch the JZ above
+        offset = self.mc.get_relative_pos() - jz_location
+        assert 0 < offset <= 127
+        self.mc.overwrite(jz_location-1, [chr(offset)])
+
+    def genop_discard_cond_call_gc_wb_array(self, op, arglocs):
+        # like cond_call_gc_wb, with the index of the item as an extra
+        # argument.  If the array already has GCFLAG_CARDS_SET, we only
+        # set the bit of the card inline, without calling the GC.
+        descr = op.descr
+        if we_are_translated():
+            cls = self.cpu.gc_ll_descr.has_write_barrier_class()
+            assert cls is not None and isinstance(descr, cls)
+        loc_base = arglocs[0]
+        loc_index = arglocs[1]
+        self.mc.ensure_bytes_available(256)
+        self.mc.TEST8_mi((loc_base.value, descr.jit_wb_if_flag_byteofs),
+                descr.jit_wb_if_flag_singlebyte)
+        self.mc.J_il8(rx86.Conditions['Z'], 0) # patched later
+        jz_location = self.mc.get_relative_pos()
+        self.mc.TEST8_mi((loc_base.value, descr.jit_wb_cards_set_byteofs),
+                descr.jit_wb_cards_set_singlebyte)
+        self.mc.J_il8(rx86.Conditions['Z'], 0) # patched later
+        jz_location2 = self.mc.get_relative_pos()
+        # fast path: set the bit of the card, i.e. the bit number
+        # (card & 7) of the byte at offset ~(card >> 3) from loc_base
+        shift = descr.jit_wb_card_page_shift
+        if isinstance(loc_index, ImmedLoc):
+            card = loc_index.value >> shift
+            self.mc.OR8_mi((loc_base.value, ~(card >> 3)), 1 << (card & 7))
+        else:
+            # compute in loc_index the bit offset 8*~(card>>3) + (card&7)
+            # (i.e. 'card ^ -8') and use BTS, which accepts a negative one
+            assert isinstance(loc_index, RegLoc)
+            self.mc.PUSH_r(loc_index.value)
+            self.mc.SHR_ri(loc_index.value, shift)
+            self.mc.XOR_ri(loc_index.value, -8)
+            self.mc.BTS_mr((loc_base.value, 0), loc_index.value)
+            self.mc.POP_r(loc_index.value)
+        self.mc.JMP_l8(0) # jump to done, patched later
+        jmp_location = self.mc.get_relative_pos()
+        # patch the second JZ above
+        offset = self.mc.get_relative_pos() - jz_location2
+        assert 0 < offset <= 127
+        self.mc.overwrite(jz_location2-1, [chr(offset)])
+        # slow path
+        self._emit_wb_slowpath(arglocs, 3,
+                               descr.get_write_barrier_from_array_fn(self.cpu))
+        # patch the JMP and the first JZ above
+        offset = self.mc.get_relative_pos() - jmp_location
+        assert 0 < offset <= 127
+        self.mc.overwrite(jmp_location-1, [chr(offset)])
+        offset = self.mc.get_relative_pos() - jz_location
+        assert 0 < offset <= 127
+        self.mc.overwrite(jz_location-1, [chr(offset)])
+
+    def _emit_wb_slowpath(self, arglocs, nargs, fnaddr):
         # the following is supposed to be the slow path, so whenever possible
         # we choose the most compact encoding over the most efficient one.
+        # The first 'nargs' of the arglocs are the arguments of the call.
         for i in range(len(arglocs)-1, -1, -1):
             loc = arglocs[i]
             if isinstance(loc, RegLoc):
@@ -1769,21 +1890,19 @@ class Assembler386(object):
             # so they are saved on the stack above and restored below 
             self.mc.MOV_rs(edi.value, 0)
             self.mc.MOV_rs(esi.value, 8)
+            if nargs == 3:
+                self.mc.MOV_rs(edx.value, 16)
 
         # misaligned stack in the call, but it's ok because the write barrier
         # is not going to call anything more.  Also, this assumes that the
         # write barrier does not touch the xmm registers.
-        self.mc.CALL(imm(descr.get_write_barrier_fn(self.cpu)))
+        self.mc.CALL(imm(fnaddr))
         for i in range(len(arglocs)):
             loc = arglocs[i]
             if isinstance(loc, RegLoc):
                 self.mc.POP_r(loc.value)
             else:
                 self.mc.ADD_ri(esp.value, WORD)   # ignore the pushed constant
-        # patch the JZ above
-        offset = self.mc.get_relative_pos() - jz_location
-        assert 0 < offset <= 127
-        self.mc.overwrite(jz_location-1, [chr(offset)])
 
     def genop_force_token(self, op, arglocs, resloc):
         # RegAlloc.consider_force_token ensures this:
@@ -689,6 +689,23 @@ class RegAlloc(object):
         loc_base = self.rm.make_sure_var_in_reg(op.args[0], op.args,
                                                 imm_fine=False)
         arglocs = [loc_base, loc_newvalue]
+        self._add_wb_saved_regs(arglocs)
+        self.PerformDiscard(op, arglocs)
+        self.rm.possibly_free_vars(op.args)
+
+    def consider_cond_call_gc_wb_array(self, op):
+        assert op.result is None
+        loc_newvalue = self.rm.make_sure_var_in_reg(op.args[2], op.args)
+        loc_index = self.rm.make_sure_var_in_reg(op.args[1], op.args)
+        # ^^^ both are needed anyway by the following setarrayitem_gc
+        loc_base = self.rm.make_sure_var_in_reg(op.args[0], op.args,
+                                                imm_fine=False)
+        arglocs = [loc_base, loc_index, loc_newvalue]
+        self._add_wb_saved_regs(arglocs)
+        self.PerformDiscard(op, arglocs)
+        self.rm.possibly_free_vars(op.args)
+
+    def _add_wb_saved_regs(self, arglocs):
         # add eax, ecx and edx as extra "arguments" to ensure they are
         # saved and restored.  Fish in self.rm to know which of these
         # registers really need to be saved (a bit of a hack).  Moreover,
@@ -699,8 +716,6 @@ class RegAlloc(object):
             if (reg in self.rm.save_around_call_regs
                 and self.rm.stays_alive(v)):
                 arglocs.append(reg)
-        self.PerformDiscard(op, arglocs)
-        self.rm.possibly_free_vars(op.args)
 
     def _fastpath_malloc(self, op, descr):
         assert isinstance(descr, BaseSizeDescr)
@@ -52,8 +52,17 @@ class AbstractX86CPU(AbstractLLCPU):
     def compile_loop(self, inputargs, operations, looptoken):
         self.assembler.assemble_loop(inputargs, operations, looptoken)
 
-    def compile_bridge(self, faildescr, inputargs, operations):
-        self.assembler.assemble_bridge(faildescr, inputargs, operations)
+    def compile_bridge(self, faildescr, inputargs, operations,
+                       original_loop_token=None):
+        self.assembler.assemble_bridge(faildescr, inputargs, operations,
+                                       original_loop_token)
+
+    def free_loop_and_bridges(self, compiled_loop_token):
+        AbstractLLCPU.free_loop_and_bridges(self, compiled_loop_token)
+        blocks = compiled_loop_token.asm_code_blocks
+        if blocks is not None:
+            compiled_loop_token.asm_code_blocks = None
+            self.assembler.mc.release_blocks(blocks)
 
     def set_future_value_int(self, index, intvalue):
         self.assembler.fail_boxes_int.setitem(index, intvalue)
@@ -289,3 +289,57 @@ def test_mc_wrapper_profile_agent():
         mc.writechr("x")
     mc.end_function()
     assert agent.functions == [("abc", 0, 4), ("cde", 5, 4), ("xyz", 9, 29), ("xyz", 200, 22)]
+
+def test_mc_wrapper_release_blocks():
+    mc = FakeMCWrapper(FakeAssembler(), 100)
+    first_block = mc._mc
+    # loop 1: fits in the first block
+    mc.start_recording_blocks()
+    for i in range(10):
+        mc.writechr("x")
+    blocks1 = mc.stop_recording_blocks()
+    assert blocks1 == [first_block]
+    # loop 2: starts in the first block and continues in two more blocks
+    mc.start_recording_blocks()
+    for i in range(70):
+        mc.writechr("x")
+    blocks2 = mc.stop_recording_blocks()
+    assert len(blocks2) == 3 and blocks2[0] is first_block
+    assert mc.old_mcs == blocks2[:2]
+    # loop 3: only in the current block
+    mc.start_recording_blocks()
+    mc.writechr("x")
+    blocks3 = mc.stop_recording_blocks()
+    assert blocks3 == [blocks2[2]]
+    # freeing loop 2 releases its middle block, but not the first one,
+    # which contains the helpers of the assembler, nor the current one
+    mc.release_blocks(blocks2)
+    assert mc.old_mcs == [first_block]
+    assert mc._mc is blocks2[2]
+    mc.release_blocks(blocks1)
+    mc.release_blocks(blocks3)
+    assert mc.old_mcs == [first_block]
+    # the current block, now unused, is dropped when we leave it
+    for i in range(100):
+        mc.writechr("x")
+    assert mc.old_mcs == [first_block]
+
+def test_mc_wrapper_recorded_bytes():
+    mc = FakeMCWrapper(FakeAssembler(), 100)
+    mc.start_recording_blocks()
+    for i in range(10):
+        mc.writechr("x")
+    mc.stop_recording_blocks()
+    assert mc.recorded_bytes == 10
+    # this one overflows into two new blocks: the bytes of the jumps
+    # from one block to the next are counted too
+    mc.start_recording_blocks()
+    for i in range(70):
+        mc.writechr("x")
+    blocks = mc.stop_recording_blocks()
+    assert len(blocks) == 3
+    assert mc.recorded_bytes > 70
+    mc.start_recording_blocks()
+    mc.writechr("x")
+    mc.stop_recording_blocks()
+    assert mc.recorded_bytes == 1
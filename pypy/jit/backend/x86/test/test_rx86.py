@@ -183,6 +183,12 @@ def test_or8_rr():
 def test_test8_mi():
     assert_encodes_as(CodeBuilder32, 'TEST8_mi', ((edx, 16), 99), '\xF6\x42\x10\x63')
 
+def test_or8_mi():
+    assert_encodes_as(CodeBuilder32, 'OR8_mi', ((edx, -1), 4), '\x80\x4A\xFF\x04')
+
+def test_bts_mr():
+    assert_encodes_as(CodeBuilder32, 'BTS_mr', ((edx, 0), ecx), '\x0F\xAB\x0A')
+
 def test_mov8():
     cb = CodeBuilder32
     assert_encodes_as(cb, 'MOV8_mi', ((edx, 16), 99), '\xC6\x42\x10\x63')
@@ -185,13 +185,14 @@ class CallControl(object):
                                          FUNC.RESULT)
         return (fnaddr, calldescr)
 
-    def getcalldescr(self, op):
+    def getcalldescr(self, op, oopspecindex=EffectInfo.OS_NONE):
         """Return the calldescr that describes all calls done by 'op'.
         This returns a calldescr that we can put in the corresponding
         call operation in the calling jitcode.  It gets an effectinfo
         describing the effect of the call: which field types it may
         change, whether it can force virtualizables, whether it can
-        raise, etc.
+        raise, etc.  'oopspecindex' tells the optimizer which known
+        function is called, if any.
         """
         NON_VOID_ARGS = [x.concretetype for x in op.args[1:]
                                         if x.concretetype is not lltype.Void]
@@ -226,9 +227,10 @@ class CallControl(object):
             extraeffect = EffectInfo.EF_CANNOT_RAISE
         #
         effectinfo = effectinfo_from_writeanalyze(
-            self.readwrite_analyzer.analyze(op), self.cpu, extraeffect)
+            self.readwrite_analyzer.analyze(op), self.cpu, extraeffect,
+            oopspecindex)
         #
-        if pure or loopinvariant:
+        if pure or loopinvariant or oopspecindex != EffectInfo.OS_NONE:
             assert effectinfo is not None
             assert extraeffect != EffectInfo.EF_FORCES_VIRTUAL_OR_VIRTUALIZABLE
         #
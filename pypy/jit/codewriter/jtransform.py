@@ -7,6 +7,7 @@ from pypy.objspace.flow.model import Block, Link, c_last_exception
 from pypy.jit.codewriter.flatten import ListOfKind, IndirectCallTargets
 from pypy.jit.codewriter import support, heaptracker
 from pypy.jit.codewriter.policy import log
+from pypy.jit.codewriter.effectinfo import EffectInfo
 from pypy.jit.metainterp.typesystem import deref, arrayItem
 from pypy.rlib import objectmodel
 from pypy.rlib.jit import _we_are_jitted
@@ -283,11 +284,12 @@ class Transformer(object):
         else: raise AssertionError(kind)
         lst.append(v)
 
-    def handle_residual_call(self, op, extraargs=[], may_call_jitcodes=False):
+    def handle_residual_call(self, op, extraargs=[], may_call_jitcodes=False,
+                             oopspecindex=EffectInfo.OS_NONE):
         """A direct_call turns into the operation 'residual_call_xxx' if it
         is calling a function that we don't want to JIT.  The initial args
         of 'residual_call_xxx' are the function to call, and its calldescr."""
-        calldescr = self.callcontrol.getcalldescr(op)
+        calldescr = self.callcontrol.getcalldescr(op, oopspecindex)
         op1 = self.rewrite_call(op, 'residual_call',
                                 [op.args[0], calldescr] + extraargs)
         if may_call_jitcodes or self.callcontrol.calldescr_canraise(calldescr):
@@ -312,6 +314,8 @@ class Transformer(object):
             prepare = self._handle_list_call
         elif oopspec_name.startswith('virtual_ref'):
             prepare = self._handle_virtual_ref_call
+        elif oopspec_name.startswith('stroruni.'):
+            prepare = self._handle_stroruni_call
         else:
             prepare = self.prepare_builtin_call
         try:
@@ -1022,6 +1026,25 @@ class Transformer(object):
         return SpaceOperation('getfield_gc_i',
                               [args[0], lengthdescr], op.result)
 
+    # ----------
+    # Strings.
+
+    _stroruni_oopspecs = {
+        'stroruni.concat':          EffectInfo.OS_STR_CONCAT,
+        'stroruni.slice_startonly': EffectInfo.OS_STR_SLICE_STARTONLY,
+        'stroruni.slice_startstop': EffectInfo.OS_STR_SLICE_STARTSTOP,
+        }
+
+    def _handle_stroruni_call(self, op, oopspec_name, args):
+        # a residual call to the original function, with a calldescr
+        # that tells the optimizer which function it is, so that it can
+        # make the resulting string virtual.  Unicode strings are not
+        # optimized so far.
+        if args[0].concretetype != lltype.Ptr(rstr.STR):
+            raise NotSupported(oopspec_name)
+        oopspecindex = self._stroruni_oopspecs[oopspec_name]
+        return self.handle_residual_call(op, oopspecindex=oopspecindex)
+
     # ----------
     # VirtualRefs.
 
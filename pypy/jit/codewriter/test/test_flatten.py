@@ -59,7 +59,7 @@ class FakeCallControl:
     _descr_cannot_raise = FakeDescr()
     def guess_call_kind(self, op):
         return 'residual'
-    def getcalldescr(self, op):
+    def getcalldescr(self, op, oopspecindex=None):
         try:
             if 'cannot_raise' in op.args[0].value._obj.graph.name:
                 return self._descr_cannot_raise
@@ -80,7 +80,7 @@ class FakeCallControlWithVRefInfo:
         if op.args[0].value._obj._name == 'jit_force_virtual':
             return 'residual'
         return 'builtin'
-    def getcalldescr(self, op):
+    def getcalldescr(self, op, oopspecindex=None):
         return FakeDescr()
     def calldescr_canraise(self, calldescr):
         return False
@@ -6,6 +6,8 @@ from pypy.jit.metainterp.history import getkind
 from pypy.rpython.lltypesystem import lltype, llmemory, rclass, rstr
 from pypy.translator.unsimplify import varoftype
 from pypy.jit.codewriter import heaptracker
+from pypy.jit.codewriter.flatten import ListOfKind
+from pypy.jit.codewriter.effectinfo import EffectInfo
 
 class FakeRTyper:
     class type_system: name = 'lltypesystem'
@@ -32,7 +34,7 @@ class FakeLink:
 class FakeResidualCallControl:
     def guess_call_kind(self, op):
         return 'residual'
-    def getcalldescr(self, op):
+    def getcalldescr(self, op, oopspecindex=None):
         return 'calldescr'
     def calldescr_canraise(self, calldescr):
         return True
@@ -49,17 +51,26 @@ class FakeRegularCallControl:
 class FakeResidualIndirectCallControl:
     def guess_call_kind(self, op):
         return 'residual'
-    def getcalldescr(self, op):
+    def getcalldescr(self, op, oopspecindex=None):
         return 'calldescr'
     def calldescr_canraise(self, calldescr):
         return True
 
+class FakeBuiltinCallControl:
+    def guess_call_kind(self, op):
+        return 'builtin'
+    def getcalldescr(self, op, oopspecindex=None):
+        assert oopspecindex is not None    # in this test
+        return 'calldescr-%d' % oopspecindex
+    def calldescr_canraise(self, calldescr):
+        return False
+
 class FakeRegularIndirectCallControl:
     def guess_call_kind(self, op):
         return 'regular'
     def graphs_from(self, op):
         return ['somegraph1', 'somegraph2']
-    def getcalldescr(self, op):
+    def getcalldescr(self, op, oopspecindex=None):
         return 'calldescr'
     def get_jitcode(self, graph, called_from=None):
         assert graph in ('somegraph1', 'somegraph2')
@@ -656,3 +667,43 @@ def test_int_abs():
     oplist = tr.rewrite_operation(op)
     assert oplist[0].opname == 'inline_call_ir_i'
     assert oplist[0].args[0] == 'somejitcode'
+
+def test_str_concat():
+    # test that the oopspec is present and correctly transformed
+    PSTR = lltype.Ptr(rstr.STR)
+    FUNC = lltype.FuncType([PSTR, PSTR], PSTR)
+    func = lltype.functionptr(FUNC, 'll_strconcat',
+                              _callable=rstr.LLHelpers.ll_strconcat)
+    v1 = varoftype(PSTR)
+    v2 = varoftype(PSTR)
+    v3 = varoftype(PSTR)
+    c_func = Constant(func, lltype.typeOf(func))
+    op = SpaceOperation('direct_call', [c_func, v1, v2], v3)
+    tr = Transformer(FakeCPU(), FakeBuiltinCallControl())
+    op1 = tr.rewrite_operation(op)
+    assert op1.opname == 'residual_call_r_r'
+    assert op1.args[0].value == func
+    assert op1.args[1] == 'calldescr-%d' % EffectInfo.OS_STR_CONCAT
+    assert op1.args[2] == ListOfKind('ref', [v1, v2])
+    assert op1.result == v3
+
+def test_str_slice():
+    PSTR = lltype.Ptr(rstr.STR)
+    INT = lltype.Signed
+    FUNC = lltype.FuncType([PSTR, INT, INT], PSTR)
+    func = lltype.functionptr(FUNC, 'll_stringslice_startstop',
+                              _callable=rstr.LLHelpers.ll_stringslice_startstop)
+    v1 = varoftype(PSTR)
+    v2 = varoftype(INT)
+    v3 = varoftype(INT)
+    v4 = varoftype(PSTR)
+    c_func = Constant(func, lltype.typeOf(func))
+    op = SpaceOperation('direct_call', [c_func, v1, v2, v3], v4)
+    tr = Transformer(FakeCPU(), FakeBuiltinCallControl())
+    op1 = tr.rewrite_operation(op)
+    assert op1.opname == 'residual_call_ir_r'
+    assert op1.args[0].value == func
+    assert op1.args[1] == 'calldescr-%d' % EffectInfo.OS_STR_SLICE_STARTSTOP
+    assert op1.args[2] == ListOfKind('int', [v2, v3])
+    assert op1.args[3] == ListOfKind('ref', [v1])
+    assert op1.result == v4
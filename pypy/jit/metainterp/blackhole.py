@@ -9,6 +9,7 @@ from pypy.rpython.llinterp import LLException
 from pypy.jit.codewriter.jitcode import JitCode, SwitchDictDescr
 from pypy.jit.codewriter import heaptracker
 from pypy.jit.metainterp.jitexc import JitException, get_llexception, reraise
+from pypy.jit.metainterp.jitprof import jit_statistics
 
 
 def arguments(*argtypes, **kwds):
@@ -1349,6 +1350,7 @@ def resume_in_blackhole(metainterp_sd, jitdriver_sd, resumedescr,
     from pypy.jit.metainterp.resume import blackhole_from_resumedata
     debug_start('jit-blackhole')
     metainterp_sd.profiler.start_blackhole()
+    jit_statistics.blackhole_count += 1
     blackholeinterp = blackhole_from_resumedata(
         metainterp_sd.blackholeinterpbuilder,
         jitdriver_sd,
@@ -1368,6 +1370,7 @@ def convert_and_run_from_pyjitpl(metainterp, raising_exception=False):
     debug_start('jit-blackhole')
     metainterp_sd = metainterp.staticdata
     metainterp_sd.profiler.start_blackhole()
+    jit_statistics.blackhole_count += 1
     nextbh = None
     for frame in metainterp.framestack:
         curbh = metainterp_sd.blackholeinterpbuilder.acquire_interp()
@@ -1,4 +1,5 @@
 
+import weakref
 from pypy.rpython.ootypesystem import ootype
 from pypy.objspace.flow.model import Constant, Variable
 from pypy.rlib.objectmodel import we_are_translated
@@ -14,6 +15,7 @@ from pypy.jit.metainterp import history
 from pypy.jit.metainterp.specnode import NotSpecNode, more_general_specnodes
 from pypy.jit.metainterp.typesystem import llhelper, oohelper
 from pypy.jit.metainterp.optimizeutil import InvalidLoop
+from pypy.jit.metainterp.jitprof import jit_statistics
 
 def giveup():
     from pypy.jit.metainterp.pyjitpl import SwitchToBlackhole
@@ -76,8 +78,15 @@ def compile_new_loop(metainterp, old_loop_tokens, greenkey, start):
     if old_loop_token is not None:
         metainterp.staticdata.log("reusing old loop")
         return old_loop_token
-    send_loop_to_backend(metainterp_sd, loop, "loop")
+    if loop.peeled_loop is not None:
+        # 'loop' is only the preamble; it jumps to the peeled loop,
+        # which must be compiled first
+        send_loop_to_backend(metainterp_sd, loop.peeled_loop, "loop")
+        send_loop_to_backend(metainterp_sd, loop, "preamble")
+    else:
+        send_loop_to_backend(metainterp_sd, loop, "loop")
     insert_loop_token(old_loop_tokens, loop_token)
+    metainterp.set_compiled_merge_points(greenkey, old_loop_tokens)
     return loop_token
 
 def insert_loop_token(old_loop_tokens, loop_token):
@@ -93,6 +102,40 @@ def insert_loop_token(old_loop_tokens, loop_token):
     else:
         old_loop_tokens.append(loop_token)
 
+def record_loop_or_bridge(metainterp_sd, loop, original_loop_token):
+    """Do post-backend recordings and cleanups on 'loop', which is either
+    a loop or a bridge belonging to 'original_loop_token'.
+    """
+    assert original_loop_token is not None
+    wref = weakref.ref(original_loop_token)
+    clt = original_loop_token.compiled_loop_token
+    for op in loop.operations:
+        descr = op.descr
+        if isinstance(descr, ResumeDescr):
+            descr.wref_original_loop_token = wref   # stick it there
+            descr.original_loop_number = original_loop_token.number
+            n = descr.index
+            if n >= 0:       # we also record the resumedescr number
+                clt.record_faildescr_index(n)
+        elif isinstance(descr, LoopToken):
+            # for a JUMP or a CALL_ASSEMBLER: record it as a potential jump.
+            # This is what keeps alive the loops that are only reached
+            # from other loops, like the peeled loop after its preamble.
+            if descr is not original_loop_token:
+                original_loop_token.record_jump_to(descr)
+            op.descr = None    # clear reference, mostly for tests
+    # mostly for tests: make sure we don't keep a reference to the LoopToken
+    loop.token = None
+    memmgr = metainterp_sd.memory_manager
+    if memmgr is not None:
+        memmgr.next_generation()
+
+def get_asm_bytes(loop_token):
+    clt = loop_token.compiled_loop_token
+    if clt is None:     # only with some fake cpus in tests
+        return 0
+    return clt.asm_bytes
+
 def send_loop_to_backend(metainterp_sd, loop, type):
     globaldata = metainterp_sd.globaldata
     loop_token = loop.token
@@ -104,22 +147,35 @@ def send_loop_to_backend(metainterp_sd, loop, type):
         show_loop(metainterp_sd, loop)
         loop.check_consistency()
     metainterp_sd.profiler.start_backend()
+    starttime = jit_statistics.start_backend()
     debug_start("jit-backend")
     try:
         metainterp_sd.cpu.compile_loop(loop.inputargs, loop.operations,
                                        loop.token)
     finally:
         debug_stop("jit-backend")
+    jit_statistics.end_backend(starttime)
     metainterp_sd.profiler.end_backend()
+    nguards = 0
+    for op in loop.operations:
+        if op.is_guard():
+            nguards += 1
+    jit_statistics.loop_compiled(n, type, len(loop.operations), nguards,
+                                 get_asm_bytes(loop_token))
     metainterp_sd.stats.add_new_loop(loop)
     if not we_are_translated():
-        if type != "entry bridge":
+        if type != "entry bridge" and type != "preamble":
             metainterp_sd.stats.compiled()
         else:
             loop._ignore_during_counting = True
     metainterp_sd.log("compiled new " + type)
+    memmgr = metainterp_sd.memory_manager
+    if memmgr is not None:
+        memmgr.keep_loop_alive(loop_token)
+    record_loop_or_bridge(metainterp_sd, loop, loop_token)
 
-def send_bridge_to_backend(metainterp_sd, faildescr, inputargs, operations):
+def send_bridge_to_backend(metainterp_sd, faildescr, inputargs, operations,
+                           original_loop_token):
     n = metainterp_sd.cpu.get_fail_descr_number(faildescr)
     metainterp_sd.logger_ops.log_bridge(inputargs, operations, n)
     if not we_are_translated():
@@ -127,15 +183,24 @@ def send_bridge_to_backend(metainterp_sd, faildescr, inputargs, operations):
         TreeLoop.check_consistency_of(inputargs, operations)
         pass
     metainterp_sd.profiler.start_backend()
+    starttime = jit_statistics.start_backend()
+    asm_bytes_before = get_asm_bytes(original_loop_token)
     debug_start("jit-backend")
     try:
-        metainterp_sd.cpu.compile_bridge(faildescr, inputargs, operations)
+        metainterp_sd.cpu.compile_bridge(faildescr, inputargs, operations,
+                                         original_loop_token)
     finally:
         debug_stop("jit-backend")
+    jit_statistics.end_backend(starttime)
     metainterp_sd.profiler.end_backend()
+    jit_statistics.bridge_compiled(original_loop_token.number,
+                        get_asm_bytes(original_loop_token) - asm_bytes_before)
     if not we_are_translated():
         metainterp_sd.stats.compiled()
     metainterp_sd.log("compiled new bridge")            
+    bridge = TreeLoop('bridge')
+    bridge.operations = operations
+    record_loop_or_bridge(metainterp_sd, bridge, original_loop_token)
 
 # ____________________________________________________________
 
@@ -210,6 +275,11 @@ def make_done_loop_tokens():
             }
 
 class ResumeDescr(AbstractFailDescr):
+    # a weakref to the LoopToken of the loop that this guard belongs to,
+    # set by record_loop_or_bridge()
+    wref_original_loop_token = None
+    original_loop_number = -1
+
     def __init__(self, original_greenkey):
         self.original_greenkey = original_greenkey
 
@@ -259,6 +329,7 @@ class ResumeGuardDescr(ResumeDescr):
             self._counter = cnt | i
 
     def handle_fail(self, metainterp_sd, jitdriver_sd):
+        jit_statistics.guard_failed(self.original_loop_number)
         if self.must_compile(metainterp_sd, jitdriver_sd):
             return self._trace_and_compile_from_bridge(metainterp_sd,
                                                        jitdriver_sd)
@@ -323,7 +394,8 @@ class ResumeGuardDescr(ResumeDescr):
         if not we_are_translated():
             self._debug_suboperations = new_loop.operations
         send_bridge_to_backend(metainterp.staticdata, self, inputargs,
-                               new_loop.operations)
+                               new_loop.operations,
+                               metainterp.resumekey_original_loop_token)
 
     def copy_all_attrbutes_into(self, res):
         # XXX a bit ugly to have to list them all here
@@ -351,6 +423,7 @@ class ResumeGuardForcedDescr(ResumeGuardDescr):
         # the virtualrefs and virtualizable have been forced by
         # handle_async_forcing() just a moment ago.
         from pypy.jit.metainterp.blackhole import resume_in_blackhole
+        jit_statistics.guard_failed(self.original_loop_number)
         token = metainterp_sd.cpu.get_latest_force_token()
         all_virtuals = self.fetch_data(token)
         if all_virtuals is None:
@@ -502,6 +575,8 @@ class ResumeFromInterpDescr(ResumeDescr):
         # it always goes at the end of the list, as it is the most
         # general loop token
         old_loop_tokens.append(new_loop_token)
+        metainterp.set_compiled_merge_points(self.original_greenkey,
+                                             old_loop_tokens)
 
     def reset_counter_from_failure(self):
         pass
@@ -291,6 +291,7 @@ def _make_execute_list():
             if value in (rop.FORCE_TOKEN,
                          rop.CALL_ASSEMBLER,
                          rop.COND_CALL_GC_WB,
+                         rop.COND_CALL_GC_WB_ARRAY,
                          rop.DEBUG_MERGE_POINT,
                          rop.SETARRAYITEM_RAW,
                          ):      # list of opcodes never executed by pyjitpl
@@ -703,9 +703,20 @@ class LoopToken(AbstractDescr):
     # specnodes = ...
     # and more data specified by the backend when the loop is compiled
     number = 0
+    generation = 0
+    # one purpose of LoopToken is to keep alive the CompiledLoopToken
+    # returned by the backend.  When the LoopToken goes away, the
+    # CompiledLoopToken has its __del__ called, which frees the assembler
+    # memory and the ResumeGuards.
+    compiled_loop_token = None
 
     def __init__(self, number=0):
         self.number = number
+        # For memory management of assembled loops
+        self._keepalive_target_looptokens = {}      # set of other LoopToken
+
+    def record_jump_to(self, target_loop_token):
+        self._keepalive_target_looptokens[target_loop_token] = None
 
     def repr_of_descr(self):
         return '<Loop%d>' % self.number
@@ -714,6 +725,7 @@ class TreeLoop(object):
     inputargs = None
     operations = None
     token = None
+    peeled_loop = None    # set by optimizeopt.py if the loop was peeled
 
     def __init__(self, name):
         self.name = name
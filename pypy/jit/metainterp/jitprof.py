@@ -24,6 +24,7 @@ ABORT_ESCAPE
 NVIRTUALS
 NVHOLES
 NVREUSED
+NRESUMEBYTES
 """
 
 def _setup():
@@ -176,6 +177,7 @@ class Profiler(BaseProfiler):
         self._print_intline("nvirtuals", cnt[NVIRTUALS])
         self._print_intline("nvholes", cnt[NVHOLES])
         self._print_intline("nvreused", cnt[NVREUSED])
+        self._print_intline("resume bytes", cnt[NRESUMEBYTES])
 
     def _print_line_time(self, string, i, tim):
         final = "%s:%s\t%d\t%f\n" % (string, " " * max(0, 13-len(string)), i, tim)
@@ -190,3 +192,101 @@ class Profiler(BaseProfiler):
 
 class BrokenProfilerData(JitException):
     pass
+
+# ____________________________________________________________
+
+class LoopStatistics(object):
+    """The statistics about one compiled loop and its bridges."""
+
+    def __init__(self, number, type, nops, nguards):
+        self.number = number
+        self.type = type        # 'loop', 'entry bridge' or 'preamble'
+        self.operations = nops
+        self.guards = nguards
+        self.asm_bytes = 0
+        self.bridges = 0
+        self.guard_failures = 0
+
+
+class JitStatistics(object):
+    """Statistics that are always collected, unlike the Profiler above,
+    because they only cost a few increments (and a call to time.time()
+    around tracing and compiling).  There is a single prebuilt instance,
+    'jit_statistics', which is read by the 'pypyjit' module.
+    """
+    timer = time.time
+
+    def __init__(self):
+        self.loops = {}
+        self.reset()
+
+    def reset(self):
+        self.loops_compiled = 0
+        self.bridges_compiled = 0
+        self.loops_freed = 0
+        self.asm_bytes = 0
+        self.abort_too_long = 0
+        self.abort_bridge = 0
+        self.abort_escape = 0
+        self.guard_failures = 0
+        self.tracing_count = 0
+        self.tracing_time = 0.0
+        self.backend_count = 0
+        self.backend_time = 0.0
+        self.running_count = 0
+        self.blackhole_count = 0
+        # only reset the counters of the loops that are still alive
+        for loopstats in self.loops.values():
+            loopstats.asm_bytes = 0
+            loopstats.bridges = 0
+            loopstats.guard_failures = 0
+
+    def start_tracing(self):
+        self.tracing_count += 1
+        return self.timer()
+
+    def end_tracing(self, starttime):
+        self.tracing_time += self.timer() - starttime
+
+    def start_backend(self):
+        self.backend_count += 1
+        return self.timer()
+
+    def end_backend(self, starttime):
+        self.backend_time += self.timer() - starttime
+
+    def count_abort(self, reason):
+        if reason == ABORT_TOO_LONG:
+            self.abort_too_long += 1
+        elif reason == ABORT_BRIDGE:
+            self.abort_bridge += 1
+        elif reason == ABORT_ESCAPE:
+            self.abort_escape += 1
+
+    def loop_compiled(self, number, type, nops, nguards, asm_bytes):
+        self.loops_compiled += 1
+        self.asm_bytes += asm_bytes
+        loopstats = LoopStatistics(number, type, nops, nguards)
+        loopstats.asm_bytes = asm_bytes
+        self.loops[number] = loopstats
+
+    def bridge_compiled(self, loopnumber, asm_bytes):
+        self.bridges_compiled += 1
+        self.asm_bytes += asm_bytes
+        loopstats = self.loops.get(loopnumber, None)
+        if loopstats is not None:
+            loopstats.bridges += 1
+            loopstats.asm_bytes += asm_bytes
+
+    def guard_failed(self, loopnumber):
+        self.guard_failures += 1
+        loopstats = self.loops.get(loopnumber, None)
+        if loopstats is not None:
+            loopstats.guard_failures += 1
+
+    def loop_freed(self, number):
+        self.loops_freed += 1
+        if number in self.loops:
+            del self.loops[number]
+
+jit_statistics = JitStatistics()
@@ -9,11 +9,18 @@ from pypy.jit.metainterp.specnode import equals_specnodes
 def optimize_loop(metainterp_sd, old_loop_tokens, loop):
     debug_start("jit-optimize")
     try:
-        return _optimize_loop(metainterp_sd, old_loop_tokens, loop)
+        return _optimize_loop(metainterp_sd, old_loop_tokens, loop, False)
     finally:
         debug_stop("jit-optimize")
 
-def _optimize_loop(metainterp_sd, old_loop_tokens, loop):
+def optimize_loop_unroll(metainterp_sd, old_loop_tokens, loop):
+    debug_start("jit-optimize")
+    try:
+        return _optimize_loop(metainterp_sd, old_loop_tokens, loop, True)
+    finally:
+        debug_stop("jit-optimize")
+
+def _optimize_loop(metainterp_sd, old_loop_tokens, loop, unroll):
     cpu = metainterp_sd.cpu
     metainterp_sd.logger_noopt.log_loop(loop.inputargs, loop.operations)
     finder = PerfectSpecializationFinder(cpu)
@@ -21,7 +28,7 @@ def _optimize_loop(metainterp_sd, old_loop_tokens, loop):
     for old_loop_token in old_loop_tokens:
         if equals_specnodes(old_loop_token.specnodes, loop.token.specnodes):
             return old_loop_token
-    optimize_loop_1(metainterp_sd, loop)
+    optimize_loop_1(metainterp_sd, loop, unroll)
     return None
 
 # ____________________________________________________________
@@ -17,14 +17,30 @@ from pypy.jit.metainterp.typesystem import llhelper, oohelper
 from pypy.rlib.objectmodel import we_are_translated
 from pypy.rpython.lltypesystem import lltype
 from pypy.jit.metainterp.history import AbstractDescr, make_hashable_int
+from pypy.jit.metainterp.history import TreeLoop
+from pypy.jit.codewriter.effectinfo import EffectInfo
 
 
-def optimize_loop_1(metainterp_sd, loop):
+def optimize_loop_1(metainterp_sd, loop, unroll=False):
     """Optimize loop.operations to make it match the input of loop.specnodes
     and to remove internal overheadish operations.  Note that loop.specnodes
     must be applicable to the loop; you will probably get an AssertionError
     if not.
+
+    If 'unroll' is True, try to peel off the first iteration of the loop:
+    'loop' becomes a preamble that jumps to the new 'loop.peeled_loop',
+    which only contains what needs to be redone in every iteration.
     """
+    if unroll:
+        inputargs = loop.inputargs
+        operations = [op.clone() for op in loop.operations]
+        optimizer = Optimizer(metainterp_sd, loop)
+        optimizer.setup_virtuals_and_constants()
+        if optimizer.propagate_forward_peeled(inputargs, operations):
+            return
+        # peeling did not work; start again from the untouched copy
+        loop.inputargs = inputargs
+        loop.operations = operations
     optimizer = Optimizer(metainterp_sd, loop)
     optimizer.setup_virtuals_and_constants()
     optimizer.propagate_forward()
@@ -340,6 +356,185 @@ class VArrayValue(AbstractVirtualValue):
     def _make_virtual(self, modifier):
         return modifier.make_varray(self.arraydescr)
 
+
+# Strings longer than this are not made virtual: every character of a
+# virtual string is a separate value, both in the optimizer and in the
+# resume data of the guards.
+MAX_CONST_LEN = 100
+
+
+class VAbstractStringValue(AbstractVirtualValue):
+    """Base class of the virtual strings (lltype only).  Their length is
+    returned as a box by getstrlen(), which may emit operations to
+    compute it."""
+    _attrs_ = ()
+
+    def getstrlen(self, optimizer):
+        raise NotImplementedError("abstract base")
+
+    def strgetitem(self, optimizer, indexbox):
+        raise NotImplementedError("abstract base")
+
+class VStringPlainValue(VAbstractStringValue):
+    """A string built with NEWSTR of a constant length, whose characters
+    are known."""
+
+    def __init__(self, optimizer, size, keybox, source_op=None):
+        VAbstractStringValue.__init__(self, optimizer, keybox, source_op)
+        self._chars = [CVAL_ZERO] * size
+
+    def getstrlen(self, optimizer):
+        return ConstInt(len(self._chars))
+
+    def getitem(self, index):
+        return self._chars[index]
+
+    def strgetitem(self, optimizer, indexbox):
+        if isinstance(indexbox, Const):
+            return self.getitem(indexbox.getint())
+        return None
+
+    def setitem(self, index, charvalue):
+        assert isinstance(charvalue, OptValue)
+        self._chars[index] = charvalue
+
+    def _really_force(self):
+        assert self.source_op is not None
+        newoperations = self.optimizer.newoperations
+        newoperations.append(self.source_op)
+        self.box = box = self.source_op.result
+        for index in range(len(self._chars)):
+            charvalue = self._chars[index]
+            if charvalue is not CVAL_ZERO:
+                op = ResOperation(rop.STRSETITEM,
+                                  [box, ConstInt(index), charvalue.force_box()],
+                                  None)
+                newoperations.append(op)
+
+    def get_args_for_fail(self, modifier):
+        if self.box is None and not modifier.already_seen_virtual(self.keybox):
+            charboxes = []
+            for charvalue in self._chars:
+                charboxes.append(charvalue.get_key_box())
+            modifier.register_virtual_fields(self.keybox, charboxes)
+            for charvalue in self._chars:
+                charvalue.get_args_for_fail(modifier)
+
+    def _make_virtual(self, modifier):
+        return modifier.make_vstrplain()
+
+class VStringCallValue(VAbstractStringValue):
+    """A string that is the result of a pure call to one of the helpers
+    of rstr.py, like a concatenation or a slice, that was not done yet.
+    Forcing it does the call.  The string arguments of the call come
+    first, followed by the integer arguments."""
+    nb_str_args = 0
+
+    def __init__(self, optimizer, argvalues, keybox, source_op):
+        VAbstractStringValue.__init__(self, optimizer, keybox, source_op)
+        self._argvalues = argvalues    # [funcvalue, arg1, arg2...]
+        self.lengthbox = None
+
+    def _really_force(self):
+        assert self.source_op is not None
+        argboxes = [None] * len(self._argvalues)
+        for i in range(len(self._argvalues)):
+            argboxes[i] = self._argvalues[i].force_box()
+        op = ResOperation(rop.CALL, argboxes, self.source_op.result,
+                          descr=self.source_op.descr)
+        self.optimizer.newoperations.append(op)
+        self.box = op.result
+
+    def get_args_for_fail(self, modifier):
+        if self.box is None and not modifier.already_seen_virtual(self.keybox):
+            # the function is a constant, stored in the VStrCallInfo
+            argboxes = []
+            for i in range(1, len(self._argvalues)):
+                argboxes.append(self._argvalues[i].get_key_box())
+            modifier.register_virtual_fields(self.keybox, argboxes)
+            for i in range(1, len(self._argvalues)):
+                self._argvalues[i].get_args_for_fail(modifier)
+
+    def _make_virtual(self, modifier):
+        funcbox = self._argvalues[0].get_key_box()
+        assert isinstance(funcbox, Const)
+        return modifier.make_vstrcall(self.source_op.descr, funcbox,
+                                      self.nb_str_args)
+
+class VStringConcatValue(VStringCallValue):
+    """The concatenation of two strings."""
+    nb_str_args = 2
+
+    def __init__(self, optimizer, argvalues, keybox, source_op):
+        VStringCallValue.__init__(self, optimizer, argvalues, keybox,
+                                  source_op)
+        self.left = argvalues[1]
+        self.right = argvalues[2]
+
+    def getstrlen(self, optimizer):
+        if self.lengthbox is None:
+            len1box = optimizer.getstrlen(self.left)
+            len2box = optimizer.getstrlen(self.right)
+            self.lengthbox = optimizer.int_add(len1box, len2box)
+        return self.lengthbox
+
+    def strgetitem(self, optimizer, indexbox):
+        if isinstance(indexbox, Const):
+            len1box = optimizer.getstrlen(self.left)
+            if isinstance(len1box, Const):
+                index = indexbox.getint()
+                len1 = len1box.getint()
+                if index < len1:
+                    return optimizer.strgetitem_or_emit(self.left, indexbox)
+                else:
+                    return optimizer.strgetitem_or_emit(self.right,
+                                                    ConstInt(index - len1))
+        return None
+
+class VStringSliceValue(VStringCallValue):
+    """The slice of a string from 'vstart' to 'vstop', or to the end of
+    the string if 'vstop' is None.  As 'vstop' may be out of bounds, the
+    length is only known if it and the length of the string are
+    constants."""
+    nb_str_args = 1
+
+    def __init__(self, optimizer, argvalues, keybox, source_op):
+        VStringCallValue.__init__(self, optimizer, argvalues, keybox,
+                                  source_op)
+        self.vstr = argvalues[1]
+        self.vstart = argvalues[2]
+        if len(argvalues) > 3:
+            self.vstop = argvalues[3]
+        else:
+            self.vstop = None
+
+    def getstrlen(self, optimizer):
+        if self.lengthbox is None:
+            if self.vstop is None:
+                stopbox = optimizer.getstrlen(self.vstr)
+            else:
+                if not self.vstop.is_constant():
+                    return None
+                if not (self.vstr.is_constant() or
+                        (isinstance(self.vstr, VAbstractStringValue) and
+                         self.vstr.is_virtual())):
+                    return None
+                strlenbox = optimizer.getstrlen(self.vstr)
+                if not isinstance(strlenbox, Const):
+                    return None
+                stop = self.vstop.box.getint()
+                strlen = strlenbox.getint()
+                if stop > strlen:
+                    stop = strlen
+                stopbox = ConstInt(stop)
+            self.lengthbox = optimizer.int_sub(stopbox,
+                                               self.vstart.force_box())
+        return self.lengthbox
+
+    def strgetitem(self, optimizer, indexbox):
+        indexbox = optimizer.int_add(self.vstart.force_box(), indexbox)
+        return optimizer.strgetitem_or_emit(self.vstr, indexbox)
+
 class __extend__(SpecNode):
     def setup_virtual_node(self, optimizer, box, newinputargs):
         raise NotImplementedError
@@ -475,6 +670,11 @@ class Optimizer(object):
         self.make_equal_to(box, vvalue)
         return vvalue
 
+    def make_vstring_plain(self, size, box, source_op=None):
+        vvalue = VStringPlainValue(self, size, box, source_op)
+        self.make_equal_to(box, vvalue)
+        return vvalue
+
     def new_ptr_box(self):
         return self.cpu.ts.BoxRef()
 
@@ -526,9 +726,16 @@ class Optimizer(object):
     def propagate_forward(self):
         self.exception_might_have_happened = False
         self.newoperations = []
+        self.optimize_operations(self.loop.operations)
+        self.loop.operations = self.newoperations
+        # accumulate counters
+        self.resumedata_memo.update_counters(self.metainterp_sd.profiler)
+
+    def optimize_operations(self, operations):
+        self.operations = operations
         self.i = 0
-        while self.i < len(self.loop.operations):
-            op = self.loop.operations[self.i]
+        while self.i < len(operations):
+            op = operations[self.i]
             opnum = op.opnum
             for value, func in optimize_ops:
                 if opnum == value:
@@ -537,9 +744,167 @@ class Optimizer(object):
             else:
                 self.optimize_default(op)
             self.i += 1
-        self.loop.operations = self.newoperations
+
+    # ----------
+    # Loop peeling.  The first iteration of the loop is optimized as usual
+    # and becomes the preamble.  Then a second copy of the loop operations
+    # is optimized with all the knowledge gathered so far (guards already
+    # done, cached fields, pure operations...), which removes everything
+    # that is loop-invariant.  This second copy becomes the peeled loop,
+    # which jumps to itself.  Each box of the preamble that is still used
+    # by the peeled loop becomes an extra input argument of it; at the end
+    # of the peeled loop we pass in its place the box computed by the same
+    # operation in the second copy.
+
+    def propagate_forward_peeled(self, inputargs, operations):
+        """'inputargs' and 'operations' are an untouched copy of the loop.
+        Returns False if peeling is not possible; the optimizer must not
+        be used any more in this case."""
+        loop = self.loop
+        self.exception_might_have_happened = False
+        self.newoperations = []
+        self.optimize_operations(loop.operations[:-1])
+        jumpop = loop.operations[-1]
+        assert jumpop.opnum == rop.JUMP
+        # compute the values passed to the next iteration, as with a jump
+        # to the loop itself, and map them to the input args of the preamble
+        specnodes = loop.token.specnodes
+        assert len(jumpop.args) == len(specnodes)
+        exitargs = []
+        for i in range(len(specnodes)):
+            value = self.getvalue(jumpop.args[i])
+            specnodes[i].teardown_virtual_node(self, value, exitargs)
+        assert len(exitargs) == len(loop.inputargs)
+        self.heap_op_optimizer.force_all_lazy_setfields()
+        preamble = self.newoperations
+        preamble_boxes = {}
+        for i in range(len(loop.inputargs)):
+            preamble_boxes[loop.inputargs[i]] = exitargs[i]
+        for op in preamble:
+            if op.result is not None:
+                preamble_boxes[op.result] = None
+        #
+        # make the second copy of the loop, starting with the values
+        # that the first iteration jumps with
+        boxmap = {}
+        for i in range(len(inputargs)):
+            newbox = inputargs[i].clonebox()
+            boxmap[inputargs[i]] = newbox
+            self.make_equal_to(newbox, self.getvalue(jumpop.args[i]))
+        snapshots = {}
+        body = []
+        for op in operations[:-1]:
+            newop = op.clone()
+            for j in range(len(newop.args)):
+                box = newop.args[j]
+                newop.args[j] = boxmap.get(box, box)
+            if op.result is not None:
+                newop.result = op.result.clonebox()
+                boxmap[op.result] = newop.result
+            if newop.is_guard():
+                descr = newop.descr
+                assert isinstance(descr, compile.ResumeGuardDescr)
+                descr.rd_snapshot = self.inline_snapshot(descr.rd_snapshot,
+                                                         boxmap, snapshots)
+            body.append(newop)
+        #
+        # the indices stored in last_guard_index point to the preamble
+        for value in self.values.itervalues():
+            value.last_guard_index = -1
+        self.exception_might_have_happened = False
+        self.newoperations = []
+        try:
+            self.optimize_operations(body)
+        except InvalidLoop:
+            return False
+        self.heap_op_optimizer.force_all_lazy_setfields()
+        #
+        # collect the boxes of the preamble used in the peeled loop, and
+        # compute what to pass for each of them at the end of the loop
+        newinputargs = []
+        jumpargs = []
+        seen = {}
+        defined = {}
+        i = 0
+        while True:
+            while i < len(self.newoperations):
+                op = self.newoperations[i]
+                i += 1
+                if not self._collect_preamble_boxes(op.args, defined, seen,
+                                                    preamble_boxes,
+                                                    newinputargs):
+                    return False
+                if op.is_guard():
+                    if not self._collect_preamble_boxes(op.fail_args,
+                                                        defined, seen,
+                                                        preamble_boxes,
+                                                        newinputargs):
+                        return False
+                if op.result is not None:
+                    defined[op.result] = None
+            if len(jumpargs) == len(newinputargs):
+                break
+            while len(jumpargs) < len(newinputargs):
+                box = newinputargs[len(jumpargs)]
+                nextbox = preamble_boxes[box]
+                if nextbox is None:
+                    # the result of an operation of the preamble
+                    try:
+                        nextbox = boxmap[box]
+                    except KeyError:
+                        return False
+                # this may force virtuals, adding operations that are
+                # scanned by the next iteration of the outer loop
+                nextbox = self.getvalue(nextbox).force_box()
+                jumpargs.append(nextbox)
+                if not self._collect_preamble_boxes([nextbox], defined, seen,
+                                                    preamble_boxes,
+                                                    newinputargs):
+                    return False
+        #
+        token = compile.make_loop_token(len(newinputargs),
+                                        loop.token.outermost_jitdriver_sd)
+        self.metainterp_sd.profiler.count(jitprof.OPT_OPS)
+        self.newoperations.append(ResOperation(rop.JUMP, jumpargs[:], None,
+                                               descr=token))
+        peeled_loop = TreeLoop(loop.name + ' (peeled)')
+        peeled_loop.inputargs = newinputargs
+        peeled_loop.operations = self.newoperations
+        peeled_loop.token = token
+        preamble.append(ResOperation(rop.JUMP, newinputargs[:], None,
+                                     descr=token))
+        loop.operations = preamble
+        loop.peeled_loop = peeled_loop
         # accumulate counters
         self.resumedata_memo.update_counters(self.metainterp_sd.profiler)
+        return True
+
+    def _collect_preamble_boxes(self, boxes, defined, seen, preamble_boxes,
+                                newinputargs):
+        for box in boxes:
+            if (isinstance(box, Const) or box in defined or box in seen):
+                continue
+            if box not in preamble_boxes:
+                return False     # should not occur
+            seen[box] = None
+            newinputargs.append(box)
+        return True
+
+    def inline_snapshot(self, snapshot, boxmap, snapshots):
+        if snapshot is None:
+            return None
+        try:
+            return snapshots[snapshot]
+        except KeyError:
+            pass
+        prev = self.inline_snapshot(snapshot.prev, boxmap, snapshots)
+        boxes = snapshot.boxes[:]
+        for i in range(len(boxes)):
+            box = boxes[i]
+            boxes[i] = boxmap.get(box, box)
+        result = resume.Snapshot(prev, boxes)
+        snapshots[snapshot] = result
+        return result
 
     def emit_operation(self, op):
         self.heap_op_optimizer.emitting_operation(op)
@@ -594,7 +959,7 @@ class Optimizer(object):
         canfold = op.is_always_pure()
         is_ovf = op.is_ovf()
         if is_ovf:
-            nextop = self.loop.operations[self.i + 1]
+            nextop = self.operations[self.i + 1]
             canfold = nextop.opnum == rop.GUARD_NO_OVERFLOW
         if canfold:
             for arg in op.args:
@@ -755,10 +1120,11 @@ class Optimizer(object):
         assert isinstance(expectedclassbox, Const)
         realclassbox = value.get_constant_class(self.cpu)
         if realclassbox is not None:
-            # the following assert should always be true for now,
-            # because invalid loops that would fail it are detected
-            # earlier, in optimizefindnode.py.
-            assert realclassbox.same_constant(expectedclassbox)
+            # optimizefindnode.py detects the invalid loops that would
+            # fail this check in the first iteration, but not in the
+            # peeled second one
+            if not realclassbox.same_constant(expectedclassbox):
+                raise InvalidLoop
             return
         emit_operation = True
         if value.last_guard_index != -1:
@@ -1032,8 +1398,179 @@ class Optimizer(object):
             self.make_constant(op.result, op.args[0])
             return
         # replace CALL_PURE with just CALL
-        self.emit_operation(ResOperation(rop.CALL, op.args[1:], op.result,
-                                         op.descr))
+        op = ResOperation(rop.CALL, op.args[1:], op.result, op.descr)
+        if self.optimize_string_call(op):
+            return
+        self.emit_operation(op)
+
+    def optimize_CALL(self, op):
+        if self.optimize_string_call(op):
+            return
+        self.optimize_default(op)
+
+    # ----------
+    # Virtual strings.  NEWSTR with a constant length gives a string whose
+    # characters are known, and the calls to the concatenation and slicing
+    # helpers of rstr.py are delayed until the result escapes.  STRLEN and
+    # STRGETITEM are done on the virtual strings directly.
+
+    def optimize_string_call(self, op):
+        effectinfo = op.descr.get_extra_info()
+        if effectinfo is None:
+            return False
+        oopspecindex = effectinfo.oopspecindex
+        if oopspecindex == EffectInfo.OS_STR_CONCAT:
+            self.optimize_STR_CONCAT(op)
+        elif oopspecindex == EffectInfo.OS_STR_SLICE_STARTONLY:
+            self.optimize_STR_SLICE_STARTONLY(op)
+        elif oopspecindex == EffectInfo.OS_STR_SLICE_STARTSTOP:
+            self.optimize_STR_SLICE_STARTSTOP(op)
+        else:
+            return False
+        return True
+
+    def optimize_STR_CONCAT(self, op):
+        vleft = self.getvalue(op.args[1])
+        vright = self.getvalue(op.args[2])
+        if (isinstance(vleft, VStringPlainValue) and vleft.is_virtual() and
+            isinstance(vright, VStringPlainValue) and vright.is_virtual()):
+            len1 = vleft.getstrlen(self).getint()
+            len2 = vright.getstrlen(self).getint()
+            if len1 + len2 <= MAX_CONST_LEN:
+                # concatenate the characters directly
+                newop = ResOperation(rop.NEWSTR, [ConstInt(len1 + len2)],
+                                     op.result)
+                vresult = self.make_vstring_plain(len1 + len2, op.result,
+                                                  newop)
+                for i in range(len1):
+                    vresult.setitem(i, vleft.getitem(i))
+                for i in range(len2):
+                    vresult.setitem(len1 + i, vright.getitem(i))
+                return
+        argvalues = [self.getvalue(op.args[0]), vleft, vright]
+        vresult = VStringConcatValue(self, argvalues, op.result, op)
+        self.make_equal_to(op.result, vresult)
+
+    def optimize_STR_SLICE_STARTONLY(self, op):
+        self.optimize_str_slice(op)
+
+    def optimize_STR_SLICE_STARTSTOP(self, op):
+        vstr = self.getvalue(op.args[1])
+        vstart = self.getvalue(op.args[2])
+        vstop = self.getvalue(op.args[3])
+        if (isinstance(vstr, VStringPlainValue) and vstr.is_virtual() and
+            vstart.is_constant() and vstart.box.getint() == 0 and
+            vstop.is_constant() and
+            vstop.box.getint() >= vstr.getstrlen(self).getint()):
+            # the helper returns the string itself in this case
+            self.make_equal_to(op.result, vstr)
+            return
+        self.optimize_str_slice(op)
+
+    def optimize_str_slice(self, op):
+        argvalues = []
+        for arg in op.args:
+            argvalues.append(self.getvalue(arg))
+        vresult = VStringSliceValue(self, argvalues, op.result, op)
+        vstr = vresult.vstr
+        if (isinstance(vstr, VStringPlainValue) and vstr.is_virtual() and
+            vresult.vstart.is_constant()):
+            lengthbox = vresult.getstrlen(self)
+            if isinstance(lengthbox, Const):
+                # slicing a string whose characters are known
+                start = vresult.vstart.box.getint()
+                length = lengthbox.getint()
+                newop = ResOperation(rop.NEWSTR, [lengthbox], op.result)
+                vplain = self.make_vstring_plain(length, op.result, newop)
+                for i in range(length):
+                    vplain.setitem(i, vstr.getitem(start + i))
+                return
+        self.make_equal_to(op.result, vresult)
+
+    def optimize_NEWSTR(self, op):
+        lengthbox = self.get_constant_box(op.args[0])
+        if lengthbox is not None and lengthbox.getint() <= MAX_CONST_LEN:
+            # if the original 'op' did not have a ConstInt as argument,
+            # build a new one with the ConstInt argument
+            if not isinstance(op.args[0], ConstInt):
+                op = ResOperation(rop.NEWSTR, [lengthbox], op.result)
+            self.make_vstring_plain(lengthbox.getint(), op.result, op)
+        else:
+            self.optimize_default(op)
+
+    def optimize_STRSETITEM(self, op):
+        value = self.getvalue(op.args[0])
+        if isinstance(value, VStringPlainValue) and value.is_virtual():
+            indexbox = self.get_constant_box(op.args[1])
+            if indexbox is not None:
+                value.setitem(indexbox.getint(), self.getvalue(op.args[2]))
+                return
+        value.ensure_nonnull()
+        self.optimize_default(op)
+
+    def optimize_STRLEN(self, op):
+        value = self.getvalue(op.args[0])
+        if isinstance(value, VAbstractStringValue) and value.is_virtual():
+            lengthbox = value.getstrlen(self)
+            if lengthbox is not None:
+                self.make_equal_to(op.result, self.getvalue(lengthbox))
+                return
+        value.ensure_nonnull()
+        self.optimize_default(op)
+
+    def optimize_STRGETITEM(self, op):
+        value = self.getvalue(op.args[0])
+        vindex = self.getvalue(op.args[1])
+        charvalue = self.strgetitem(value, vindex.force_box())
+        if charvalue is not None:
+            self.make_equal_to(op.result, charvalue)
+            return
+        value.ensure_nonnull()
+        self.optimize_default(op)
+
+    def strgetitem(self, value, indexbox):
+        """Return the value of the character at 'indexbox' in the virtual
+        string 'value', or None if it is not known without forcing it."""
+        if not isinstance(value, VAbstractStringValue) or not value.is_virtual():
+            return None
+        return value.strgetitem(self, indexbox)
+
+    def strgetitem_or_emit(self, value, indexbox):
+        charvalue = self.strgetitem(value, indexbox)
+        if charvalue is None:
+            resbox = BoxInt()
+            self.optimize_default(ResOperation(rop.STRGETITEM,
+                                               [value.force_box(), indexbox],
+                                               resbox))
+            charvalue = self.getvalue(resbox)
+        return charvalue
+
+    def getstrlen(self, value):
+        """Return a box with the length of the string 'value'."""
+        if isinstance(value, VAbstractStringValue) and value.is_virtual():
+            lengthbox = value.getstrlen(self)
+            if lengthbox is not None:
+                return lengthbox
+        resbox = BoxInt()
+        self.optimize_default(ResOperation(rop.STRLEN, [value.force_box()],
+                                           resbox))
+        return self.getvalue(resbox).force_box()
+
+    def int_add(self, box1, box2):
+        if isinstance(box1, Const) and box1.getint() == 0:
+            return box2
+        if isinstance(box2, Const) and box2.getint() == 0:
+            return box1
+        resbox = BoxInt()
+        self.optimize_default(ResOperation(rop.INT_ADD, [box1, box2], resbox))
+        return self.getvalue(resbox).force_box()
+
+    def int_sub(self, box1, box2):
+        if isinstance(box2, Const) and box2.getint() == 0:
+            return box1
+        resbox = BoxInt()
+        self.optimize_default(ResOperation(rop.INT_SUB, [box1, box2], resbox))
+        return self.getvalue(resbox).force_box()
 
     def optimize_INT_AND(self, op):
         v1 = self.getvalue(op.args[0])
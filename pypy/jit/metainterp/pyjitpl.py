@@ -15,6 +15,7 @@ from pypy.jit.metainterp.logger import Logger
 from pypy.jit.metainterp.jitprof import EmptyProfiler
 from pypy.jit.metainterp.jitprof import GUARDS, RECORDED_OPS, ABORT_ESCAPE
 from pypy.jit.metainterp.jitprof import ABORT_TOO_LONG, ABORT_BRIDGE
+from pypy.jit.metainterp.jitprof import jit_statistics
 from pypy.jit.metainterp.jitexc import JitException, get_llexception
 from pypy.rlib.rarithmetic import intmask
 from pypy.rlib.objectmodel import specialize
@@ -691,7 +692,8 @@ class MIFrame(object):
         allboxes = greenboxes + redboxes
         warmrunnerstate = targetjitdriver_sd.warmstate
         token = None
-        if warmrunnerstate.inlining:
+        if (warmrunnerstate.inlining or
+                warmrunnerstate.should_always_inline(greenboxes)):
             if warmrunnerstate.can_inline_callable(greenboxes):
                 portal_code = targetjitdriver_sd.mainjitcode
                 return self.metainterp.perform_call(portal_code, allboxes,
@@ -1145,6 +1147,7 @@ class MIFrame(object):
 class MetaInterpStaticData(object):
     logger_noopt = None
     logger_ops = None
+    memory_manager = None     # set by warmspot.py
 
     def __init__(self, cpu, options,
                  ProfilerClass=EmptyProfiler, warmrunnerdesc=None):
@@ -1303,6 +1306,7 @@ class MetaInterpGlobalData(object):
 
 class MetaInterp(object):
     in_recursion = 0
+    resumekey_original_loop_token = None
 
     def __init__(self, staticdata, jitdriver_sd):
         self.staticdata = staticdata
@@ -1522,6 +1526,7 @@ class MetaInterp(object):
 
     def aborted_tracing(self, reason):
         self.staticdata.profiler.count(reason)
+        jit_statistics.count_abort(reason)
         debug_print('~~~ ABORTING TRACING')
         self.staticdata.stats.aborted()
         self.resumekey.reset_counter_from_failure()
@@ -1566,12 +1571,14 @@ class MetaInterp(object):
         debug_start('jit-tracing')
         self.staticdata._setup_once()
         self.staticdata.profiler.start_tracing()
+        starttime = jit_statistics.start_tracing()
         assert jitdriver_sd is self.jitdriver_sd
         self.create_empty_history()
         try:
             original_boxes = self.initialize_original_boxes(jitdriver_sd,*args)
             return self._compile_and_run_once(original_boxes)
         finally:
+            jit_statistics.end_tracing(starttime)
             self.staticdata.profiler.end_tracing()
             debug_stop('jit-tracing')
 
@@ -1595,11 +1602,13 @@ class MetaInterp(object):
     def handle_guard_failure(self, key):
         debug_start('jit-tracing')
         self.staticdata.profiler.start_tracing()
+        starttime = jit_statistics.start_tracing()
         assert isinstance(key, compile.ResumeGuardDescr)
         self.initialize_state_from_guard_failure(key)
         try:
             return self._handle_guard_failure(key)
         finally:
+            jit_statistics.end_tracing(starttime)
             self.staticdata.profiler.end_tracing()
             debug_stop('jit-tracing')
 
@@ -1612,6 +1621,11 @@ class MetaInterp(object):
         self.resumekey = key
         self.seen_loop_header_for_jdindex = -1
         try:
+            # keep the loop that the failing guard belongs to alive
+            # while we are tracing
+            self.resumekey_original_loop_token = key.wref_original_loop_token()
+            if self.resumekey_original_loop_token is None:
+                compile.giveup()    # should be rare
             self.prepare_resume_from_failure(key.guard_opnum)
             self.interpret()
         except GenerateMergePoint, gmp:
@@ -1737,10 +1751,15 @@ class MetaInterp(object):
             raise NotImplementedError(opname[opnum])
 
     def get_compiled_merge_points(self, greenkey):
+        """Get the list of looptokens corresponding to the greenkey.
+        Turns the (internal) list of weakrefs into regular refs.
+        """
+        cell = self.jitdriver_sd.warmstate.jit_cell_at_key(greenkey)
+        return cell.get_compiled_merge_points()
+
+    def set_compiled_merge_points(self, greenkey, looptokens):
         cell = self.jitdriver_sd.warmstate.jit_cell_at_key(greenkey)
-        if cell.compiled_merge_points is None:
-            cell.compiled_merge_points = []
-        return cell.compiled_merge_points
+        cell.set_compiled_merge_points(looptokens)
 
     def compile(self, original_boxes, live_arg_boxes, start):
         num_green_args = self.jitdriver_sd.num_green_args
@@ -220,6 +220,7 @@ _oplist = [
     'NEWUNICODE/1',
     #'RUNTIMENEW/1',     # ootype operation
     'COND_CALL_GC_WB',  # [objptr, newvalue]   (for the write barrier)
+    'COND_CALL_GC_WB_ARRAY', # [objptr, index, newvalue]   (card marking)
     'DEBUG_MERGE_POINT/1',      # debugging only
     'VIRTUAL_REF_FINISH/2',   # removed before it's passed to the backend
 
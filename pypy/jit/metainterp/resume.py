@@ -107,6 +107,23 @@ UNASSIGNED = tag(-1<<13, TAGBOX)
 UNASSIGNEDVIRTUAL = tag(-1<<13, TAGVIRTUAL)
 NULLREF = tag(-1, TAGCONST)
 
+# Rough estimates of the size of the resume data, in bytes.  They are
+# only used for statistics (see ResumeDataLoopMemo.nresumebytes), and
+# assume that every object has a header of one word plus a typeptr.
+WORD = rarithmetic.LONG_BIT // 8
+SIZEOF_TAGGED = 2
+
+def size_of_tagged_list(length):
+    return 2 * WORD + SIZEOF_TAGGED * length
+
+def size_of_ptr_list(length):
+    return 2 * WORD + WORD * length
+
+SIZEOF_NUMBERING = 4 * WORD      # header, typeptr, 'prev' and 'nums'
+SIZEOF_VINFO     = 5 * WORD      # header, typeptr and up to 3 fields
+SIZEOF_CONST     = 3 * WORD
+SIZEOF_PENDINGFIELD = 5 * WORD   # a tuple (descr, num, fieldnum)
+
 
 class ResumeDataLoopMemo(object):
 
@@ -119,10 +136,18 @@ class ResumeDataLoopMemo(object):
         self.numberings = {}
         self.cached_boxes = {}
         self.cached_virtuals = {}
-    
+        # for sharing identical resume data between consecutive guards
+        self.toplevel_numbering = None
+        self.numberings_by_prev = {}
+        self.last_rd_virtuals = None
+        self.last_rd_pendingfields = None
+
         self.nvirtuals = 0
         self.nvholes = 0
         self.nvreused = 0
+        self.nguards = 0
+        self.nnumbreused = 0
+        self.nresumebytes = 0
 
     def getconst(self, const):
         if const.type == INT:
@@ -155,6 +180,7 @@ class ResumeDataLoopMemo(object):
     def _newconst(self, const):
         result = tag(len(self.consts), TAGCONST)
         self.consts.append(const)
+        self.nresumebytes += SIZEOF_CONST + WORD
         return result
 
     # env numbering
@@ -191,10 +217,31 @@ class ResumeDataLoopMemo(object):
                 liveboxes[box] = tagged
             nums[i] = tagged
         #
-        numb = Numbering(numb1, nums)
+        numb = self._make_numbering(numb1, nums)
         self.numberings[snapshot] = numb, liveboxes, v
         return numb, liveboxes.copy(), v
 
+    def _make_numbering(self, prev, nums):
+        # Consecutive guards often have the same frames with the same
+        # content, e.g. all guards generated at the same position in the
+        # trace, or the parent frames after forget_numberings().  If the
+        # last Numbering built on top of 'prev' has the same 'nums', we
+        # share it instead of building an identical one.
+        if prev is None:
+            numb = self.toplevel_numbering
+        else:
+            numb = self.numberings_by_prev.get(prev, None)
+        if numb is not None and tagged_list_eq(numb.nums, nums):
+            self.nnumbreused += 1
+            return numb
+        numb = Numbering(prev, nums)
+        if prev is None:
+            self.toplevel_numbering = numb
+        else:
+            self.numberings_by_prev[prev] = numb
+        self.nresumebytes += SIZEOF_NUMBERING + size_of_tagged_list(len(nums))
+        return numb
+
     def forget_numberings(self, virtualbox):
         # XXX ideally clear only the affected numberings
         self.numberings.clear()
@@ -231,10 +278,52 @@ class ResumeDataLoopMemo(object):
         self.cached_boxes.clear()
         self.cached_virtuals.clear()
 
+    def share_rd_virtuals(self, virtuals):
+        last = self.last_rd_virtuals
+        if last is not None and _same_vinfos(last, virtuals):
+            return last
+        self.last_rd_virtuals = virtuals
+        self.nresumebytes += size_of_ptr_list(len(virtuals))
+        return virtuals
+
+    def share_rd_pendingfields(self, pendingfields):
+        last = self.last_rd_pendingfields
+        if last is not None and _same_pendingfields(last, pendingfields):
+            return last
+        self.last_rd_pendingfields = pendingfields
+        self.nresumebytes += (size_of_ptr_list(len(pendingfields)) +
+                              SIZEOF_PENDINGFIELD * len(pendingfields))
+        return pendingfields
+
     def update_counters(self, profiler):
         profiler.count(jitprof.NVIRTUALS, self.nvirtuals)
         profiler.count(jitprof.NVHOLES, self.nvholes)
         profiler.count(jitprof.NVREUSED, self.nvreused)
+        profiler.count(jitprof.NRESUMEBYTES, self.nresumebytes)
+        debug_start("jit-resume-size")
+        debug_print("guards:", self.nguards)
+        debug_print("numberings reused:", self.nnumbreused)
+        debug_print("resume data bytes:", self.nresumebytes)
+        debug_stop("jit-resume-size")
+
+def _same_vinfos(virtuals1, virtuals2):
+    if len(virtuals1) != len(virtuals2):
+        return False
+    for i in range(len(virtuals1)):
+        if virtuals1[i] is not virtuals2[i]:
+            return False
+    return True
+
+def _same_pendingfields(pendingfields1, pendingfields2):
+    if len(pendingfields1) != len(pendingfields2):
+        return False
+    for i in range(len(pendingfields1)):
+        descr1, num1, fieldnum1 = pendingfields1[i]
+        descr2, num2, fieldnum2 = pendingfields2[i]
+        if (descr1 is not descr2 or not tagged_eq(num1, num2) or
+                not tagged_eq(fieldnum1, fieldnum2)):
+            return False
+    return True
 
 _frame_info_placeholder = (None, 0, 0)
 
@@ -253,6 +342,12 @@ class ResumeDataVirtualAdder(object):
     def make_varray(self, arraydescr):
         return VArrayInfo(arraydescr)
 
+    def make_vstrplain(self):
+        return VStrPlainInfo()
+
+    def make_vstrcall(self, calldescr, funcbox, nb_str_args):
+        return VStrCallInfo(calldescr, funcbox, nb_str_args)
+
     def register_virtual_fields(self, virtualbox, fieldboxes):
         tagged = self.liveboxes_from_env.get(virtualbox, UNASSIGNEDVIRTUAL)
         self.liveboxes[virtualbox] = tagged
@@ -282,6 +377,7 @@ class ResumeDataVirtualAdder(object):
         storage = self.storage
         # make sure that nobody attached resume data to this guard yet
         assert storage.rd_numb is None
+        self.memo.nguards += 1
         numb, liveboxes_from_env, v = self.memo.number(values,
                                                        storage.rd_snapshot)
         self.liveboxes_from_env = liveboxes_from_env
@@ -350,7 +446,7 @@ class ResumeDataVirtualAdder(object):
         vfieldboxes = self.vfieldboxes
         if vfieldboxes:
             length = num_env_virtuals + memo.num_cached_virtuals()
-            virtuals = storage.rd_virtuals = [None] * length
+            virtuals = [None] * length
             memo.nvirtuals += length
             memo.nvholes += length - len(vfieldboxes)
             for virtualbox, fieldboxes in vfieldboxes.iteritems():
@@ -363,7 +459,11 @@ class ResumeDataVirtualAdder(object):
                 # pass in as an attribute. hackish.
                 if vinfo.fieldnums is not fieldnums:
                     memo.nvreused += 1
+                else:
+                    memo.nresumebytes += (SIZEOF_VINFO +
+                                          size_of_tagged_list(len(fieldnums)))
                 virtuals[num] = vinfo
+            storage.rd_virtuals = memo.share_rd_virtuals(virtuals)
 
         if self._invalidation_needed(len(liveboxes), nholes):
             memo.clear_box_virtual_numbers()           
@@ -385,6 +485,8 @@ class ResumeDataVirtualAdder(object):
                 num = self._gettagged(box)
                 fieldnum = self._gettagged(fieldbox)
                 rd_pendingfields.append((descr, num, fieldnum))
+            rd_pendingfields = self.memo.share_rd_pendingfields(
+                rd_pendingfields)
         self.storage.rd_pendingfields = rd_pendingfields
 
     def _gettagged(self, box):
@@ -397,6 +499,7 @@ class ResumeDataVirtualAdder(object):
 
 
 class AbstractVirtualInfo(object):
+    is_string = False
     #def allocate(self, metainterp):
     #    raise NotImplementedError
     #def setfields(self, decoder, struct):
@@ -486,6 +589,51 @@ class VArrayInfo(AbstractVirtualInfo):
         for i in self.fieldnums:
             debug_print("\t\t", str(untag(i)))
 
+class AbstractVStrInfo(AbstractVirtualInfo):
+    """Virtual strings are built in one go by allocate(), once the
+    virtuals they are made of are built; see getvirtual()."""
+    is_string = True
+
+    @specialize.argtype(1)
+    def setfields(self, decoder, string):
+        pass
+
+class VStrPlainInfo(AbstractVStrInfo):
+    """A string whose characters are all known."""
+    #self.fieldnums = [the characters]
+
+    @specialize.argtype(1)
+    def allocate(self, decoder):
+        length = len(self.fieldnums)
+        string = decoder.allocate_string(length)
+        for i in range(length):
+            decoder.string_setitem(string, i, self.fieldnums[i])
+        return string
+
+    def debug_prints(self):
+        debug_print("\tvstrplaininfo length", len(self.fieldnums))
+        for i in self.fieldnums:
+            debug_print("\t\t", str(untag(i)))
+
+class VStrCallInfo(AbstractVStrInfo):
+    """A string that is the result of a call to a helper of rstr.py."""
+    #self.fieldnums = [string args..., integer args...]
+
+    def __init__(self, calldescr, funcbox, nb_str_args):
+        self.calldescr = calldescr
+        self.funcbox = funcbox
+        self.nb_str_args = nb_str_args
+
+    @specialize.argtype(1)
+    def allocate(self, decoder):
+        return decoder.call_string_function(self.calldescr, self.funcbox,
+                                            self.nb_str_args, self.fieldnums)
+
+    def debug_prints(self):
+        debug_print("\tvstrcallinfo", self.calldescr)
+        for i in self.fieldnums:
+            debug_print("\t\t", str(untag(i)))
+
 # ____________________________________________________________
 
 class AbstractResumeDataReader(object):
@@ -497,6 +645,7 @@ class AbstractResumeDataReader(object):
     """
     _mixin_ = True
     virtuals = None
+    rd_virtuals = None
     virtual_default = None
 
     def _init(self, cpu, storage):
@@ -510,15 +659,32 @@ class AbstractResumeDataReader(object):
 
     def _prepare_virtuals(self, virtuals):
         if virtuals:
+            self.rd_virtuals = virtuals
             self.virtuals = [self.virtual_default] * len(virtuals)
             for i in range(len(virtuals)):
                 vinfo = virtuals[i]
-                if vinfo is not None:
+                if vinfo is not None and not vinfo.is_string:
                     self.virtuals[i] = vinfo.allocate(self)
             for i in range(len(virtuals)):
                 vinfo = virtuals[i]
                 if vinfo is not None:
-                    vinfo.setfields(self, self.virtuals[i])
+                    if vinfo.is_string:
+                        self.getvirtual(i)
+                    else:
+                        vinfo.setfields(self, self.virtuals[i])
+
+    def getvirtual(self, index):
+        # the virtual strings are only built when first needed, because
+        # they need the strings they are made of to be built already
+        v = self.virtuals[index]
+        if not v:
+            rd_virtuals = self.rd_virtuals
+            assert rd_virtuals is not None
+            vinfo = rd_virtuals[index]
+            assert vinfo is not None and vinfo.is_string
+            v = vinfo.allocate(self)
+            self.virtuals[index] = v
+        return v
 
     def _prepare_pendingfields(self, pendingfields):
         if pendingfields is not None:
@@ -622,6 +788,26 @@ class ResumeDataBoxReader(AbstractResumeDataReader):
         return self.metainterp.execute_and_record(rop.NEW_ARRAY,
                                                   arraydescr, ConstInt(length))
 
+    def allocate_string(self, length):
+        return self.metainterp.execute_and_record(rop.NEWSTR,
+                                                  None, ConstInt(length))
+
+    def string_setitem(self, strbox, index, charnum):
+        charbox = self.decode_box(charnum, INT)
+        self.metainterp.execute_and_record(rop.STRSETITEM, None,
+                                           strbox, ConstInt(index), charbox)
+
+    def call_string_function(self, calldescr, funcbox, nb_str_args,
+                             fieldnums):
+        argboxes = [funcbox]
+        for i in range(len(fieldnums)):
+            if i < nb_str_args:
+                argboxes.append(self.decode_box(fieldnums[i], REF))
+            else:
+                argboxes.append(self.decode_box(fieldnums[i], INT))
+        return self.metainterp.execute_and_record_varargs(rop.CALL, argboxes,
+                                                          descr=calldescr)
+
     def setfield(self, descr, structbox, fieldnum):
         if descr.is_pointer_field():
             kind = REF
@@ -663,9 +849,8 @@ class ResumeDataBoxReader(AbstractResumeDataReader):
             else:
                 box = self.consts[num]
         elif tag == TAGVIRTUAL:
-            virtuals = self.virtuals
-            assert virtuals is not None
-            box = virtuals[num]
+            assert self.virtuals is not None
+            box = self.getvirtual(num)
         elif tag == TAGINT:
             box = ConstInt(num)
         else:
@@ -839,6 +1024,26 @@ class ResumeDataDirectReader(AbstractResumeDataReader):
     def allocate_array(self, arraydescr, length):
         return self.cpu.bh_new_array(arraydescr, length)
 
+    def allocate_string(self, length):
+        return self.cpu.bh_newstr(length)
+
+    def string_setitem(self, string, index, charnum):
+        char = self.decode_int(charnum)
+        self.cpu.bh_strsetitem(string, index, char)
+
+    def call_string_function(self, calldescr, funcbox, nb_str_args,
+                             fieldnums):
+        args_r = [self.virtual_default] * nb_str_args
+        for i in range(nb_str_args):
+            args_r[i] = self.decode_ref(fieldnums[i])
+        nb_int_args = len(fieldnums) - nb_str_args
+        assert nb_int_args >= 0
+        args_i = [0] * nb_int_args
+        for i in range(nb_int_args):
+            args_i[i] = self.decode_int(fieldnums[nb_str_args + i])
+        return self.cpu.bh_call_r(funcbox.getint(), calldescr,
+                                  args_i, args_r, None)
+
     def setfield(self, descr, struct, fieldnum):
         if descr.is_pointer_field():
             newvalue = self.decode_ref(fieldnum)
@@ -881,9 +1086,8 @@ class ResumeDataDirectReader(AbstractResumeDataReader):
                 return self.cpu.ts.NULLREF
             return self.consts[num].getref_base()
         elif tag == TAGVIRTUAL:
-            virtuals = self.virtuals
-            assert virtuals is not None
-            return virtuals[num]
+            assert self.virtuals is not None
+            return self.getvirtual(num)
         else:
             assert tag == TAGBOX
             if num < 0:
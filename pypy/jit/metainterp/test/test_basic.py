@@ -2,6 +2,7 @@ import py
 import sys
 from pypy.rlib.jit import JitDriver, we_are_jitted, hint, dont_look_inside
 from pypy.rlib.jit import OPTIMIZER_FULL, OPTIMIZER_SIMPLE, loop_invariant
+from pypy.rlib.jit import OPTIMIZER_NO_UNROLL
 from pypy.jit.metainterp.warmspot import ll_meta_interp, get_stats
 from pypy.jit.backend.llgraph import runner
 from pypy.jit.metainterp import pyjitpl, history
@@ -16,8 +17,12 @@ def _get_jitcodes(testself, CPUClass, func, values, type_system):
     from pypy.jit.codewriter import support, codewriter
     from pypy.jit.metainterp import simple_optimize
 
-    class FakeJitCell:
-        compiled_merge_points = None
+    class FakeJitCell(object):
+        __compiled_merge_points = []
+        def get_compiled_merge_points(self):
+            return self.__compiled_merge_points[:]
+        def set_compiled_merge_points(self, lst):
+            self.__compiled_merge_points = lst
 
     class FakeWarmRunnerState:
         def attach_unoptimized_bridge_from_interp(self, greenkey, newloop):
@@ -146,6 +151,9 @@ class JitMixin:
         kwds['type_system'] = self.type_system
         if "backendopt" not in kwds:
             kwds["backendopt"] = False
+        # the operation counts checked by the tests are the ones of a
+        # loop that was not peeled; see test_loop_unroll.py for peeling
+        kwds.setdefault("optimizer", OPTIMIZER_NO_UNROLL)
         return ll_meta_interp(*args, **kwds)
 
     def interp_operations(self, f, args, **kwds):
@@ -530,6 +538,62 @@ class BasicTests:
         assert res == -2
         self.check_loop_count(1)
 
+    def test_get_threshold(self):
+        def get_threshold(x):
+            if x > 5:
+                return -1          # never trace
+            if x == 5:
+                return 1000        # much more than the default
+            return 0
+        myjitdriver = JitDriver(greens = ['x'], reds = ['y'],
+                                get_threshold = get_threshold)
+        def f(x, y):
+            while y >= 0:
+                myjitdriver.can_enter_jit(x=x, y=y)
+                myjitdriver.jit_merge_point(x=x, y=y)
+                y -= x
+            return y
+        #
+        res = self.meta_interp(f, [10, 184])
+        assert res == -6
+        self.check_loop_count(0)
+        #
+        res = self.meta_interp(f, [5, 104])
+        assert res == -1
+        self.check_loop_count(0)
+        #
+        res = self.meta_interp(f, [3, 19])
+        assert res == -2
+        self.check_loop_count(1)
+
+    def test_threshold_reached(self):
+        class State:
+            pass
+        state = State()
+        def threshold_reached(x):
+            state.count += 1
+        myjitdriver = JitDriver(greens = ['x'], reds = ['y'],
+                                threshold_reached = threshold_reached)
+        def g(x, y):
+            while y >= 0:
+                myjitdriver.can_enter_jit(x=x, y=y)
+                myjitdriver.jit_merge_point(x=x, y=y)
+                y -= x
+            return y
+        def f(x, y):
+            state.count = y - y
+            i = 0
+            while i < 10:
+                g(x, y)
+                i += 1
+            return state.count
+        #
+        res = self.meta_interp(f, [1, 20])
+        # called when tracing the loop and when tracing its entry bridge,
+        # but not each time that g() enters the machine code
+        assert res == 2
+        self.check_loop_count(2)
+
     def test_format(self):
         def f(n):
             return len("<%d>" % n)
@@ -34,6 +34,13 @@ class FakeCPU:
         self.seen = []
     def compile_loop(self, inputargs, operations, token):
         self.seen.append((inputargs, operations, token))
+        token.compiled_loop_token = FakeCompiledLoopToken()
+
+class FakeCompiledLoopToken:
+    asm_bytes = 0
+
+    def record_faildescr_index(self, n):
+        pass
 
 class FakeLogger:
     def log_loop(self, inputargs, operations, number=0, type=None):
@@ -53,12 +60,15 @@ class FakeMetaInterpStaticData:
 
     stats = Stats()
     profiler = jitprof.EmptyProfiler()
+    memory_manager = None
     def log(self, msg, event_kind=None):
         pass
 
 class FakeMetaInterp:
     class jitdriver_sd:
         warmstate = FakeState()
+    def set_compiled_merge_points(self, greenkey, looptokens):
+        pass
 
 def test_compile_new_loop():
     cpu = FakeCPU()
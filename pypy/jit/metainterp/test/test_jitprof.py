@@ -63,8 +63,10 @@ class TestProfile(ProfilerMixin):
             ]
         assert profiler.events == expected
         assert profiler.times == [2, 1, 1, 1]
-        assert profiler.counters == [1, 1, 1, 1, 3, 3, 1, 7, 1, 0, 0, 0,
-                                     0, 0, 0, 0]
+        assert profiler.counters[:NRESUMEBYTES] == [1, 1, 1, 1, 3, 3, 1, 7,
+                                                    1, 0, 0, 0, 0, 0, 0, 0]
+        # the exact size of the resume data depends on the word size
+        assert profiler.counters[NRESUMEBYTES] > 0
 
     def test_simple_loop_with_call(self):
         @dont_look_inside
@@ -105,3 +107,73 @@ class TestProfile(ProfilerMixin):
         assert res == f(6, 7, 2)
         profiler = pyjitpl._warmrunnerdesc.metainterp_sd.profiler
         assert profiler.calls == 1
+
+
+class TestJitStatistics(LLJitMixin):
+
+    def setup_method(self, meth):
+        jit_statistics.reset()
+
+    def test_simple_loop(self):
+        myjitdriver = JitDriver(greens = [], reds = ['x', 'y', 'res'])
+        def f(x, y):
+            res = 0
+            while y > 0:
+                myjitdriver.can_enter_jit(x=x, y=y, res=res)
+                myjitdriver.jit_merge_point(x=x, y=y, res=res)
+                res += x
+                if y == 5:
+                    res += 1
+                y -= 1
+            return res * 2
+        res = self.meta_interp(f, [6, 20])
+        assert res == f(6, 20)
+        stats = jit_statistics
+        assert stats.loops_compiled >= 1
+        assert stats.bridges_compiled == 0
+        assert stats.tracing_count >= 1
+        assert stats.backend_count == stats.loops_compiled
+        assert stats.guard_failures >= 1
+        assert stats.running_count >= 1
+        assert stats.blackhole_count >= 1
+        assert stats.abort_too_long == stats.abort_escape == 0
+        total_failures = 0
+        for loopstats in stats.loops.values():
+            assert loopstats.operations > 0
+            assert loopstats.guards > 0
+            assert loopstats.bridges == 0
+            total_failures += loopstats.guard_failures
+        assert total_failures == stats.guard_failures
+        #
+        stats.reset()
+        assert stats.loops_compiled == stats.guard_failures == 0
+        for loopstats in stats.loops.values():
+            assert loopstats.guard_failures == 0
+
+    def test_bridge_and_abort(self):
+        myjitdriver = JitDriver(greens = [], reds = ['x', 'y', 'res'])
+        def g(x, y):
+            return x * y + x - y
+        def f(x, y):
+            res = 0
+            while y > 0:
+                myjitdriver.can_enter_jit(x=x, y=y, res=res)
+                myjitdriver.jit_merge_point(x=x, y=y, res=res)
+                if y % 3 == 0:
+                    res += g(x, y)
+                else:
+                    res += 1
+                y -= 1
+            return res
+        res = self.meta_interp(f, [6, 50], trace_limit=1000)
+        assert res == f(6, 50)
+        assert jit_statistics.bridges_compiled >= 1
+        bridges = 0
+        for loopstats in jit_statistics.loops.values():
+            bridges += loopstats.bridges
+        assert bridges == jit_statistics.bridges_compiled
+        #
+        jit_statistics.reset()
+        res = self.meta_interp(f, [6, 50], trace_limit=2)
+        assert res == f(6, 50)
+        assert jit_statistics.abort_too_long >= 1
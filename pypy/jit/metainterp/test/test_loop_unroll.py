@@ -0,0 +1,74 @@
+import py
+from pypy.rlib.jit import JitDriver, OPTIMIZER_FULL
+from pypy.jit.metainterp.test import test_loop
+from pypy.jit.metainterp.test.test_basic import LLJitMixin, OOJitMixin
+
+class LoopUnrollTest(test_loop.LoopTest):
+    optimizer = OPTIMIZER_FULL
+    automatic_promotion_result = {
+        'int_add' : 3, 'int_gt' : 1, 'guard_false' : 1, 'jump' : 1,
+    }
+
+    # ====> test_loop.py
+
+    def test_alternating_loops(self):
+        myjitdriver = JitDriver(greens = [], reds = ['pattern'])
+        def f(pattern):
+            while pattern > 0:
+                myjitdriver.can_enter_jit(pattern=pattern)
+                myjitdriver.jit_merge_point(pattern=pattern)
+                if pattern & 1:
+                    pass
+                else:
+                    pass
+                pattern >>= 1
+            return 42
+        self.meta_interp(f, [0xF0F0])
+        # the failures of the guard are shared between its copy in the
+        # preamble and its copy in the loop, so no bridge gets hot enough
+        self.check_loop_count(1)
+
+    def test_invariant_guard_and_getfield_removed(self):
+        myjitdriver = JitDriver(greens = [], reds = ['n', 'res', 'a'])
+        class A(object):
+            def __init__(self, x):
+                self.x = x
+        def f(n):
+            a = A(n)
+            res = 0
+            while n > 0:
+                myjitdriver.can_enter_jit(n=n, res=res, a=a)
+                myjitdriver.jit_merge_point(n=n, res=res, a=a)
+                res += a.x
+                n -= 1
+            return res
+        res = self.meta_interp(f, [20])
+        assert res == f(20)
+        self.check_loop_count(1)
+        # the preamble is not counted: the loop itself has no guard_class
+        # and no getfield_gc on 'a' any more
+        self.check_loops(getfield_gc=0, guard_class=0, guard_nonnull=0,
+                         guard_nonnull_class=0)
+        self.check_loops(getfield_gc=1, everywhere=True)
+
+    def test_invariant_pure_operation_removed(self):
+        myjitdriver = JitDriver(greens = [], reds = ['n', 'x', 'res'])
+        def f(n, x):
+            res = 0
+            while n > 0:
+                myjitdriver.can_enter_jit(n=n, x=x, res=res)
+                myjitdriver.jit_merge_point(n=n, x=x, res=res)
+                res += x * 7
+                n -= 1
+            return res
+        res = self.meta_interp(f, [20, 6])
+        assert res == f(20, 6)
+        self.check_loops(int_mul=0)
+        self.check_loops(int_mul=1, everywhere=True)
+
+
+class TestLLtype(LoopUnrollTest, LLJitMixin):
+    pass
+
+class TestOOtype(LoopUnrollTest, OOJitMixin):
+    pass
@@ -0,0 +1,293 @@
+import gc, weakref
+from pypy.jit.metainterp.memmgr import MemoryManager
+from pypy.jit.metainterp.test.test_basic import LLJitMixin
+from pypy.jit.metainterp.history import LoopToken, BoxInt, ConstInt
+from pypy.jit.metainterp.resoperation import ResOperation, rop
+from pypy.jit.metainterp import compile
+from pypy.rlib.jit import JitDriver
+
+
+class FakeLoopToken:
+    generation = 0
+
+
+class TestMemoryManager:
+
+    def test_disabled(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(0)
+        tokens = [FakeLoopToken() for i in range(10)]
+        for token in tokens:
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+        assert memmgr.alive_loops == dict.fromkeys(tokens)
+
+    def test_basic(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(3, 1)
+        tokens = [FakeLoopToken() for i in range(10)]
+        for token in tokens:
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+        # only the tokens recorded in the last 'max_age - 1' generations
+        assert memmgr.alive_loops == dict.fromkeys(tokens[8:])
+
+    def test_basic_2(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(3, 1)
+        token = FakeLoopToken()
+        memmgr.keep_loop_alive(token)
+        for i in range(10):
+            memmgr.next_generation()
+            if i < 2:
+                assert memmgr.alive_loops == {token: None}
+            else:
+                assert memmgr.alive_loops == {}
+
+    def test_basic_3(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(3, 1)
+        tokens = [FakeLoopToken() for i in range(10)]
+        for i in range(len(tokens)):
+            print 'record tokens[%d]' % i
+            memmgr.keep_loop_alive(tokens[i])
+            for j in range(0, i, 2):
+                assert tokens[j] in memmgr.alive_loops
+                print 'also keep alive tokens[%d]' % j
+                memmgr.keep_loop_alive(tokens[j])
+            memmgr.next_generation()
+        for i in range(len(tokens)):
+            if i < 8 and (i%2) != 0:
+                assert tokens[i] not in memmgr.alive_loops
+            else:
+                assert tokens[i] in memmgr.alive_loops
+
+    def test_check_frequency(self):
+        memmgr = MemoryManager()
+        memmgr.set_max_age(3, 5)
+        tokens = [FakeLoopToken() for i in range(10)]
+        for token in tokens:
+            memmgr.keep_loop_alive(token)
+            memmgr.next_generation()
+        # the first check that freed something was done after the 6th
+        # token was recorded, and there was none afterwards
+        assert memmgr.alive_loops == dict.fromkeys(tokens[4:])
+
+
+class FakeMetaInterpStaticData(object):
+    # only what compile.send_loop_to_backend() needs
+    class globaldata:
+        loopnumbering = 0
+    class logger_ops:
+        @staticmethod
+        def log_loop(inputargs, operations, number=0, type=None):
+            pass
+    def __init__(self, cpu, memory_manager):
+        from pypy.jit.metainterp import jitprof
+        from pypy.jit.metainterp.history import NoStats
+        self.cpu = cpu
+        self.memory_manager = memory_manager
+        self.stats = NoStats()
+        self.profiler = jitprof.EmptyProfiler()
+    def log(self, msg):
+        pass
+
+
+class TestStress:
+    # Compile tens of thousands of distinct loops on the llgraph backend,
+    # without keeping them alive ourselves, and check that the memory
+    # manager lets the resume descrs and the compiled loops be freed.
+
+    NUM_LOOPS = 20000
+    MAX_AGE = 1000
+    CHECK_FREQUENCY = 500
+
+    def make_loop(self, k):
+        i0 = BoxInt()
+        i1 = BoxInt()
+        i2 = BoxInt()
+        descr = compile.ResumeGuardDescr(None, None)
+        loop = compile.TreeLoop('stress %d' % k)
+        loop.inputargs = [i0]
+        loop.token = LoopToken()
+        loop.operations = [
+            ResOperation(rop.INT_ADD, [i0, ConstInt(k + 1)], i1),
+            ResOperation(rop.INT_LT, [i1, ConstInt(100)], i2),
+            ResOperation(rop.GUARD_TRUE, [i2], None, descr=descr),
+            ResOperation(rop.JUMP, [i1], None, descr=loop.token),
+            ]
+        loop.operations[2].fail_args = [i1]
+        return loop
+
+    def test_many_loops(self):
+        from pypy.jit.backend.llgraph.runner import LLtypeCPU
+        cpu = LLtypeCPU(None)
+        memmgr = MemoryManager()
+        memmgr.set_max_age(self.MAX_AGE, self.CHECK_FREQUENCY)
+        metainterp_sd = FakeMetaInterpStaticData(cpu, memmgr)
+        wrefs = []
+        for k in range(self.NUM_LOOPS):
+            loop = self.make_loop(k)
+            looptoken = loop.token
+            compile.send_loop_to_backend(metainterp_sd, loop, "loop")
+            if k % 1000 == 0:
+                # run a few of them, to check that they still work
+                cpu.set_future_value_int(0, 0)
+                fail = cpu.execute_token(looptoken)
+                assert isinstance(fail, compile.ResumeGuardDescr)
+                assert 100 <= cpu.get_latest_value_int(0) <= 100 + k
+                wrefs.append(weakref.ref(looptoken))
+            del loop, looptoken
+            # the number of compiled loops and of resume descrs stays
+            # bounded, instead of growing with the total number of loops
+            limit = self.MAX_AGE + self.CHECK_FREQUENCY
+            assert len(memmgr.alive_loops) <= limit
+            assert len(cpu.fail_descr_list) <= limit + 100
+        gc.collect()
+        assert cpu.total_compiled_loops == self.NUM_LOOPS
+        freed = self.NUM_LOOPS - len(memmgr.alive_loops)
+        assert cpu.total_freed_loops >= freed - 100
+        assert cpu.total_freed_bridges == 0
+        # the fail descr numbers are reused
+        alive_descrs = [descr for descr in cpu.fail_descr_list
+                              if descr is not None]
+        assert len(alive_descrs) == len(memmgr.alive_loops)
+        # the old loops are really gone, but not the most recent ones
+        assert [wref() for wref in wrefs[:-1]] == [None] * (len(wrefs) - 1)
+        assert wrefs[-1]() is not None
+
+
+class TestIntegration(LLJitMixin):
+
+    def test_loop_kept_alive(self):
+        myjitdriver = JitDriver(greens=[], reds=['n'])
+        def g():
+            n = 10
+            while n > 0:
+                myjitdriver.can_enter_jit(n=n)
+                myjitdriver.jit_merge_point(n=n)
+                n = n - 1
+            return 21
+        def f():
+            for i in range(15):
+                g()
+            return 42
+
+        res = self.meta_interp(f, [], loop_longevity=4)
+        assert res == 42
+
+        # we should see only the loop and the entry bridge: they are
+        # never freed, because the loop is entered all the time
+        self.check_tree_loop_count(2)
+        assert self._get_cpu().total_freed_loops == 0
+
+    def test_target_loop_kept_alive_or_not(self):
+        myjitdriver = JitDriver(greens=['m'], reds=['n'])
+        def g(m):
+            n = 10
+            while n > 0:
+                myjitdriver.can_enter_jit(n=n, m=m)
+                myjitdriver.jit_merge_point(n=n, m=m)
+                n = n - 1
+            return 21
+        def f():
+            # Depending on loop_longevity, either:
+            # A. create the loops and the entry bridge for 'g(5)'
+            # B. create 8 loops (and throw them away at each iteration)
+            for i in range(20):
+                g(5)
+            for i in range(20):
+                g(i % 8)
+            # use again g(5)
+            for i in range(20):
+                g(5)
+            return 42
+
+        # case A: nothing is freed
+        res = self.meta_interp(f, [], loop_longevity=30)
+        assert res == 42
+        # the loop and the entry bridge for each of the 8 values of 'm'
+        self.check_tree_loop_count(2 * 8)
+        assert self._get_cpu().total_freed_loops == 0
+
+        # case B, with a lower longevity: the loops for g(5) are freed
+        # and have to be compiled a second time at the end
+        res = self.meta_interp(f, [], loop_longevity=3)
+        assert res == 42
+        assert self.count_loops_with_greenkey(5) > 2
+        assert self._get_cpu().total_freed_loops > 0
+
+    def test_throw_away_old_loops(self):
+        myjitdriver = JitDriver(greens=['m'], reds=['n'])
+        def g(m):
+            n = 10
+            while n > 0:
+                myjitdriver.can_enter_jit(n=n, m=m)
+                myjitdriver.jit_merge_point(n=n, m=m)
+                n = n - 1
+            return 21
+        def f():
+            for i in range(10):
+                g(1)   # g(1) gets a loop and an entry bridge, stays alive
+                g(2)   # (and an exit bridge, which does not count in
+                g(1)   # check_tree_loop_count)
+                g(3)
+                g(1)
+                g(4)   # g(2), g(3), g(4), g(5) are thrown away every iteration
+                g(1)   # (no entry bridge for them)
+                g(5)
+            return 42
+
+        res = self.meta_interp(f, [], loop_longevity=4)
+        assert res == 42
+        self.check_tree_loop_count(2 + 10*4)
+
+    def test_call_assembler_keep_alive(self):
+        myjitdriver1 = JitDriver(greens=['m'], reds=['n'])
+        myjitdriver2 = JitDriver(greens=['m'], reds=['n', 'rec'])
+        def h(m, n):
+            while True:
+                if n == 0:
+                    return 1
+                myjitdriver1.can_enter_jit(n=n, m=m)
+                myjitdriver1.jit_merge_point(n=n, m=m)
+                n = n >> 1
+
+        def g(m, rec):
+            n = 5
+            while n > 0:
+                myjitdriver2.can_enter_jit(n=n, m=m, rec=rec)
+                myjitdriver2.jit_merge_point(n=n, m=m, rec=rec)
+                if rec:
+                    h(m, rec)
+                n = n - 1
+            return 21
+        def f(u):
+            for i in range(8):
+                h(u, 32)  # make a loop and an entry bridge for h(u)
+            g(u, 8)       # make a loop for g(u) with a call_assembler
+            g(u, 0); g(u+1, 0)     # \
+            g(u, 0); g(u+2, 0)     #  \  make more loops for g(u+1) to g(u+4),
+            g(u, 0); g(u+3, 0)     #  /  but keeps g(u) alive
+            g(u, 0); g(u+4, 0)     # /
+            g(u, 8)       # call g(u) again, with its call_assembler to h(u)
+            return 42
+
+        res = self.meta_interp(f, [1], loop_longevity=4, inline=True)
+        assert res == 42
+        # the loops of h(1) are kept alive by the call_assembler in the
+        # loop of g(1), so they are never compiled a second time: we
+        # see the loop and the entry bridge of h(1) and of g(1), and one
+        # loop for each of g(2) to g(5)
+        self.check_tree_loop_count(4 + 4)
+        assert self.count_loops_with_greenkey(1) == 4
+        assert self._get_cpu().total_freed_loops > 0
+
+    def _get_cpu(self):
+        from pypy.jit.metainterp import pyjitpl
+        return pyjitpl._warmrunnerdesc.cpu
+
+    def count_loops_with_greenkey(self, value):
+        from pypy.jit.metainterp.test.test_basic import get_stats
+        return len([loop for loop in get_stats().loops
+                         if loop.greenkey[0].getint() == value])
@@ -1,6 +1,6 @@
 import py, random
 
-from pypy.rpython.lltypesystem import lltype, llmemory, rclass
+from pypy.rpython.lltypesystem import lltype, llmemory, rclass, rstr
 from pypy.rpython.ootypesystem import ootype
 from pypy.rpython.lltypesystem.rclass import OBJECT, OBJECT_VTABLE
 
@@ -115,6 +115,23 @@ class LLtypeMixin(object):
     mayforcevirtdescr = cpu.calldescrof(FUNC, FUNC.ARGS, FUNC.RESULT,
                  EffectInfo([nextdescr], [], [],
                             EffectInfo.EF_FORCES_VIRTUAL_OR_VIRTUALIZABLE))
+    STRPTR = lltype.Ptr(rstr.STR)
+    STRCONCAT = lltype.FuncType([STRPTR, STRPTR], STRPTR)
+    strconcatdescr = cpu.calldescrof(STRCONCAT, STRCONCAT.ARGS,
+                                     STRCONCAT.RESULT,
+                 EffectInfo([], [], [], EffectInfo.EF_PURE,
+                            EffectInfo.OS_STR_CONCAT))
+    STRSLICE1 = lltype.FuncType([STRPTR, lltype.Signed], STRPTR)
+    strslice1descr = cpu.calldescrof(STRSLICE1, STRSLICE1.ARGS,
+                                     STRSLICE1.RESULT,
+                 EffectInfo([], [], [], EffectInfo.EF_PURE,
+                            EffectInfo.OS_STR_SLICE_STARTONLY))
+    STRSLICE2 = lltype.FuncType([STRPTR, lltype.Signed, lltype.Signed],
+                                STRPTR)
+    strslice2descr = cpu.calldescrof(STRSLICE2, STRSLICE2.ARGS,
+                                     STRSLICE2.RESULT,
+                 EffectInfo([], [], [], EffectInfo.EF_PURE,
+                            EffectInfo.OS_STR_SLICE_STARTSTOP))
     class LoopToken(AbstractDescr):
         pass
     asmdescr = LoopToken() # it can be whatever, it's not a descr though
@@ -211,6 +211,10 @@ class Storage(compile.ResumeGuardDescr):
         op.fail_args = boxes
     def __eq__(self, other):
         return type(self) is type(other)      # xxx obscure
+    def _clone_if_mutable(self):
+        res = Storage(self.metainterp_sd, self.original_greenkey)
+        self.copy_all_attrbutes_into(res)
+        return res
 
 def _sortboxes(boxes):
     _kind2count = {history.INT: 1, history.REF: 2, history.FLOAT: 3}
@@ -259,6 +263,26 @@ class BaseTestOptimizeOpt(BaseTest):
         expected = self.parse(optops)
         self.assert_equal(loop, expected)
 
+    def optimize_loop_peeled(self, ops, spectext, expected_preamble,
+                             expected_loop):
+        loop = self.parse(ops)
+        perfect_specialization_finder = PerfectSpecializationFinder(self.cpu)
+        perfect_specialization_finder.find_nodes_loop(loop)
+        self.check_specnodes(loop.token.specnodes, spectext)
+        self.loop = loop
+        metainterp_sd = FakeMetaInterpStaticData(self.cpu)
+        optimize_loop_1(metainterp_sd, loop, unroll=True)
+        #
+        self.assert_equal(loop, self.parse(expected_preamble))
+        if expected_loop is None:
+            assert loop.peeled_loop is None
+        else:
+            peeled_loop = loop.peeled_loop
+            assert loop.operations[-1].descr is peeled_loop.token
+            assert peeled_loop.operations[-1].descr is peeled_loop.token
+            self.assert_equal(peeled_loop, self.parse(expected_loop))
+        return loop
+
     def test_simple(self):
         ops = """
         [i]
@@ -2592,6 +2616,234 @@ class BaseTestOptimizeOpt(BaseTest):
 
 class TestLLtype(BaseTestOptimizeOpt, LLtypeMixin):
 
+    def test_newstr_1(self):
+        ops = """
+        [i0]
+        p1 = newstr(1)
+        strsetitem(p1, 0, i0)
+        i1 = strgetitem(p1, 0)
+        jump(i1)
+        """
+        expected = """
+        [i0]
+        jump(i0)
+        """
+        self.optimize_loop(ops, 'Not', expected)
+
+    def test_newstr_2(self):
+        ops = """
+        [i0, i1]
+        p1 = newstr(2)
+        strsetitem(p1, 0, i0)
+        strsetitem(p1, 1, i1)
+        i2 = strgetitem(p1, 1)
+        i3 = strlen(p1)
+        jump(i2, i3)
+        """
+        expected = """
+        [i0, i1]
+        jump(i1, 2)
+        """
+        self.optimize_loop(ops, 'Not, Not', expected)
+
+    def test_newstr_escape(self):
+        ops = """
+        [i0]
+        p1 = newstr(3)
+        strsetitem(p1, 0, i0)
+        strsetitem(p1, 2, 65)
+        escape(p1)
+        jump(i0)
+        """
+        expected = """
+        [i0]
+        p1 = newstr(3)
+        strsetitem(p1, 0, i0)
+        strsetitem(p1, 2, 65)
+        escape(p1)
+        jump(i0)
+        """
+        self.optimize_loop(ops, 'Not', expected)
+
+    def test_newstr_too_long(self):
+        ops = """
+        [i0]
+        p1 = newstr(1000)
+        strsetitem(p1, 0, i0)
+        i1 = strgetitem(p1, 0)
+        jump(i1)
+        """
+        self.optimize_loop(ops, 'Not', ops)
+
+    def test_str_concat_1(self):
+        ops = """
+        [p1, p2]
+        p3 = call(0, p1, p2, descr=strconcatdescr)
+        jump(p2, p3)
+        """
+        self.optimize_loop(ops, 'Not, Not', ops)
+
+    def test_str_concat_strlen(self):
+        ops = """
+        [p1, p2]
+        p3 = call_pure(ConstPtr(myptr), 0, p1, p2, descr=strconcatdescr)
+        i1 = strlen(p3)
+        escape(i1)
+        jump(p1, p2)
+        """
+        expected = """
+        [p1, p2]
+        i2 = strlen(p1)
+        i3 = strlen(p2)
+        i1 = int_add(i2, i3)
+        escape(i1)
+        jump(p1, p2)
+        """
+        self.optimize_loop(ops, 'Not, Not', expected)
+
+    def test_str_concat_vstr2_vstr2(self):
+        ops = """
+        [i0, i1]
+        p1 = newstr(1)
+        strsetitem(p1, 0, i0)
+        p2 = newstr(1)
+        strsetitem(p2, 0, i1)
+        p3 = call(0, p1, p2, descr=strconcatdescr)
+        i2 = strgetitem(p3, 1)
+        i3 = strgetitem(p3, 0)
+        jump(i2, i3)
+        """
+        expected = """
+        [i0, i1]
+        jump(i1, i0)
+        """
+        self.optimize_loop(ops, 'Not, Not', expected)
+
+    def test_str_concat_vstr2_escape(self):
+        ops = """
+        [i0, i1]
+        p1 = newstr(1)
+        strsetitem(p1, 0, i0)
+        p2 = newstr(1)
+        strsetitem(p2, 0, i1)
+        p3 = call(0, p1, p2, descr=strconcatdescr)
+        escape(p3)
+        jump(i1, i0)
+        """
+        expected = """
+        [i0, i1]
+        p3 = newstr(2)
+        strsetitem(p3, 0, i0)
+        strsetitem(p3, 1, i1)
+        escape(p3)
+        jump(i1, i0)
+        """
+        self.optimize_loop(ops, 'Not, Not', expected)
+
+    def test_str_concat_getitem(self):
+        ops = """
+        [p1, i0]
+        p2 = newstr(1)
+        strsetitem(p2, 0, i0)
+        p3 = call(0, p2, p1, descr=strconcatdescr)
+        i1 = strgetitem(p3, 0)
+        i2 = strgetitem(p3, 2)
+        escape(i2)
+        jump(p1, i1)
+        """
+        expected = """
+        [p1, i0]
+        i2 = strgetitem(p1, 1)
+        escape(i2)
+        jump(p1, i0)
+        """
+        self.optimize_loop(ops, 'Not, Not', expected)
+
+    def test_str_slice_getitem(self):
+        ops = """
+        [p1, i0]
+        p2 = call(0, p1, i0, descr=strslice1descr)
+        i1 = strgetitem(p2, 2)
+        escape(i1)
+        jump(p1, i0)
+        """
+        expected = """
+        [p1, i0]
+        i2 = int_add(i0, 2)
+        i1 = strgetitem(p1, i2)
+        escape(i1)
+        jump(p1, i0)
+        """
+        self.optimize_loop(ops, 'Not, Not', expected)
+
+    def test_str_slice_len(self):
+        ops = """
+        [p1, i0]
+        p2 = call(0, p1, i0, descr=strslice1descr)
+        i1 = strlen(p2)
+        escape(i1)
+        jump(p1, i0)
+        """
+        expected = """
+        [p1, i0]
+        i2 = strlen(p1)
+        i1 = int_sub(i2, i0)
+        escape(i1)
+        jump(p1, i0)
+        """
+        self.optimize_loop(ops, 'Not, Not', expected)
+
+    def test_str_slice_vstr(self):
+        ops = """
+        [i0, i1]
+        p1 = newstr(3)
+        strsetitem(p1, 0, i0)
+        strsetitem(p1, 1, i1)
+        p2 = call(0, p1, 1, 5, descr=strslice2descr)
+        i2 = strlen(p2)
+        i3 = strgetitem(p2, 0)
+        jump(i2, i3)
+        """
+        expected = """
+        [i0, i1]
+        jump(2, i1)
+        """
+        self.optimize_loop(ops, 'Not, Not', expected)
+
+    def test_str_slice_unknown_len_escape(self):
+        ops = """
+        [p1, i0]
+        p2 = call(0, p1, 1, i0, descr=strslice2descr)
+        i1 = strlen(p2)
+        escape(i1)
+        jump(p1, i0)
+        """
+        expected = """
+        [p1, i0]
+        p2 = call(0, p1, 1, i0, descr=strslice2descr)
+        i1 = strlen(p2)
+        escape(i1)
+        jump(p1, i0)
+        """
+        self.optimize_loop(ops, 'Not, Not', expected)
+
+    def test_vstr_in_fail_args(self):
+        self.make_fail_descr()
+        ops = """
+        [i0, i1]
+        p1 = newstr(2)
+        strsetitem(p1, 0, i0)
+        strsetitem(p1, 1, i1)
+        guard_true(i0, descr=fdescr) [p1]
+        jump(i0, i1)
+        """
+        expected = """
+        [i0, i1]
+        guard_true(i0, descr=fdescr) [i0, i1]
+        jump(1, i1)
+        """
+        self.optimize_loop(ops, 'Not, Not', expected)
+
     def test_residual_call_does_not_invalidate_caches(self):
         ops = """
         [p1, p2]
@@ -3089,6 +3341,173 @@ class TestLLtype(BaseTestOptimizeOpt, LLtypeMixin):
         '''
         self.optimize_loop(ops, 'Not', expected)
 
+    # ----------
+
+    def test_peel_invariant_guard_and_getfield(self):
+        ops = """
+        [p0, i0]
+        guard_class(p0, ConstClass(node_vtable)) []
+        i1 = getfield_gc(p0, descr=valuedescr)
+        i2 = int_add(i0, i1)
+        jump(p0, i2)
+        """
+        preamble = """
+        [p0, i0]
+        guard_class(p0, ConstClass(node_vtable)) []
+        i1 = getfield_gc(p0, descr=valuedescr)
+        i2 = int_add(i0, i1)
+        jump(i2, i1)
+        """
+        expected = """
+        [i2, i1]
+        i3 = int_add(i2, i1)
+        jump(i3, i1)
+        """
+        self.optimize_loop_peeled(ops, 'Not, Not', preamble, expected)
+
+    def test_peel_invariant_pure_operation(self):
+        ops = """
+        [i0, i1]
+        i2 = int_mul(i1, 3)
+        i3 = int_add(i0, i2)
+        i4 = int_lt(i3, 100)
+        guard_true(i4) [i3]
+        jump(i3, i1)
+        """
+        preamble = """
+        [i0, i1]
+        i2 = int_mul(i1, 3)
+        i3 = int_add(i0, i2)
+        i4 = int_lt(i3, 100)
+        guard_true(i4) [i3]
+        jump(i3, i2)
+        """
+        expected = """
+        [i3, i2]
+        i5 = int_add(i3, i2)
+        i6 = int_lt(i5, 100)
+        guard_true(i6) [i5]
+        jump(i5, i2)
+        """
+        self.optimize_loop_peeled(ops, 'Not, Not', preamble, expected)
+
+    def test_peel_setfield_then_getfield(self):
+        ops = """
+        [p0, i0]
+        i1 = getfield_gc(p0, descr=valuedescr)
+        i2 = int_add(i1, i0)
+        setfield_gc(p0, i2, descr=valuedescr)
+        jump(p0, i0)
+        """
+        preamble = """
+        [p0, i0]
+        i1 = getfield_gc(p0, descr=valuedescr)
+        i2 = int_add(i1, i0)
+        setfield_gc(p0, i2, descr=valuedescr)
+        jump(i2, i0, p0)
+        """
+        expected = """
+        [i2, i0, p0]
+        i3 = int_add(i2, i0)
+        setfield_gc(p0, i3, descr=valuedescr)
+        jump(i3, i0, p0)
+        """
+        self.optimize_loop_peeled(ops, 'Not, Not', preamble, expected)
+
+    def test_peel_call_clobbers_cache(self):
+        ops = """
+        [p0, i0]
+        i1 = getfield_gc(p0, descr=valuedescr)
+        i2 = int_add(i0, i1)
+        escape(i2)
+        jump(p0, i2)
+        """
+        preamble = """
+        [p0, i0]
+        i1 = getfield_gc(p0, descr=valuedescr)
+        i2 = int_add(i0, i1)
+        escape(i2)
+        jump(p0, i2)
+        """
+        expected = """
+        [p0, i2]
+        i3 = getfield_gc(p0, descr=valuedescr)
+        i4 = int_add(i2, i3)
+        escape(i4)
+        jump(p0, i4)
+        """
+        self.optimize_loop_peeled(ops, 'Not, Not', preamble, expected)
+
+    def test_peel_guard_fail_args_renamed(self):
+        ops = """
+        [i0, p0]
+        guard_nonnull(p0) [i0]
+        i1 = int_sub(i0, 1)
+        i2 = int_is_true(i1)
+        guard_true(i2) [i1, p0]
+        jump(i1, p0)
+        """
+        preamble = """
+        [i0, p0]
+        guard_nonnull(p0) [i0]
+        i1 = int_sub(i0, 1)
+        i2 = int_is_true(i1)
+        guard_true(i2) [i1, p0]
+        jump(i1, p0)
+        """
+        expected = """
+        [i1, p0]
+        i3 = int_sub(i1, 1)
+        i4 = int_is_true(i3)
+        guard_true(i4) [i3, p0]
+        jump(i3, p0)
+        """
+        loop = self.optimize_loop_peeled(ops, 'Not, Not', preamble, expected)
+        # the guards of the two copies have their own descrs
+        guard1 = loop.operations[-2]
+        guard2 = loop.peeled_loop.operations[-2]
+        assert guard1.descr is not guard2.descr
+
+    def test_peel_virtual(self):
+        ops = """
+        [i0, p0]
+        i1 = getfield_gc(p0, descr=valuedescr)
+        i2 = int_add(i1, i0)
+        p1 = new_with_vtable(ConstClass(node_vtable))
+        setfield_gc(p1, i2, descr=valuedescr)
+        jump(i0, p1)
+        """
+        preamble = """
+        [i0, i1]
+        i2 = int_add(i1, i0)
+        jump(i2, i0)
+        """
+        expected = """
+        [i2, i0]
+        i3 = int_add(i2, i0)
+        jump(i3, i0)
+        """
+        self.optimize_loop_peeled(ops, 'Not, Virtual(node_vtable, valuedescr=Not)',
+                                  preamble, expected)
+
+    def test_peel_invalid_second_iteration(self):
+        ops = """
+        [p0]
+        guard_isnull(p0) []
+        p1 = new_with_vtable(ConstClass(node_vtable))
+        escape(p1)
+        jump(p1)
+        """
+        expected = """
+        [p0]
+        guard_isnull(p0) []
+        p1 = new_with_vtable(ConstClass(node_vtable))
+        escape(p1)
+        jump(p1)
+        """
+        self.optimize_loop_peeled(ops, 'Not', expected, None)
+
+
 ##class TestOOtype(BaseTestOptimizeOpt, OOtypeMixin):
 
 ##    def test_instanceof(self):
@@ -495,6 +495,31 @@ class RecursiveTests:
         res = self.meta_interp(main, [1], optimizer=OPTIMIZER_SIMPLE, trace_limit=TRACE_LIMIT)
         self.check_loops(call_may_force=0, call=0)
 
+    def test_should_always_inline(self):
+        def should_always_inline(k):
+            return k == 1
+        myjitdriver = JitDriver(greens=['k'], reds=['n', 'recurse'],
+                                should_always_inline=should_always_inline)
+        def loop(k, n, recurse=False):
+            while n:
+                myjitdriver.jit_merge_point(k=k, n=n, recurse=recurse)
+                n -= 1
+                if not recurse:
+                    loop(k, 10, True)
+                    myjitdriver.can_enter_jit(k=k, n=n, recurse=recurse)
+            return n
+
+        def main(k):
+            myjitdriver.set_param("threshold", 10)
+            myjitdriver.set_param('inlining', False)
+            return loop(k, 100)
+
+        res = self.meta_interp(main, [0], optimizer=OPTIMIZER_SIMPLE)
+        self.check_loops(call_may_force=1, call=0)
+
+        res = self.meta_interp(main, [1], optimizer=OPTIMIZER_SIMPLE)
+        self.check_loops(call_may_force=0, call=0)
+
     def test_trace_from_start(self):
         def p(pc, code):
             code = hlstr(code)
@@ -199,6 +199,7 @@ def test_simple_read_tagged_ints():
 
 def test_prepare_virtuals():
     class FakeVinfo(object):
+        is_string = False
         def allocate(self, decoder):
             return "allocated"
         def setfields(self, decoder, virtual):
@@ -704,6 +705,69 @@ def test_ResumeDataLoopMemo_number():
                                           tag(1, TAGVIRTUAL)]
     assert numb5.prev is numb4
 
+def test_ResumeDataLoopMemo_number_shared():
+    b1, b2, b3 = [BoxInt(), BoxInt(), BoxInt()]
+    c1, c2, c3 = [ConstInt(1), ConstInt(2), ConstInt(3)]
+
+    env = [b1, c1, b2, b1, c2]
+    snap = Snapshot(None, env)
+    snap1 = Snapshot(snap, [c3, b3, b1, c1])
+    # another guard at the same position, with a new snapshot
+    snap2 = Snapshot(snap, [c3, b3, b1, c1])
+
+    memo = ResumeDataLoopMemo(FakeMetaInterpStaticData())
+    numb1, liveboxes1, v = memo.number({}, snap1)
+    size1 = memo.nresumebytes
+    assert size1 > 0
+    numb2, liveboxes2, v = memo.number({}, snap2)
+    assert numb2 is numb1
+    assert memo.nnumbreused == 1
+    assert memo.nresumebytes == size1
+
+    # a different content is not shared
+    snap3 = Snapshot(snap, [c3, b3, b1, c2])
+    numb3, liveboxes3, v = memo.number({}, snap3)
+    assert numb3 is not numb1
+    assert numb3.prev is numb1.prev
+    assert memo.nresumebytes > size1
+
+    # after forget_numberings(), the identical parent frame is shared
+    size3 = memo.nresumebytes
+    memo.forget_numberings(b3)
+    snap4 = Snapshot(snap, [c3, b3, b1, c2])
+    numb4, liveboxes4, v = memo.number({}, snap4)
+    assert numb4 is numb3
+    assert memo.nresumebytes == size3
+
+def test_ResumeDataLoopMemo_share_rd_virtuals():
+    memo = ResumeDataLoopMemo(FakeMetaInterpStaticData())
+    vinfo1 = VirtualInfo(None, [])
+    vinfo2 = VirtualInfo(None, [])
+    virtuals1 = [vinfo1, None, vinfo2]
+    assert memo.share_rd_virtuals(virtuals1) is virtuals1
+    size = memo.nresumebytes
+    assert memo.share_rd_virtuals([vinfo1, None, vinfo2]) is virtuals1
+    assert memo.nresumebytes == size
+    virtuals2 = [vinfo2, None, vinfo1]
+    assert memo.share_rd_virtuals(virtuals2) is virtuals2
+    assert memo.nresumebytes > size
+    virtuals3 = [vinfo2, None]
+    assert memo.share_rd_virtuals(virtuals3) is virtuals3
+
+def test_ResumeDataLoopMemo_share_rd_pendingfields():
+    memo = ResumeDataLoopMemo(FakeMetaInterpStaticData())
+    descr = LLtypeMixin.nextdescr
+    pending1 = [(descr, tag(0, TAGBOX), tag(1, TAGBOX))]
+    assert memo.share_rd_pendingfields(pending1) is pending1
+    size = memo.nresumebytes
+    pending2 = [(descr, tag(0, TAGBOX), tag(1, TAGBOX))]
+    assert memo.share_rd_pendingfields(pending2) is pending1
+    assert memo.nresumebytes == size
+    pending3 = [(descr, tag(0, TAGBOX), tag(2, TAGBOX))]
+    assert memo.share_rd_pendingfields(pending3) is pending3
+    pending4 = [(LLtypeMixin.valuedescr, tag(0, TAGBOX), tag(2, TAGBOX))]
+    assert memo.share_rd_pendingfields(pending4) is pending4
+
 def test_ResumeDataLoopMemo_number_boxes():
     memo = ResumeDataLoopMemo(FakeMetaInterpStaticData())
     b1, b2 = [BoxInt(), BoxInt()]
@@ -1123,6 +1187,24 @@ def test_virtual_adder_pending_fields():
     assert demo55.next == demo66
 
 
+def test_virtual_adder_shares_between_guards():
+    b1s, b2s, b3s = [BoxInt(1), BoxInt(2), BoxInt(3)]
+    memo = ResumeDataLoopMemo(FakeMetaInterpStaticData())
+    storage1 = make_storage(b1s, b2s, b3s)
+    ResumeDataVirtualAdder(storage1, memo).finish({})
+    size = memo.nresumebytes
+    storage2 = make_storage(b1s, b2s, b3s)
+    ResumeDataVirtualAdder(storage2, memo).finish({})
+    # all the frames are the same, so the whole numbering is shared
+    assert storage2.rd_numb is storage1.rd_numb
+    assert memo.nguards == 2
+    assert memo.nresumebytes == size
+
+    storage3 = make_storage(b1s, b2s, b1s)
+    ResumeDataVirtualAdder(storage3, memo).finish({})
+    assert storage3.rd_numb is not storage1.rd_numb
+    assert memo.nresumebytes > size
+
 def test_invalidation_needed():
     class options:
         failargs_limit = 10
@@ -72,6 +72,41 @@ class StringTests:
         res = self.meta_interp(f, [6, 10])
         assert res == 6
 
+    def test_strconcat_guard_fail(self):
+        jitdriver = JitDriver(greens = [], reds = ['m', 'n', 'total'])
+        def f(n, m):
+            total = 0
+            while m >= 0:
+                jitdriver.can_enter_jit(m=m, n=n, total=total)
+                jitdriver.jit_merge_point(m=m, n=n, total=total)
+                s = chr(n) + chr(m)
+                if m % 3 == 0:
+                    # 's' is still virtual when this guard fails
+                    total += ord(s[0]) * len(s)
+                total += ord(s[1])
+                m -= 1
+            return total
+        res = self.meta_interp(f, [6, 100])
+        assert res == f(6, 100)
+
+    def test_strslice_guard_fail(self):
+        jitdriver = JitDriver(greens = [], reds = ['m', 'total', 's'])
+        def f(n, m):
+            s = chr(n) * 5 + 'xyz'
+            total = 0
+            while m >= 0:
+                jitdriver.can_enter_jit(m=m, s=s, total=total)
+                jitdriver.jit_merge_point(m=m, s=s, total=total)
+                t = s[m % 4:]
+                u = s[1:m % 7 + 1]
+                if m % 5 == 0:
+                    total += len(u) * ord(t[-1]) + len(t)
+                total += ord(t[0])
+                m -= 1
+            return total
+        res = self.meta_interp(f, [6, 100])
+        assert res == f(6, 100)
+
 class TestOOtype(StringTests, OOJitMixin):
     CALL = "oosend"
     CALL_PURE = "oosend_pure"
@@ -79,3 +114,35 @@ class TestOOtype(StringTests, OOJitMixin):
 class TestLLtype(StringTests, LLJitMixin):
     CALL = "call"
     CALL_PURE = "call_pure"
+
+    def test_strconcat_pure(self):
+        jitdriver = JitDriver(greens = [], reds = ['m', 'n', 'total'])
+        def f(n, m):
+            total = 0
+            while m >= 0:
+                jitdriver.can_enter_jit(m=m, n=n, total=total)
+                jitdriver.jit_merge_point(m=m, n=n, total=total)
+                s = chr(n) + chr(m)
+                total += ord(s[0]) + ord(s[1]) + len(s)
+                m -= 1
+            return total
+        res = self.meta_interp(f, [6, 10])
+        assert res == f(6, 10)
+        self.check_loops(newstr=0, strsetitem=0, strgetitem=0, strlen=0,
+                         call=0, call_pure=0)
+
+    def test_strslice_pure(self):
+        jitdriver = JitDriver(greens = [], reds = ['m', 'total', 's'])
+        def f(n, m):
+            s = chr(n) * 10
+            total = 0
+            while m >= 0:
+                jitdriver.can_enter_jit(m=m, s=s, total=total)
+                jitdriver.jit_merge_point(m=m, s=s, total=total)
+                t = s[m % 3:]
+                total += ord(t[1]) + len(t)
+                m -= 1
+            return total
+        res = self.meta_interp(f, [6, 10])
+        assert res == f(6, 10)
+        self.check_loops(newstr=0, call=0, call_pure=0)
@@ -129,7 +129,7 @@ class WarmspotTests(object):
         from pypy.jit.metainterp import optimize
 
         state = warmrunnerdescr.jitdrivers_sd[0].warmstate
-        assert state.optimize_loop is optimize.optimize_loop
+        assert state.optimize_loop is optimize.optimize_loop_unroll
         assert state.optimize_bridge is optimize.optimize_bridge
 
     def test_static_debug_level(self, capfd):
@@ -152,20 +152,26 @@ def test_attach_unoptimized_bridge_from_interp():
     class FakeJitDriverSD:
         _green_args_spec = [lltype.Signed, lltype.Float]
         _get_jitcell_at_ptr = None
+    class FakeLoopToken(object):
+        pass
+    looptoken = FakeLoopToken()
     state = WarmEnterState(None, FakeJitDriverSD())
     get_jitcell = state.make_jitcell_getter()
     state.attach_unoptimized_bridge_from_interp([ConstInt(5),
                                                  ConstFloat(2.25)],
-                                                "entry loop token")
+                                                looptoken)
     cell1 = get_jitcell(True, 5, 2.25)
     assert cell1.counter < 0
-    assert cell1.entry_loop_token == "entry loop token"
+    assert cell1.get_entry_loop_token() is looptoken
 
 def test_make_jitdriver_callbacks_1():
     class FakeJitDriverSD:
         _green_args_spec = [lltype.Signed, lltype.Float]
         _get_printable_location_ptr = None
         _confirm_enter_jit_ptr = None
+        _get_threshold_ptr = None
+        _should_always_inline_ptr = None
+        _threshold_reached_ptr = None
     class FakeCell:
         dont_trace_here = False
     state = WarmEnterState(None, FakeJitDriverSD())
@@ -189,6 +195,9 @@ def test_make_jitdriver_callbacks_3():
         _green_args_spec = [lltype.Signed, lltype.Float]
         _get_printable_location_ptr = llhelper(GET_LOCATION, get_location)
         _confirm_enter_jit_ptr = None
+        _get_threshold_ptr = None
+        _should_always_inline_ptr = None
+        _threshold_reached_ptr = None
         _get_jitcell_at_ptr = None
     state = WarmEnterState(FakeWarmRunnerDesc(), FakeJitDriverSD())
     state.make_jitdriver_callbacks()
@@ -209,9 +218,45 @@ def test_make_jitdriver_callbacks_4():
         _green_args_spec = [lltype.Signed, lltype.Float]
         _get_printable_location_ptr = None
         _confirm_enter_jit_ptr = llhelper(ENTER_JIT, confirm_enter_jit)
+        _get_threshold_ptr = None
+        _should_always_inline_ptr = None
+        _threshold_reached_ptr = None
         _get_jitcell_at_ptr = None
 
     state = WarmEnterState(FakeWarmRunnerDesc(), FakeJitDriverSD())
     state.make_jitdriver_callbacks()
     res = state.confirm_enter_jit(5, 42.5, 3)
     assert res is True
+
+def test_make_jitdriver_callbacks_5():
+    def get_threshold(x, y):
+        return x
+    def should_always_inline(x, y):
+        return y > 0.0
+    GET_THRESHOLD = lltype.Ptr(lltype.FuncType([lltype.Signed, lltype.Float],
+                                               lltype.Signed))
+    SHOULD_INLINE = lltype.Ptr(lltype.FuncType([lltype.Signed, lltype.Float],
+                                               lltype.Bool))
+    class FakeWarmRunnerDesc:
+        rtyper = None
+    class FakeJitDriverSD:
+        _green_args_spec = [lltype.Signed, lltype.Float]
+        _get_printable_location_ptr = None
+        _confirm_enter_jit_ptr = None
+        _get_threshold_ptr = llhelper(GET_THRESHOLD, get_threshold)
+        _should_always_inline_ptr = llhelper(SHOULD_INLINE,
+                                             should_always_inline)
+        _threshold_reached_ptr = None
+        _get_jitcell_at_ptr = None
+    state = WarmEnterState(FakeWarmRunnerDesc(), FakeJitDriverSD())
+    state.make_jitdriver_callbacks()
+    # 0 means the default threshold of the jitdriver
+    assert state.get_increment(0, 1.5) == state.increment_threshold
+    assert state.get_increment(7, 1.5) == state.compute_increment(7)
+    assert state.get_increment(7, 1.5) > state.increment_threshold
+    # a negative threshold means 'never trace from here'
+    assert state.get_increment(-1, 1.5) == 0
+    assert state.can_inline_greenargs(7, 1.5)
+    assert not state.can_inline_greenargs(-1, 1.5)
+    assert state.should_always_inline([ConstInt(5), ConstFloat(1.5)])
+    assert not state.should_always_inline([ConstInt(5), ConstFloat(-1.5)])
@@ -21,6 +21,7 @@ class TranslationTest:
         # - full optimizer
         # - jitdriver hooks
         # - two JITs
+        # - virtual strings
 
         class Frame(object):
             _virtualizable2_ = ['i']
@@ -60,14 +61,20 @@ class TranslationTest:
                 frame.i -= 1
             return total * 10
         #
-        myjitdriver2 = JitDriver(greens = ['g'], reds = ['m', 'x'])
+        myjitdriver2 = JitDriver(greens = ['g'], reds = ['m', 'x', 's'])
         def f2(g, m, x):
+            s = ''
             while m > 0:
-                myjitdriver2.can_enter_jit(g=g, m=m, x=x)
-                myjitdriver2.jit_merge_point(g=g, m=m, x=x)
+                myjitdriver2.can_enter_jit(g=g, m=m, x=x, s=s)
+                myjitdriver2.jit_merge_point(g=g, m=m, x=x, s=s)
                 m -= 1
                 x += 3
-            return x
+                t = s + chr(m % 256)
+                if len(t) > 5:
+                    t = t[1:]
+                s = t
+                x += ord(s[0]) & 1
+            return x + len(s)
         #
         def main(i, j):
             return f(i) - f2(i+j, i, j)
@@ -16,7 +16,7 @@ from pypy.rpython.lltypesystem.lloperation import llop
 from pypy.translator.simplify import get_funcobj, get_functype
 from pypy.translator.unsimplify import call_final_function
 
-from pypy.jit.metainterp import history, pyjitpl, gc
+from pypy.jit.metainterp import history, pyjitpl, gc, memmgr
 from pypy.jit.metainterp.pyjitpl import MetaInterpStaticData, MetaInterp
 from pypy.jit.metainterp.typesystem import LLTypeHelper, OOTypeHelper
 from pypy.jit.metainterp.jitprof import Profiler, EmptyProfiler
@@ -66,7 +66,8 @@ def ll_meta_interp(function, args, backendopt=False, type_system='lltype',
 
 def jittify_and_run(interp, graph, args, repeat=1,
                     backendopt=False, trace_limit=sys.maxint,
-                    debug_level=DEBUG_STEPS, inline=False, **kwds):
+                    debug_level=DEBUG_STEPS, inline=False,
+                    loop_longevity=0, **kwds):
     translator = interp.typer.annotator.translator
     translator.config.translation.gc = "boehm"
     translator.config.translation.list_comprehension_operations = True
@@ -77,6 +78,7 @@ def jittify_and_run(interp, graph, args, repeat=1,
         jd.warmstate.set_param_trace_limit(trace_limit)
         jd.warmstate.set_param_inlining(inline)
         jd.warmstate.set_param_debug(debug_level)
+        jd.warmstate.set_param_loop_longevity(loop_longevity)
     warmrunnerdesc.finish()
     res = interp.eval_graph(graph, args)
     if not kwds.get('translate_support_code', False):
@@ -275,6 +277,8 @@ class WarmRunnerDesc(object):
                                                   self.opt,
                                                   ProfilerClass=ProfilerClass,
                                                   warmrunnerdesc=self)
+        self.memory_manager = memmgr.MemoryManager()
+        self.metainterp_sd.memory_manager = self.memory_manager
 
     def make_virtualizable_infos(self):
         vinfos = {}
@@ -425,6 +429,14 @@ class WarmRunnerDesc(object):
             jd._confirm_enter_jit_ptr = self._make_hook_graph(jd,
                 annhelper, jd.jitdriver.confirm_enter_jit, annmodel.s_Bool,
                 onlygreens=False)
+            jd._get_threshold_ptr = self._make_hook_graph(jd,
+                annhelper, jd.jitdriver.get_threshold,
+                annmodel.SomeInteger())
+            jd._should_always_inline_ptr = self._make_hook_graph(jd,
+                annhelper, jd.jitdriver.should_always_inline,
+                annmodel.s_Bool)
+            jd._threshold_reached_ptr = self._make_hook_graph(jd,
+                annhelper, jd.jitdriver.threshold_reached, annmodel.s_None)
         annhelper.finish()
 
     def _make_hook_graph(self, jitdriver_sd, annhelper, func,
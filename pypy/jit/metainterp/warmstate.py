@@ -1,4 +1,4 @@
-import sys
+import sys, weakref
 from pypy.rpython.lltypesystem import lltype, llmemory, rstr
 from pypy.rpython.ootypesystem import ootype
 from pypy.rpython.annlowlevel import hlstr, llstr, cast_base_ptr_to_instance
@@ -8,10 +8,12 @@ from pypy.rlib.rarithmetic import intmask
 from pypy.rlib.nonconst import NonConstant
 from pypy.rlib.unroll import unrolling_iterable
 from pypy.rlib.jit import PARAMETERS, OPTIMIZER_SIMPLE, OPTIMIZER_FULL
+from pypy.rlib.jit import OPTIMIZER_NO_UNROLL
 from pypy.rlib.jit import DEBUG_PROFILE
 from pypy.rlib.jit import BaseJitCell
 from pypy.rlib.debug import debug_start, debug_stop, debug_print
 from pypy.jit.metainterp import history
+from pypy.jit.metainterp.jitprof import jit_statistics
 from pypy.jit.codewriter import support, heaptracker
 
 # ____________________________________________________________
@@ -142,9 +144,42 @@ class JitCell(BaseJitCell):
     #     counter == -1: there is an entry bridge for this cell
     #     counter == -2: tracing is currently going on for this cell
     counter = 0
-    compiled_merge_points = None
+    # the value added to 'counter' on each iteration, computed from the
+    # get_threshold() hook the first time and cached until either the
+    # global threshold or the parameters of this cell change
+    increment = 0
+    increment_generation = -1
+    compiled_merge_points_wref = None    # list of weakrefs to LoopToken
     dont_trace_here = False
-    entry_loop_token = None
+    wref_entry_loop_token = None         # (possibly) one weakref to LoopToken
+
+    def get_compiled_merge_points(self):
+        result = []
+        if self.compiled_merge_points_wref is not None:
+            for wref in self.compiled_merge_points_wref:
+                looptoken = wref()
+                if looptoken is not None:
+                    result.append(looptoken)
+        return result
+
+    def invalidate_increment(self):
+        self.increment_generation = -1
+
+    def set_compiled_merge_points(self, looptokens):
+        self.compiled_merge_points_wref = [self._makeref(token)
+                                           for token in looptokens]
+
+    def get_entry_loop_token(self):
+        if self.wref_entry_loop_token is not None:
+            return self.wref_entry_loop_token()
+        return None
+
+    def set_entry_loop_token(self, looptoken):
+        self.wref_entry_loop_token = self._makeref(looptoken)
+
+    def _makeref(self, looptoken):
+        assert looptoken is not None
+        return weakref.ref(looptoken)
 
 # ____________________________________________________________
 
@@ -152,6 +187,7 @@ class JitCell(BaseJitCell):
 class WarmEnterState(object):
     THRESHOLD_LIMIT = sys.maxint // 2
     default_jitcell_dict = None
+    threshold_generation = 0
 
     def __init__(self, warmrunnerdesc, jitdriver_sd):
         "NOT_RPYTHON"
@@ -161,6 +197,10 @@ class WarmEnterState(object):
             self.profiler = warmrunnerdesc.metainterp_sd.profiler
         except AttributeError:       # for tests
             self.profiler = None
+        try:
+            self.memory_manager = warmrunnerdesc.memory_manager
+        except AttributeError:       # for tests
+            self.memory_manager = None
         # initialize the state with the default values of the
         # parameters specified in rlib/jit.py
         for name, default_value in PARAMETERS.items():
@@ -168,10 +208,15 @@ class WarmEnterState(object):
             meth(default_value)
 
     def set_param_threshold(self, threshold):
+        self.increment_threshold = self.compute_increment(threshold)
+        # invalidates the 'increment' cached on all the cells
+        self.threshold_generation += 1
+
+    def compute_increment(self, threshold):
         if threshold < 2:
             threshold = 2
-        self.increment_threshold = (self.THRESHOLD_LIMIT // threshold) + 1
         # the number is at least 1, and at most about half THRESHOLD_LIMIT
+        return (self.THRESHOLD_LIMIT // threshold) + 1
 
     def set_param_trace_eagerness(self, value):
         self.trace_eagerness = value
@@ -187,13 +232,22 @@ class WarmEnterState(object):
             from pypy.jit.metainterp import simple_optimize
             self.optimize_loop = simple_optimize.optimize_loop
             self.optimize_bridge = simple_optimize.optimize_bridge
-        elif optimizer == OPTIMIZER_FULL:
+        elif optimizer == OPTIMIZER_NO_UNROLL:
             from pypy.jit.metainterp import optimize
             self.optimize_loop = optimize.optimize_loop
             self.optimize_bridge = optimize.optimize_bridge
+        elif optimizer == OPTIMIZER_FULL:
+            from pypy.jit.metainterp import optimize
+            self.optimize_loop = optimize.optimize_loop_unroll
+            self.optimize_bridge = optimize.optimize_bridge
         else:
             raise ValueError("unknown optimizer")
 
+    def set_param_loop_longevity(self, value):
+        # note: it's a global parameter, not a per-jitdriver one
+        if self.memory_manager is not None:     # None only for tests
+            self.memory_manager.set_max_age(value)
+
     def set_param_debug(self, value):
         self.debug_level = value
         if self.profiler is not None:
@@ -211,7 +265,7 @@ class WarmEnterState(object):
                                               entry_loop_token):
         cell = self.jit_cell_at_key(greenkey)
         cell.counter = -1
-        cell.entry_loop_token = entry_loop_token
+        cell.set_entry_loop_token(entry_loop_token)
 
     # ----------
 
@@ -229,6 +283,9 @@ class WarmEnterState(object):
         set_future_values = self.make_set_future_values()
         self.make_jitdriver_callbacks()
         confirm_enter_jit = self.confirm_enter_jit
+        threshold_reached = self.threshold_reached
+        get_increment = self.get_increment
+        memmgr = self.memory_manager
 
         def maybe_compile_and_run(*args):
             """Entry point to the JIT.  Called at the point with the
@@ -252,7 +309,10 @@ class WarmEnterState(object):
 
             if cell.counter >= 0:
                 # update the profiling counter
-                n = cell.counter + self.increment_threshold
+                if cell.increment_generation != self.threshold_generation:
+                    cell.increment = get_increment(*greenargs)
+                    cell.increment_generation = self.threshold_generation
+                n = cell.counter + cell.increment
                 if n <= self.THRESHOLD_LIMIT:       # bound not reached
                     cell.counter = n
                     return
@@ -260,6 +320,7 @@ class WarmEnterState(object):
                     cell.counter = 0
                     return
                 # bound reached; start tracing
+                threshold_reached(*greenargs)
                 from pypy.jit.metainterp.pyjitpl import MetaInterp
                 metainterp = MetaInterp(metainterp_sd, jitdriver_sd)
                 # set counter to -2, to mean "tracing in effect"
@@ -278,14 +339,20 @@ class WarmEnterState(object):
                 assert cell.counter == -1
                 if not confirm_enter_jit(*args):
                     return
+                loop_token = cell.get_entry_loop_token()
+                if loop_token is None:   # it was a weakref that has been freed
+                    cell.counter = 0
+                    return
                 # machine code was already compiled for these greenargs
                 # get the assembler and fill in the boxes
                 set_future_values(*args[num_green_args:])
-                loop_token = cell.entry_loop_token
+                if memmgr is not None:
+                    memmgr.keep_loop_alive(loop_token)
 
             # ---------- execute assembler ----------
             while True:     # until interrupted by an exception
                 metainterp_sd.profiler.start_running()
+                jit_statistics.running_count += 1
                 debug_start("jit-running")
                 fail_descr = metainterp_sd.cpu.execute_token(loop_token)
                 debug_stop("jit-running")
@@ -492,10 +559,32 @@ class WarmEnterState(object):
         unwrap_greenkey = self.make_unwrap_greenkey()
         jit_getter = self.make_jitcell_getter()
 
+        get_threshold_ptr = self.jitdriver_sd._get_threshold_ptr
+        if get_threshold_ptr is None:
+            def get_threshold(*greenargs):
+                return 0
+        else:
+            rtyper = self.warmrunnerdesc.rtyper
+            #
+            def get_threshold(*greenargs):
+                fn = support.maybe_on_top_of_llinterp(rtyper,
+                                                      get_threshold_ptr)
+                return fn(*greenargs)
+        def get_increment(*greenargs):
+            threshold = get_threshold(*greenargs)
+            if threshold == 0:
+                return self.increment_threshold
+            if threshold < 0:      # never trace from here
+                return 0
+            return self.compute_increment(threshold)
+        self.get_increment = get_increment
+
         def can_inline_greenargs(*greenargs):
             cell = jit_getter(False, *greenargs)
             if cell is not None and cell.dont_trace_here:
                 return False
+            if get_threshold(*greenargs) < 0:
+                return False
             return True
         def can_inline_callable(greenkey):
             greenargs = unwrap_greenkey(greenkey)
@@ -503,12 +592,26 @@ class WarmEnterState(object):
         self.can_inline_greenargs = can_inline_greenargs
         self.can_inline_callable = can_inline_callable
 
+        should_always_inline_ptr = self.jitdriver_sd._should_always_inline_ptr
+        if should_always_inline_ptr is None:
+            def should_always_inline(greenkey):
+                return False
+        else:
+            rtyper = self.warmrunnerdesc.rtyper
+            #
+            def should_always_inline(greenkey):
+                greenargs = unwrap_greenkey(greenkey)
+                fn = support.maybe_on_top_of_llinterp(rtyper,
+                                                      should_always_inline_ptr)
+                return fn(*greenargs)
+        self.should_always_inline = should_always_inline
+
         def get_assembler_token(greenkey):
             greenargs = unwrap_greenkey(greenkey)
             cell = jit_getter(False, *greenargs)
             if cell is None or cell.counter >= 0:
                 return None
-            return cell.entry_loop_token
+            return cell.get_entry_loop_token()
         self.get_assembler_token = get_assembler_token
         
         #
@@ -546,3 +649,16 @@ class WarmEnterState(object):
                                                       confirm_enter_jit_ptr)
                 return fn(*args)
         self.confirm_enter_jit = confirm_enter_jit
+        #
+        threshold_reached_ptr = self.jitdriver_sd._threshold_reached_ptr
+        if threshold_reached_ptr is None:
+            def threshold_reached(*greenargs):
+                pass
+        else:
+            rtyper = self.warmrunnerdesc.rtyper
+            #
+            def threshold_reached(*greenargs):
+                fn = support.maybe_on_top_of_llinterp(rtyper,
+                                                      threshold_reached_ptr)
+                fn(*greenargs)
+        self.threshold_reached = threshold_reached
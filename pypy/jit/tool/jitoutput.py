@@ -27,6 +27,7 @@ REGEXES = [
     (('nvirtuals',), '^nvirtuals:\s+(\d+)$'),
     (('nvholes',), '^nvholes:\s+(\d+)$'),
     (('nvreused',), '^nvreused:\s+(\d+)$'),
+    (('resume_bytes',), '^resume bytes:\s+(\d+)$'),
     ]
 
 class Ops(object):
@@ -54,6 +55,7 @@ class OutputInfo(object):
     nvirtuals = 0
     nvholes = 0
     nvreused = 0
+    resume_bytes = 0
 
     def __init__(self):
         self.ops = Ops()
@@ -33,13 +33,13 @@ def test_really_run():
     assert info.tracing_no == 1
     assert info.asm_no == 1
     assert info.blackhole_no == 1
-    assert info.backend_no == 1
+    assert info.backend_no == 2     # the preamble and the peeled loop
     assert info.ops.total == 2
     assert info.recorded_ops.total == 2
     assert info.recorded_ops.calls == 0
     assert info.guards == 1
-    assert info.opt_ops == 6
-    assert info.opt_guards == 1
+    assert info.opt_ops == 11
+    assert info.opt_guards == 2
     assert info.forcings == 0
 
 DATA = '''Tracing:         1       0.006992
@@ -60,6 +60,7 @@ abort: vable escape:    12
 nvirtuals:              13
 nvholes:                14
 nvreused:               15
+resume bytes:           16
 '''
 
 def test_parse():
@@ -83,3 +84,4 @@ def test_parse():
     assert info.nvirtuals == 13
     assert info.nvholes == 14
     assert info.nvreused == 15
+    assert info.resume_bytes == 16
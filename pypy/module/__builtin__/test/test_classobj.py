@@ -935,9 +935,9 @@ class AppTestOldStyleSharing(AppTestOldstyle):
         if option.runappdirect:
             py.test.skip("can only be run on py.py")
         def is_sharing(space, w_inst):
-            from pypy.objspace.std.sharingdict import SharedDictImplementation
+            from pypy.objspace.std.sharingdict import SharedDictStrategy
             w_d = w_inst.getdict()
-            return space.wrap(isinstance(w_d, SharedDictImplementation) and w_d.r_dict_content is None)
+            return space.wrap(isinstance(w_d.strategy, SharedDictStrategy))
         cls.w_is_sharing = cls.space.wrap(gateway.interp2app(is_sharing))
 
 
@@ -955,9 +955,9 @@ class AppTestOldStyleModDict(object):
         if option.runappdirect:
             py.test.skip("can only be run on py.py")
         def is_strdict(space, w_class):
-            from pypy.objspace.std.dictmultiobject import StrDictImplementation
+            from pypy.objspace.std.dictmultiobject import StrDictStrategy
             w_d = w_class.getdict()
-            return space.wrap(isinstance(w_d, StrDictImplementation) and w_d.r_dict_content is None)
+            return space.wrap(isinstance(w_d.strategy, StrDictStrategy))
 
         cls.w_is_strdict = cls.space.wrap(gateway.interp2app(is_strdict))
 
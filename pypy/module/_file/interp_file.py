@@ -2,6 +2,8 @@ import py
 import os
 from pypy.rlib import streamio
 from pypy.rlib.rarithmetic import r_longlong
+from pypy.rlib.objectmodel import keepalive_until_here
+from pypy.rpython.lltypesystem import rffi
 from pypy.module._file.interp_stream import W_AbstractStream
 from pypy.module._file.interp_stream import StreamErrors, wrap_streamerror
 from pypy.module.posix.interp_posix import dispatch_filename
@@ -149,6 +151,16 @@ class W_File(W_AbstractStream):
                 result.append(data)
             return ''.join(result)
 
+    def direct_readinto_raw(self, dataptr, n):
+        stream = self.getstream()
+        count = 0
+        while count < n:
+            got = stream.readinto_raw(rffi.ptradd(dataptr, count), n - count)
+            if got == 0:
+                break
+            count += got
+        return count
+
     def direct_readline(self, size=-1):
         stream = self.getstream()
         if size < 0:
@@ -409,13 +421,30 @@ optimizations previously implemented in the xreadlines module.""")
 
     def file_readinto(self, w_rwbuffer):
         """readinto() -> Undocumented.  Don't use this; it may go away."""
-        # XXX not the most efficient solution as it doesn't avoid the copying
         space = self.space
         rwbuffer = space.rwbuffer_w(w_rwbuffer)
-        w_data = self.file_read(rwbuffer.getlength())
-        data = space.str_w(w_data)
-        rwbuffer.setslice(0, data)
-        return space.wrap(len(data))
+        dataptr = rwbuffer.get_raw_address()
+        if not dataptr:
+            # the buffer has no stable raw memory: read into a string
+            # and copy it over
+            w_data = self.file_read(rwbuffer.getlength())
+            data = space.str_w(w_data)
+            rwbuffer.setslice(0, data)
+            return space.wrap(len(data))
+        # the memory must stay there while the GIL is released
+        rwbuffer.pin()
+        self.lock()
+        try:
+            try:
+                count = self.direct_readinto_raw(dataptr,
+                                                 rwbuffer.getlength())
+            except StreamErrors, e:
+                raise wrap_streamerror(space, e, self.w_name)
+        finally:
+            self.unlock()
+            rwbuffer.unpin()
+        keepalive_until_here(rwbuffer)
+        return space.wrap(count)
     file_readinto.unwrap_spec = ['self', W_Root]
 
 
@@ -520,6 +520,23 @@ class AppTestAFewExtra:
         assert len(a) == 10
         assert a.tostring() == 'foobar6789'
 
+    def test_readinto_large(self):
+        from array import array
+        fn = self.temptestfile
+        data = ''.join([chr(i & 0xff) for i in range(40000)])
+        f = open(fn, 'wb')
+        f.write(data)
+        f.close()
+        for buffering in [-1, 0]:
+            a = array('c', 'x' * 50000)
+            f = open(fn, 'rb', buffering)
+            assert f.read(3) == data[:3]
+            n = f.readinto(a)
+            assert f.read() == ''
+            f.close()
+            assert n == 40000 - 3
+            assert a.tostring() == data[3:] + 'x' * (50000 - n)
+
     def test_weakref(self):
         """Files are weakrefable."""
         import weakref
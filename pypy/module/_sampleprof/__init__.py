@@ -0,0 +1,20 @@
+""" _sampleprof module
+"""
+
+from pypy.interpreter.mixedmodule import MixedModule
+
+class Module(MixedModule):
+    """Low-overhead sampling profiler.  At regular intervals of CPU time,
+the stack of code objects of the running thread is recorded into a
+preallocated ring buffer.  Profiler objects turn the samples into
+statistics in the same format as the ones of _lsprof."""
+
+    interpleveldefs = {
+        'enable':     'interp_sampleprof.enable',
+        'disable':    'interp_sampleprof.disable',
+        'getsamples': 'interp_sampleprof.getsamples',
+    }
+
+    appleveldefs = {
+        'Profiler':   'app_sampleprof.Profiler',
+    }
@@ -0,0 +1,128 @@
+class profiler_entry(object):
+    def __init__(self, code):
+        self.code = code
+        self.callcount = 0
+        self.reccallcount = 0
+        self.inlinetime = 0.0
+        self.totaltime = 0.0
+        self.subentries = {}
+        self.calls = []
+
+class profiler_subentry(object):
+    def __init__(self, code):
+        self.code = code
+        self.callcount = 0
+        self.reccallcount = 0
+        self.inlinetime = 0.0
+        self.totaltime = 0.0
+
+def label(code):
+    return (code.co_filename, code.co_firstlineno, code.co_name)
+
+
+class Profiler(object):
+    """Profiler(interval=0.005, nsamples=10000, maxdepth=64)
+
+    Builds a sampling profiler: while it is enabled, the stack is
+    recorded every 'interval' seconds of CPU time.  The statistics are
+    estimated from the samples; their 'callcount' fields are numbers of
+    samples, not numbers of calls.  Only one profiler can be enabled at
+    a time.  getstats() returns entries like the ones of _lsprof, so
+    that pstats.Stats() and the KCacheGrind class of lsprofcalltree.py
+    accept Profiler objects.
+    """
+
+    def __init__(self, interval=0.005, nsamples=10000, maxdepth=64):
+        self.interval = interval
+        self.nsamples = nsamples
+        self.maxdepth = maxdepth
+        self.enabled = False
+        self.samples = []
+
+    def enable(self):
+        import _sampleprof
+        _sampleprof.enable(self.interval, self.nsamples, self.maxdepth)
+        self.enabled = True
+
+    def disable(self):
+        import _sampleprof
+        if self.enabled:
+            _sampleprof.disable()
+            self.enabled = False
+            self.samples = _sampleprof.getsamples()
+
+    def jitted_samples(self):
+        """Return the number of samples taken while running JIT code."""
+        return len([jitted for jitted, codes in self.samples if jitted])
+
+    def getstats(self):
+        interval = self.interval
+        entries = {}
+        for jitted, codes in self.samples:
+            seen = {}
+            for i in range(len(codes)):
+                code = codes[i]
+                try:
+                    entry = entries[code]
+                except KeyError:
+                    entry = entries[code] = profiler_entry(code)
+                if i == 0:
+                    entry.inlinetime += interval
+                if code not in seen:
+                    # count recursive functions only once per sample
+                    seen[code] = None
+                    entry.callcount += 1
+                    entry.totaltime += interval
+                if i + 1 < len(codes):
+                    caller = codes[i + 1]
+                    if (caller, code) in seen:
+                        continue
+                    seen[caller, code] = None
+                    try:
+                        callerentry = entries[caller]
+                    except KeyError:
+                        callerentry = entries[caller] = profiler_entry(caller)
+                    try:
+                        subentry = callerentry.subentries[code]
+                    except KeyError:
+                        subentry = profiler_subentry(code)
+                        callerentry.subentries[code] = subentry
+                    if i == 0:
+                        subentry.inlinetime += interval
+                    subentry.callcount += 1
+                    subentry.totaltime += interval
+        for entry in entries.values():
+            entry.calls = entry.subentries.values()
+        return entries.values()
+
+    def create_stats(self):
+        """Compute self.stats in the format of the pstats module."""
+        self.disable()
+        entries = self.getstats()
+        self.stats = {}
+        callersdicts = {}
+        for entry in entries:
+            callers = {}
+            callersdicts[entry.code] = callers
+            self.stats[label(entry.code)] = (entry.callcount, entry.callcount,
+                                             entry.inlinetime,
+                                             entry.totaltime, callers)
+        for entry in entries:
+            func = label(entry.code)
+            for subentry in entry.calls:
+                callers = callersdicts[subentry.code]
+                callers[func] = (subentry.callcount, subentry.callcount,
+                                 subentry.inlinetime, subentry.totaltime)
+
+    def dump_stats(self, file):
+        import marshal
+        f = open(file, 'wb')
+        try:
+            self.create_stats()
+            marshal.dump(self.stats, f)
+        finally:
+            f.close()
+
+    def print_stats(self, sort=-1):
+        import pstats
+        pstats.Stats(self).strip_dirs().sort_stats(sort).print_stats()
@@ -0,0 +1,176 @@
+from pypy.interpreter.error import OperationError
+from pypy.interpreter.baseobjspace import ObjSpace
+from pypy.module.signal import interp_signal
+from pypy.rpython.lltypesystem import lltype, rffi
+from pypy.rpython.tool import rffi_platform
+from pypy.translator.tool.cbuild import ExternalCompilationInfo
+from pypy.rlib import jit
+
+eci = ExternalCompilationInfo(
+    includes = ['sys/time.h', 'signal.h'],
+)
+
+class CConfig:
+    _compilation_info_ = eci
+    ITIMER_PROF = rffi_platform.ConstantInteger('ITIMER_PROF')
+
+CConfig.timeval = rffi_platform.Struct('struct timeval',
+                                       [('tv_sec', rffi.LONG),
+                                        ('tv_usec', rffi.LONG)])
+CConfig.itimerval = rffi_platform.Struct('struct itimerval',
+                                         [('it_interval', CConfig.timeval),
+                                          ('it_value', CConfig.timeval)])
+
+cconfig = rffi_platform.configure(CConfig)
+ITIMER_PROF = cconfig['ITIMER_PROF']
+ITIMERVAL = cconfig['itimerval']
+
+c_setitimer = rffi.llexternal('setitimer',
+                              [rffi.INT, lltype.Ptr(ITIMERVAL),
+                               lltype.Ptr(ITIMERVAL)],
+                              rffi.INT, compilation_info=eci,
+                              threadsafe=False)
+c_siginterrupt = rffi.llexternal('siginterrupt', [rffi.INT, rffi.INT],
+                                 rffi.INT, compilation_info=eci,
+                                 threadsafe=False)
+
+def set_prof_timer(interval):
+    """Send SIGPROF every 'interval' seconds of CPU time, or never if
+    'interval' is 0."""
+    sec = int(interval)
+    usec = int((interval - sec) * 1000000.0)
+    if sec == 0 and usec == 0 and interval > 0.0:
+        usec = 1
+    p = lltype.malloc(ITIMERVAL, flavor='raw')
+    try:
+        rffi.setintfield(p.c_it_interval, 'c_tv_sec', sec)
+        rffi.setintfield(p.c_it_interval, 'c_tv_usec', usec)
+        rffi.setintfield(p.c_it_value, 'c_tv_sec', sec)
+        rffi.setintfield(p.c_it_value, 'c_tv_usec', usec)
+        c_setitimer(ITIMER_PROF, p, lltype.nullptr(ITIMERVAL))
+    finally:
+        lltype.free(p, flavor='raw')
+
+
+class SamplingProfiler(interp_signal.InterpSignalHandler):
+    """The state of the sampling profiler of a space.  Each sample takes
+    'maxdepth' consecutive entries of the 'codes' ring buffer, innermost
+    frame first.  Taking a sample doesn't allocate anything, so that the
+    profiler can be left running on a production process.
+    """
+    # the ticks must not make select(), poll() or sleep() return early
+    block_during_waits = True
+
+    def __init__(self, space):
+        self.space = space
+        self.enabled = False
+        self.maxdepth = 0
+        self.codes = []
+        self.depths = []
+        self.jitted = []
+        self.next = 0        # index of the next sample to write
+        self.count = 0       # number of samples in the buffer
+        self.dropped = 0     # number of samples overwritten by newer ones
+
+    def allocate(self, nsamples, maxdepth):
+        if len(self.depths) != nsamples or self.maxdepth != maxdepth:
+            self.codes = [None] * (nsamples * maxdepth)
+            self.depths = [0] * nsamples
+            self.jitted = [False] * nsamples
+            self.maxdepth = maxdepth
+        self.clear()
+
+    def clear(self):
+        self.next = 0
+        self.count = 0
+        self.dropped = 0
+
+    def handle_signal(self, executioncontext, frame):
+        if not self.enabled:
+            return
+        n = self.next
+        maxdepth = self.maxdepth
+        base = n * maxdepth
+        depth = 0
+        frame = executioncontext.gettopframe_nohidden()
+        while frame is not None and depth < maxdepth:
+            self.codes[base + depth] = frame.pycode
+            depth += 1
+            frame = executioncontext.getnextframe_nohidden(frame)
+        self.depths[n] = depth
+        self.jitted[n] = executioncontext.actions_from_jit
+        n += 1
+        if n == len(self.depths):
+            n = 0
+        self.next = n
+        if self.count < len(self.depths):
+            self.count += 1
+        else:
+            self.dropped += 1
+
+    def getsamples(self):
+        space = self.space
+        nsamples = len(self.depths)
+        maxdepth = self.maxdepth
+        start = self.next - self.count
+        if start < 0:
+            start += nsamples
+        samples_w = []
+        for i in range(self.count):
+            n = (start + i) % nsamples
+            base = n * maxdepth
+            codes_w = [None] * self.depths[n]
+            for j in range(self.depths[n]):
+                codes_w[j] = space.wrap(self.codes[base + j])
+            samples_w.append(space.newtuple([space.newbool(self.jitted[n]),
+                                             space.newtuple(codes_w)]))
+        return space.newlist(samples_w)
+
+
+@jit.dont_look_inside
+def enable(space, interval=0.005, nsamples=10000, maxdepth=64):
+    """enable(interval=0.005, nsamples=10000, maxdepth=64)
+
+Start sampling the stack every 'interval' seconds of CPU time, using
+SIGPROF.  The last 'nsamples' samples are kept, each with at most the
+'maxdepth' innermost frames.  This clears the samples of the previous
+run."""
+    if interval <= 0.0:
+        raise OperationError(space.w_ValueError,
+                             space.wrap("interval must be positive"))
+    if nsamples <= 0 or maxdepth <= 0:
+        raise OperationError(space.w_ValueError,
+                    space.wrap("nsamples and maxdepth must be positive"))
+    profiler = space.fromcache(SamplingProfiler)
+    if profiler.enabled:
+        set_prof_timer(0.0)
+    profiler.allocate(nsamples, maxdepth)
+    profiler.enabled = True
+    interp_signal.set_interp_handler(space, interp_signal.SIGPROF, profiler)
+    # restart the system calls interrupted by SIGPROF: the ticks must not
+    # make blocking I/O fail with EINTR in the program being profiled
+    c_siginterrupt(interp_signal.SIGPROF, 0)
+    set_prof_timer(interval)
+enable.unwrap_spec = [ObjSpace, float, int, int]
+
+@jit.dont_look_inside
+def disable(space):
+    """Stop sampling.  The samples taken so far are kept."""
+    profiler = space.fromcache(SamplingProfiler)
+    if profiler.enabled:
+        set_prof_timer(0.0)
+        # a last SIGPROF may be pending: let the profiler see it now,
+        # instead of the app-level handler later
+        space.check_signal_action.perform(space.getexecutioncontext(), None)
+        profiler.enabled = False
+        # give SIGPROF back to the app-level handler, or to the default
+        interp_signal.set_interp_handler(space, interp_signal.SIGPROF, None)
+disable.unwrap_spec = [ObjSpace]
+
+def getsamples(space):
+    """Return the list of the samples, oldest first.  Each sample is a
+tuple (jitted, codes), where 'codes' is the tuple of the code objects on
+the stack, innermost first, and 'jitted' tells if the innermost frame
+was running JIT-compiled code."""
+    return space.fromcache(SamplingProfiler).getsamples()
+getsamples.unwrap_spec = [ObjSpace]
@@ -0,0 +1,191 @@
+import os, py
+from pypy.conftest import gettestobjspace
+from pypy.tool.udir import udir
+
+class AppTestSampleProf:
+
+    def setup_class(cls):
+        if os.name != 'posix':
+            py.test.skip("requires setitimer() and SIGPROF")
+        space = gettestobjspace(usemodules=['_sampleprof', 'signal',
+                                            'select', 'rctime'])
+        cls.space = space
+        cls.w_tmpfilename = space.wrap(str(udir.join('sampleprof.stats')))
+
+    def test_samples(self):
+        import _sampleprof, time
+        def busy():
+            start = time.clock()
+            while time.clock() - start < 0.2:
+                pass
+        _sampleprof.enable(0.001)
+        busy()
+        _sampleprof.disable()
+        samples = _sampleprof.getsamples()
+        assert len(samples) > 0
+        for jitted, codes in samples:
+            assert jitted is False
+            assert len(codes) > 0
+        assert busy.func_code in [codes[0] for jitted, codes in samples]
+        # disabling doesn't lose the samples, but enabling again does
+        _sampleprof.disable()
+        assert _sampleprof.getsamples() == samples
+        _sampleprof.enable(1000.0)
+        _sampleprof.disable()
+        assert _sampleprof.getsamples() == []
+
+    def test_ring_buffer(self):
+        import _sampleprof, time
+        def busy():
+            start = time.clock()
+            while time.clock() - start < 0.2:
+                pass
+            _sampleprof.disable()
+        def f():
+            busy()
+        _sampleprof.enable(0.001, 3, 1)
+        f()
+        samples = _sampleprof.getsamples()
+        assert len(samples) == 3
+        for jitted, codes in samples:
+            assert codes == (busy.func_code,)
+
+    def test_app_handler_restored(self):
+        import _sampleprof, signal, posix
+        received = []
+        def handler(signum, frame):
+            received.append(signum)
+        prev = signal.signal(signal.SIGPROF, handler)
+        try:
+            _sampleprof.enable(0.001)
+            for i in range(10000):
+                pass
+            _sampleprof.disable()
+            assert received == []
+            assert signal.getsignal(signal.SIGPROF) is handler
+            posix.kill(posix.getpid(), signal.SIGPROF)
+            for i in range(10000):
+                # wait a bit for the signal to be delivered to the handler
+                if received:
+                    break
+            assert received == [signal.SIGPROF]
+            del received[:]
+            # while profiling, signal() only records the new handler
+            _sampleprof.enable(1000.0)
+            signal.signal(signal.SIGPROF, signal.SIG_IGN)
+            _sampleprof.disable()
+            assert signal.getsignal(signal.SIGPROF) == signal.SIG_IGN
+            posix.kill(posix.getpid(), signal.SIGPROF)
+            for i in range(10000):
+                # wait a bit - signal should not arrive
+                if received:
+                    break
+            assert received == []
+        finally:
+            signal.signal(signal.SIGPROF, prev)
+
+    def test_blocking_io(self):
+        import _sampleprof, signal, posix, time
+        # a SIGPROF arriving while we are blocked in a read() must not
+        # make it fail with EINTR
+        r, w = posix.pipe()
+        _sampleprof.enable(1000.0)
+        try:
+            ppid = posix.getpid()
+            pid = posix.fork()
+            if pid == 0:
+                try:
+                    time.sleep(0.2)
+                    posix.kill(ppid, signal.SIGPROF)
+                    time.sleep(0.2)
+                    posix.write(w, 'x')
+                finally:
+                    posix._exit(0)
+            try:
+                assert posix.read(r, 1) == 'x'
+            finally:
+                posix.waitpid(pid, 0)
+        finally:
+            _sampleprof.disable()
+            posix.close(r)
+            posix.close(w)
+
+    def test_blocking_waits(self):
+        import _sampleprof, signal, posix, time, select
+        # a SIGPROF arriving while we wait in select(), poll() or sleep()
+        # must not make them fail with EINTR or return early
+        def wait_select():
+            assert select.select([r], [], [], 0.6) == ([], [], [])
+        def wait_poll():
+            p = select.poll()
+            p.register(r, select.POLLIN)
+            assert p.poll(600) == []
+        def wait_sleep():
+            time.sleep(0.6)
+        waits = [wait_select, wait_poll, wait_sleep]
+        if hasattr(select, 'epoll'):
+            def wait_epoll():
+                ep = select.epoll()
+                ep.register(r, select.EPOLLIN)
+                try:
+                    assert ep.poll(0.6) == []
+                finally:
+                    ep.close()
+            waits.append(wait_epoll)
+        r, w = posix.pipe()
+        _sampleprof.enable(1000.0)
+        try:
+            for wait in waits:
+                ppid = posix.getpid()
+                pid = posix.fork()
+                if pid == 0:
+                    try:
+                        time.sleep(0.2)
+                        posix.kill(ppid, signal.SIGPROF)
+                    finally:
+                        posix._exit(0)
+                try:
+                    start = time.time()
+                    wait()
+                    assert time.time() - start >= 0.5
+                finally:
+                    posix.waitpid(pid, 0)
+        finally:
+            _sampleprof.disable()
+            posix.close(r)
+            posix.close(w)
+
+    def test_bad_arguments(self):
+        import _sampleprof
+        raises(ValueError, _sampleprof.enable, 0.0)
+        raises(ValueError, _sampleprof.enable, 0.01, 0)
+        raises(ValueError, _sampleprof.enable, 0.01, 10, -1)
+
+    def test_profiler(self):
+        import _sampleprof, time, pstats
+        def busy():
+            start = time.clock()
+            while time.clock() - start < 0.2:
+                pass
+        def f():
+            busy()
+        prof = _sampleprof.Profiler(0.001)
+        prof.enable()
+        f()
+        prof.disable()
+        assert prof.jitted_samples() == 0
+        entries = dict([(entry.code, entry) for entry in prof.getstats()])
+        fentry = entries[f.func_code]
+        bentry = entries[busy.func_code]
+        assert fentry.callcount > 0
+        assert bentry.inlinetime > 0.0
+        assert fentry.totaltime >= bentry.totaltime
+        [subentry] = [sub for sub in fentry.calls
+                          if sub.code is busy.func_code]
+        assert subentry.callcount == bentry.callcount
+
+        prof.dump_stats(self.tmpfilename)
+        stats = pstats.Stats(self.tmpfilename)
+        key = (busy.func_code.co_filename, busy.func_code.co_firstlineno,
+               'busy')
+        assert stats.stats[key][0] == bentry.callcount
@@ -4,6 +4,7 @@ from pypy.interpreter.typedef import TypeDef, make_weakref_descr,\
 from pypy.interpreter.gateway import ObjSpace, W_Root, NoneNotWrapped
 from pypy.interpreter.gateway import interp2app
 from pypy.rlib.rarithmetic import intmask
+from pypy.rlib.objectmodel import keepalive_until_here
 from pypy.rlib.rsocket import RSocket, AF_INET, SOCK_STREAM
 from pypy.rlib.rsocket import SocketError, SocketErrorWithErrno
 from pypy.interpreter.error import OperationError
@@ -316,7 +317,19 @@ class W_RSocket(Wrappable, RSocket):
         if nbytes == 0 or nbytes > lgt:
             nbytes = lgt
         try:
-            return space.wrap(self.recvinto(rwbuffer, nbytes, flags))
+            dataptr = rwbuffer.get_raw_address()
+            if dataptr:
+                # receive directly into the memory of the buffer, which
+                # must stay there while the GIL is released
+                rwbuffer.pin()
+                try:
+                    readlgt = self.recv_raw(dataptr, nbytes, flags)
+                finally:
+                    rwbuffer.unpin()
+                keepalive_until_here(rwbuffer)
+            else:
+                readlgt = self.recvinto(rwbuffer, nbytes, flags)
+            return space.wrap(readlgt)
         except SocketError, e:
             raise converted_error(space, e)
 
@@ -328,7 +341,16 @@ class W_RSocket(Wrappable, RSocket):
         if nbytes == 0 or nbytes > lgt:
             nbytes = lgt
         try:
-            readlgt, addr = self.recvfrom_into(rwbuffer, nbytes, flags)
+            dataptr = rwbuffer.get_raw_address()
+            if dataptr:
+                rwbuffer.pin()
+                try:
+                    readlgt, addr = self.recvfrom_raw(dataptr, nbytes, flags)
+                finally:
+                    rwbuffer.unpin()
+                keepalive_until_here(rwbuffer)
+            else:
+                readlgt, addr = self.recvfrom_into(rwbuffer, nbytes, flags)
             if addr:
                 w_addr = addr.as_object(space)
             else:
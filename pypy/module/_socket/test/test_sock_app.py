@@ -603,6 +603,22 @@ class AppTestSocketTCP:
         msg = buf.tostring()[:len(MSG)]
         assert msg == MSG
 
+    def test_recv_into_nbytes(self):
+        import socket
+        import array
+        cli = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        cli.connect(self.serv.getsockname())
+        conn, addr = self.serv.accept()
+        conn.send(array.array('i', [1, 2, 3]).tostring())
+        buf = array.array('i', [0, 0, 0, 0])
+        itemsize = buf.itemsize
+        nbytes = cli.recv_into(buf, 2 * itemsize)
+        assert nbytes == 2 * itemsize
+        assert buf.tolist() == [1, 2, 0, 0]
+        nbytes = cli.recv_into(buf)
+        assert nbytes == itemsize
+        assert buf.tolist() == [3, 2, 0, 0]
+
     def test_family(self):
         import socket
         cli = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
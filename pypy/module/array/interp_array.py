@@ -94,6 +94,8 @@ type_typedef.registermethods(globals())
 
 class W_ArrayBase(W_Object):
     typedef = type_typedef
+    itemsize = 0
+    exports = 0       # number of ArrayBuffers pinning the storage
 
     @staticmethod
     def register(typeorder):
@@ -145,18 +147,40 @@ for k, v in types.items():
 unroll_typecodes = unrolling_iterable(types.keys())
 
 class ArrayBuffer(RWBuffer):
-    def __init__(self, data, bytes):
-        self.data = data
-        self.len = bytes
+    """A view on the items of an array.  It reads the current storage of
+    the array at each access, so it stays valid if the array is resized."""
+
+    def __init__(self, array):
+        self.array = array
 
     def getlength(self):
-        return self.len
+        return self.array.len * self.array.itemsize
 
     def getitem(self, index):
-        return self.data[index]
+        return self.array.charbuf()[index]
+
+    def getslice(self, start, stop):
+        if start >= stop:
+            return ''
+        data = rffi.ptradd(self.array.charbuf(), start)
+        return rffi.charpsize2str(data, stop - start)
 
     def setitem(self, index, char):
-        self.data[index] = char
+        self.array.charbuf()[index] = char
+
+    def setslice(self, start, string):
+        data = self.array.charbuf()
+        for i in range(len(string)):
+            data[start + i] = string[i]
+
+    def get_raw_address(self):
+        return self.array.charbuf()
+
+    def pin(self):
+        self.array.exports += 1
+
+    def unpin(self):
+        self.array.exports -= 1
 
 
 
@@ -219,6 +243,10 @@ def make_array(mytype):
             self.setlen(0)
 
         def setlen(self, size):
+            if self.exports > 0 and size != self.len:
+                msg = "cannot resize an array that is exporting buffers"
+                raise OperationError(self.space.w_ValueError,
+                                     self.space.wrap(msg))
             if size > 0:
                 if size > self.allocated or size < self.allocated / 2:
                     if size < 9:
@@ -595,7 +623,7 @@ def make_array(mytype):
     # Misc methods
 
     def buffer__Array(space, self):
-        b = ArrayBuffer(self.charbuf(), self.len * mytype.bytes)
+        b = ArrayBuffer(self)
         return space.wrap(b)
 
     def array_buffer_info__Array(space, self):
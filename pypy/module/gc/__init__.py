@@ -12,11 +12,21 @@ class Module(MixedModule):
         'disable_finalizers': 'interp_gc.disable_finalizers',
         'estimate_heap_size': 'interp_gc.estimate_heap_size',
         'garbage' : 'space.newlist([])',
-        #'dump_heap_stats': 'interp_gc.dump_heap_stats',
+        'dump_heap_stats': 'interp_gc.dump_heap_stats',
+        'get_heap_histogram': 'interp_gc.get_heap_histogram',
+        'get_collection_events': 'interp_gc.get_collection_events',
+        'set_collection_hook': 'interp_gc.set_collection_hook',
     }
 
     def __init__(self, space, w_name):
         ts = space.config.translation.type_system
         if ts == 'ootype':
             del self.interpleveldefs['dump_heap_stats']
+            del self.interpleveldefs['get_heap_histogram']
+            del self.interpleveldefs['get_collection_events']
+            del self.interpleveldefs['set_collection_hook']
         MixedModule.__init__(self, space, w_name)
+        if ts != 'ootype':
+            from pypy.module.gc.interp_gc import CollectionHookAction
+            space.gc_collection_hook_action = CollectionHookAction(space)
+            space.actionflag.register_action(space.gc_collection_hook_action)
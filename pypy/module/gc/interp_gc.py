@@ -1,5 +1,6 @@
-from pypy.interpreter.gateway import ObjSpace
+from pypy.interpreter.gateway import ObjSpace, W_Root
 from pypy.interpreter.error import OperationError
+from pypy.interpreter.executioncontext import PeriodicAsyncAction
 from pypy.rlib import rgc
 from pypy.rlib.streamio import open_file_as_stream
 
@@ -65,3 +66,117 @@ def dump_heap_stats(space, filename):
         f.write(",".join([str(tb[i].links[j]) for j in range(len(tb))]) + "\n")
     f.close()
 dump_heap_stats.unwrap_spec = [ObjSpace, str]
+
+def get_heap_histogram(space):
+    """Return a dict describing the heap.  'types' is a list of tuples
+    (type index, count, size, nursery count, nursery size, external count,
+    external size); the type index is the 'memberN' of the typeids.txt
+    written at translation.  The GC keeps these counters up to date as
+    it allocates, copies and frees, so this is only a read: objects that
+    died since the last collection are still counted.  External objects
+    are the raw-malloced ones; prebuilt objects are not counted.  The
+    other keys give the bytes used by the nursery, the semispace, and the
+    raw-malloced objects not freed yet."""
+    hist = rgc._heap_histogram()
+    if not hist:
+        raise OperationError(space.w_RuntimeError,
+                             space.wrap("Wrong GC"))
+    types_w = []
+    for i in range(len(hist.types)):
+        entry = hist.types[i]
+        if entry.count == 0:
+            continue
+        types_w.append(space.newtuple([space.wrap(i),
+                                       space.wrap(entry.count),
+                                       space.wrap(entry.size),
+                                       space.wrap(entry.nursery_count),
+                                       space.wrap(entry.nursery_size),
+                                       space.wrap(entry.external_count),
+                                       space.wrap(entry.external_size)]))
+    w_result = space.newdict()
+    space.setitem(w_result, space.wrap('types'), space.newlist(types_w))
+    space.setitem(w_result, space.wrap('nursery_bytes'),
+                  space.wrap(hist.nursery_bytes))
+    space.setitem(w_result, space.wrap('space_bytes'),
+                  space.wrap(hist.space_bytes))
+    space.setitem(w_result, space.wrap('rawmalloced_bytes'),
+                  space.wrap(hist.rawmalloced_bytes))
+    return w_result
+get_heap_histogram.unwrap_spec = [ObjSpace]
+
+# ____________________________________________________________
+
+# indexed by the GC_EVENT_xxx constants of rpython/memory/gc/base.py
+event_kinds = ['minor', 'major', 'full', 'sweep']
+
+def _fetch_collection_events(space, events_w):
+    """Append to 'events_w' the events recorded by the GC since the last
+    call, and return the number of events that were lost because the
+    GC's buffer was full."""
+    result = rgc._get_collection_events()
+    if not result:
+        return 0
+    for i in range(len(result.events)):
+        event = result.events[i]
+        events_w.append(space.newtuple([space.wrap(event_kinds[event.kind]),
+                                        space.wrap(event.start),
+                                        space.wrap(event.duration),
+                                        space.wrap(event.size_before),
+                                        space.wrap(event.size_after)]))
+    return result.lost
+
+def get_collection_events(space):
+    """Return a tuple (events, lost).  'events' is the list of the
+    collections done since the previous call, as tuples (kind, start
+    time, duration, size before, size after); the kind is 'minor',
+    'major', 'full' or 'sweep'.  'lost' is the number of events that
+    were dropped because there were too many of them in-between."""
+    events_w = []
+    lost = _fetch_collection_events(space, events_w)
+    return space.newtuple([space.newlist(events_w), space.wrap(lost)])
+get_collection_events.unwrap_spec = [ObjSpace]
+
+class CollectionHookAction(PeriodicAsyncAction):
+    """Every sys.checkinterval bytecodes, if a hook is installed, collect
+    the events recorded by the GC and pass them in batches to the hook."""
+
+    def __init__(self, space):
+        PeriodicAsyncAction.__init__(self, space)
+        self.w_callback = None
+        self.batch_size = 1
+        self.pending_w = []
+        self.lost = 0
+
+    def perform(self, executioncontext, frame):
+        if self.w_callback is None:
+            return
+        space = self.space
+        self.lost += _fetch_collection_events(space, self.pending_w)
+        if len(self.pending_w) + self.lost < self.batch_size:
+            return
+        w_events = space.newlist(self.pending_w)
+        w_lost = space.wrap(self.lost)
+        self.pending_w = []
+        self.lost = 0
+        try:
+            space.call_function(self.w_callback, w_events, w_lost)
+        except OperationError, e:
+            e.write_unraisable(space, 'collection hook ', self.w_callback)
+
+def set_collection_hook(space, w_callback, batch_size=1):
+    """Install a hook called as 'callback(events, lost)' with batches of
+    at least 'batch_size' events, in the format of
+    get_collection_events().  The hook is called between bytecodes,
+    every sys.checkinterval bytecodes at most.  Pass None to remove it."""
+    action = space.gc_collection_hook_action
+    if space.is_w(w_callback, space.w_None):
+        action.w_callback = None
+    else:
+        _fetch_collection_events(space, [])    # forget the older events
+        action.w_callback = w_callback
+    if batch_size < 1:
+        batch_size = 1
+    action.batch_size = batch_size
+    action.pending_w = []
+    action.lost = 0
+set_collection_hook.unwrap_spec = [ObjSpace, W_Root, int]
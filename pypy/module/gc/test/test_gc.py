@@ -77,7 +77,6 @@ class AppTestGC(object):
         assert gc.isenabled()
 
 class AppTestGcDumpHeap(object):
-    pytestmark = py.test.mark.xfail(run=False)
 
     def setup_class(cls):
         import py
@@ -110,3 +109,96 @@ class AppTestGcDumpHeap(object):
         import gc
         gc.dump_heap_stats(self.fname)
 
+
+class AppTestGcHeapHistogram(object):
+
+    def setup_class(cls):
+        from pypy.rlib import rgc
+        class Entry(object):
+            def __init__(self, *args):
+                (self.count, self.size, self.nursery_count, self.nursery_size,
+                 self.external_count, self.external_size) = args
+        class Histogram(object):
+            nursery_bytes = 100
+            space_bytes = 2000
+            rawmalloced_bytes = 30000
+            types = [Entry(3, 36, 1, 12, 0, 0),
+                     Entry(0, 0, 0, 0, 0, 0),
+                     Entry(2, 80, 0, 0, 1, 64)]
+
+        def fake_heap_histogram():
+            return Histogram()
+
+        cls._heap_histogram = rgc._heap_histogram
+        rgc._heap_histogram = fake_heap_histogram
+        cls.space = gettestobjspace()
+
+    def teardown_class(cls):
+        from pypy.rlib import rgc
+        rgc._heap_histogram = cls._heap_histogram
+
+    def test_get_heap_histogram(self):
+        import gc
+        d = gc.get_heap_histogram()
+        assert d['types'] == [(0, 3, 36, 1, 12, 0, 0),
+                              (2, 2, 80, 0, 0, 1, 64)]
+        assert d['nursery_bytes'] == 100
+        assert d['space_bytes'] == 2000
+        assert d['rawmalloced_bytes'] == 30000
+
+class AppTestGcCollectionEvents(object):
+
+    def setup_class(cls):
+        from pypy.rlib import rgc
+        cls._get_collection_events = rgc._get_collection_events
+        rgc._get_collection_events = cls.fake_get_collection_events
+        cls.space = gettestobjspace()
+
+    def setup_method(self, meth):
+        class Event(object):
+            def __init__(self, *args):
+                (self.kind, self.start, self.duration,
+                 self.size_before, self.size_after) = args
+        class Events(object):
+            def __init__(self, events, lost):
+                self.events = events
+                self.lost = lost
+        self.batches[:] = [Events([Event(0, 1.5, 0.25, 100, 10)], 0),
+                           Events([Event(1, 2.5, 0.5, 1000, 800),
+                                   Event(3, 3.0, 0.125, 50, 20)], 2)]
+
+    batches = []
+
+    @staticmethod
+    def fake_get_collection_events():
+        batches = AppTestGcCollectionEvents.batches
+        if batches:
+            return batches.pop(0)
+        return None
+
+    def teardown_class(cls):
+        from pypy.rlib import rgc
+        rgc._get_collection_events = cls._get_collection_events
+
+    def test_get_collection_events(self):
+        import gc
+        events, lost = gc.get_collection_events()
+        assert events == [('minor', 1.5, 0.25, 100, 10)]
+        assert lost == 0
+        events, lost = gc.get_collection_events()
+        assert events == [('major', 2.5, 0.5, 1000, 800),
+                          ('sweep', 3.0, 0.125, 50, 20)]
+        assert lost == 2
+        assert gc.get_collection_events() == ([], 0)
+
+    def test_collection_hook(self):
+        import gc
+        seen = []
+        def hook(events, lost):
+            seen.append((events, lost))
+        gc.set_collection_hook(hook, 2)     # forgets the first batch
+        for i in range(1000):
+            pass
+        gc.set_collection_hook(None)
+        assert seen == [([('major', 2.5, 0.5, 1000, 800),
+                          ('sweep', 3.0, 0.125, 50, 20)], 2)]
@@ -3,6 +3,8 @@ from pypy.interpreter.baseobjspace import Wrappable
 from pypy.interpreter.typedef import TypeDef
 from pypy.interpreter.gateway import interp2app, ObjSpace, W_Root
 
+UPDATE_CHUNK = 65536
+
 
 class W_MD5(Wrappable, rmd5.RMD5):
     """
@@ -14,6 +16,15 @@ class W_MD5(Wrappable, rmd5.RMD5):
         self._init()
 
     def update_w(self, string):
+        # hashing doesn't release the GIL: big strings are hashed in
+        # chunks, and another thread can run between two of them
+        start = 0
+        while len(string) - start > UPDATE_CHUNK:
+            self.update(string[start:start + UPDATE_CHUNK])
+            start += UPDATE_CHUNK
+            self.space.threadlocals.switch_if_requested()
+        if start:
+            string = string[start:]
         self.update(string)
 
     def digest_w(self):
@@ -35,7 +46,7 @@ def W_MD5___new__(space, w_subtype, initialdata=''):
     w_md5 = space.allocate_instance(W_MD5, w_subtype)
     md5 = space.interp_w(W_MD5, w_md5)
     W_MD5.__init__(md5, space)
-    md5.update(initialdata)
+    md5.update_w(initialdata)
     return w_md5
 
 
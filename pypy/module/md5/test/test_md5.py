@@ -88,6 +88,19 @@ class AppTestMD5(object):
         assert d2.hexdigest() == 'e8dc4081b13434b45189a720b77b6818'
 
 
+    def test_big_string(self):
+        """
+        Test strings that are hashed in several chunks.
+        """
+        md5 = self.md5
+        data = 'abcdefg' * 30000
+        d1 = md5.md5(data)
+        assert d1.hexdigest() == '7c62045472565d33657a3df290e2537f'
+        d2 = md5.md5('abcdefg')
+        d2.update(data[7:])
+        assert d2.hexdigest() == '7c62045472565d33657a3df290e2537f'
+
+
     def test_buffer(self):
         """
         Test passing a buffer object.
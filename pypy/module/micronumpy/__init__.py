@@ -6,8 +6,17 @@ class Module(MixedModule):
     applevel_name = 'numpy'
     
     interpleveldefs = {
+        'ndarray'  : 'space.gettypefor(numarray.W_NDArray)',
+        'dtype'    : 'space.gettypefor(dtype.W_Dtype)',
         'zeros'    : 'numarray.zeros',
-        'minimum'  : 'ufunc.minimum',
+        'ones'     : 'numarray.ones',
+        'array'    : 'numarray.array',
+        'arange'   : 'numarray.arange',
         }
 
     appleveldefs = {}
+
+for _name in ['add', 'subtract', 'multiply', 'divide', 'minimum', 'maximum',
+              'equal', 'not_equal', 'less', 'less_equal', 'greater',
+              'greater_equal', 'negative', 'absolute']:
+    Module.interpleveldefs[_name] = 'ufunc.' + _name
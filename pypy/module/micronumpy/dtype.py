@@ -0,0 +1,92 @@
+import sys
+from pypy.interpreter.baseobjspace import ObjSpace, Wrappable
+from pypy.interpreter.error import OperationError, operationerrfmt
+from pypy.interpreter.typedef import TypeDef, interp_attrproperty
+from pypy.interpreter.gateway import interp2app
+from pypy.rpython.lltypesystem import lltype, rffi
+
+BOOL, INT, FLOAT = range(3)
+
+class W_Dtype(Wrappable):
+    """The type of the items of an array.  There is one prebuilt instance
+    per supported type; they are compared by identity."""
+    _immutable_ = True
+
+    def __init__(self, num, name, char, itemsize):
+        self.num = num
+        self.name = name
+        self.char = char
+        self.itemsize = itemsize
+
+    def is_float(self):
+        return self.num == FLOAT
+
+    def descr_repr(self, space):
+        return space.wrap("dtype('%s')" % self.name)
+    descr_repr.unwrap_spec = ['self', ObjSpace]
+
+    def descr_str(self, space):
+        return space.wrap(self.name)
+    descr_str.unwrap_spec = ['self', ObjSpace]
+
+W_Dtype.typedef = TypeDef(
+    'dtype',
+    __module__ = 'numpy',
+    __repr__ = interp2app(W_Dtype.descr_repr),
+    __str__ = interp2app(W_Dtype.descr_str),
+    name = interp_attrproperty('name', W_Dtype),
+    char = interp_attrproperty('char', W_Dtype),
+    itemsize = interp_attrproperty('itemsize', W_Dtype),
+)
+
+if sys.maxint > 2 ** 32:
+    _int_name = 'int64'
+else:
+    _int_name = 'int32'
+
+bool_dtype = W_Dtype(BOOL, 'bool', '?', rffi.sizeof(lltype.Bool))
+int_dtype = W_Dtype(INT, _int_name, 'l', rffi.sizeof(lltype.Signed))
+float_dtype = W_Dtype(FLOAT, 'float64', 'd', rffi.sizeof(lltype.Float))
+all_dtypes = [bool_dtype, int_dtype, float_dtype]
+
+def get_dtype(space, w_dtype):
+    """Convert the 'dtype' argument of the app-level functions: a dtype,
+    one of the types bool, int and float, or a type name."""
+    if isinstance(w_dtype, W_Dtype):
+        return w_dtype
+    if space.is_w(w_dtype, space.w_bool):
+        return bool_dtype
+    if space.is_w(w_dtype, space.w_int):
+        return int_dtype
+    if space.is_w(w_dtype, space.w_float):
+        return float_dtype
+    if space.is_true(space.isinstance(w_dtype, space.w_str)):
+        name = space.str_w(w_dtype)
+        for dtype in all_dtypes:
+            if name == dtype.name or name == dtype.char:
+                return dtype
+        raise operationerrfmt(space.w_TypeError,
+                              "data type '%s' not understood", name)
+    raise OperationError(space.w_TypeError,
+                         space.wrap("data type not understood"))
+
+def scalar_dtype(space, w_obj):
+    """The dtype that can represent the app-level number w_obj."""
+    if space.is_true(space.isinstance(w_obj, space.w_bool)):
+        return bool_dtype
+    if space.is_true(space.isinstance(w_obj, space.w_int)):
+        return int_dtype
+    return float_dtype
+
+def find_result_dtype(dt1, dt2):
+    if dt1.num >= dt2.num:
+        return dt1
+    return dt2
+
+def find_arith_dtype(dt1, dt2):
+    """Like find_result_dtype(), but bools are added, multiplied, etc.
+    as integers."""
+    dtype = find_result_dtype(dt1, dt2)
+    if dtype is bool_dtype:
+        return int_dtype
+    return dtype
@@ -1,127 +1,1051 @@
-
+import math, weakref
 from pypy.interpreter.baseobjspace import ObjSpace, W_Root, Wrappable
 from pypy.interpreter.error import OperationError
-from pypy.interpreter.typedef import TypeDef
-from pypy.interpreter.gateway import interp2app, NoneNotWrapped
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+from pypy.interpreter.gateway import interp2app
+from pypy.rpython.lltypesystem import lltype
 from pypy.rlib.debug import make_sure_not_resized
+from pypy.rlib.jit import JitDriver
+from pypy.rlib.rarithmetic import intmask, isnan, INFINITY, NAN
+from pypy.module.micronumpy.dtype import BOOL, INT, FLOAT, \
+     bool_dtype, int_dtype, float_dtype, get_dtype, scalar_dtype, \
+     find_result_dtype, find_arith_dtype
+
+# the element-wise operations.  The binary ones from EQ on are comparisons
+# and give arrays of bools.
+ADD, SUB, MUL, DIV, MIN, MAX, EQ, NE, LT, LE, GT, GE = range(12)
+POS, NEG, ABS = range(3)
+SUM, PROD, RMIN, RMAX = range(4)
+
+# the layouts of the items of concrete arrays, see W_NDArray.offset_of()
+CONTIGUOUS, STRIDED, BROADCAST, GENERAL = range(4)
+layout_names = ['', '[strided]', '[broadcast]', '[general]']
+
+# see W_NDArray.add_invalidates()
+MIN_INVALIDATES_LIMIT = 32
+
+binop_names = ['add', 'subtract', 'multiply', 'divide', 'minimum', 'maximum',
+               'equal', 'not_equal', 'less', 'less_equal', 'greater',
+               'greater_equal']
+unop_names = ['copy', 'negative', 'absolute']
+reduce_names = ['sum', 'prod', 'min', 'max']
+
+
+class Signature(object):
+    """Describes the structure of an array or of a tree of operations:
+    arrays with the same signature are computed by the same code.
+    Signatures are unique, so that they can be compared by identity."""
+    _immutable_ = True
+
+    def __init__(self, name):
+        self.name = name
+
+class SignatureCache(object):
+    def __init__(self):
+        self.signatures = {}
 
-class BaseNumArray(Wrappable):
-    pass
+signature_cache = SignatureCache()
 
-class NumArray(BaseNumArray):
-    def __init__(self, space, dim, dtype):
-        self.dim = dim
+def find_signature(name):
+    try:
+        return signature_cache.signatures[name]
+    except KeyError:
+        signature = Signature(name)
+        signature_cache.signatures[name] = signature
+        return signature
+
+
+class W_NDArray(Wrappable):
+    """An n-dimensional array of items of a single dtype.  Concrete arrays
+    store their items in raw memory, with one subclass per dtype, see
+    make_array_class().  A view shares the memory of the array that owns
+    it ('base'), with its own shape, strides and start; all three count
+    items, not bytes.  The result of an operation is a VirtualArray
+    instead, which is only computed when needed."""
+    _immutable_fields_ = ['dtype', 'shape[*]', 'strides[*]', 'start', 'size',
+                          'layout', 'base']
+
+    depth = 0         # the depth of the tree of operations, see VirtualArray
+    invalidates_limit = MIN_INVALIDATES_LIMIT
+
+    def __init__(self, space, dtype, shape, strides, start, base):
+        make_sure_not_resized(shape)
         self.space = space
-        # ignore dtype for now
-        self.storage = [0] * dim
-        make_sure_not_resized(self.storage)
+        self.dtype = dtype
+        self.shape = shape
+        self.start = start
+        self.base = base
+        size = 1
+        for n in shape:
+            size *= n
+        self.size = size
+        default_strides = contiguous_strides(shape)
+        if strides is None:
+            strides = default_strides
+        make_sure_not_resized(strides)
+        self.strides = strides
+        if same_shape(strides, default_strides):
+            self.layout = CONTIGUOUS
+        elif len(shape) == 1:
+            self.layout = STRIDED
+        elif same_shape(strides, [0] * len(strides)):
+            self.layout = BROADCAST
+        else:
+            self.layout = GENERAL
+        self.signature = find_signature(dtype.name + layout_names[self.layout])
+        # weakrefs to the VirtualArrays that read this array, and must be
+        # computed before it is modified
+        self.invalidates = []
+
+    def owner(self):
+        if self.base is None:
+            return self
+        return self.base
+
+    def offset_of(self, i):
+        """The position in the storage of the i-th item, counting in the
+        C order of the indexes."""
+        if self.layout == CONTIGUOUS:
+            return self.start + i
+        elif self.layout == STRIDED:
+            return self.start + i * self.strides[0]
+        elif self.layout == BROADCAST:
+            return self.start
+        return self._strided_offset(i)
+
+    def _strided_offset(self, i):
+        offset = self.start
+        d = len(self.shape) - 1
+        while d >= 0:
+            n = self.shape[d]
+            offset += (i % n) * self.strides[d]
+            i = i // n
+            d -= 1
+        return offset
+
+    def force(self):
+        """Return a concrete array with the items of this one."""
+        return self
 
-    def descr_getitem(self, index):
+    def simplified(self):
+        """Return the array to use as the operand of a new VirtualArray."""
+        return self
+
+    def dependency_root(self):
+        """The array whose 'invalidates' list records the VirtualArrays
+        reading this one."""
+        return self.owner()
+
+    def add_invalidates(self, virtual):
+        # most VirtualArrays die without being forced, e.g. after a sum():
+        # the list only holds weakrefs to them, and is cleaned up when its
+        # length doubles
+        if len(self.invalidates) >= self.invalidates_limit:
+            self.invalidates = [wref for wref in self.invalidates
+                                if pending_virtual(wref)]
+            self.invalidates_limit = max(MIN_INVALIDATES_LIMIT,
+                                         2 * len(self.invalidates))
+        self.invalidates.append(weakref.ref(virtual))
+
+    def invalidated(self):
+        """Called before the items are modified."""
+        if self.invalidates:
+            invalidates = self.invalidates
+            self.invalidates = []
+            self.invalidates_limit = MIN_INVALIDATES_LIMIT
+            for wref in invalidates:
+                virtual = wref()
+                if virtual is not None:
+                    virtual.force()
+
+    # the following are implemented in the subclasses
+    def getfloat(self, offset):
+        raise NotImplementedError
+    def getint(self, offset):
+        raise NotImplementedError
+    def setfloat(self, offset, value):
+        raise NotImplementedError
+    def setint(self, offset, value):
+        raise NotImplementedError
+    def getitem_w(self, offset):
+        raise NotImplementedError
+    def setitem_w(self, offset, w_value):
+        raise NotImplementedError
+    def make_view(self, shape, strides, start):
+        raise NotImplementedError
+    def eval_float(self, i):
+        """The i-th item, counting in the C order of the indexes."""
+        raise NotImplementedError
+    def eval_int(self, i):
+        raise NotImplementedError
+
+    def _index(self, w_index):
+        """Decode an index made of integers and slices.  Returns
+        (offset, None) if it selects a single item, and (0, view)
+        otherwise."""
         space = self.space
-        try:
-            return space.wrap(self.storage[index])
-        except IndexError:
+        if space.is_true(space.isinstance(w_index, space.w_tuple)):
+            indexes_w = space.fixedview(w_index)
+        else:
+            indexes_w = [w_index]
+        ndim = len(self.shape)
+        if len(indexes_w) > ndim:
             raise OperationError(space.w_IndexError,
-                                 space.wrap("list index out of range"))
-    descr_getitem.unwrap_spec = ['self', int]
+                                 space.wrap("too many indices"))
+        offset = self.start
+        shape = []
+        strides = []
+        for d in range(len(indexes_w)):
+            w_idx = indexes_w[d]
+            n = self.shape[d]
+            if space.is_true(space.isinstance(w_idx, space.w_slice)):
+                start, step, length = decode_slice(space, w_idx, n)
+                offset += start * self.strides[d]
+                shape.append(length)
+                strides.append(step * self.strides[d])
+            else:
+                idx = space.int_w(w_idx)
+                if idx < 0:
+                    idx += n
+                if not (0 <= idx < n):
+                    raise OperationError(space.w_IndexError,
+                                         space.wrap("index out of range"))
+                offset += idx * self.strides[d]
+        if not shape and len(indexes_w) == ndim:
+            return offset, None
+        for d in range(len(indexes_w), ndim):
+            shape.append(self.shape[d])
+            strides.append(self.strides[d])
+        return 0, self.make_view(shape[:], strides[:], offset)
 
-    def descr_setitem(self, index, value):
+    def descr_getitem(self, w_index):
+        array = self.force()
+        offset, view = array._index(w_index)
+        if view is None:
+            return array.getitem_w(offset)
+        return self.space.wrap(view)
+    descr_getitem.unwrap_spec = ['self', W_Root]
+
+    def descr_setitem(self, w_index, w_value):
         space = self.space
-        try:
-            self.storage[index] = value
-        except IndexError:
-            raise OperationError(space.w_IndexError,
-                                 space.wrap("list index out of range"))
-        return space.w_None
-    descr_setitem.unwrap_spec = ['self', int, int]
+        array = self.force()
+        array.dependency_root().invalidated()
+        offset, view = array._index(w_index)
+        if view is None:
+            array.setitem_w(offset, w_value)
+        else:
+            source = convert_operand(space, w_value, view.shape)
+            if source.dependency_root() is view.owner():
+                source = copy_array(space, source, source.dtype)
+            compute(source, view)
+    descr_setitem.unwrap_spec = ['self', W_Root, W_Root]
 
     def descr_len(self):
-        return self.space.wrap(len(self.storage))
+        return self.space.wrap(self.shape[0])
     descr_len.unwrap_spec = ['self']
 
-NumArray.typedef = TypeDef(
-    'NumArray',
-    __getitem__ = interp2app(NumArray.descr_getitem),
-    __setitem__ = interp2app(NumArray.descr_setitem),
-    __len__     = interp2app(NumArray.descr_len),
-)
+    def descr_get_shape(space, self):
+        return space.newtuple([space.wrap(n) for n in self.shape])
 
-def compute_pos(space, indexes, dim):
-    current = 1
-    pos = 0
-    for i in range(len(indexes)):
-        index = indexes[i]
-        d = dim[i]
-        if index >= d or index <= -d - 1:
-            raise OperationError(space.w_IndexError,
-                                 space.wrap("invalid index"))
-        if index < 0:
-            index = d + index
-        pos += index * current
-        current *= d
-    return pos
-
-class MultiDimArray(BaseNumArray):
-    def __init__(self, space, dim, dtype):
-        self.dim = dim
-        self.space = space
-        # ignore dtype for now
-        size = 1
-        for el in dim:
-            size *= el
-        self.storage = [0] * size
-        make_sure_not_resized(self.storage)
-
-    def _unpack_indexes(self, space, w_index):
-        indexes = [space.int_w(w_i) for w_i in space.fixedview(w_index)]
-        if len(indexes) != len(self.dim):
-            raise OperationError(space.w_IndexError, space.wrap(
-                'Wrong index'))
-        return indexes
+    def descr_get_ndim(space, self):
+        return space.wrap(len(self.shape))
 
-    def descr_getitem(self, w_index):
+    def descr_get_size(space, self):
+        return space.wrap(self.size)
+
+    def descr_get_dtype(space, self):
+        return space.wrap(self.dtype)
+
+    def descr_astype(self, w_dtype):
+        dtype = get_dtype(self.space, w_dtype)
+        return self.space.wrap(copy_array(self.space, self, dtype))
+    descr_astype.unwrap_spec = ['self', W_Root]
+
+    def _tolist(self, dim, offset):
         space = self.space
-        indexes = self._unpack_indexes(space, w_index)
-        pos = compute_pos(space, indexes, self.dim)
-        return space.wrap(self.storage[pos])
-    descr_getitem.unwrap_spec = ['self', W_Root]
+        n = self.shape[dim]
+        stride = self.strides[dim]
+        items_w = [None] * n
+        for k in range(n):
+            if dim == len(self.shape) - 1:
+                items_w[k] = self.getitem_w(offset + k * stride)
+            else:
+                items_w[k] = self._tolist(dim + 1, offset + k * stride)
+        return space.newlist(items_w)
 
-    def descr_setitem(self, w_index, value):
+    def descr_tolist(self):
+        array = self.force()
+        return array._tolist(0, array.start)
+    descr_tolist.unwrap_spec = ['self']
+
+    def descr_repr(self):
         space = self.space
-        indexes = self._unpack_indexes(space, w_index)
-        pos = compute_pos(space, indexes, self.dim)
-        self.storage[pos] = value
-        return space.w_None
-    descr_setitem.unwrap_spec = ['self', W_Root, int]
+        w_list = self.descr_tolist()
+        return space.wrap("array(%s)" % space.str_w(space.repr(w_list)))
+    descr_repr.unwrap_spec = ['self']
 
-    def descr_len(self):
-        return self.space.wrap(self.dim[0])
-    descr_len.unwrap_spec = ['self']
+    def descr_str(self):
+        return self.space.str(self.descr_tolist())
+    descr_str.unwrap_spec = ['self']
 
-MultiDimArray.typedef = TypeDef(
-    'NumArray',
-    __getitem__ = interp2app(MultiDimArray.descr_getitem),
-    __setitem__ = interp2app(MultiDimArray.descr_setitem),
-    __len__     = interp2app(MultiDimArray.descr_len),
-)
+    def descr_mean(self):
+        space = self.space
+        if self.size == 0:
+            return space.wrap(NAN)
+        if self.dtype is float_dtype:
+            total = reduce_float(SUM, self)
+        else:
+            total = float(reduce_int(SUM, self))
+        return space.wrap(total / self.size)
+    descr_mean.unwrap_spec = ['self']
+
+
+def make_binop_descr(op, reverse=False):
+    def descr_binop(self, w_other):
+        if reverse:
+            return binop(self.space, op, w_other, self)
+        return binop(self.space, op, self, w_other)
+    descr_binop.unwrap_spec = ['self', W_Root]
+    if reverse:
+        descr_binop.func_name = 'descr_r' + binop_names[op]
+    else:
+        descr_binop.func_name = 'descr_' + binop_names[op]
+    setattr(W_NDArray, descr_binop.func_name, descr_binop)
+
+def make_unop_descr(op):
+    def descr_unop(self):
+        return unop(self.space, op, self)
+    descr_unop.unwrap_spec = ['self']
+    descr_unop.func_name = 'descr_' + unop_names[op]
+    setattr(W_NDArray, descr_unop.func_name, descr_unop)
+
+def make_reduce_descr(op):
+    def descr_reduce(self):
+        space = self.space
+        if self.size == 0 and (op == RMIN or op == RMAX):
+            raise OperationError(space.w_ValueError, space.wrap(
+                "zero-size array to reduction operation %s which has no "
+                "identity" % reduce_names[op]))
+        if self.dtype is float_dtype:
+            return space.wrap(reduce_float(op, self))
+        result = reduce_int(op, self)
+        if self.dtype is bool_dtype and (op == RMIN or op == RMAX):
+            return space.newbool(result != 0)
+        return space.wrap(result)
+    descr_reduce.unwrap_spec = ['self']
+    descr_reduce.func_name = 'descr_' + reduce_names[op]
+    setattr(W_NDArray, descr_reduce.func_name, descr_reduce)
+
+for _op in range(len(binop_names)):
+    make_binop_descr(_op)
+for _op in [ADD, SUB, MUL, DIV]:
+    make_binop_descr(_op, reverse=True)
+for _op in range(len(unop_names)):
+    make_unop_descr(_op)
+for _op in range(len(reduce_names)):
+    make_reduce_descr(_op)
+
+
+def make_array_class(dtype, ITEM):
+    STORAGE = lltype.Array(ITEM, hints={'nolength': True})
+    num = dtype.num
+
+    class W_TypedArray(W_NDArray):
+        _immutable_fields_ = ['storage']
+
+        def __init__(self, space, shape, strides=None, start=0, base=None,
+                     zero=False):
+            W_NDArray.__init__(self, space, dtype, shape, strides, start,
+                               base)
+            if base is None:
+                self.storage = lltype.malloc(STORAGE, self.size,
+                                             flavor='raw', zero=zero)
+            else:
+                assert isinstance(base, W_TypedArray)
+                self.storage = base.storage
+
+        def __del__(self):
+            if self.base is None:
+                lltype.free(self.storage, flavor='raw')
+
+        def make_view(self, shape, strides, start):
+            return W_TypedArray(self.space, shape, strides, start,
+                                self.owner())
+
+        def getfloat(self, offset):
+            if num == FLOAT:
+                return self.storage[offset]
+            elif num == INT:
+                return float(self.storage[offset])
+            else:
+                if self.storage[offset]:
+                    return 1.0
+                return 0.0
+
+        def getint(self, offset):
+            if num == FLOAT:
+                return int(self.storage[offset])
+            elif num == INT:
+                return self.storage[offset]
+            else:
+                if self.storage[offset]:
+                    return 1
+                return 0
+
+        def setfloat(self, offset, value):
+            if num == FLOAT:
+                self.storage[offset] = value
+            elif num == INT:
+                self.storage[offset] = int(value)
+            else:
+                self.storage[offset] = value != 0.0
+
+        def setint(self, offset, value):
+            if num == FLOAT:
+                self.storage[offset] = float(value)
+            elif num == INT:
+                self.storage[offset] = value
+            else:
+                self.storage[offset] = value != 0
+
+        def getitem_w(self, offset):
+            space = self.space
+            if num == FLOAT:
+                return space.wrap(self.storage[offset])
+            elif num == INT:
+                return space.wrap(self.storage[offset])
+            else:
+                return space.newbool(self.storage[offset])
+
+        def setitem_w(self, offset, w_value):
+            space = self.space
+            if num == FLOAT:
+                self.storage[offset] = space.float_w(w_value)
+            elif num == INT:
+                self.storage[offset] = space.int_w(w_value)
+            else:
+                self.storage[offset] = space.is_true(w_value)
+
+        def eval_float(self, i):
+            return self.getfloat(self.offset_of(i))
+
+        def eval_int(self, i):
+            return self.getint(self.offset_of(i))
+
+    W_TypedArray.__name__ = 'W_%sArray' % (dtype.name.capitalize(),)
+    return W_TypedArray
 
-def unpack_dim(space, w_dim):
-    if space.is_true(space.isinstance(w_dim, space.w_int)):
-        return [space.int_w(w_dim)]
-    dim_w = space.fixedview(w_dim)
-    return [space.int_w(w_i) for w_i in dim_w]
+W_BoolArray = make_array_class(bool_dtype, lltype.Bool)
+W_IntArray = make_array_class(int_dtype, lltype.Signed)
+W_FloatArray = make_array_class(float_dtype, lltype.Float)
 
-def unpack_dtype(space, w_dtype):
-    if space.is_w(w_dtype, space.w_int):
-        return 'i'
+def new_array(space, dtype, shape, zero=False):
+    if dtype is float_dtype:
+        return W_FloatArray(space, shape, zero=zero)
+    elif dtype is int_dtype:
+        return W_IntArray(space, shape, zero=zero)
     else:
+        return W_BoolArray(space, shape, zero=zero)
+
+def contiguous_strides(shape):
+    strides = [0] * len(shape)
+    stride = 1
+    d = len(shape) - 1
+    while d >= 0:
+        strides[d] = stride
+        stride *= shape[d]
+        d -= 1
+    return strides
+
+def same_shape(shape1, shape2):
+    if len(shape1) != len(shape2):
+        return False
+    for i in range(len(shape1)):
+        if shape1[i] != shape2[i]:
+            return False
+    return True
+
+def decode_slice(space, w_slice, length):
+    """Returns (start, step, slicelength)."""
+    w_indices = space.call_method(w_slice, "indices", space.wrap(length))
+    w_start, w_stop, w_step = space.fixedview(w_indices, 3)
+    start = space.int_w(w_start)
+    stop = space.int_w(w_stop)
+    step = space.int_w(w_step)
+    if (step < 0 and stop >= start) or (step > 0 and start >= stop):
+        slicelength = 0
+    elif step < 0:
+        slicelength = (stop - start + 1) / step + 1
+    else:
+        slicelength = (stop - start - 1) / step + 1
+    return start, step, slicelength
+
+def convert_operand(space, w_obj, shape):
+    """Turn w_obj into an array of the given shape: arrays must already
+    have it, sequences are converted, and scalars are broadcast by a
+    view with all strides equal to zero."""
+    if isinstance(w_obj, W_NDArray):
+        array = w_obj
+    elif (space.is_true(space.isinstance(w_obj, space.w_list)) or
+          space.is_true(space.isinstance(w_obj, space.w_tuple))):
+        array = array_from_sequence(space, w_obj, None)
+    else:
+        scalar = new_array(space, scalar_dtype(space, w_obj), [1])
+        scalar.setitem_w(0, w_obj)
+        return scalar.make_view(shape, [0] * len(shape), 0)
+    if not same_shape(array.shape, shape):
+        raise OperationError(space.w_ValueError, space.wrap(
+            "shape mismatch: objects cannot be broadcast to a single shape"))
+    return array
+
+def copy_array(space, source, dtype):
+    result = new_array(space, dtype, source.shape)
+    compute(source, result)
+    return result
+
+# ____________________________________________________________
+#
+# Lazy evaluation.  An operation on arrays returns a VirtualArray, a node
+# of a tree whose leaves are concrete arrays.  The tree is only computed
+# when its items are needed, in one loop over all items that evaluates
+# the whole tree for each of them: there are no temporary arrays.  The
+# signature of the tree is green, so that the JIT produces one loop per
+# kind of expression, in which the calls to eval_float() and eval_int()
+# are inlined.
+
+MAX_DEPTH = 32
+
+def float_binop(op, x, y):
+    if op == ADD:
+        return x + y
+    elif op == SUB:
+        return x - y
+    elif op == MUL:
+        return x * y
+    elif op == DIV:
+        if y == 0.0:
+            if x == 0.0 or isnan(x):
+                return NAN
+            elif x > 0.0:
+                return INFINITY
+            return -INFINITY
+        return x / y
+    elif op == MIN:
+        if x < y or isnan(x):
+            return x
+        return y
+    else:
+        assert op == MAX
+        if x > y or isnan(x):
+            return x
+        return y
+
+def int_binop(op, x, y):
+    if op == ADD:
+        return intmask(x + y)
+    elif op == SUB:
+        return intmask(x - y)
+    elif op == MUL:
+        return intmask(x * y)
+    elif op == DIV:
+        if y == 0:
+            return 0
+        elif y == -1:
+            return intmask(-x)
+        return x // y
+    elif op == MIN:
+        if x < y:
+            return x
+        return y
+    else:
+        assert op == MAX
+        if x > y:
+            return x
+        return y
+
+def compare(op, x, y):
+    if op == EQ:
+        return x == y
+    elif op == NE:
+        return x != y
+    elif op == LT:
+        return x < y
+    elif op == LE:
+        return x <= y
+    elif op == GT:
+        return x > y
+    else:
+        assert op == GE
+        return x >= y
+compare._annspecialcase_ = 'specialize:argtype(1)'
+
+def float_unop(op, x):
+    if op == NEG:
+        return -x
+    elif op == ABS:
+        return abs(x)
+    return x
+
+def int_unop(op, a):
+    if op == NEG:
+        return intmask(-a)
+    elif op == ABS:
+        return intmask(abs(a))
+    return a
+
+
+def pending_virtual(wref):
+    virtual = wref()
+    return virtual is not None and virtual.forced is None
+
+
+class VirtualArray(W_NDArray):
+    """The not-yet-computed result of an operation.  It is contiguous;
+    once forced, all the accesses go to the concrete array 'forced'."""
+
+    def __init__(self, space, dtype, shape, depth, signature):
+        W_NDArray.__init__(self, space, dtype, shape, None, 0, None)
+        self.depth = depth
+        self.signature = signature
+        self.forced = None
+
+    def force(self):
+        if self.forced is None:
+            result = new_array(self.space, self.dtype, self.shape)
+            compute(self, result)
+            self.forced = result
+            self.signature = result.signature
+            result.invalidates = self.invalidates
+            result.invalidates_limit = self.invalidates_limit
+            self.invalidates = []
+            self.forget_operands()
+        return self.forced
+
+    def simplified(self):
+        if self.forced is not None:
+            return self.forced
+        if self.depth >= MAX_DEPTH:
+            return self.force()
+        return self
+
+    def dependency_root(self):
+        if self.forced is not None:
+            return self.forced
+        return self
+
+    def forget_operands(self):
         raise NotImplementedError
 
-def zeros(space, w_dim, w_dtype):
-    dim = unpack_dim(space, w_dim)
-    dtype = unpack_dtype(space, w_dtype)
-    if len(dim) == 1:
-        return space.wrap(NumArray(space, dim[0], dtype))
+    def getfloat(self, offset):
+        return self.force().getfloat(offset)
+    def getint(self, offset):
+        return self.force().getint(offset)
+    def setfloat(self, offset, value):
+        self.force().setfloat(offset, value)
+    def setint(self, offset, value):
+        self.force().setint(offset, value)
+    def getitem_w(self, offset):
+        return self.force().getitem_w(offset)
+    def setitem_w(self, offset, w_value):
+        self.force().setitem_w(offset, w_value)
+    def make_view(self, shape, strides, start):
+        return self.force().make_view(shape, strides, start)
+
+
+def make_call1_class(op):
+    class Call1(VirtualArray):
+        _immutable_fields_ = ['source_float']
+
+        def __init__(self, space, dtype, source):
+            source = source.simplified()
+            signature = find_signature('%s:%s(%s)' % (
+                unop_names[op], dtype.name, source.signature.name))
+            VirtualArray.__init__(self, space, dtype, source.shape,
+                                  source.depth + 1, signature)
+            self.source = source
+            self.source_float = source.dtype is float_dtype
+            source.dependency_root().add_invalidates(self)
+
+        def forget_operands(self):
+            self.source = None
+
+        def eval_float(self, i):
+            if self.forced is not None:
+                return self.forced.eval_float(i)
+            if self.source_float:
+                return float_unop(op, self.source.eval_float(i))
+            return float(self.eval_int(i))
+
+        def eval_int(self, i):
+            if self.forced is not None:
+                return self.forced.eval_int(i)
+            if self.source_float:
+                return int(self.eval_float(i))
+            return int_unop(op, self.source.eval_int(i))
+
+    Call1.__name__ = 'Call1_' + unop_names[op]
+    return Call1
+
+def make_call2_class(op):
+    class Call2(VirtualArray):
+        _immutable_fields_ = ['calc_float']
+
+        def __init__(self, space, dtype, left, right):
+            left = left.simplified()
+            right = right.simplified()
+            signature = find_signature('%s(%s,%s)' % (
+                binop_names[op], left.signature.name, right.signature.name))
+            VirtualArray.__init__(self, space, dtype, left.shape,
+                                  max(left.depth, right.depth) + 1,
+                                  signature)
+            self.left = left
+            self.right = right
+            self.calc_float = (left.dtype is float_dtype or
+                               right.dtype is float_dtype)
+            left.dependency_root().add_invalidates(self)
+            right.dependency_root().add_invalidates(self)
+
+        def forget_operands(self):
+            self.left = None
+            self.right = None
+
+        def eval_float(self, i):
+            if self.forced is not None:
+                return self.forced.eval_float(i)
+            if not self.calc_float:
+                return float(self.eval_int(i))
+            x = self.left.eval_float(i)
+            y = self.right.eval_float(i)
+            if op >= EQ:
+                if compare(op, x, y):
+                    return 1.0
+                return 0.0
+            return float_binop(op, x, y)
+
+        def eval_int(self, i):
+            if self.forced is not None:
+                return self.forced.eval_int(i)
+            if self.calc_float:
+                if op >= EQ:
+                    x = self.left.eval_float(i)
+                    y = self.right.eval_float(i)
+                    return int(compare(op, x, y))
+                return int(self.eval_float(i))
+            a = self.left.eval_int(i)
+            b = self.right.eval_int(i)
+            if op >= EQ:
+                return int(compare(op, a, b))
+            return int_binop(op, a, b)
+
+    Call2.__name__ = 'Call2_' + binop_names[op]
+    return Call2
+
+call1_classes = [make_call1_class(_op) for _op in range(len(unop_names))]
+call2_classes = [make_call2_class(_op) for _op in range(len(binop_names))]
+
+
+def get_printable_location(tree_sig, res_sig):
+    return 'numpy %s -> %s' % (tree_sig.name, res_sig.name)
+
+compute_driver = JitDriver(greens=['tree_sig', 'res_sig'],
+                           reds=['i', 'tree', 'result'],
+                           get_printable_location=get_printable_location)
+
+def compute(tree, result):
+    """Store the items of 'tree' into 'result', converting them to the
+    dtype of 'result'."""
+    tree_sig = tree.signature
+    res_sig = result.signature
+    i = 0
+    while i < result.size:
+        compute_driver.jit_merge_point(tree_sig=tree_sig, res_sig=res_sig,
+                                       i=i, tree=tree, result=result)
+        offset = result.offset_of(i)
+        if result.dtype is float_dtype:
+            result.setfloat(offset, tree.eval_float(i))
+        else:
+            result.setint(offset, tree.eval_int(i))
+        i += 1
+        compute_driver.can_enter_jit(tree_sig=tree_sig, res_sig=res_sig,
+                                     i=i, tree=tree, result=result)
+compute._dont_inline_ = True
+
+def binop(space, op, w_left, w_right):
+    """Apply a binary operation to two operands, at least one of which
+    is usually an array.  The other one can be a sequence or a scalar."""
+    if isinstance(w_left, W_NDArray):
+        shape = w_left.shape
+    elif isinstance(w_right, W_NDArray):
+        shape = w_right.shape
+    else:
+        shape = None
+    if shape is None:
+        left = convert_operand(space, w_left, [1])
+        right = convert_operand(space, w_right, [1])
+    else:
+        left = convert_operand(space, w_left, shape)
+        right = convert_operand(space, w_right, shape)
+    if op >= EQ:
+        res_dtype = bool_dtype
+    elif op == MIN or op == MAX:
+        res_dtype = find_result_dtype(left.dtype, right.dtype)
+    else:
+        res_dtype = find_arith_dtype(left.dtype, right.dtype)
+    result = call2_classes[op](space, res_dtype, left, right)
+    if shape is None:
+        return result.getitem_w(0)
+    return space.wrap(result)
+
+def unop(space, op, w_obj):
+    if isinstance(w_obj, W_NDArray):
+        source = w_obj
+    else:
+        source = convert_operand(space, w_obj, [1])
+    res_dtype = source.dtype
+    if op != POS and res_dtype is bool_dtype:
+        res_dtype = int_dtype
+    result = call1_classes[op](space, res_dtype, source)
+    if not isinstance(w_obj, W_NDArray):
+        return result.getitem_w(0)
+    return space.wrap(result)
+
+
+def get_printable_location_reduce(op, sig):
+    return 'numpy %s(%s)' % (reduce_names[op], sig.name)
+
+reduce_float_driver = JitDriver(greens=['op', 'sig'],
+                                reds=['i', 'tree', 'acc'],
+                                get_printable_location=
+                                    get_printable_location_reduce)
+reduce_int_driver = JitDriver(greens=['op', 'sig'],
+                              reds=['i', 'acc', 'tree'],
+                              get_printable_location=
+                                  get_printable_location_reduce)
+
+def reduce_float(op, tree):
+    sig = tree.signature
+    if op == SUM:
+        acc = 0.0
+        i = 0
+    elif op == PROD:
+        acc = 1.0
+        i = 0
     else:
-        return space.wrap(MultiDimArray(space, dim, dtype))
+        acc = tree.eval_float(0)
+        i = 1
+    while i < tree.size:
+        reduce_float_driver.jit_merge_point(op=op, sig=sig, i=i,
+                                            tree=tree, acc=acc)
+        x = tree.eval_float(i)
+        if op == SUM:
+            acc += x
+        elif op == PROD:
+            acc *= x
+        elif op == RMIN:
+            acc = float_binop(MIN, acc, x)
+        else:
+            acc = float_binop(MAX, acc, x)
+        i += 1
+        reduce_float_driver.can_enter_jit(op=op, sig=sig, i=i,
+                                          tree=tree, acc=acc)
+    return acc
+reduce_float._dont_inline_ = True
+
+def reduce_int(op, tree):
+    sig = tree.signature
+    if op == SUM:
+        acc = 0
+        i = 0
+    elif op == PROD:
+        acc = 1
+        i = 0
+    else:
+        acc = tree.eval_int(0)
+        i = 1
+    while i < tree.size:
+        reduce_int_driver.jit_merge_point(op=op, sig=sig, i=i,
+                                          acc=acc, tree=tree)
+        a = tree.eval_int(i)
+        if op == SUM:
+            acc = intmask(acc + a)
+        elif op == PROD:
+            acc = intmask(acc * a)
+        elif op == RMIN:
+            acc = int_binop(MIN, acc, a)
+        else:
+            acc = int_binop(MAX, acc, a)
+        i += 1
+        reduce_int_driver.can_enter_jit(op=op, sig=sig, i=i,
+                                        acc=acc, tree=tree)
+    return acc
+reduce_int._dont_inline_ = True
+
+# ____________________________________________________________
+#
+# Creating arrays
+
+def unpack_shape(space, w_shape):
+    if space.is_true(space.isinstance(w_shape, space.w_int)):
+        shape = [space.int_w(w_shape)]
+    else:
+        shape = [space.int_w(w_n) for w_n in space.fixedview(w_shape)]
+    if not shape:
+        raise OperationError(space.w_ValueError,
+                             space.wrap("0-d arrays are not supported"))
+    for n in shape:
+        if n < 0:
+            raise OperationError(space.w_ValueError,
+                                 space.wrap("negative dimensions are not allowed"))
+    return shape
+
+def unpack_dtype(space, w_dtype, default):
+    if w_dtype is None or space.is_w(w_dtype, space.w_None):
+        return default
+    return get_dtype(space, w_dtype)
+
+def _is_sequence(space, w_obj):
+    return (space.is_true(space.isinstance(w_obj, space.w_list)) or
+            space.is_true(space.isinstance(w_obj, space.w_tuple)))
+
+def _flatten(space, w_obj, shape, depth, items_w):
+    if depth == len(shape):
+        if _is_sequence(space, w_obj):
+            raise OperationError(space.w_ValueError, space.wrap(
+                "setting an array element with a sequence"))
+        items_w.append(w_obj)
+        return
+    if not _is_sequence(space, w_obj):
+        raise OperationError(space.w_ValueError, space.wrap(
+            "setting an array element with a sequence"))
+    seq_w = space.fixedview(w_obj)
+    if len(seq_w) != shape[depth]:
+        raise OperationError(space.w_ValueError, space.wrap(
+            "setting an array element with a sequence"))
+    for w_item in seq_w:
+        _flatten(space, w_item, shape, depth + 1, items_w)
+
+def array_from_sequence(space, w_seq, dtype):
+    shape = []
+    w_obj = w_seq
+    while _is_sequence(space, w_obj):
+        seq_w = space.fixedview(w_obj)
+        shape.append(len(seq_w))
+        if not seq_w:
+            break
+        w_obj = seq_w[0]
+    if not shape:
+        raise OperationError(space.w_ValueError,
+                             space.wrap("0-d arrays are not supported"))
+    items_w = []
+    _flatten(space, w_seq, shape, 0, items_w)
+    if dtype is None:
+        dtype = bool_dtype
+        for w_item in items_w:
+            dtype = find_result_dtype(dtype, scalar_dtype(space, w_item))
+    result = new_array(space, dtype, shape[:])
+    for i in range(len(items_w)):
+        result.setitem_w(i, items_w[i])
+    return result
+
+def zeros(space, w_shape, w_dtype=None):
+    dtype = unpack_dtype(space, w_dtype, float_dtype)
+    return space.wrap(new_array(space, dtype, unpack_shape(space, w_shape),
+                                zero=True))
 zeros.unwrap_spec = [ObjSpace, W_Root, W_Root]
+
+def ones(space, w_shape, w_dtype=None):
+    dtype = unpack_dtype(space, w_dtype, float_dtype)
+    result = new_array(space, dtype, unpack_shape(space, w_shape))
+    for i in range(result.size):
+        result.setint(i, 1)
+    return space.wrap(result)
+ones.unwrap_spec = [ObjSpace, W_Root, W_Root]
+
+def array(space, w_obj, w_dtype=None):
+    if w_dtype is None or space.is_w(w_dtype, space.w_None):
+        dtype = None
+    else:
+        dtype = get_dtype(space, w_dtype)
+    if isinstance(w_obj, W_NDArray):
+        if dtype is None:
+            dtype = w_obj.dtype
+        return space.wrap(copy_array(space, w_obj, dtype))
+    return space.wrap(array_from_sequence(space, w_obj, dtype))
+array.unwrap_spec = [ObjSpace, W_Root, W_Root]
+
+def arange(space, w_start, w_stop=None, w_step=None, w_dtype=None):
+    if w_stop is None or space.is_w(w_stop, space.w_None):
+        w_stop = w_start
+        w_start = space.wrap(0)
+    if w_step is None or space.is_w(w_step, space.w_None):
+        w_step = space.wrap(1)
+    default = bool_dtype
+    for w_obj in [w_start, w_stop, w_step]:
+        default = find_arith_dtype(default, scalar_dtype(space, w_obj))
+    dtype = unpack_dtype(space, w_dtype, default)
+    if default is float_dtype:
+        start = space.float_w(w_start)
+        step = space.float_w(w_step)
+        if step == 0.0:
+            raise OperationError(space.w_ValueError,
+                                 space.wrap("arange() step cannot be zero"))
+        length = int(math.ceil((space.float_w(w_stop) - start) / step))
+        result = new_array(space, dtype, [max(length, 0)])
+        for i in range(result.size):
+            result.setfloat(i, start + i * step)
+    else:
+        start_i = space.int_w(w_start)
+        step_i = space.int_w(w_step)
+        if step_i == 0:
+            raise OperationError(space.w_ValueError,
+                                 space.wrap("arange() step cannot be zero"))
+        distance = space.int_w(w_stop) - start_i
+        if step_i > 0:
+            length = (distance + step_i - 1) // step_i
+        else:
+            length = (distance + step_i + 1) // step_i
+        result = new_array(space, dtype, [max(length, 0)])
+        for i in range(result.size):
+            result.setint(i, start_i + i * step_i)
+    return space.wrap(result)
+arange.unwrap_spec = [ObjSpace, W_Root, W_Root, W_Root, W_Root]
+
+
+W_NDArray.typedef = TypeDef(
+    'ndarray',
+    __module__ = 'numpy',
+    __getitem__ = interp2app(W_NDArray.descr_getitem),
+    __setitem__ = interp2app(W_NDArray.descr_setitem),
+    __len__ = interp2app(W_NDArray.descr_len),
+    __repr__ = interp2app(W_NDArray.descr_repr),
+    __str__ = interp2app(W_NDArray.descr_str),
+    __pos__ = interp2app(W_NDArray.descr_copy),
+    __neg__ = interp2app(W_NDArray.descr_negative),
+    __abs__ = interp2app(W_NDArray.descr_absolute),
+    __add__ = interp2app(W_NDArray.descr_add),
+    __sub__ = interp2app(W_NDArray.descr_subtract),
+    __mul__ = interp2app(W_NDArray.descr_multiply),
+    __div__ = interp2app(W_NDArray.descr_divide),
+    __radd__ = interp2app(W_NDArray.descr_radd),
+    __rsub__ = interp2app(W_NDArray.descr_rsubtract),
+    __rmul__ = interp2app(W_NDArray.descr_rmultiply),
+    __rdiv__ = interp2app(W_NDArray.descr_rdivide),
+    __eq__ = interp2app(W_NDArray.descr_equal),
+    __ne__ = interp2app(W_NDArray.descr_not_equal),
+    __lt__ = interp2app(W_NDArray.descr_less),
+    __le__ = interp2app(W_NDArray.descr_less_equal),
+    __gt__ = interp2app(W_NDArray.descr_greater),
+    __ge__ = interp2app(W_NDArray.descr_greater_equal),
+    shape = GetSetProperty(W_NDArray.descr_get_shape),
+    ndim = GetSetProperty(W_NDArray.descr_get_ndim),
+    size = GetSetProperty(W_NDArray.descr_get_size),
+    dtype = GetSetProperty(W_NDArray.descr_get_dtype),
+    copy = interp2app(W_NDArray.descr_copy),
+    astype = interp2app(W_NDArray.descr_astype),
+    tolist = interp2app(W_NDArray.descr_tolist),
+    sum = interp2app(W_NDArray.descr_sum),
+    prod = interp2app(W_NDArray.descr_prod),
+    min = interp2app(W_NDArray.descr_min),
+    max = interp2app(W_NDArray.descr_max),
+    mean = interp2app(W_NDArray.descr_mean),
+)
@@ -1,5 +1,27 @@
 
 from pypy.conftest import gettestobjspace
+from pypy.module.micronumpy.numarray import W_NDArray, MIN_INVALIDATES_LIMIT
+
+
+def test_invalidates_dont_accumulate():
+    space = gettestobjspace(usemodules=('micronumpy',))
+    w_res = space.appexec([], """():
+        from numpy import arange
+        a = arange(10)
+        b = a * 2
+        for i in range(1000):
+            (a + 1).sum()
+        return a, b
+    """)
+    w_a, w_b = space.fixedview(w_res)
+    a = space.interp_w(W_NDArray, w_a)
+    # the VirtualArrays that died without being forced were dropped
+    assert len(a.invalidates) <= MIN_INVALIDATES_LIMIT
+    # but the one still alive is computed before 'a' changes
+    space.appexec([w_a, w_b], """(a, b):
+        a[1] = 100
+        assert b[1] == 2
+    """)
 
 class AppTestNumpy(object):
     def setup_class(cls):
@@ -63,3 +85,195 @@ class AppTestMultiDim(object):
     def test_len(self):
         from numpy import zeros
         assert len(zeros((3, 2, 1), dtype=int)) == 3
+
+class AppTestNDArray(object):
+    def setup_class(cls):
+        cls.space = gettestobjspace(usemodules=('micronumpy',))
+
+    def test_dtypes(self):
+        from numpy import zeros, array, dtype
+        assert zeros(3).dtype.name == 'float64'
+        assert zeros(3, dtype=int).dtype.char == 'l'
+        assert zeros(3, dtype=bool).dtype.name == 'bool'
+        assert zeros(3, dtype='float64').dtype is zeros(1).dtype
+        assert isinstance(zeros(1).dtype, dtype)
+        assert array([1, 2]).dtype.char == 'l'
+        assert array([1, 2.5]).dtype.name == 'float64'
+        assert array([True, False]).dtype.name == 'bool'
+        raises(TypeError, zeros, 3, dtype='xyz')
+
+    def test_array(self):
+        from numpy import array, ndarray
+        a = array([[1, 2, 3], [4, 5, 6]])
+        assert isinstance(a, ndarray)
+        assert a.shape == (2, 3)
+        assert a.ndim == 2
+        assert a.size == 6
+        assert a[1, 2] == 6
+        assert a.tolist() == [[1, 2, 3], [4, 5, 6]]
+        assert repr(array([1.5, 2.0])) == 'array([1.5, 2.0])'
+        raises(ValueError, array, [[1, 2], [3]])
+        b = array(a, dtype=float)
+        b[0, 0] = 0.5
+        assert a[0, 0] == 1
+        assert b.tolist()[0] == [0.5, 2.0, 3.0]
+
+    def test_ones_arange(self):
+        from numpy import ones, arange
+        assert ones(3, dtype=int).tolist() == [1, 1, 1]
+        assert ones((2, 2)).tolist() == [[1.0, 1.0], [1.0, 1.0]]
+        assert arange(5).tolist() == [0, 1, 2, 3, 4]
+        assert arange(1, 10, 3).tolist() == [1, 4, 7]
+        assert arange(5, 0, -2).tolist() == [5, 3, 1]
+        assert arange(0, 1, 0.25).tolist() == [0.0, 0.25, 0.5, 0.75]
+        assert arange(3, 1).tolist() == []
+
+    def test_float_storage(self):
+        from numpy import zeros
+        a = zeros(3)
+        a[0] = 1.5
+        a[1] = 7
+        assert a[0] == 1.5
+        assert type(a[1]) is float
+        b = zeros(2, dtype=bool)
+        b[1] = 5
+        assert b[0] is False and b[1] is True
+
+    def test_slice_is_view(self):
+        from numpy import arange
+        a = arange(10)
+        b = a[2:8:2]
+        assert b.tolist() == [2, 4, 6]
+        b[1] = 40
+        assert a[4] == 40
+        assert a[::-1].tolist()[:3] == [9, 8, 7]
+        assert a[8:2].tolist() == []
+        c = a[1:4]
+        c[:] = 0
+        assert a.tolist()[:5] == [0, 0, 0, 0, 40]
+
+    def test_multidim_view(self):
+        from numpy import arange, array
+        a = array([[1, 2, 3], [4, 5, 6], [7, 8, 9]])
+        row = a[1]
+        assert row.tolist() == [4, 5, 6]
+        col = a[:, 1]
+        assert col.tolist() == [2, 5, 8]
+        sub = a[1:, ::2]
+        assert sub.tolist() == [[4, 6], [7, 9]]
+        sub[0, 1] = 60
+        assert a[1, 2] == 60
+        a[0] = [10, 20, 30]
+        assert a[0].tolist() == [10, 20, 30]
+        raises(ValueError, a.__setitem__, 0, [1, 2])
+        raises(IndexError, a.__getitem__, (0, 0, 0))
+
+    def test_overlapping_assignment(self):
+        from numpy import arange
+        a = arange(5)
+        a[1:] = a[:-1]
+        assert a.tolist() == [0, 0, 1, 2, 3]
+
+    def test_arithmetic(self):
+        from numpy import array
+        a = array([1, 2, 3])
+        b = array([0.5, 1.0, 1.5])
+        assert (a + b).tolist() == [1.5, 3.0, 4.5]
+        assert (a - 1).tolist() == [0, 1, 2]
+        assert (10 - a).tolist() == [9, 8, 7]
+        assert (a * a).tolist() == [1, 4, 9]
+        assert (2.5 * a).dtype.name == 'float64'
+        assert (a / 2).tolist() == [0, 1, 1]
+        assert (array([-3]) / 2).tolist() == [-2]
+        assert (a / 0).tolist() == [0, 0, 0]
+        assert (b / 0.5).tolist() == [1.0, 2.0, 3.0]
+        assert (-a).tolist() == [-1, -2, -3]
+        assert abs(array([-1.5, 2.0])).tolist() == [1.5, 2.0]
+        assert (a + [1, 1, 1]).tolist() == [2, 3, 4]
+        raises(ValueError, "a + array([1, 2])")
+
+    def test_arithmetic_on_views(self):
+        from numpy import arange
+        a = arange(10)
+        assert (a[::2] + a[1::2]).tolist() == [1, 5, 9, 13, 17]
+        m = arange(6)
+        assert (m[1:] * 2).tolist() == [2, 4, 6, 8, 10]
+
+    def test_bools(self):
+        from numpy import array
+        a = array([True, False, True])
+        assert (a + a).tolist() == [2, 0, 2]
+        assert (a + a).dtype.name != 'bool'
+        c = array([1, 5, 3]) > 2
+        assert c.dtype.name == 'bool'
+        assert c.tolist() == [False, True, True]
+        assert (array([1.0, 2.0]) == array([1, 3])).tolist() == [True, False]
+
+    def test_ufuncs(self):
+        from numpy import array, minimum, maximum, add, negative, absolute
+        a = array([1.0, 5.0, 3.0])
+        b = array([4.0, 2.0, 3.0])
+        assert minimum(a, b).tolist() == [1.0, 2.0, 3.0]
+        assert maximum(a, b).tolist() == [4.0, 5.0, 3.0]
+        assert add(a, 1).tolist() == [2.0, 6.0, 4.0]
+        assert add(1, 2) == 3
+        assert negative(a).tolist() == [-1.0, -5.0, -3.0]
+        assert absolute(-2) == 2
+
+    def test_reductions(self):
+        from numpy import array, arange, zeros
+        a = array([3, 1, 4, 1, 5])
+        assert a.sum() == 14
+        assert a.min() == 1
+        assert a.max() == 5
+        assert a.prod() == 60
+        assert a.mean() == 2.8
+        b = array([[1.5, 2.5], [3.0, -1.0]])
+        assert b.sum() == 6.0
+        assert b.min() == -1.0
+        assert b.max() == 3.0
+        assert b.mean() == 1.5
+        assert b[:, 0].sum() == 4.5
+        assert array([True, True, False]).sum() == 2
+        assert array([True, False]).max() is True
+        assert zeros(0).sum() == 0.0
+        raises(ValueError, zeros(0).min)
+        assert arange(100)[::3].sum() == sum(range(0, 100, 3))
+
+    def test_lazy_sees_old_values(self):
+        from numpy import array
+        a = array([1, 2, 3])
+        b = a + a
+        c = b * 10
+        a[0] = 100
+        assert b.tolist() == [2, 4, 6]
+        a[1:] = 0
+        assert c.tolist() == [20, 40, 60]
+        d = a * 2
+        b[0] = -1
+        assert b[0] == -1
+        assert d.tolist() == [200, 0, 0]
+
+    def test_lazy_dependency_through_views(self):
+        from numpy import arange
+        a = arange(6)
+        b = a[::2] + 1
+        c = b * 2
+        view = b[1:]
+        view[0] = 50
+        assert b.tolist() == [1, 50, 5]
+        assert c.tolist() == [2, 6, 10]
+
+    def test_lazy_overlapping_assignment(self):
+        from numpy import arange
+        a = arange(5)
+        a[1:] = a[:-1] * 10
+        assert a.tolist() == [0, 0, 10, 20, 30]
+
+    def test_long_expression(self):
+        from numpy import zeros
+        a = zeros(4, dtype=int)
+        for i in range(100):
+            a = a + 1
+        assert a.tolist() == [100] * 4
+        assert a.sum() == 400
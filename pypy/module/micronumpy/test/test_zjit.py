@@ -0,0 +1,43 @@
+from pypy.jit.metainterp.test.test_basic import LLJitMixin
+from pypy.module.micronumpy.numarray import W_FloatArray, W_IntArray, \
+     compute, reduce_float, reduce_int, call2_classes, call1_classes, \
+     ADD, MUL, NEG, SUM, RMAX
+from pypy.module.micronumpy.dtype import int_dtype, float_dtype
+
+Add = call2_classes[ADD]
+Mul = call2_classes[MUL]
+Neg = call1_classes[NEG]
+
+class TestNumpyJIT(LLJitMixin):
+    def test_fused_expression(self):
+        def f(n):
+            a = W_FloatArray(None, [n])
+            b = W_IntArray(None, [n])
+            for i in range(n):
+                a.setfloat(i, i * 0.5)
+                b.setint(i, i)
+            # (a + b) * -a, computed in a single loop
+            tree = Mul(None, float_dtype, Add(None, float_dtype, a, b),
+                       Neg(None, float_dtype, a))
+            res = W_FloatArray(None, [n])
+            compute(tree, res)
+            return reduce_float(SUM, res) + reduce_float(RMAX, a)
+        result = self.meta_interp(f, [30], listops=True, backendopt=True)
+        assert result == f(30)
+        self.check_loop_count(3)
+        self.check_loops(call=0)
+
+    def test_fused_reduction(self):
+        def f(n):
+            a = W_IntArray(None, [2 * n])
+            for i in range(2 * n):
+                a.setint(i, i)
+            evens = a.make_view([n], [2], 0)
+            odds = a.make_view([n], [2], 1)
+            tree = Mul(None, int_dtype, Add(None, int_dtype, evens, odds),
+                       odds)
+            return reduce_int(SUM, tree) + reduce_int(RMAX, odds)
+        result = self.meta_interp(f, [30], listops=True, backendopt=True)
+        assert result == f(30)
+        self.check_loop_count(2)
+        self.check_loops(call=0, setarrayitem_raw=0)
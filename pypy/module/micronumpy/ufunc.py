@@ -1,22 +1,21 @@
-
-from numarray import NumArray
 from pypy.interpreter.baseobjspace import ObjSpace, W_Root
-from pypy.interpreter.error import OperationError
+from pypy.tool.sourcetools import func_with_new_name
+from pypy.module.micronumpy.numarray import binop, unop, binop_names, \
+     unop_names
+
+def make_binop_ufunc(op):
+    def ufunc(space, w_left, w_right):
+        return binop(space, op, w_left, w_right)
+    ufunc.unwrap_spec = [ObjSpace, W_Root, W_Root]
+    return func_with_new_name(ufunc, binop_names[op])
+
+def make_unop_ufunc(op):
+    def ufunc(space, w_obj):
+        return unop(space, op, w_obj)
+    ufunc.unwrap_spec = [ObjSpace, W_Root]
+    return func_with_new_name(ufunc, unop_names[op])
 
-def minimum(space, w_a, w_b):
-    if not isinstance(w_a, NumArray) or not isinstance(w_b, NumArray):
-        raise OperationError(space.w_TypeError,
-                             space.wrap("expecting NumArrat object"))
-    if w_a.dim != w_b.dim:
-        raise OperationError(space.w_ValueError,
-                             space.wrap("minimum of arrays of different length"))
-    res = NumArray(space, w_a.dim, 'i')
-    for i in range(len(w_a.storage)):
-        one = w_a.storage[i]
-        two = w_b.storage[i]
-        if one < two:
-            res.storage[i] = one
-        else:
-            res.storage[i] = two
-    return space.wrap(res)
-minimum.unwrap_spec = [ObjSpace, W_Root, W_Root]
+for _op in range(len(binop_names)):
+    globals()[binop_names[_op]] = make_binop_ufunc(_op)
+for _op in range(1, len(unop_names)):
+    globals()[unop_names[_op]] = make_unop_ufunc(_op)
@@ -4,6 +4,7 @@ from pypy.interpreter.error import OperationError, wrap_oserror
 from pypy.interpreter.baseobjspace import W_Root, ObjSpace, Wrappable
 from pypy.interpreter.typedef import TypeDef
 from pypy.interpreter.gateway import interp2app
+from pypy.interpreter.buffer import Buffer, RWBuffer
 from pypy.rlib import rmmap
 from pypy.rlib.rmmap import RValueError, RTypeError
 import sys
@@ -15,8 +16,10 @@ class W_MMap(Wrappable):
     def __init__(self, space, mmap_obj):
         self.space = space
         self.mmap = mmap_obj
+        self.exports = 0     # number of MMapBuffers pinning the memory
         
     def close(self):
+        self.check_not_exported("close")
         self.mmap.close()
     close.unwrap_spec = ['self']
 
@@ -103,6 +106,7 @@ class W_MMap(Wrappable):
     def resize(self, newsize):
         self.check_valid()
         self.check_resizeable()
+        self.check_not_exported("resize")
         try:
             self.mmap.resize(newsize)
         except OSError, e:
@@ -114,6 +118,12 @@ class W_MMap(Wrappable):
         return self.space.wrap(self.mmap.size)
     __len__.unwrap_spec = ['self']
 
+    def check_not_exported(self, what):
+        if self.exports > 0:
+            msg = "cannot %s an mmap that is exporting buffers" % (what,)
+            raise OperationError(self.space.w_ValueError,
+                                 self.space.wrap(msg))
+
     def check_valid(self):
         try:
             self.mmap.check_valid()
@@ -149,8 +159,7 @@ class W_MMap(Wrappable):
         if step == 0:  # index only
             return space.wrap(self.mmap.getitem(start))
         elif step == 1:
-            res = "".join([self.mmap.getitem(i) for i in range(start, stop)])
-            return space.wrap(res)
+            return space.wrap(MMapBuffer(self).getslice(start, stop))
         else:
             raise OperationError(space.w_ValueError,
                 space.wrap("mmap object does not support slicing with a step"))
@@ -182,12 +191,59 @@ class W_MMap(Wrappable):
     descr_setitem.unwrap_spec = ['self', W_Root, 'bufferstr']
 
     def descr_buffer(self):
-        # XXX improve to work directly on the low-level address
-        from pypy.interpreter.buffer import StringLikeBuffer
-        space = self.space
-        return space.wrap(StringLikeBuffer(space, space.wrap(self)))
+        if self.mmap.access == rmmap.ACCESS_READ:
+            return self.space.wrap(MMapBuffer(self))
+        return self.space.wrap(MMapRWBuffer(self))
     descr_buffer.unwrap_spec = ['self']
 
+class MMapBufferMixin(object):
+    _mixin_ = True
+
+    def __init__(self, w_mmap):
+        self.w_mmap = w_mmap
+
+    def getlength(self):
+        return self.w_mmap.mmap.size
+
+    def getitem(self, index):
+        self.w_mmap.check_valid()
+        return self.w_mmap.mmap.data[index]
+
+    def getslice(self, start, stop):
+        self.w_mmap.check_valid()
+        if start >= stop:
+            return ''
+        return rffi.charpsize2str(self.w_mmap.mmap.getptr(start),
+                                  stop - start)
+
+    def get_raw_address(self):
+        self.w_mmap.check_valid()
+        return self.w_mmap.mmap.data
+
+    def pin(self):
+        self.w_mmap.exports += 1
+
+    def unpin(self):
+        self.w_mmap.exports -= 1
+
+class MMapBuffer(MMapBufferMixin, Buffer):
+    """A read-only view working directly on the mapped memory."""
+
+class MMapRWBuffer(MMapBufferMixin, RWBuffer):
+    """A view working directly on the mapped memory."""
+
+    def setitem(self, index, char):
+        self.w_mmap.check_valid()
+        self.w_mmap.check_writeable()
+        self.w_mmap.mmap.data[index] = char
+
+    def setslice(self, start, string):
+        self.w_mmap.check_valid()
+        self.w_mmap.check_writeable()
+        data = self.w_mmap.mmap.data
+        for i in range(len(string)):
+            data[start + i] = string[i]
+
 W_MMap.typedef = TypeDef("mmap",
     close = interp2app(W_MMap.close),
     read_byte = interp2app(W_MMap.read_byte),
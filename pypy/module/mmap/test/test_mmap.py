@@ -441,6 +441,40 @@ class AppTestMMap:
         assert b[3] == "b"
         assert b[:] == "foobar"
 
+    def test_readinto(self):
+        from mmap import mmap
+        f = open(self.tmpname + "y2", "w+")
+        f.write("foobar")
+        f.flush()
+        m = mmap(f.fileno(), 6)
+        g = open(self.tmpname + "y3", "w+")
+        g.write("spam")
+        g.seek(0)
+        assert g.readinto(m) == 4
+        assert m[:] == "spamar"
+        m.close()
+        g.seek(0)
+        raises(ValueError, g.readinto, m)
+        g.close()
+        f.close()
+
+    def test_readinto_readonly(self):
+        from mmap import mmap, ACCESS_READ
+        f = open(self.tmpname + "y4", "w+")
+        f.write("foobar")
+        f.flush()
+        m = mmap(f.fileno(), 6, access=ACCESS_READ)
+        b = buffer(m)
+        assert b[:] == "foobar"
+        g = open(self.tmpname + "y5", "w+")
+        g.write("spam")
+        g.seek(0)
+        raises(TypeError, g.readinto, m)
+        assert m[:] == "foobar"
+        m.close()
+        g.close()
+        f.close()
+
     def test_all(self):
         # this is a global test, ported from test_mmap.py
         import mmap
@@ -597,6 +597,8 @@ def fork(space):
         pid = os.fork()
     except OSError, e: 
         raise wrap_oserror(space, e) 
+    if pid == 0:
+        space.threadlocals.reinit_threads(space)
     return space.wrap(pid)
 
 def openpty(space):
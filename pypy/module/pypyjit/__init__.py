@@ -2,10 +2,18 @@ from pypy.interpreter.mixedmodule import MixedModule
 
 class Module(MixedModule):
     appleveldefs = {
+        'save_counter_seeds': 'app_counterseeds.save_counter_seeds',
+        'load_counter_seeds': 'app_counterseeds.load_counter_seeds',
     }
 
     interpleveldefs = {
         'set_param':    'interp_jit.set_param',
+        'set_code_param': 'interp_jit.set_code_param',
+        'get_stats':    'interp_jit.get_stats',
+        'get_loop_stats': 'interp_jit.get_loop_stats',
+        'reset_stats':  'interp_jit.reset_stats',
+        '_get_hot_positions': 'interp_counterseeds._get_hot_positions',
+        '_set_seeded_positions': 'interp_counterseeds._set_seeded_positions',
     }
 
     def setup_after_space_initialization(self):
@@ -0,0 +1,27 @@
+# NOT_RPYTHON
+
+def save_counter_seeds(filename):
+    """Save in 'filename' which loops of which code objects became hot
+    in this process, for load_counter_seeds() in a future process."""
+    import marshal, pypyjit
+    data = pypyjit._get_hot_positions()
+    f = open(filename, 'wb')
+    try:
+        marshal.dump(data, f)
+    finally:
+        f.close()
+
+def load_counter_seeds(filename):
+    """Load a file written by save_counter_seeds().  The JIT counters
+    of the loops listed there start as if the loops were already hot:
+    in the code objects created afterwards, these loops are traced after
+    2 iterations instead of after 'threshold' iterations.  They are still
+    traced and compiled again.  Code objects whose bytecode changed since
+    the file was written are ignored."""
+    import marshal, pypyjit
+    f = open(filename, 'rb')
+    try:
+        data = marshal.load(f)
+    finally:
+        f.close()
+    pypyjit._set_seeded_positions(data)
@@ -0,0 +1,93 @@
+"""
+Counter seeding: remember which loops of which code objects became hot
+in a previous run, so that the next process can start tracing them after
+SEEDED_THRESHOLD iterations instead of first counting up to the normal
+threshold.
+
+Only the JIT counters are seeded; the next process still traces, optimizes
+and compiles those loops again.  The traces themselves are not saved: they
+contain addresses of prebuilt and heap objects, descrs and resume data
+that are only meaningful inside the process that produced them.  What is
+saved is therefore only the counting phase, i.e. at most 'threshold'
+interpreted iterations per hot loop.
+"""
+
+from pypy.interpreter.error import OperationError
+from pypy.interpreter.gateway import ObjSpace, W_Root
+from pypy.rlib.objectmodel import compute_hash
+from pypy.rlib.rarithmetic import intmask, r_uint
+
+# the threshold used for the positions found in the counter seeds
+SEEDED_THRESHOLD = 2
+
+
+def code_key(code):
+    return (code.co_filename, code.co_name, code.co_firstlineno,
+            compute_hash(code.co_code))
+
+
+class CounterSeeds(object):
+
+    def __init__(self):
+        self.hot_positions = {}      # {code key: {next_instr: None}}
+        self.seeded_positions = {}   # {code key: {next_instr: None}}, loaded
+
+    def record_hot_position(self, next_instr, code):
+        positions = code.jit_hot_positions
+        if positions is None:
+            key = code_key(code)
+            positions = self.hot_positions.get(key, None)
+            if positions is None:
+                positions = {}
+                self.hot_positions[key] = positions
+            code.jit_hot_positions = positions
+        positions[next_instr] = None
+
+    def lookup_seeded_positions(self, code):
+        # called once per code object, the first time that the JIT asks
+        # for the threshold of one of its positions
+        code.jit_seeds_checked = True
+        if self.seeded_positions:
+            key = code_key(code)
+            code.jit_seeded_positions = self.seeded_positions.get(key, None)
+
+counter_seeds = CounterSeeds()
+
+# ____________________________________________________________
+
+def _get_hot_positions(space):
+    '''Return a list of (filename, name, firstlineno, codehash, positions)
+    describing the loops that became hot so far.'''
+    items_w = []
+    for key, positions in counter_seeds.hot_positions.items():
+        filename, name, firstlineno, codehash = key
+        positions_w = [space.wrap(intmask(pos)) for pos in positions.keys()]
+        items_w.append(space.newtuple([space.wrap(filename),
+                                       space.wrap(name),
+                                       space.wrap(firstlineno),
+                                       space.wrap(codehash),
+                                       space.newlist(positions_w)]))
+    return space.newlist(items_w)
+
+_get_hot_positions.unwrap_spec = [ObjSpace]
+
+def _set_seeded_positions(space, w_items):
+    '''Set the list of (filename, name, firstlineno, codehash, positions)
+    describing the loops whose JIT counters are seeded.  Only the code
+    objects created afterwards, and with exactly the same bytecode,
+    are affected.'''
+    seeded_positions = {}
+    for w_item in space.unpackiterable(w_items):
+        items_w = space.fixedview(w_item)
+        if len(items_w) != 5:
+            raise OperationError(space.w_ValueError,
+                                 space.wrap("bad counter seeds entry"))
+        key = (space.str_w(items_w[0]), space.str_w(items_w[1]),
+               space.int_w(items_w[2]), space.int_w(items_w[3]))
+        positions = {}
+        for w_pos in space.unpackiterable(items_w[4]):
+            positions[r_uint(space.int_w(w_pos))] = None
+        seeded_positions[key] = positions
+    counter_seeds.seeded_positions = seeded_positions
+
+_set_seeded_positions.unwrap_spec = [ObjSpace, W_Root]
@@ -8,12 +8,15 @@ from pypy.rlib.rarithmetic import r_uint, intmask
 from pypy.rlib.jit import JitDriver, hint, we_are_jitted
 import pypy.interpreter.pyopcode   # for side-effects
 from pypy.interpreter.error import OperationError, operationerrfmt
-from pypy.interpreter.gateway import ObjSpace, Arguments
+from pypy.interpreter.gateway import ObjSpace, Arguments, W_Root
+from pypy.interpreter.function import Function
+from pypy.module.pypyjit.interp_counterseeds import counter_seeds
+from pypy.module.pypyjit.interp_counterseeds import SEEDED_THRESHOLD
 from pypy.interpreter.pycode import PyCode, CO_GENERATOR
 from pypy.interpreter.pyframe import PyFrame
 from pypy.interpreter.pyopcode import ExitFrame
 from opcode import opmap
-from pypy.rlib.objectmodel import we_are_translated
+from pypy.rlib.objectmodel import we_are_translated, specialize
 
 PyFrame._virtualizable2_ = ['last_instr', 'pycode',
                             'valuestackdepth', 'valuestack_w[*]',
@@ -35,12 +38,28 @@ def get_jitcell_at(next_instr, bytecode):
 def set_jitcell_at(newcell, next_instr, bytecode):
     bytecode.jit_cells[next_instr] = newcell
 
+def get_threshold(next_instr, bytecode):
+    if bytecode.jit_threshold != 0:
+        return bytecode.jit_threshold
+    if not bytecode.jit_seeds_checked:
+        counter_seeds.lookup_seeded_positions(bytecode)
+    positions = bytecode.jit_seeded_positions
+    if positions is not None and next_instr in positions:
+        return SEEDED_THRESHOLD
+    return 0
+
+def should_always_inline(next_instr, bytecode):
+    return bytecode.jit_always_inline
+
 def confirm_enter_jit(next_instr, bytecode, frame, ec):
     return (not (bytecode.co_flags & CO_GENERATOR) and
             frame.w_f_trace is None and
             ec.profilefunc is None and
             ec.w_tracefunc is None)
 
+def threshold_reached(next_instr, bytecode):
+    counter_seeds.record_hot_position(next_instr, bytecode)
+
 
 class PyPyJitDriver(JitDriver):
     reds = ['frame', 'ec']
@@ -58,7 +77,10 @@ class PyPyJitDriver(JitDriver):
 pypyjitdriver = PyPyJitDriver(get_printable_location = get_printable_location,
                               get_jitcell_at = get_jitcell_at,
                               set_jitcell_at = set_jitcell_at,
-                              confirm_enter_jit = confirm_enter_jit)
+                              confirm_enter_jit = confirm_enter_jit,
+                              get_threshold = get_threshold,
+                              should_always_inline = should_always_inline,
+                              threshold_reached = threshold_reached)
 
 class __extend__(PyFrame):
 
@@ -93,9 +115,19 @@ class __extend__(PyCode):
     def _initialize(self):
         PyCode__initialize(self)
         self.jit_cells = {}
+        # per-code-object settings, changed by pypyjit.set_code_param()
+        self.jit_threshold = 0       # 0: default; < 0: never trace
+        self.jit_always_inline = False
+        # for the counter seeding, see interp_counterseeds.py
+        self.jit_hot_positions = None
+        self.jit_seeded_positions = None
+        self.jit_seeds_checked = False
 
     def _freeze_(self):
         self.jit_cells = {}
+        self.jit_hot_positions = None
+        self.jit_seeded_positions = None
+        self.jit_seeds_checked = False
         return False
 
 # ____________________________________________________________
@@ -128,3 +160,111 @@ def set_param(space, args):
                                   "no JIT parameter '%s'", key)
 
 set_param.unwrap_spec = [ObjSpace, Arguments]
+
+CODE_PARAMETERS = ('threshold', 'never_trace', 'always_inline')
+
+def set_code_param(space, w_code, args):
+    '''Configure the JIT for a single function or code object.
+        * set_code_param(f, threshold=n)    # 0 means the global threshold
+        * set_code_param(f, never_trace=True)
+        * set_code_param(f, always_inline=True)
+    The parameters are applied in this order, so that never_trace=True
+    wins over threshold=n if both are given.
+    '''
+    if isinstance(w_code, Function):
+        w_code = w_code.code
+    code = space.interp_w(PyCode, w_code)
+    args_w, kwds_w = args.unpack()
+    if len(args_w) > 0:
+        msg = "set_code_param() takes no non-keyword argument, %d given"
+        raise operationerrfmt(space.w_TypeError, msg, len(args_w))
+    for key in kwds_w:
+        if key not in CODE_PARAMETERS:
+            raise operationerrfmt(space.w_TypeError,
+                                  "no JIT code parameter '%s'", key)
+    # the parameters are applied in the order of CODE_PARAMETERS, not in
+    # the (arbitrary) order of the keywords
+    w_value = kwds_w.get('threshold', None)
+    if w_value is not None:
+        threshold = space.int_w(w_value)
+        if threshold < 0:
+            raise OperationError(space.w_ValueError,
+                                 space.wrap("negative threshold"))
+        code.jit_threshold = threshold
+    w_value = kwds_w.get('never_trace', None)
+    if w_value is not None:
+        if space.is_true(w_value):
+            code.jit_threshold = -1
+        elif code.jit_threshold < 0:
+            code.jit_threshold = 0
+    w_value = kwds_w.get('always_inline', None)
+    if w_value is not None:
+        code.jit_always_inline = space.is_true(w_value)
+    # the JIT caches the threshold of each position in its cell
+    for cell in code.jit_cells.values():
+        cell.invalidate_increment()
+
+set_code_param.unwrap_spec = [ObjSpace, W_Root, Arguments]
+
+@specialize.argtype(3)
+def _setitem(space, w_dict, key, value):
+    space.setitem(w_dict, space.wrap(key), space.wrap(value))
+
+def get_stats(space):
+    '''Return a dict with the global statistics of the JIT: number of
+    compiled loops and bridges, size of the machine code, aborted traces
+    with their reason, guard failures, and the time spent tracing and
+    in the backend.  These counters are always enabled.
+    '''
+    from pypy.jit.metainterp.jitprof import jit_statistics
+    stats = jit_statistics
+    w_result = space.newdict()
+    _setitem(space, w_result, 'loops', stats.loops_compiled)
+    _setitem(space, w_result, 'bridges', stats.bridges_compiled)
+    _setitem(space, w_result, 'freed_loops', stats.loops_freed)
+    _setitem(space, w_result, 'asm_bytes', stats.asm_bytes)
+    _setitem(space, w_result, 'abort_too_long', stats.abort_too_long)
+    _setitem(space, w_result, 'abort_bridge', stats.abort_bridge)
+    _setitem(space, w_result, 'abort_escape', stats.abort_escape)
+    _setitem(space, w_result, 'guard_failures', stats.guard_failures)
+    _setitem(space, w_result, 'tracing', stats.tracing_count)
+    _setitem(space, w_result, 'tracing_time', stats.tracing_time)
+    _setitem(space, w_result, 'backend', stats.backend_count)
+    _setitem(space, w_result, 'backend_time', stats.backend_time)
+    _setitem(space, w_result, 'running', stats.running_count)
+    _setitem(space, w_result, 'blackhole', stats.blackhole_count)
+    return w_result
+
+get_stats.unwrap_spec = [ObjSpace]
+
+def get_loop_stats(space):
+    '''Return a list of dicts, one per compiled loop that is still alive,
+    giving its number, type, number of operations and guards, size of
+    the machine code, number of bridges and number of guard failures.
+    '''
+    from pypy.jit.metainterp.jitprof import jit_statistics
+    numbers = jit_statistics.loops.keys()
+    numbers.sort()
+    result_w = []
+    for number in numbers:
+        loopstats = jit_statistics.loops[number]
+        w_loop = space.newdict()
+        _setitem(space, w_loop, 'number', loopstats.number)
+        _setitem(space, w_loop, 'type', loopstats.type)
+        _setitem(space, w_loop, 'operations', loopstats.operations)
+        _setitem(space, w_loop, 'guards', loopstats.guards)
+        _setitem(space, w_loop, 'asm_bytes', loopstats.asm_bytes)
+        _setitem(space, w_loop, 'bridges', loopstats.bridges)
+        _setitem(space, w_loop, 'guard_failures', loopstats.guard_failures)
+        result_w.append(w_loop)
+    return space.newlist(result_w)
+
+get_loop_stats.unwrap_spec = [ObjSpace]
+
+def reset_stats(space):
+    '''Reset all the counters returned by get_stats() and get_loop_stats().
+    '''
+    from pypy.jit.metainterp.jitprof import jit_statistics
+    jit_statistics.reset()
+
+reset_stats.unwrap_spec = [ObjSpace]
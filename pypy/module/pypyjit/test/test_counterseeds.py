@@ -0,0 +1,114 @@
+from pypy.conftest import gettestobjspace
+from pypy.tool.udir import udir
+from pypy.rlib.rarithmetic import r_uint
+from pypy.module.pypyjit import interp_counterseeds
+from pypy.module.pypyjit.interp_counterseeds import CounterSeeds, code_key
+from pypy.module.pypyjit.interp_jit import get_threshold
+from pypy.interpreter.pycode import PyCode
+from pypy.jit.metainterp.warmstate import WarmEnterState
+from pypy.rlib.jit import PARAMETERS
+
+
+class FakeCode(object):
+    co_filename = 'foo.py'
+    co_name = 'f'
+    co_firstlineno = 42
+    jit_threshold = 0
+    jit_hot_positions = None
+    jit_seeded_positions = None
+    jit_seeds_checked = False
+
+    def __init__(self, co_code):
+        self.co_code = co_code
+
+
+def test_record_hot_position():
+    cache = CounterSeeds()
+    code = FakeCode('abc')
+    cache.record_hot_position(r_uint(5), code)
+    cache.record_hot_position(r_uint(12), code)
+    cache.record_hot_position(r_uint(5), code)
+    assert cache.hot_positions == {code_key(code): {5: None, 12: None}}
+    # another code object with the same key shares the same positions
+    code2 = FakeCode('abc')
+    cache.record_hot_position(r_uint(7), code2)
+    assert cache.hot_positions == {code_key(code): {5: None, 7: None,
+                                                    12: None}}
+
+def test_get_threshold_seeded_positions():
+    cache = interp_counterseeds.counter_seeds
+    prev = cache.seeded_positions
+    try:
+        cache.seeded_positions = {code_key(FakeCode('abc')): {r_uint(5): None}}
+        code = FakeCode('abc')
+        assert get_threshold(r_uint(5), code) == interp_counterseeds.SEEDED_THRESHOLD
+        assert code.jit_seeds_checked
+        assert get_threshold(r_uint(6), code) == 0
+        # the bytecode changed: the cache entry is ignored
+        code = FakeCode('abd')
+        assert get_threshold(r_uint(5), code) == 0
+        # an explicit setting wins
+        code = FakeCode('abc')
+        code.jit_threshold = -1
+        assert get_threshold(r_uint(5), code) == -1
+    finally:
+        cache.seeded_positions = prev
+
+
+def make_code(space):
+    # a new code object each time, but always with the same key
+    w_code = space.appexec([], """():
+        src = "def f(n):\\n    while n > 0:\\n        n -= 1\\n"
+        d = {}
+        exec compile(src, 'foo.py', 'exec') in d
+        return d['f'].func_code
+    """)
+    return space.interp_w(PyCode, w_code)
+
+def test_save_load():
+    space = gettestobjspace(usemodules=('pypyjit',))
+    cache = interp_counterseeds.counter_seeds
+    prev = cache.hot_positions, cache.seeded_positions
+    filename = str(udir.join('pypyjit-counter-seeds-save-load'))
+    try:
+        cache.hot_positions = {}
+        cache.seeded_positions = {}
+        code = make_code(space)
+        # what the jitdriver's threshold_reached() hook does
+        cache.record_hot_position(r_uint(12), code)
+        space.appexec([space.wrap(filename)], """(filename):
+            import pypyjit
+            pypyjit.save_counter_seeds(filename)
+        """)
+        # start again, as in a new process
+        cache.hot_positions = {}
+        cache.seeded_positions = {}
+        space.appexec([space.wrap(filename)], """(filename):
+            import pypyjit
+            pypyjit.load_counter_seeds(filename)
+        """)
+        assert cache.seeded_positions == {code_key(code): {r_uint(12): None}}
+        code = make_code(space)
+        assert get_threshold(r_uint(12), code) == interp_counterseeds.SEEDED_THRESHOLD
+        assert get_threshold(r_uint(3), code) == 0
+    finally:
+        cache.hot_positions, cache.seeded_positions = prev
+    # the JIT traces such a position on its second iteration, instead
+    # of after the default threshold
+    increment = WarmEnterState.compute_increment.im_func(
+        WarmEnterState, interp_counterseeds.SEEDED_THRESHOLD)
+    assert 2 * increment > WarmEnterState.THRESHOLD_LIMIT
+    assert increment <= WarmEnterState.THRESHOLD_LIMIT
+    default_increment = WarmEnterState.compute_increment.im_func(
+        WarmEnterState, PARAMETERS['threshold'])
+    assert 2 * default_increment <= WarmEnterState.THRESHOLD_LIMIT
+
+
+class AppTestCounterSeeds:
+    def setup_class(cls):
+        cls.space = gettestobjspace(usemodules=('pypyjit',))
+
+    def test_set_seeded_positions_errors(self):
+        import pypyjit
+        raises(ValueError, pypyjit._set_seeded_positions, [('foo.py',)])
+        pypyjit._set_seeded_positions([])
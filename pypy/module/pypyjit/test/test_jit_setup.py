@@ -1,4 +1,31 @@
 from pypy.conftest import gettestobjspace
+from pypy.interpreter.pycode import PyCode
+
+
+def test_set_code_param_order():
+    space = gettestobjspace(usemodules=('pypyjit',))
+    w_code = space.appexec([], """():
+        def f(x):
+            return x + 1
+        return f.func_code
+    """)
+    code = space.interp_w(PyCode, w_code)
+    class FakeCell(object):
+        invalidated = False
+        def invalidate_increment(self):
+            self.invalidated = True
+    cell = FakeCell()
+    code.jit_cells[5] = cell
+    for args in ["never_trace=True, threshold=5",
+                 "threshold=5, never_trace=True"]:
+        space.appexec([w_code], """(code):
+            import pypyjit
+            pypyjit.set_code_param(code, %s)
+        """ % (args,))
+        assert code.jit_threshold == -1
+    assert cell.invalidated
+    del code.jit_cells[5]
+
 
 class AppTestPyPyJIT:
     def setup_class(cls):
@@ -24,3 +51,29 @@ class AppTestPyPyJIT:
                 i += 1
 
         assert list(gen(3)) == [0, 1, 4]
+
+    def test_stats(self):
+        import pypyjit
+        pypyjit.reset_stats()
+        stats = pypyjit.get_stats()
+        for key in ['loops', 'bridges', 'freed_loops', 'asm_bytes',
+                    'abort_too_long', 'abort_bridge', 'abort_escape',
+                    'guard_failures', 'tracing', 'backend', 'running',
+                    'blackhole']:
+            assert stats[key] == 0
+        assert stats['tracing_time'] == 0.0
+        assert stats['backend_time'] == 0.0
+        assert isinstance(pypyjit.get_loop_stats(), list)
+
+    def test_set_code_param(self):
+        import pypyjit
+        def f(x):
+            return x + 1
+        pypyjit.set_code_param(f, threshold=5)
+        pypyjit.set_code_param(f.func_code, never_trace=True)
+        pypyjit.set_code_param(f, never_trace=False, always_inline=True)
+        raises(TypeError, pypyjit.set_code_param, f, foobar=3)
+        raises(TypeError, pypyjit.set_code_param, f, 5)
+        raises(TypeError, pypyjit.set_code_param, 42, threshold=5)
+        raises(ValueError, pypyjit.set_code_param, f, threshold=-2)
+        assert f(6) == 7
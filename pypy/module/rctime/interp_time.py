@@ -5,6 +5,8 @@ from pypy.interpreter.baseobjspace import W_Root, ObjSpace
 from pypy.rpython.lltypesystem import lltype
 from pypy.rlib.rarithmetic import ovfcheck_float_to_int
 from pypy.rlib import rposix
+from pypy.module.signal.interp_signal import block_signals_during_wait
+from pypy.module.signal.interp_signal import unblock_signals_after_wait
 from pypy.translator.tool.cbuild import ExternalCompilationInfo
 import math
 import os
@@ -166,9 +168,13 @@ def _get_error_msg():
     errno = rposix.get_errno()
     return os.strerror(errno)
 
-def sleep(secs):
-    pytime.sleep(secs)
-sleep.unwrap_spec = [float]
+def sleep(space, secs):
+    blocked = block_signals_during_wait(space)
+    try:
+        pytime.sleep(secs)
+    finally:
+        unblock_signals_after_wait(blocked)
+sleep.unwrap_spec = [ObjSpace, float]
 
 def _get_module_object(space, obj_name):
     w_module = space.getbuiltinmodule('time')
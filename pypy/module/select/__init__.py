@@ -12,11 +12,19 @@ class Module(MixedModule):
         'select': 'interp_select.select',
     }
 
+    if sys.platform.startswith('linux'):
+        interpleveldefs['epoll'] = 'space.gettypefor(interp_epoll.W_Epoll)'
+
     def buildloaders(cls):
         from pypy.rlib import rpoll
         for name in rpoll.eventnames:
             value = getattr(rpoll, name)
             Module.interpleveldefs[name] = "space.wrap(%r)" % value
+        if 'epoll' in Module.interpleveldefs:
+            from pypy.rlib import repoll
+            for name in repoll.eventnames:
+                value = getattr(repoll, name)
+                Module.interpleveldefs[name] = "space.wrap(%r)" % value
         super(Module, cls).buildloaders()
     buildloaders = classmethod(buildloaders)
 
@@ -0,0 +1,164 @@
+import os
+from pypy.interpreter.typedef import TypeDef, GetSetProperty
+from pypy.interpreter.baseobjspace import Wrappable
+from pypy.interpreter.gateway import W_Root, ObjSpace, interp2app
+from pypy.interpreter.error import OperationError, operationerrfmt
+from pypy.interpreter.error import wrap_oserror
+from pypy.module.select.interp_select import as_fd_w
+from pypy.module.signal.interp_signal import block_signals_during_wait
+from pypy.module.signal.interp_signal import unblock_signals_after_wait
+from pypy.rpython.lltypesystem import lltype
+from pypy.rlib import repoll
+
+defaultevents = repoll.EPOLLIN | repoll.EPOLLOUT | repoll.EPOLLPRI
+
+def epoll_error(space, e):
+    return wrap_oserror(space, e, exception_name='w_IOError')
+
+class W_Epoll(Wrappable):
+    # The array receiving the events from epoll_wait() is kept between
+    # calls to poll(); it is taken out of the object while a poll() is
+    # running, so that concurrent polls from several threads each use
+    # their own array.
+    events = lltype.nullptr(repoll.EPOLL_EVENT_ARRAY)
+    events_size = 0
+
+    def __init__(self, space, epfd):
+        self.space = space
+        self.epfd = epfd
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        if self.epfd >= 0:
+            epfd = self.epfd
+            self.epfd = -1
+            try:
+                os.close(epfd)
+            except OSError:
+                pass
+        if self.events:
+            repoll.free_events(self.events)
+            self.events = lltype.nullptr(repoll.EPOLL_EVENT_ARRAY)
+            self.events_size = 0
+
+    def check_closed(self):
+        if self.epfd < 0:
+            space = self.space
+            raise OperationError(space.w_ValueError,
+                space.wrap("I/O operation on closed epoll fd"))
+
+    def descr_fileno(self, space):
+        self.check_closed()
+        return space.wrap(self.epfd)
+    descr_fileno.unwrap_spec = ['self', ObjSpace]
+
+    def descr_close(self, space):
+        self.close()
+    descr_close.unwrap_spec = ['self', ObjSpace]
+
+    def _ctl(self, space, op, w_fd, eventmask):
+        self.check_closed()
+        fd = as_fd_w(space, w_fd)
+        try:
+            repoll.epoll_ctl(self.epfd, op, fd, eventmask)
+        except OSError, e:
+            raise epoll_error(space, e)
+
+    def descr_register(self, space, w_fd, eventmask=defaultevents):
+        self._ctl(space, repoll.EPOLL_CTL_ADD, w_fd, eventmask)
+    descr_register.unwrap_spec = ['self', ObjSpace, W_Root, int]
+
+    def descr_modify(self, space, w_fd, eventmask):
+        self._ctl(space, repoll.EPOLL_CTL_MOD, w_fd, eventmask)
+    descr_modify.unwrap_spec = ['self', ObjSpace, W_Root, int]
+
+    def descr_unregister(self, space, w_fd):
+        self._ctl(space, repoll.EPOLL_CTL_DEL, w_fd, 0)
+    descr_unregister.unwrap_spec = ['self', ObjSpace, W_Root]
+
+    def descr_poll(self, space, timeout=-1.0, maxevents=-1):
+        self.check_closed()
+        if timeout < 0:
+            itimeout = -1
+        else:
+            itimeout = int(timeout * 1000.0 + 0.5)
+        if maxevents == -1:
+            maxevents = repoll.FD_SETSIZE - 1
+        elif maxevents < 1:
+            raise operationerrfmt(space.w_ValueError,
+                                  "maxevents must be greater than 0, not %d",
+                                  maxevents)
+        events = self.events
+        if events and self.events_size >= maxevents:
+            size = self.events_size
+            self.events = lltype.nullptr(repoll.EPOLL_EVENT_ARRAY)
+            self.events_size = 0
+        else:
+            events = repoll.alloc_events(maxevents)
+            size = maxevents
+        blocked = block_signals_during_wait(space)
+        try:
+            try:
+                retval = repoll.epoll_wait(self.epfd, events, maxevents,
+                                           itimeout)
+            except OSError, e:
+                raise epoll_error(space, e)
+        finally:
+            unblock_signals_after_wait(blocked)
+            if self.events or self.epfd < 0:
+                repoll.free_events(events)
+            else:
+                self.events = events
+                self.events_size = size
+        retval_w = []
+        for fd, revents in retval:
+            retval_w.append(space.newtuple([space.wrap(fd),
+                                            space.wrap(revents)]))
+        return space.newlist(retval_w)
+    descr_poll.unwrap_spec = ['self', ObjSpace, float, int]
+
+
+def descr_epoll__new__(space, w_subtype, sizehint=-1):
+    if sizehint == -1:
+        sizehint = repoll.FD_SETSIZE - 1
+    elif sizehint < 0:
+        raise operationerrfmt(space.w_ValueError,
+                              "sizehint must be greater than zero, got %d",
+                              sizehint)
+    try:
+        epfd = repoll.epoll_create(sizehint)
+    except OSError, e:
+        raise epoll_error(space, e)
+    epoll = space.allocate_instance(W_Epoll, w_subtype)
+    W_Epoll.__init__(epoll, space, epfd)
+    return space.wrap(epoll)
+descr_epoll__new__.unwrap_spec = [ObjSpace, W_Root, int]
+
+def descr_epoll_fromfd(space, w_subtype, fd):
+    epoll = space.allocate_instance(W_Epoll, w_subtype)
+    W_Epoll.__init__(epoll, space, fd)
+    return space.wrap(epoll)
+descr_epoll_fromfd.unwrap_spec = [ObjSpace, W_Root, int]
+
+def descr_epoll_closed(space, epoll):
+    return space.wrap(epoll.epfd < 0)
+
+W_Epoll.typedef = TypeDef('select.epoll',
+    __doc__ = """select.epoll([sizehint=-1])
+
+Returns an epolling object.  sizehint must be a positive integer or -1
+for the default size.  The sizehint is used to optimize internal data
+structures.  It doesn't limit the maximum number of monitored events.""",
+    __new__ = interp2app(descr_epoll__new__),
+    fromfd = interp2app(descr_epoll_fromfd, as_classmethod=True),
+    closed = GetSetProperty(descr_epoll_closed, cls=W_Epoll,
+                            doc="True if the epoll handler is closed"),
+    fileno = interp2app(W_Epoll.descr_fileno),
+    close = interp2app(W_Epoll.descr_close),
+    register = interp2app(W_Epoll.descr_register),
+    modify = interp2app(W_Epoll.descr_modify),
+    unregister = interp2app(W_Epoll.descr_unregister),
+    poll = interp2app(W_Epoll.descr_poll),
+)
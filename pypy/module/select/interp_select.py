@@ -4,6 +4,8 @@ from pypy.interpreter.baseobjspace import Wrappable
 from pypy.interpreter.gateway import W_Root, ObjSpace, interp2app
 from pypy.interpreter.error import OperationError, operationerrfmt
 from pypy.rlib import rpoll
+from pypy.module.signal.interp_signal import block_signals_during_wait
+from pypy.module.signal.interp_signal import unblock_signals_after_wait
 
 defaultevents = rpoll.POLLIN | rpoll.POLLOUT | rpoll.POLLPRI
 
@@ -66,8 +68,12 @@ class Poll(Wrappable):
                 raise OperationError(space.w_ValueError,
                                      space.wrap("math range error"))
 
+        blocked = block_signals_during_wait(space)
         try:
-            retval = rpoll.poll(self.fddict, timeout)
+            try:
+                retval = rpoll.poll(self.fddict, timeout)
+            finally:
+                unblock_signals_after_wait(blocked)
         except rpoll.PollError, e:
             w_module = space.getbuiltinmodule('select')
             w_errortype = space.getattr(w_module, space.wrap('error'))
@@ -128,11 +134,16 @@ On Windows, only sockets are supported; on Unix, all file descriptors.
         owtd_d[owtd[i]] = owtd_w[i]
     for i in range(len(ewtd)):
         ewtd_d[ewtd[i]] = ewtd_w[i]
+    if space.is_w(w_timeout, space.w_None):
+        timeout = -1.0
+    else:
+        timeout = space.float_w(w_timeout)
+    blocked = block_signals_during_wait(space)
     try:
-        if space.is_w(w_timeout, space.w_None):
-            iwtd, owtd, ewtd = rpoll.select(iwtd, owtd, ewtd)
-        else:
-            iwtd, owtd, ewtd = rpoll.select(iwtd, owtd, ewtd, space.float_w(w_timeout))
+        try:
+            iwtd, owtd, ewtd = rpoll.select(iwtd, owtd, ewtd, timeout)
+        finally:
+            unblock_signals_after_wait(blocked)
     except rpoll.SelectError, s:
         w_module = space.getbuiltinmodule('select')
         w_errortype = space.getattr(w_module, space.wrap('error'))
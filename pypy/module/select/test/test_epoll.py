@@ -0,0 +1,88 @@
+import py, sys
+from pypy.conftest import gettestobjspace
+
+class AppTestEpoll:
+    def setup_class(cls):
+        if not sys.platform.startswith('linux'):
+            py.test.skip("epoll is only available on Linux")
+        cls.space = gettestobjspace(usemodules=('select',))
+
+    def test_create(self):
+        import select
+        ep = select.epoll(16)
+        assert ep.fileno() > 0
+        assert not ep.closed
+        ep.close()
+        assert ep.closed
+        raises(ValueError, ep.fileno)
+        raises(ValueError, ep.poll, 0)
+        ep.close()      # closing twice is fine
+        raises(ValueError, select.epoll, -2)
+
+    def test_fromfd(self):
+        import select, os
+        ep = select.epoll()
+        ep2 = select.epoll.fromfd(os.dup(ep.fileno()))
+        assert isinstance(ep2, select.epoll)
+        assert ep2.fileno() != ep.fileno()
+        ep.close()
+        ep2.close()
+
+    def test_register_poll(self):
+        import select, os
+        ep = select.epoll()
+        readend, writeend = os.pipe()
+        try:
+            ep.register(readend, select.EPOLLIN)
+            ep.register(writeend, select.EPOLLOUT)
+            raises(IOError, ep.register, readend)
+            assert ep.poll(0) == [(writeend, select.EPOLLOUT)]
+            os.write(writeend, 'x')
+            res = ep.poll(1.0)
+            res.sort()
+            assert res == [(readend, select.EPOLLIN),
+                           (writeend, select.EPOLLOUT)]
+            assert len(ep.poll(-1, 1)) == 1
+            raises(ValueError, ep.poll, 0, 0)
+
+            ep.modify(writeend, 0)
+            assert ep.poll(0) == [(readend, select.EPOLLIN)]
+            ep.unregister(readend)
+            assert ep.poll(0) == []
+            raises(IOError, ep.unregister, readend)
+        finally:
+            ep.close()
+            os.close(readend)
+            os.close(writeend)
+
+    def test_timeout(self):
+        import select, os, time
+        ep = select.epoll()
+        readend, writeend = os.pipe()
+        try:
+            ep.register(readend)
+            start = time.time()
+            assert ep.poll(0.3) == []
+            assert time.time() - start > 0.25
+        finally:
+            ep.close()
+            os.close(readend)
+            os.close(writeend)
+
+    def test_fileno_object(self):
+        import select, os
+        class FileLike:
+            def __init__(self, fd):
+                self.fd = fd
+            def fileno(self):
+                return self.fd
+        ep = select.epoll()
+        readend, writeend = os.pipe()
+        try:
+            ep.register(FileLike(writeend), select.EPOLLOUT)
+            assert ep.poll(0) == [(writeend, select.EPOLLOUT)]
+            raises(TypeError, ep.register, "foo")
+        finally:
+            ep.close()
+            os.close(readend)
+            os.close(writeend)
@@ -3,6 +3,8 @@ from pypy.interpreter.baseobjspace import Wrappable
 from pypy.interpreter.typedef import TypeDef
 from pypy.interpreter.gateway import interp2app, ObjSpace, W_Root
 
+UPDATE_CHUNK = 65536
+
 
 class W_SHA(Wrappable, rsha.RSHA):
     """
@@ -14,6 +16,15 @@ class W_SHA(Wrappable, rsha.RSHA):
         self._init()
 
     def update_w(self, string):
+        # hashing doesn't release the GIL: big strings are hashed in
+        # chunks, and another thread can run between two of them
+        start = 0
+        while len(string) - start > UPDATE_CHUNK:
+            self.update(string[start:start + UPDATE_CHUNK])
+            start += UPDATE_CHUNK
+            self.space.threadlocals.switch_if_requested()
+        if start:
+            string = string[start:]
         self.update(string)
 
     def digest_w(self):
@@ -35,7 +46,7 @@ def W_SHA___new__(space, w_subtype, initialdata=''):
     w_sha = space.allocate_instance(W_SHA, w_subtype)
     sha = space.interp_w(W_SHA, w_sha)
     W_SHA.__init__(sha, space)
-    sha.update(initialdata)
+    sha.update_w(initialdata)
     return w_sha
 
 
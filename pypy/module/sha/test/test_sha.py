@@ -87,6 +87,19 @@ class AppTestSHA(object):
         assert d2.hexdigest() == '425af12a0743502b322e93a015bcf868e324d56a'
 
 
+    def test_big_string(self):
+        """
+        Test strings that are hashed in several chunks.
+        """
+        sha = self.sha
+        data = 'abcdefg' * 30000
+        d1 = sha.sha(data)
+        assert d1.hexdigest() == 'a9639196c6e233606aaf06c4b96a7075c9cdd0a7'
+        d2 = sha.sha('abcdefg')
+        d2.update(data[7:])
+        assert d2.hexdigest() == 'a9639196c6e233606aaf06c4b96a7075c9cdd0a7'
+
+
     def test_buffer(self):
         """
         Test passing a buffer object.
@@ -26,7 +26,8 @@ eci = ExternalCompilationInfo(
     include_dirs = [str(py.path.local(autopath.pypydir).join('translator', 'c'))],
     export_symbols = ['pypysig_poll', 'pypysig_default',
                       'pypysig_ignore', 'pypysig_setflag',
-                      'pypysig_getaddr_occurred'],
+                      'pypysig_getaddr_occurred',
+                      'pypysig_block', 'pypysig_unblock'],
 )
 
 def external(name, args, result, **kwds):
@@ -38,6 +39,10 @@ pypysig_setflag = external('pypysig_setflag', [rffi.INT], lltype.Void)
 pypysig_poll = external('pypysig_poll', [], rffi.INT, threadsafe=False)
 # don't bother releasing the GIL around a call to pypysig_poll: it's
 # pointless and a performance issue
+pypysig_block = external('pypysig_block', [rffi.INT], lltype.Void,
+                         threadsafe=False)
+pypysig_unblock = external('pypysig_unblock', [rffi.INT], lltype.Void,
+                           threadsafe=False)
 
 # don't use rffi.LONGP because the JIT doesn't support raw arrays so far
 struct_name = 'pypysig_long_struct'
@@ -70,6 +75,8 @@ class CheckSignalAction(AsyncAction):
     def __init__(self, space):
         AsyncAction.__init__(self, space)
         self.handlers_w = {}
+        self.interp_handlers = {}
+        self.signals_blocked_during_waits = []
         if space.config.objspace.usemodules.thread:
             # need a helper action in case signals arrive in a non-main thread
             self.pending_signals = {}
@@ -83,7 +90,11 @@ class CheckSignalAction(AsyncAction):
             n = pypysig_poll()
             if n < 0:
                 break
-            if self.reissue_signal_action is None:
+            if n in self.interp_handlers:
+                # handled at interp-level, in whichever thread runs now
+                handler = self.interp_handlers[n]
+                handler.handle_signal(executioncontext, frame)
+            elif self.reissue_signal_action is None:
                 # no threads: we can report the signal immediately
                 self.report_signal(n)
             else:
@@ -127,6 +138,71 @@ class CheckSignalAction(AsyncAction):
                 self.reissue_signal_action.fire()
 
 
+class InterpSignalHandler(object):
+    """Base class for signal handlers written at interp-level, installed
+    with set_interp_handler().  Unlike app-level handlers, they are
+    invoked in whichever thread notices the signal, between two opcodes
+    of the given frame.
+    """
+    # if True, the signal is blocked in the threads that are in a blocking
+    # wait, see block_signals_during_wait()
+    block_during_waits = False
+
+    def handle_signal(self, executioncontext, frame):
+        """To be overridden."""
+
+def set_interp_handler(space, signum, handler):
+    """Deliver the signal 'signum' to the InterpSignalHandler 'handler'
+    instead of to the app-level handler, or stop doing so if 'handler'
+    is None.  Meanwhile, signal() only records the new app-level handler;
+    the C-level handling that matches it is installed again when the
+    interp-level handler is removed."""
+    action = space.check_signal_action
+    blocked = action.signals_blocked_during_waits
+    if signum in blocked:
+        blocked.remove(signum)
+    if handler is None:
+        if signum in action.interp_handlers:
+            del action.interp_handlers[signum]
+            reset_c_handler(space, signum)
+    else:
+        action.interp_handlers[signum] = handler
+        if handler.block_during_waits:
+            blocked.append(signum)
+        pypysig_setflag(signum)
+
+def block_signals_during_wait(space):
+    """Block, in the calling thread, the signals whose interp-level handler
+    must not interrupt a blocking wait like select(), poll() or sleep()
+    with EINTR.  Such a signal is delivered to another thread meanwhile,
+    or when unblock_signals_after_wait() is called with the result."""
+    if not space.config.objspace.usemodules.signal:
+        return None
+    signals = space.check_signal_action.signals_blocked_during_waits
+    if not signals:
+        return None
+    signals = signals[:]
+    for signum in signals:
+        pypysig_block(signum)
+    return signals
+
+def unblock_signals_after_wait(signals):
+    if signals is not None:
+        for signum in signals:
+            pypysig_unblock(signum)
+
+def reset_c_handler(space, signum):
+    """Make the C-level handling of 'signum' match its app-level handler."""
+    action = space.check_signal_action
+    w_handler = action.handlers_w.get(signum, None)
+    if w_handler is None or space.eq_w(w_handler, space.wrap(SIG_DFL)):
+        pypysig_default(signum)
+    elif space.eq_w(w_handler, space.wrap(SIG_IGN)):
+        pypysig_ignore(signum)
+    else:
+        pypysig_setflag(signum)
+
+
 class ReissueSignalAction(AsyncAction):
     """A special action to help deliver signals to the main thread.  If
     a non-main thread caught a signal, this action fires after every
@@ -199,18 +275,14 @@ def signal(space, signum, w_handler):
                              space.wrap("signal() must be called from the "
                                         "main thread"))
     action = space.check_signal_action
-    if space.eq_w(w_handler, space.wrap(SIG_DFL)):
-        pypysig_default(signum)
-        action.handlers_w[signum] = w_handler
-    elif space.eq_w(w_handler, space.wrap(SIG_IGN)):
-        pypysig_ignore(signum)
-        action.handlers_w[signum] = w_handler
-    else:
-        if not space.is_true(space.callable(w_handler)):
-            raise OperationError(space.w_TypeError,
-                                 space.wrap("'handler' must be a callable "
-                                            "or SIG_DFL or SIG_IGN"))
-        pypysig_setflag(signum)
-        action.handlers_w[signum] = w_handler
+    if (not space.eq_w(w_handler, space.wrap(SIG_DFL)) and
+        not space.eq_w(w_handler, space.wrap(SIG_IGN)) and
+        not space.is_true(space.callable(w_handler))):
+        raise OperationError(space.w_TypeError,
+                             space.wrap("'handler' must be a callable "
+                                        "or SIG_DFL or SIG_IGN"))
+    action.handlers_w[signum] = w_handler
+    if signum not in action.interp_handlers:
+        reset_c_handler(space, signum)
     return old_handler
 signal.unwrap_spec = [ObjSpace, int, W_Root]
@@ -49,11 +49,11 @@ The variable struct.error is an exception raised on errors."""
         'calcsize': 'interp_struct.calcsize',
         'pack': 'interp_struct.pack',
         'unpack': 'interp_struct.unpack',
+        'unpack_from': 'interp_struct.unpack_from',
         }
 
     appleveldefs = {
         'error': 'app_struct.error',
         'pack_into': 'app_struct.pack_into',
-        'unpack_from': 'app_struct.unpack_from',
         'Struct': 'app_struct.Struct',
         }
@@ -13,15 +13,6 @@ def pack_into(fmt, buf, offset, *args):
     data = struct.pack(fmt, *args)
     buffer(buf)[offset:offset+len(data)] = data
 
-# XXX inefficient
-def unpack_from(fmt, buf, offset=0):
-    size = struct.calcsize(fmt)
-    data = buffer(buf)[offset:offset+size]
-    if len(data) != size:
-        raise error("unpack_from requires a buffer of at least %d bytes"
-                    % (size,))
-    return struct.unpack(fmt, data)
-
 # XXX inefficient
 class Struct(object):
     def __init__(self, format):
@@ -38,4 +29,4 @@ class Struct(object):
         return pack_into(self.format, buffer, offset, *args)
 
     def unpack_from(self, buffer, offset=0):
-        return unpack_from(self.format, buffer, offset)
+        return struct.unpack_from(self.format, buffer, offset)
@@ -1,4 +1,4 @@
-from pypy.interpreter.gateway import ObjSpace
+from pypy.interpreter.gateway import ObjSpace, W_Root
 from pypy.interpreter.error import OperationError
 from pypy.rlib.rstruct.error import StructError
 from pypy.module.struct.formatiterator import CalcSizeFormatIterator
@@ -35,3 +35,25 @@ def unpack(space, format, input):
         raise e.at_applevel(space)
     return space.newtuple(fmtiter.result_w[:])
 unpack.unwrap_spec = [ObjSpace, str, 'bufferstr']
+
+
+def unpack_from(space, format, w_buffer, offset=0):
+    fmtiter = CalcSizeFormatIterator()
+    try:
+        fmtiter.interpret(format)
+    except StructError, e:
+        raise e.at_applevel(space)
+    size = fmtiter.totalsize
+    # only copy the bytes that are needed out of the buffer, instead of
+    # going through an app-level buffer slice
+    buf = space.buffer_w(w_buffer)
+    length = buf.getlength()
+    if offset < 0:
+        offset += length
+    if offset < 0 or length - offset < size:
+        e = StructError("unpack_from requires a buffer of at least %d bytes"
+                        % (size,))
+        raise e.at_applevel(space)
+    data = buf.getslice(offset, offset + size)
+    return unpack(space, format, data)
+unpack_from.unwrap_spec = [ObjSpace, str, W_Root, int]
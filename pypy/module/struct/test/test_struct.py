@@ -377,3 +377,8 @@ class AppTestStructBuffer(object):
         assert self.struct.unpack_from("ii", b, 2) == (17, 42)
         b[:sz] = self.struct.pack("ii", 18, 43)
         assert self.struct.unpack_from("ii", b) == (18, 43)
+        assert self.struct.unpack_from("ii", b, -19) == (18, 43)
+        raises(self.struct.error, self.struct.unpack_from, "ii", b, 19-sz+1)
+        raises(self.struct.error, self.struct.unpack_from, "ii", b, -20)
+        s = self.struct.Struct("ii")
+        assert s.unpack_from(b) == (18, 43)
@@ -9,6 +9,7 @@ class Module(MixedModule):
         """NOT_RPYTHON""" # because parent __init__ isn't
         super(Module, self).__init__(space, w_name) 
         self.checkinterval = 100
+        self.switchinterval = 0.005
         self.recursionlimit = 100
         self.w_default_encoder = None
         self.defaultencoding = "ascii"
@@ -45,6 +46,8 @@ class Module(MixedModule):
         'getrecursionlimit'     : 'vm.getrecursionlimit', 
         'setcheckinterval'      : 'vm.setcheckinterval', 
         'getcheckinterval'      : 'vm.getcheckinterval', 
+        'setswitchinterval'     : 'vm.setswitchinterval',
+        'getswitchinterval'     : 'vm.getswitchinterval',
         'exc_info'              : 'vm.exc_info', 
         'exc_clear'             : 'vm.exc_clear', 
         'settrace'              : 'vm.settrace',
@@ -331,6 +331,15 @@ class AppTestSysModulePortedFromCPython:
             sys.setcheckinterval(n)
             assert sys.getcheckinterval() == n
 
+    def test_setswitchinterval(self):
+        raises(TypeError, sys.setswitchinterval)
+        raises(ValueError, sys.setswitchinterval, 0)
+        raises(ValueError, sys.setswitchinterval, -1.0)
+        orig = sys.getswitchinterval()
+        for n in 0.001, 0.5, orig: # orig last to restore starting state
+            sys.setswitchinterval(n)
+            assert sys.getswitchinterval() == n
+
     def test_recursionlimit(self):
         raises(TypeError, sys.getrecursionlimit, 42)
         oldlimit = sys.getrecursionlimit()
@@ -82,6 +82,28 @@ def getcheckinterval(space):
         result = 0
     return space.wrap(result)
 
+def setswitchinterval(space, interval):
+    """Set the ideal thread switching delay inside the Python interpreter.
+The actual frequency of switching threads can be lower if the
+interpreter executes long sequences of uninterruptible code (this is
+implementation-specific and workload-dependent).
+
+The parameter must represent the desired switching delay in seconds.
+A typical value is 0.005 (5 milliseconds)."""
+    if interval <= 0.0:
+        raise OperationError(space.w_ValueError,
+                             space.wrap("switch interval must be strictly "
+                                        "positive"))
+    space.sys.switchinterval = interval
+    if space.config.objspace.usemodules.thread:
+        from pypy.module.thread.gil import set_switch_interval
+        set_switch_interval(interval)
+setswitchinterval.unwrap_spec = [ObjSpace, float]
+
+def getswitchinterval(space):
+    """Return the current thread switch interval; see setswitchinterval()."""
+    return space.wrap(space.sys.switchinterval)
+
 def exc_info(space):
     """Return the (type, value, traceback) of the most recent exception
 caught by an except clause in the current stack frame or in an older stack
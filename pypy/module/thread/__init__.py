@@ -18,6 +18,7 @@ class Module(MixedModule):
         'allocate':               'os_lock.allocate_lock',  # obsolete synonym
         'LockType':               'os_lock.getlocktype(space)',
         '_local':                 'os_local.getlocaltype(space)',
+        '_get_gil_stats':         'gil.get_gil_stats',
     }
 
     def __init__(self, space, *args):
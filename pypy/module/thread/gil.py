@@ -6,17 +6,34 @@ Global Interpreter Lock.
 # If multiple threads try to execute simultaneously in this space,
 # all but one will be blocked.  The other threads get a chance to run
 # from time to time, using the hook yield_thread().
-
+#
+# As in CPython 3.2, a thread waiting for the GIL gives up waiting after
+# sys.getswitchinterval() seconds.  If the GIL did not change hands in
+# the meantime, it sets spacestate.switch_requested and forces the tick
+# counter of the action flag, so that the running thread invokes
+# GILReleaseAction before its next opcode.  This hands the GIL over: the
+# running thread releases it and waits until another thread actually
+# took it before trying to acquire it again.  Without this, the
+# releasing thread would usually grab the GIL again immediately.
+#
+# Where a waiting thread cannot give up waiting (on Windows), the running
+# thread still checks every sys.checkinterval bytecodes whether it has
+# been running for longer than the switch interval.
+
+import time
 from pypy.module.thread import ll_thread as thread
 from pypy.module.thread.error import wrap_thread_error
 from pypy.interpreter.executioncontext import PeriodicAsyncAction
 from pypy.module.thread.threadlocals import OSThreadLocals
+from pypy.interpreter.gateway import ObjSpace
 from pypy.rlib.objectmodel import invoke_around_extcall
 from pypy.rlib.rposix import get_errno, set_errno
 
 class GILThreadLocals(OSThreadLocals):
     """A version of OSThreadLocals that enforces a GIL."""
     ll_GIL = thread.null_ll_lock
+    ll_waiting_lock = thread.null_ll_lock
+    ll_handoff = thread.null_ll_lock
 
     def initialize(self, space):
         # add the GIL-releasing callback as an action on the space
@@ -27,9 +44,14 @@ class GILThreadLocals(OSThreadLocals):
         if not self.ll_GIL:
             try:
                 self.ll_GIL = thread.allocate_ll_lock()
+                self.ll_waiting_lock = thread.allocate_ll_lock()
+                self.ll_handoff = thread.allocate_ll_lock()
             except thread.error:
                 raise wrap_thread_error(space, "can't allocate GIL")
             thread.acquire_NOAUTO(self.ll_GIL, True)
+            # ll_handoff is always held, apart from the moment where a
+            # thread signals that it took over the GIL after a forced switch
+            thread.acquire_NOAUTO(self.ll_handoff, True)
             self.enter_thread(space)   # setup the main thread
             result = True
         else:
@@ -44,32 +66,93 @@ class GILThreadLocals(OSThreadLocals):
         # test_compile_lock.  As a workaround, we repatch these global
         # fields systematically.
         spacestate.ll_GIL = self.ll_GIL
+        spacestate.ll_waiting_lock = self.ll_waiting_lock
+        spacestate.ll_handoff = self.ll_handoff
         spacestate.actionflag = space.actionflag
+        set_switch_interval(space.sys.switchinterval)
         invoke_around_extcall(before_external_call, after_external_call)
         return result
 
     def yield_thread(self):
         thread.yield_thread()  # explicitly release the gil (used by test_gil)
 
+    def reinit_threads(self, space):
+        """Called in the child process after a fork().  The other threads
+        don't exist there, so none of them is waiting for the GIL.  If we
+        kept counting them, the next forced switch would wait forever for
+        one of them to take over."""
+        OSThreadLocals.reinit_threads(self, space)
+        spacestate.waiting = 0
+        spacestate.handoff_pending = False
+        spacestate.switch_requested = False
+
+    def switch_if_requested(self):
+        if spacestate.switch_requested:
+            force_switch()
+
 
 class GILReleaseAction(PeriodicAsyncAction):
-    """An action called every sys.checkinterval bytecodes.  It releases
-    the GIL to give some other thread a chance to run.
+    """An action called every sys.checkinterval bytecodes, or at the next
+    opcode if a waiting thread requested a switch.  It hands the GIL over
+    to a waiting thread if the current thread has been running for long
+    enough.
     """
 
+    def __init__(self, space):
+        PeriodicAsyncAction.__init__(self, space)
+        self.seen_switches = -1
+        self.running_since = 0.0
+
     def perform(self, executioncontext, frame):
-        # Other threads can run between the release() and the acquire()
-        # implicit in the following external function call (which has
-        # otherwise no effect).
-        thread.yield_thread()
+        if not spacestate.waiting:
+            return
+        if spacestate.switch_requested:
+            force_switch()
+            return
+        now = time.time()
+        if spacestate.switches != self.seen_switches:
+            # the GIL changed hands since the last check: the time slice
+            # of the current thread starts now
+            self.seen_switches = spacestate.switches
+            self.running_since = now
+        elif now - self.running_since >= self.space.sys.switchinterval:
+            force_switch()
+
+
+def force_switch():
+    """Hand the GIL over to a waiting thread.  Other threads run between
+    the release() and the acquire() implicit in the external function
+    call done here (which has otherwise no effect)."""
+    spacestate.switch_requested = False
+    spacestate.forced_switches += 1
+    spacestate.handoff_pending = True
+    thread.yield_thread()
+
+def set_switch_interval(interval):
+    """Called when sys.setswitchinterval() changes the switch interval.
+    The threads waiting for the GIL read it without holding the GIL, so
+    it is kept here, in microseconds."""
+    spacestate.switch_interval_us = max(int(interval * 1000000.0), 1)
 
 
 class SpaceState:
 
     def _freeze_(self):
         self.ll_GIL = thread.null_ll_lock
+        self.ll_waiting_lock = thread.null_ll_lock
+        self.ll_handoff = thread.null_ll_lock
         self.actionflag = None
         self.set_actionflag_bit_after_thread_switch = 0
+        self.handoff_pending = False
+        # set by a waiting thread that waited for the whole switch interval
+        self.switch_requested = False
+        self.switch_interval_us = 5000
+        # number of threads blocked waiting for the GIL; only changed
+        # with ll_waiting_lock held, as these threads don't have the GIL
+        self.waiting = 0
+        # statistics
+        self.switches = 0           # GIL acquisitions that had to wait
+        self.forced_switches = 0    # GIL handed over by GILReleaseAction
         return False
 
     def after_thread_switch(self):
@@ -90,13 +173,41 @@ def before_external_call():
     # this function must not raise, in such a way that the exception
     # transformer knows that it cannot raise!
     e = get_errno()
+    handoff = spacestate.handoff_pending
     thread.release_NOAUTO(spacestate.ll_GIL)
+    if handoff:
+        # wait until a waiting thread took the GIL
+        thread.acquire_NOAUTO(spacestate.ll_handoff, True)
     set_errno(e)
 before_external_call._gctransformer_hint_cannot_collect_ = True
 
 def after_external_call():
     e = get_errno()
-    thread.acquire_NOAUTO(spacestate.ll_GIL, True)
+    if not thread.acquire_NOAUTO(spacestate.ll_GIL, False):
+        thread.acquire_NOAUTO(spacestate.ll_waiting_lock, True)
+        spacestate.waiting += 1
+        thread.release_NOAUTO(spacestate.ll_waiting_lock)
+        while True:
+            switches = spacestate.switches
+            if thread.acquire_timed_NOAUTO(spacestate.ll_GIL,
+                                           spacestate.switch_interval_us):
+                break
+            if spacestate.switches == switches:
+                # the running thread kept the GIL for the whole switch
+                # interval: ask it to hand the GIL over.  We don't hold
+                # the GIL, so force_tick_counter() may race with the
+                # running thread updating the ticker; at worst the
+                # request is noticed at the next sys.checkinterval.
+                spacestate.switch_requested = True
+                spacestate.actionflag.force_tick_counter()
+        spacestate.switch_requested = False
+        thread.acquire_NOAUTO(spacestate.ll_waiting_lock, True)
+        spacestate.waiting -= 1
+        thread.release_NOAUTO(spacestate.ll_waiting_lock)
+        spacestate.switches += 1
+    if spacestate.handoff_pending:
+        spacestate.handoff_pending = False
+        thread.release_NOAUTO(spacestate.ll_handoff)
     thread.gc_thread_run()
     spacestate.after_thread_switch()
     set_errno(e)
@@ -108,3 +219,19 @@ after_external_call._gctransformer_hint_cannot_collect_ = True
 # pointers in the shadow stack.  This is necessary because the GIL is
 # not held after the call to before_external_call() or before the call
 # to after_external_call().
+
+# ____________________________________________________________
+
+def get_gil_stats(space):
+    """Return a dict with statistics about the GIL: 'switches' is the
+number of times a thread had to wait for the GIL, 'forced_switches' the
+number of times the running thread handed the GIL over to a waiting one
+after its switch interval elapsed, and 'waiting' the number of threads
+currently waiting for the GIL."""
+    w_result = space.newdict()
+    for name, value in [('switches', spacestate.switches),
+                        ('forced_switches', spacestate.forced_switches),
+                        ('waiting', spacestate.waiting)]:
+        space.setitem(w_result, space.wrap(name), space.wrap(value))
+    return w_result
+get_gil_stats.unwrap_spec = [ObjSpace]
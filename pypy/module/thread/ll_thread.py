@@ -18,8 +18,8 @@ eci = ExternalCompilationInfo(
     separate_module_sources = [''],
     include_dirs = [str(py.path.local(autopath.pypydir).join('translator', 'c'))],
     export_symbols = ['RPyThreadGetIdent', 'RPyThreadLockInit',
-                      'RPyThreadAcquireLock', 'RPyThreadReleaseLock',
-                      'RPyThreadYield',
+                      'RPyThreadAcquireLock', 'RPyThreadAcquireLockTimed',
+                      'RPyThreadReleaseLock', 'RPyThreadYield',
                       'RPyThreadGetStackSize', 'RPyThreadSetStackSize']
 )
 
@@ -61,6 +61,9 @@ c_thread_releaselock = llexternal('RPyThreadReleaseLock', [TLOCKP], lltype.Void,
 c_thread_acquirelock_NOAUTO = llexternal('RPyThreadAcquireLock',
                                          [TLOCKP, rffi.INT], rffi.INT,
                                          _nowrapper=True)
+c_thread_acquirelock_timed_NOAUTO = llexternal('RPyThreadAcquireLockTimed',
+                                               [TLOCKP, rffi.LONG], rffi.INT,
+                                               _nowrapper=True)
 c_thread_releaselock_NOAUTO = llexternal('RPyThreadReleaseLock',
                                          [TLOCKP], lltype.Void,
                                          _nowrapper=True)
@@ -141,6 +144,15 @@ def acquire_NOAUTO(ll_lock, flag):
     res = rffi.cast(lltype.Signed, res)
     return bool(res)
 
+def acquire_timed_NOAUTO(ll_lock, microseconds):
+    """Like acquire_NOAUTO(ll_lock, True), but give up and return False
+    after 'microseconds'.  On Windows, this always waits until the lock
+    is acquired."""
+    microseconds = rffi.cast(rffi.LONG, microseconds)
+    res = c_thread_acquirelock_timed_NOAUTO(ll_lock, microseconds)
+    res = rffi.cast(lltype.Signed, res)
+    return bool(res)
+
 def release_NOAUTO(ll_lock):
     if not we_are_translated():
         ll_assert(not acquire_NOAUTO(ll_lock, False), "NOAUTO lock not held!")
@@ -1,4 +1,4 @@
-import time
+import py, time
 from pypy.module.thread import gil
 from pypy.module.thread.test import test_ll_thread
 from pypy.module.thread import ll_thread as thread
@@ -14,10 +14,19 @@ class FakeActionFlag(object):
         return 0
     def set(self, x):
         pass
+    def force_tick_counter(self):
+        pass
+
+class FakeSys(object):
+    switchinterval = 0.0
+
+class FakeSlowSys(object):
+    switchinterval = 1000.0
 
 class FakeSpace(object):
     def __init__(self):
         self.actionflag = FakeActionFlag()
+        self.sys = FakeSys()
     def _freeze_(self):
         return True
     def getexecutioncontext(self):
@@ -80,11 +89,126 @@ class GILTests(test_ll_thread.AbstractGCTestClass):
         res = fn()
         assert res == 2*N
 
+    def test_forced_switch(self):
+        space = FakeSpace()
+        class State:
+            pass
+        state = State()
+        def bootstrap():
+            # give the GIL back to the main thread; afterwards we only
+            # get it again if the main thread hands it over
+            if not we_are_translated(): gil.before_external_call()
+            time.sleep(0.01)
+            if not we_are_translated(): gil.after_external_call()
+            state.done = True
+            thread.gc_thread_die()
+        def f():
+            state.done = False
+            state.threadlocals = gil.GILThreadLocals()
+            state.threadlocals.setup_threads(space)
+            action = gil.GILReleaseAction(space)
+            forced = gil.spacestate.forced_switches
+            thread.gc_thread_prepare()
+            thread.start_new_thread(bootstrap, ())
+            deadline = time.time() + 30.0
+            while not state.done:
+                if time.time() > deadline:
+                    raise ValueError("time out")
+                action.perform(None, None)
+            return gil.spacestate.forced_switches - forced
+
+        fn = self.getcompiled(f, [])
+        res = fn()
+        assert res >= 1
+
+    def test_switch_requested(self):
+        # the running thread never finds that its own time slice is over,
+        # so the GIL is only handed over when the waiting thread asks
+        space = FakeSpace()
+        space.sys = FakeSlowSys()
+        class State:
+            pass
+        state = State()
+        def bootstrap():
+            if not we_are_translated(): gil.before_external_call()
+            time.sleep(0.01)
+            if not we_are_translated(): gil.after_external_call()
+            state.done = True
+            thread.gc_thread_die()
+        def f():
+            state.done = False
+            state.threadlocals = gil.GILThreadLocals()
+            state.threadlocals.setup_threads(space)
+            gil.set_switch_interval(0.001)
+            action = gil.GILReleaseAction(space)
+            forced = gil.spacestate.forced_switches
+            thread.gc_thread_prepare()
+            thread.start_new_thread(bootstrap, ())
+            deadline = time.time() + 30.0
+            while not state.done:
+                if time.time() > deadline:
+                    raise ValueError("time out")
+                action.perform(None, None)
+            return gil.spacestate.forced_switches - forced
+
+        fn = self.getcompiled(f, [])
+        res = fn()
+        assert res >= 1
+
 
 class TestRunDirectly(GILTests):
     def getcompiled(self, f, argtypes):
         return f
 
+    def test_fork_while_waiting(self):
+        # only run directly: translated, os.fork() itself releases the GIL
+        import os, signal
+        if not hasattr(os, 'fork'):
+            py.test.skip("no fork on this platform")
+        space = FakeSpace()
+        class State:
+            pass
+        state = State()
+        def bootstrap():
+            # this thread first waits for the GIL, held by the main thread
+            thread.gc_thread_die()
+        state.threadlocals = gil.GILThreadLocals()
+        state.threadlocals.setup_threads(space)
+        action = gil.GILReleaseAction(space)
+        thread.gc_thread_prepare()
+        thread.start_new_thread(bootstrap, ())
+        deadline = time.time() + 30.0
+        while not gil.spacestate.waiting:
+            if time.time() > deadline:
+                raise ValueError("time out")
+        pid = os.fork()
+        if pid == 0:
+            # in the child, the waiting thread is gone: the running thread
+            # must not try to hand the GIL over to it
+            try:
+                state.threadlocals.reinit_threads(space)
+                for i in range(5):
+                    action.perform(None, None)
+                    gil.before_external_call()
+                    gil.after_external_call()
+            finally:
+                os._exit(0)
+        # let the other thread run and finish
+        gil.before_external_call()
+        time.sleep(0.1)
+        gil.after_external_call()
+        deadline = time.time() + 30.0
+        while True:
+            spid, status = os.waitpid(pid, os.WNOHANG)
+            if spid == pid:
+                break
+            if time.time() > deadline:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+                raise AssertionError("deadlock in the child process")
+            time.sleep(0.05)
+        assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+
 class TestUsingFramework(GILTests):
     gcpolicy = 'generation'
     bigtest = True
@@ -20,6 +20,19 @@ def test_lock():
     res = ok1 and not ok2 and ok3
     assert res == 1
 
+def test_lock_timed():
+    import time, os
+    if os.name == 'nt':
+        py.test.skip("the timed acquire doesn't time out on Windows")
+    ll_lock = allocate_ll_lock()
+    assert acquire_timed_NOAUTO(ll_lock, 1000)
+    start = time.time()
+    assert not acquire_timed_NOAUTO(ll_lock, 100000)
+    assert time.time() - start >= 0.09
+    release_NOAUTO(ll_lock)
+    assert acquire_timed_NOAUTO(ll_lock, 0)
+    release_NOAUTO(ll_lock)
+
 def test_thread_error():
     l = allocate_lock()
     try:
@@ -199,3 +199,11 @@ class AppTestThread(GenericTestThread):
         assert res == 1024*1024
         res = thread.stack_size(0)
         assert res == 2*1024*1024
+
+    def test_get_gil_stats(self):
+        import thread
+        stats = thread._get_gil_stats()
+        assert sorted(stats.keys()) == ['forced_switches', 'switches',
+                                        'waiting']
+        for value in stats.values():
+            assert value >= 0
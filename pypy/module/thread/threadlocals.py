@@ -61,3 +61,6 @@ class OSThreadLocals:
     def atthreadexit(self, space, exit_func, w_obj):
         ec = space.getexecutioncontext()
         ec.thread_exit_funcs.append((exit_func, w_obj))
+
+    def reinit_threads(self, space):
+        "Called in the child process after a fork()."
@@ -45,8 +45,37 @@ def bench_simple_dict(SIZE = 10000):
     count_operation("Existing key access", lambda : rand_keys(lookup_keys))
     return test_d
 
+def bench_int_dict(SIZE = 10000):
+    keys = [random.randrange(SIZE * 10) for i in xrange(SIZE)]
+    values = [random.random() for i in xrange(SIZE)]
+
+    lookup_keys = random.sample(keys, 1000)
+    random_keys = [random.randrange(SIZE * 10) for i in xrange(1000)]
+
+    test_d = count_operation("Int creation", lambda : dict(zip(keys, values)))
+
+    def rand_keys(keys):
+        for key in keys:
+            try:
+                test_d[key]
+            except KeyError:
+                pass
+
+    count_operation("Random int key access", lambda : rand_keys(random_keys))
+    count_operation("Existing int key access", lambda : rand_keys(lookup_keys))
+    return test_d
+
+def bench_empty_dicts(NUM = 100000):
+    def make_empty():
+        for i in xrange(NUM):
+            d = {}
+            len(d)
+    count_operation("Empty dict creation", make_empty)
+    return {}
+
 if __name__ == '__main__':
-    test_d = bench_simple_dict()
     import __pypy__
-    print __pypy__.internal_repr(test_d)
-    print __pypy__.internal_repr(test_d.iterkeys())
+    for bench in [bench_simple_dict, bench_int_dict, bench_empty_dicts]:
+        test_d = bench()
+        print __pypy__.internal_repr(test_d)
+        print __pypy__.internal_repr(test_d.iterkeys())
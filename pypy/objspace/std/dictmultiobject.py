@@ -7,6 +7,7 @@ from pypy.interpreter.argument import Signature
 from pypy.module.__builtin__.__init__ import BUILTIN_TO_INDEX, OPTIMIZED_BUILTINS
 
 from pypy.rlib.objectmodel import r_dict, we_are_translated
+from pypy.objspace.std.intobject import W_IntObject
 
 def _is_str(space, w_key):
     return space.is_w(space.type(w_key), space.w_str)
@@ -24,10 +25,26 @@ def _is_sane_hash(space, w_lookup_type):
             space.is_w(w_lookup_type, space.w_float)
             )
 
+def _never_equal_to_int(space, w_lookup_type):
+    """ Handles the case of a non integer key lookup.
+    Types that can never compare equal to an int allow us to return
+    directly to signal that the key is not there. """
+    return (space.is_w(w_lookup_type, space.w_NoneType) or
+            space.is_w(w_lookup_type, space.w_str) or
+            space.is_w(w_lookup_type, space.w_unicode)
+            )
+
 class W_DictMultiObject(W_Object):
     from pypy.objspace.std.dicttype import dict_typedef as typedef
 
-    r_dict_content = None
+    # The content is stored in one of the following fields, depending on
+    # the strategy; the fields of the other strategies are None.
+    r_dict_content = None   # ObjectDictStrategy: r_dict {w_key: w_value}
+    content = None          # StrDictStrategy: {str: w_value}
+    intcontent = None       # IntDictStrategy: {int: w_value}
+    cellcontent = None      # celldict.ModuleDictStrategy: {str: ModuleCell}
+    structure = None        # sharingdict.SharedDictStrategy: SharedStructure
+    entries = None          #     and the list of values
 
     @staticmethod
     def allocate_and_init_instance(space, w_type=None, module=False,
@@ -36,46 +53,46 @@ class W_DictMultiObject(W_Object):
         if from_strdict_shared is not None:
             assert w_type is None
             assert not module and not instance and classofinstance is None
-            w_self = StrDictImplementation(space)
+            w_self = W_DictMultiObject(space, space.fromcache(StrDictStrategy))
             w_self.content = from_strdict_shared
             return w_self
         if space.config.objspace.std.withcelldict and module:
-            from pypy.objspace.std.celldict import ModuleDictImplementation
+            from pypy.objspace.std.celldict import ModuleDictStrategy
             assert w_type is None
-            return ModuleDictImplementation(space)
+            strategy = space.fromcache(ModuleDictStrategy)
         elif space.config.objspace.opcodes.CALL_LIKELY_BUILTIN and module:
             assert w_type is None
-            return WaryDictImplementation(space)
+            strategy = WaryDictStrategy(space)
         elif space.config.objspace.std.withdictmeasurement:
             assert w_type is None
-            return MeasuringDictImplementation(space)
+            strategy = MeasuringDictStrategy(space)
         elif space.config.objspace.std.withsharingdict and instance:
-            from pypy.objspace.std.sharingdict import SharedDictImplementation
+            from pypy.objspace.std.sharingdict import SharedDictStrategy
             assert w_type is None
-            return SharedDictImplementation(space)
+            strategy = space.fromcache(SharedDictStrategy)
         elif (space.config.objspace.std.withshadowtracking and instance and
                 classofinstance is not None):
             assert w_type is None
-            return ShadowDetectingDictImplementation(space, classofinstance)
-        elif instance or strdict or module:
+            strategy = ShadowDetectingDictStrategy(space, classofinstance)
+        elif module:
             assert w_type is None
-            return StrDictImplementation(space)
+            strategy = space.fromcache(StrDictStrategy)
+        elif instance or strdict:
+            assert w_type is None
+            strategy = space.fromcache(EmptyDictStrategy)
         else:
             if w_type is None:
                 w_type = space.w_dict
             w_self = space.allocate_instance(W_DictMultiObject, w_type)
-            W_DictMultiObject.__init__(w_self, space)
-            w_self.initialize_as_rdict()
+            W_DictMultiObject.__init__(w_self, space,
+                                       space.fromcache(EmptyDictStrategy))
             return w_self
+        return W_DictMultiObject(space, strategy)
 
-    def __init__(self, space):
+    def __init__(self, space, strategy):
         self.space = space
-
-    def initialize_as_rdict(self):
-        assert self.r_dict_content is None
-        self.r_dict_content = r_dict(self.space.eq_w, self.space.hash_w)
-        return self.r_dict_content
-        
+        self.strategy = strategy
+        strategy.init_storage(self)
 
     def initialize_content(w_self, list_pairs_w):
         for w_k, w_v in list_pairs_w:
@@ -83,7 +100,8 @@ class W_DictMultiObject(W_Object):
 
     def __repr__(w_self):
         """ representation for debugging purposes """
-        return "%s()" % (w_self.__class__.__name__, )
+        return "%s(%s)" % (w_self.__class__.__name__,
+                           w_self.strategy.__class__.__name__)
 
     def unwrap(w_dict, space):
         result = {}
@@ -102,36 +120,57 @@ class W_DictMultiObject(W_Object):
         else:
             return None
 
-    # _________________________________________________________________ 
-    # implementation methods
-    def impl_getitem(self, w_key):
+    def _clear_fields(w_self):
+        w_self.r_dict_content = None
+        w_self.content = None
+        w_self.intcontent = None
+
+    def switch_to_object_strategy(w_self):
+        w_self.strategy.switch_to_object_strategy(w_self)
+
+
+class DictStrategy(object):
+    """A strategy describes how the content of a W_DictMultiObject is
+    stored.  Stateless strategies are shared by all the dicts of a space;
+    the ones that need some state of their own (like the type whose
+    instances they store the attributes of) are created for every dict.
+    When a dict gets a key that its strategy cannot store, it switches to
+    the ObjectDictStrategy, keeping its identity."""
+
+    def __init__(self, space):
+        self.space = space
+
+    def init_storage(self, w_dict):
+        raise NotImplementedError("abstract base class")
+
+    def getitem(self, w_dict, w_key):
         #return w_value or None
         raise NotImplementedError("abstract base class")
 
-    def impl_getitem_str(self, w_key):
+    def getitem_str(self, w_dict, key):
         #return w_value or None
         raise NotImplementedError("abstract base class")
 
-    def impl_setitem_str(self,  key, w_value, shadows_type=True):
+    def setitem_str(self, w_dict, key, w_value, shadows_type=True):
         raise NotImplementedError("abstract base class")
 
-    def impl_setitem(self,  w_key, w_value):
+    def setitem(self, w_dict, w_key, w_value):
         raise NotImplementedError("abstract base class")
 
-    def impl_delitem(self, w_key):
+    def delitem(self, w_dict, w_key):
         raise NotImplementedError("abstract base class")
- 
-    def impl_length(self):
+
+    def length(self, w_dict):
         raise NotImplementedError("abstract base class")
 
-    def impl_iter(self):
+    def iter(self, w_dict):
         raise NotImplementedError("abstract base class")
 
-    def impl_clear(self):
+    def clear(self, w_dict):
         raise NotImplementedError("abstract base class")
 
-    def impl_keys(self):
-        iterator = self.impl_iter()
+    def keys(self, w_dict):
+        iterator = self.iter(w_dict)
         result = []
         while 1:
             w_key, w_value = iterator.next()
@@ -139,8 +178,8 @@ class W_DictMultiObject(W_Object):
                 result.append(w_key)
             else:
                 return result
-    def impl_values(self):
-        iterator = self.impl_iter()
+    def values(self, w_dict):
+        iterator = self.iter(w_dict)
         result = []
         while 1:
             w_key, w_value = iterator.next()
@@ -148,8 +187,8 @@ class W_DictMultiObject(W_Object):
                 result.append(w_value)
             else:
                 return result
-    def impl_items(self):
-        iterator = self.impl_iter()
+    def items(self, w_dict):
+        iterator = self.iter(w_dict)
         result = []
         while 1:
             w_key, w_value = iterator.next()
@@ -161,61 +200,31 @@ class W_DictMultiObject(W_Object):
     # the following method only makes sense when the option to use the
     # CALL_LIKELY_BUILTIN opcode is set. Otherwise it won't even be seen
     # by the annotator
-    def impl_get_builtin_indexed(self, i):
+    def get_builtin_indexed(self, w_dict, i):
         key = OPTIMIZED_BUILTINS[i]
-        return self.impl_getitem_str(key)
+        return self.getitem_str(w_dict, key)
 
     # this method will only be seen whan a certain config option is used
-    def impl_shadows_anything(self):
+    def shadows_anything(self, w_dict):
         return True
 
-    def impl_set_shadows_anything(self):
+    def set_shadows_anything(self, w_dict):
         pass
 
-    # _________________________________________________________________
-    # fallback implementation methods
-
-    def impl_fallback_setitem(self, w_key, w_value):
-        self.r_dict_content[w_key] = w_value
-
-    def impl_fallback_setitem_str(self, key, w_value, shadows_type=True):
-        return self.impl_fallback_setitem(self.space.wrap(key), w_value)
-
-    def impl_fallback_delitem(self, w_key):
-        del self.r_dict_content[w_key]
-        
-    def impl_fallback_length(self):
-        return len(self.r_dict_content)
-
-    def impl_fallback_getitem(self, w_key):
-        return self.r_dict_content.get(w_key, None)
-
-    def impl_fallback_getitem_str(self, key):
-        return self.r_dict_content.get(self.space.wrap(key), None)
-
-    def impl_fallback_iter(self):
-        return RDictIteratorImplementation(self.space, self)
-
-    def impl_fallback_keys(self):
-        return self.r_dict_content.keys()
-    def impl_fallback_values(self):
-        return self.r_dict_content.values()
-    def impl_fallback_items(self):
-        return [self.space.newtuple([w_key, w_val])
-                    for w_key, w_val in self.r_dict_content.iteritems()]
-
-    def impl_fallback_clear(self):
-        self.r_dict_content.clear()
-
-    def impl_fallback_get_builtin_indexed(self, i):
-        key = OPTIMIZED_BUILTINS[i]
-        return self.impl_fallback_getitem_str(key)
-
-    def impl_fallback_shadows_anything(self):
-        return True
+    def switch_to_object_strategy(self, w_dict):
+        r_dict_content = r_dict(self.space.eq_w, self.space.hash_w)
+        iterator = self.iter(w_dict)
+        while 1:
+            w_key, w_value = iterator.next()
+            if w_key is None:
+                break
+            r_dict_content[w_key] = w_value
+        self.clear_fields(w_dict)
+        w_dict.strategy = self.space.fromcache(ObjectDictStrategy)
+        w_dict.r_dict_content = r_dict_content
 
-    def impl_fallback_set_shadows_anything(self):
-        pass
+    def clear_fields(self, w_dict):
+        w_dict._clear_fields()
 
 
 implementation_methods = [
@@ -236,31 +245,24 @@ implementation_methods = [
 ]
 
 
-def _make_method(name, implname, fallback, numargs):
+def _make_method(name, numargs):
     args = ", ".join(["a" + str(i) for i in range(numargs)])
     code = """def %s(self, %s):
-        if self.r_dict_content is not None:
-            return self.%s(%s)
-        return self.%s(%s)""" % (name, args, fallback, args, implname, args)
+        return self.strategy.%s(self, %s)""" % (name, args, name, args)
     d = {}
     exec py.code.Source(code).compile() in d
     implementation_method = d[name]
-    implementation_method.func_defaults = getattr(W_DictMultiObject, implname).func_defaults
+    implementation_method.func_defaults = getattr(DictStrategy, name).func_defaults
     return implementation_method
 
 def _install_methods():
     for name, numargs in implementation_methods:
-        implname = "impl_" + name
-        fallbackname = "impl_fallback_" + name
-        func = _make_method(name, implname, fallbackname, numargs)
+        func = _make_method(name, numargs)
         setattr(W_DictMultiObject, name, func)
 _install_methods()
 
 registerimplementation(W_DictMultiObject)
 
-# DictImplementation lattice
-# XXX fix me
-
 # Iterator Implementation base classes
 
 class IteratorImplementation(object):
@@ -300,80 +302,208 @@ class IteratorImplementation(object):
 
 # concrete subclasses of the above
 
-class StrDictImplementation(W_DictMultiObject):
-    def __init__(self, space):
-        self.space = space
-        self.content = {}
-        
-    def impl_setitem(self, w_key, w_value):
+class EmptyDictStrategy(DictStrategy):
+    """The strategy of new dicts: it stores nothing at all, which makes
+    empty dicts cheap, and picks the strategy for the first key."""
+
+    def init_storage(self, w_dict):
+        pass
+
+    def switch_to_correct_strategy(self, w_dict, w_key):
         space = self.space
         if space.is_w(space.type(w_key), space.w_str):
-            self.impl_setitem_str(self.space.str_w(w_key), w_value)
+            strategy = space.fromcache(StrDictStrategy)
+        elif _is_int(space, w_key):
+            strategy = space.fromcache(IntDictStrategy)
         else:
-            self._as_rdict().setitem(w_key, w_value)
+            strategy = space.fromcache(ObjectDictStrategy)
+        w_dict.strategy = strategy
+        strategy.init_storage(w_dict)
+
+    def getitem(self, w_dict, w_key):
+        space = self.space
+        if type(w_key) is not space.StringObjectCls:
+            # still compute the hash, to raise TypeError for unhashable keys
+            space.hash_w(w_key)
+        return None
+
+    def getitem_str(self, w_dict, key):
+        return None
+
+    def setitem(self, w_dict, w_key, w_value):
+        self.switch_to_correct_strategy(w_dict, w_key)
+        w_dict.setitem(w_key, w_value)
+
+    def setitem_str(self, w_dict, key, w_value, shadows_type=True):
+        strategy = self.space.fromcache(StrDictStrategy)
+        w_dict.strategy = strategy
+        strategy.init_storage(w_dict)
+        w_dict.setitem_str(key, w_value, shadows_type)
+
+    def delitem(self, w_dict, w_key):
+        self.getitem(w_dict, w_key)
+        raise KeyError
+
+    def length(self, w_dict):
+        return 0
+
+    def iter(self, w_dict):
+        return EmptyIteratorImplementation(self.space, w_dict)
+
+    def clear(self, w_dict):
+        pass
+
+    def keys(self, w_dict):
+        return []
+
+    def values(self, w_dict):
+        return []
+
+    def items(self, w_dict):
+        return []
+
+    def switch_to_object_strategy(self, w_dict):
+        strategy = self.space.fromcache(ObjectDictStrategy)
+        w_dict.strategy = strategy
+        strategy.init_storage(w_dict)
+
+class EmptyIteratorImplementation(IteratorImplementation):
+    def next_entry(self):
+        return None, None
+
+
+class ObjectDictStrategy(DictStrategy):
+    """The general strategy: an r_dict of wrapped keys."""
+
+    def init_storage(self, w_dict):
+        w_dict.r_dict_content = r_dict(self.space.eq_w, self.space.hash_w)
+
+    def setitem(self, w_dict, w_key, w_value):
+        w_dict.r_dict_content[w_key] = w_value
+
+    def setitem_str(self, w_dict, key, w_value, shadows_type=True):
+        return self.setitem(w_dict, self.space.wrap(key), w_value)
+
+    def delitem(self, w_dict, w_key):
+        del w_dict.r_dict_content[w_key]
+
+    def length(self, w_dict):
+        return len(w_dict.r_dict_content)
+
+    def getitem(self, w_dict, w_key):
+        return w_dict.r_dict_content.get(w_key, None)
 
-    def impl_setitem_str(self, key, w_value, shadows_type=True):
-        self.content[key] = w_value
+    def getitem_str(self, w_dict, key):
+        return w_dict.r_dict_content.get(self.space.wrap(key), None)
 
-    def impl_delitem(self, w_key):
+    def iter(self, w_dict):
+        return RDictIteratorImplementation(self.space, w_dict)
+
+    def keys(self, w_dict):
+        return w_dict.r_dict_content.keys()
+    def values(self, w_dict):
+        return w_dict.r_dict_content.values()
+    def items(self, w_dict):
+        return [self.space.newtuple([w_key, w_val])
+                    for w_key, w_val in w_dict.r_dict_content.iteritems()]
+
+    def clear(self, w_dict):
+        w_dict.r_dict_content.clear()
+
+    def switch_to_object_strategy(self, w_dict):
+        pass
+
+class RDictIteratorImplementation(IteratorImplementation):
+    def __init__(self, space, dictimplementation):
+        IteratorImplementation.__init__(self, space, dictimplementation)
+        self.iterator = dictimplementation.r_dict_content.iteritems()
+
+    def next_entry(self):
+        # note that this 'for' loop only runs once, at most
+        for item in self.iterator:
+            return item
+        else:
+            return None, None
+
+
+class StrDictStrategy(DictStrategy):
+
+    def init_storage(self, w_dict):
+        w_dict.content = {}
+
+    def setitem(self, w_dict, w_key, w_value):
+        space = self.space
+        if space.is_w(space.type(w_key), space.w_str):
+            self.setitem_str(w_dict, self.space.str_w(w_key), w_value)
+        else:
+            self.switch_to_object_strategy(w_dict)
+            w_dict.setitem(w_key, w_value)
+
+    def setitem_str(self, w_dict, key, w_value, shadows_type=True):
+        w_dict.content[key] = w_value
+
+    def delitem(self, w_dict, w_key):
         space = self.space
         w_key_type = space.type(w_key)
         if space.is_w(w_key_type, space.w_str):
-            del self.content[space.str_w(w_key)]
+            self.delitem_str(w_dict, space.str_w(w_key))
             return
         elif _is_sane_hash(space, w_key_type):
             raise KeyError
         else:
-            self._as_rdict().delitem(w_key)
+            self.switch_to_object_strategy(w_dict)
+            w_dict.delitem(w_key)
         
-    def impl_length(self):
-        return len(self.content)
+    def length(self, w_dict):
+        return len(w_dict.content)
 
-    def impl_getitem_str(self, key):
-        return self.content.get(key, None)
+    def getitem_str(self, w_dict, key):
+        return w_dict.content.get(key, None)
 
-    def impl_getitem(self, w_key):
+    def getitem(self, w_dict, w_key):
         space = self.space
         # -- This is called extremely often.  Hack for performance --
         if type(w_key) is space.StringObjectCls:
-            return self.impl_getitem_str(w_key.unwrap(space))
+            return self.getitem_str(w_dict, w_key.unwrap(space))
         # -- End of performance hack --
         w_lookup_type = space.type(w_key)
         if space.is_w(w_lookup_type, space.w_str):
-            return self.impl_getitem_str(space.str_w(w_key))
+            return self.getitem_str(w_dict, space.str_w(w_key))
         elif _is_sane_hash(space, w_lookup_type):
             return None
         else:
-            return self._as_rdict().getitem(w_key)
+            self.switch_to_object_strategy(w_dict)
+            return w_dict.getitem(w_key)
 
-    def impl_iter(self):
-        return StrIteratorImplementation(self.space, self)
+    def iter(self, w_dict):
+        return StrIteratorImplementation(self.space, w_dict)
 
-    def impl_keys(self):
+    def keys(self, w_dict):
         space = self.space
-        return [space.wrap(key) for key in self.content.iterkeys()]
+        return [space.wrap(key) for key in w_dict.content.iterkeys()]
 
-    def impl_values(self):
-        return self.content.values()
+    def values(self, w_dict):
+        return w_dict.content.values()
 
-    def impl_items(self):
+    def items(self, w_dict):
         space = self.space
         return [space.newtuple([space.wrap(key), w_value])
-                    for (key, w_value) in self.content.iteritems()]
+                    for (key, w_value) in w_dict.content.iteritems()]
 
-    def impl_clear(self):
-        self.content.clear()
+    def clear(self, w_dict):
+        w_dict.content.clear()
 
+    # the following methods are also used by inlinedict.py, which stores
+    # the content in the instance instead of in a W_DictMultiObject
 
-    def _as_rdict(self):
-        r_dict_content = self.initialize_as_rdict()
-        for k, w_v in self.content.items():
-            r_dict_content[self.space.wrap(k)] = w_v
-        self._clear_fields()
-        return self
+    def delitem_str(self, w_dict, key):
+        del w_dict.content[key]
 
-    def _clear_fields(self):
-        self.content = None
+    def str_items(self, w_dict):
+        return w_dict.content.items()
+
+    def clear_fields(self, w_dict):
+        w_dict.content = None
 
 class StrIteratorImplementation(IteratorImplementation):
     def __init__(self, space, dictimplementation):
@@ -388,9 +518,93 @@ class StrIteratorImplementation(IteratorImplementation):
             return None, None
 
 
-class ShadowDetectingDictImplementation(StrDictImplementation):
+def _is_int(space, w_key):
+    return type(w_key) is W_IntObject
+
+class IntDictStrategy(DictStrategy):
+    """Dicts whose keys are all ints store them unwrapped."""
+
+    def init_storage(self, w_dict):
+        w_dict.intcontent = {}
+
+    def unwrap(self, w_key):
+        assert isinstance(w_key, W_IntObject)
+        return w_key.intval
+
+    def setitem(self, w_dict, w_key, w_value):
+        if _is_int(self.space, w_key):
+            w_dict.intcontent[self.unwrap(w_key)] = w_value
+        else:
+            self.switch_to_object_strategy(w_dict)
+            w_dict.setitem(w_key, w_value)
+
+    def setitem_str(self, w_dict, key, w_value, shadows_type=True):
+        self.switch_to_object_strategy(w_dict)
+        w_dict.setitem_str(key, w_value, shadows_type)
+
+    def delitem(self, w_dict, w_key):
+        space = self.space
+        if _is_int(space, w_key):
+            del w_dict.intcontent[self.unwrap(w_key)]
+        elif _never_equal_to_int(space, space.type(w_key)):
+            raise KeyError
+        else:
+            self.switch_to_object_strategy(w_dict)
+            w_dict.delitem(w_key)
+
+    def length(self, w_dict):
+        return len(w_dict.intcontent)
+
+    def getitem_str(self, w_dict, key):
+        return None
+
+    def getitem(self, w_dict, w_key):
+        space = self.space
+        if _is_int(space, w_key):
+            return w_dict.intcontent.get(self.unwrap(w_key), None)
+        elif _never_equal_to_int(space, space.type(w_key)):
+            return None
+        else:
+            self.switch_to_object_strategy(w_dict)
+            return w_dict.getitem(w_key)
+
+    def iter(self, w_dict):
+        return IntIteratorImplementation(self.space, w_dict)
+
+    def keys(self, w_dict):
+        space = self.space
+        return [space.wrap(key) for key in w_dict.intcontent.iterkeys()]
+
+    def values(self, w_dict):
+        return w_dict.intcontent.values()
+
+    def items(self, w_dict):
+        space = self.space
+        return [space.newtuple([space.wrap(key), w_value])
+                    for (key, w_value) in w_dict.intcontent.iteritems()]
+
+    def clear(self, w_dict):
+        w_dict.intcontent.clear()
+
+class IntIteratorImplementation(IteratorImplementation):
+    def __init__(self, space, dictimplementation):
+        IteratorImplementation.__init__(self, space, dictimplementation)
+        self.iterator = dictimplementation.intcontent.iteritems()
+
+    def next_entry(self):
+        # note that this 'for' loop only runs once, at most
+        for key, w_value in self.iterator:
+            return self.space.wrap(key), w_value
+        else:
+            return None, None
+
+
+class ShadowDetectingDictStrategy(StrDictStrategy):
+    """A strategy for the dict of one instance, which records whether
+    any of its keys shadows an attribute of the type w_type."""
+
     def __init__(self, space, w_type):
-        StrDictImplementation.__init__(self, space)
+        StrDictStrategy.__init__(self, space)
         self.w_type = w_type
         self.original_version_tag = w_type.version_tag()
         if self.original_version_tag is None:
@@ -398,72 +612,69 @@ class ShadowDetectingDictImplementation(StrDictImplementation):
         else:
             self._shadows_anything = False
 
-    def impl_setitem_str(self, key, w_value, shadows_type=True):
+    def setitem_str(self, w_dict, key, w_value, shadows_type=True):
         if shadows_type:
             self._shadows_anything = True
-        StrDictImplementation.impl_setitem_str(
-            self, key, w_value, shadows_type)
+        StrDictStrategy.setitem_str(
+            self, w_dict, key, w_value, shadows_type)
 
-    def impl_setitem(self, w_key, w_value):
+    def setitem(self, w_dict, w_key, w_value):
         space = self.space
         if space.is_w(space.type(w_key), space.w_str):
             if not self._shadows_anything:
                 w_obj = self.w_type.lookup(space.str_w(w_key))
                 if w_obj is not None:
                     self._shadows_anything = True
-            StrDictImplementation.impl_setitem_str(
-                self, self.space.str_w(w_key), w_value, False)
+            StrDictStrategy.setitem_str(
+                self, w_dict, self.space.str_w(w_key), w_value, False)
         else:
-            self._as_rdict().setitem(w_key, w_value)
+            self.switch_to_object_strategy(w_dict)
+            w_dict.setitem(w_key, w_value)
 
-    def impl_shadows_anything(self):
+    def shadows_anything(self, w_dict):
         return (self._shadows_anything or 
                 self.w_type.version_tag() is not self.original_version_tag)
 
-    def impl_set_shadows_anything(self):
+    def set_shadows_anything(self, w_dict):
         self._shadows_anything = True
 
-class WaryDictImplementation(StrDictImplementation):
+class WaryDictStrategy(StrDictStrategy):
+    """A strategy for module dicts that keeps the values of the builtin
+    names shadowed by the module in a list indexed like
+    OPTIMIZED_BUILTINS."""
+
     def __init__(self, space):
-        StrDictImplementation.__init__(self, space)
+        StrDictStrategy.__init__(self, space)
         self.shadowed = [None] * len(BUILTIN_TO_INDEX)
 
-    def impl_setitem_str(self, key, w_value, shadows_type=True):
+    def setitem_str(self, w_dict, key, w_value, shadows_type=True):
         i = BUILTIN_TO_INDEX.get(key, -1)
         if i != -1:
             self.shadowed[i] = w_value
-        self.content[key] = w_value
+        w_dict.content[key] = w_value
 
-    def impl_delitem(self, w_key):
+    def delitem(self, w_dict, w_key):
         space = self.space
         w_key_type = space.type(w_key)
         if space.is_w(w_key_type, space.w_str):
             key = space.str_w(w_key)
-            del self.content[key]
+            del w_dict.content[key]
             i = BUILTIN_TO_INDEX.get(key, -1)
             if i != -1:
                 self.shadowed[i] = None
         elif _is_sane_hash(space, w_key_type):
             raise KeyError
         else:
-            self._as_rdict().delitem(w_key)
+            self.switch_to_object_strategy(w_dict)
+            w_dict.delitem(w_key)
 
-    def impl_get_builtin_indexed(self, i):
+    def get_builtin_indexed(self, w_dict, i):
         return self.shadowed[i]
 
-
-class RDictIteratorImplementation(IteratorImplementation):
-    def __init__(self, space, dictimplementation):
-        IteratorImplementation.__init__(self, space, dictimplementation)
-        self.iterator = dictimplementation.r_dict_content.iteritems()
-
-    def next_entry(self):
-        # note that this 'for' loop only runs once, at most
-        for item in self.iterator:
-            return item
-        else:
-            return None, None
-
+    def clear(self, w_dict):
+        w_dict.content.clear()
+        for i in range(len(self.shadowed)):
+            self.shadowed[i] = None
 
 
 # XXX fix this thing
@@ -524,89 +735,92 @@ class OnTheWayOut:
     def __del__(self):
         self.info.lifetime = time.time() - self.info.createtime
 
-class MeasuringDictImplementation(W_DictMultiObject):
+class MeasuringDictStrategy(DictStrategy):
+    """A strategy that stores everything in an r_dict, like the
+    ObjectDictStrategy, and collects statistics about the usage of the dict
+    in a DictInfo."""
+
     def __init__(self, space):
-        self.space = space
-        self.content = r_dict(space.eq_w, space.hash_w)
+        DictStrategy.__init__(self, space)
         self.info = DictInfo()
         self.thing_with_del = OnTheWayOut(self.info)
 
-    def __repr__(self):
-        return "%s<%s>" % (self.__class__.__name__, self.content)
+    def init_storage(self, w_dict):
+        w_dict.r_dict_content = r_dict(self.space.eq_w, self.space.hash_w)
 
     def _is_str(self, w_key):
         space = self.space
         return space.is_true(space.isinstance(w_key, space.w_str))
-    def _read(self, w_key):
+    def _read(self, w_dict, w_key):
         self.info.reads += 1
         if not self.info.seen_non_string_in_write \
                and not self.info.seen_non_string_in_read_first \
                and not self._is_str(w_key):
             self.info.seen_non_string_in_read_first = True
-            self.info.size_on_non_string_seen_in_read = len(self.content)
-        hit = w_key in self.content
+            self.info.size_on_non_string_seen_in_read = len(w_dict.r_dict_content)
+        hit = w_key in w_dict.r_dict_content
         if hit:
             self.info.hits += 1
         else:
             self.info.misses += 1
 
-    def impl_setitem(self, w_key, w_value):
+    def setitem(self, w_dict, w_key, w_value):
+        content = w_dict.r_dict_content
         if not self.info.seen_non_string_in_write and not self._is_str(w_key):
             self.info.seen_non_string_in_write = True
-            self.info.size_on_non_string_seen_in_write = len(self.content)
+            self.info.size_on_non_string_seen_in_write = len(content)
         self.info.setitems += 1
         self.info.writes += 1
-        self.content[w_key] = w_value
-        self.info.maxcontents = max(self.info.maxcontents, len(self.content))
-    def impl_setitem_str(self, key, w_value, shadows_type=True):
+        content[w_key] = w_value
+        self.info.maxcontents = max(self.info.maxcontents, len(content))
+    def setitem_str(self, w_dict, key, w_value, shadows_type=True):
         self.info.setitem_strs += 1
-        self.impl_setitem(self.space.wrap(key), w_value)
-    def impl_delitem(self, w_key):
+        self.setitem(w_dict, self.space.wrap(key), w_value)
+    def delitem(self, w_dict, w_key):
+        content = w_dict.r_dict_content
         if not self.info.seen_non_string_in_write \
                and not self.info.seen_non_string_in_read_first \
                and not self._is_str(w_key):
             self.info.seen_non_string_in_read_first = True
-            self.info.size_on_non_string_seen_in_read = len(self.content)
+            self.info.size_on_non_string_seen_in_read = len(content)
         self.info.delitems += 1
         self.info.writes += 1
-        del self.content[w_key]
+        del content[w_key]
 
-    def impl_length(self):
+    def length(self, w_dict):
         self.info.lengths += 1
-        return len(self.content)
-    def impl_getitem_str(self, key):
-        return self.impl_getitem(self.space.wrap(key))
-    def impl_getitem(self, w_key):
+        return len(w_dict.r_dict_content)
+    def getitem_str(self, w_dict, key):
+        return self.getitem(w_dict, self.space.wrap(key))
+    def getitem(self, w_dict, w_key):
         self.info.gets += 1
-        self._read(w_key)
-        return self.content.get(w_key, None)
+        self._read(w_dict, w_key)
+        return w_dict.r_dict_content.get(w_key, None)
 
-    def impl_iteritems(self):
+    def iter(self, w_dict):
         self.info.iteritems += 1
         self.info.iterations += 1
-        return RDictItemIteratorImplementation(self.space, self)
-    def impl_iterkeys(self):
-        self.info.iterkeys += 1
-        self.info.iterations += 1
-        return RDictKeyIteratorImplementation(self.space, self)
-    def impl_itervalues(self):
-        self.info.itervalues += 1
-        self.info.iterations += 1
-        return RDictValueIteratorImplementation(self.space, self)
+        return RDictIteratorImplementation(self.space, w_dict)
 
-    def impl_keys(self):
+    def keys(self, w_dict):
         self.info.keys += 1
         self.info.listings += 1
-        return self.content.keys()
-    def impl_values(self):
+        return w_dict.r_dict_content.keys()
+    def values(self, w_dict):
         self.info.values += 1
         self.info.listings += 1
-        return self.content.values()
-    def impl_items(self):
+        return w_dict.r_dict_content.values()
+    def items(self, w_dict):
         self.info.items += 1
         self.info.listings += 1
         return [self.space.newtuple([w_key, w_val])
-                    for w_key, w_val in self.content.iteritems()]
+                    for w_key, w_val in w_dict.r_dict_content.iteritems()]
+
+    def clear(self, w_dict):
+        w_dict.r_dict_content.clear()
+
+    def switch_to_object_strategy(self, w_dict):
+        pass
 
 
 _example = DictInfo()
@@ -1,68 +1,122 @@
-import py
 from pypy.interpreter.typedef import check_new_dictionary
 from pypy.objspace.std.dictmultiobject import W_DictMultiObject
-from pypy.objspace.std.dictmultiobject import StrDictImplementation
+from pypy.objspace.std.dictmultiobject import DictStrategy, StrDictStrategy
+from pypy.objspace.std.dictmultiobject import ObjectDictStrategy
 from pypy.objspace.std.dictmultiobject import IteratorImplementation
-from pypy.objspace.std.dictmultiobject import implementation_methods
+from pypy.objspace.std.dictmultiobject import _is_sane_hash
+from pypy.rlib.objectmodel import r_dict
 from pypy.tool.sourcetools import func_with_new_name
 
 def make_mixin(config):
     if config.objspace.std.withsharingdict:
-        from pypy.objspace.std.sharingdict import SharedDictImplementation
-        return make_inlinedict_mixin(SharedDictImplementation, "structure")
+        from pypy.objspace.std.sharingdict import SharedDictStrategy
+        return make_inlinedict_mixin(SharedDictStrategy, "structure")
     else:
-        return make_inlinedict_mixin(StrDictImplementation, "content")
-
-def make_indirection_method(methname, numargs):
-    # *args don't work, the call normalization gets confused
-    args = ", ".join(["a" + str(i) for i in range(numargs)])
-    code = """def f(self, %s):
-    return self.w_obj.%s(%s)
-""" % (args, methname, args)
-    d = {}
-    exec py.code.Source(code).compile() in d
-    func = d["f"]
-    func.func_name = methname + "_indirect"
-    func.func_defaults = getattr(W_DictMultiObject, methname).func_defaults
-    return func
-
-def make_inlinedict_mixin(dictimplclass, attrname):
-    assert dictimplclass.__base__ is W_DictMultiObject
+        return make_inlinedict_mixin(StrDictStrategy, "content")
+
+# the methods of the strategy that only touch the storage fields.  The
+# instance gets a copy of each of them, and passes itself as the 'w_dict'
+# argument, so that the fields end up in the instance itself
+inlined_methods = ["init_storage", "getitem_str", "setitem_str",
+                   "delitem_str", "length", "str_items", "clear",
+                   "clear_fields"]
+
+def make_inlinedict_mixin(strategycls, attrname):
+    assert issubclass(strategycls, DictStrategy)
+    inline = {}
+    for methname in inlined_methods:
+        inline[methname] = func_with_new_name(
+            getattr(strategycls, methname).im_func,
+            "inline_%s_%s" % (methname, strategycls.__name__))
+    init_storage = inline["init_storage"]
+    getitem_str = inline["getitem_str"]
+    setitem_str = inline["setitem_str"]
+    delitem_str = inline["delitem_str"]
+    length = inline["length"]
+    str_items = inline["str_items"]
+    clear = inline["clear"]
+    clear_fields = inline["clear_fields"]
+
     class IndirectionIterImplementation(IteratorImplementation):
         def __init__(self, space, dictimpl, itemlist):
             IteratorImplementation.__init__(self, space, dictimpl)
             self.itemlist = itemlist
 
         def next_entry(self):
-            return self.itemlist[self.pos]
-            
-    class IndirectionDictImplementation(W_DictMultiObject):
+            key, w_value = self.itemlist[self.pos]
+            return self.space.wrap(key), w_value
+
+    class IndirectionDictStrategy(DictStrategy):
+        """The strategy of the dict returned by getdict(): the content is
+        stored in the fields of the instance w_obj."""
+
         def __init__(self, space, w_obj):
             self.space = space
             self.w_obj = w_obj
 
-        def impl_iter(self):
-            # XXX sucky
-            items = []
-            for w_item in self.impl_items():
-                w_key, w_value = self.space.fixedview(w_item)
-                items.append((w_key, w_value))
-            return IndirectionIterImplementation(self.space, self, items)
-
-    IndirectionDictImplementation.__name__ = "IndirectionDictImplementation" + dictimplclass.__name__
-
-    for methname, numargs in implementation_methods:
-        implname = "impl_" + methname
-        if implname != "impl_iter":
-            setattr(IndirectionDictImplementation, implname,
-                    make_indirection_method(implname, numargs))
-
-    init_dictattributes = func_with_new_name(dictimplclass.__init__.im_func,
-                                             "init_dictattributes")
-    make_rdict = func_with_new_name(dictimplclass._as_rdict.im_func,
-                                    "make_rdict")
-    clear_fields = func_with_new_name(dictimplclass._clear_fields.im_func,
-                                      "clear_fields")
+        def _inlined(self):
+            return self.space.fromcache(strategycls)
+
+        def init_storage(self, w_dict):
+            pass
+
+        def getitem_str(self, w_dict, key):
+            return getitem_str(self._inlined(), self.w_obj, key)
+
+        def getitem(self, w_dict, w_key):
+            space = self.space
+            w_lookup_type = space.type(w_key)
+            if space.is_w(w_lookup_type, space.w_str):
+                return self.getitem_str(w_dict, space.str_w(w_key))
+            elif _is_sane_hash(space, w_lookup_type):
+                return None
+            else:
+                self.switch_to_object_strategy(w_dict)
+                return w_dict.getitem(w_key)
+
+        def setitem_str(self, w_dict, key, w_value, shadows_type=True):
+            setitem_str(self._inlined(), self.w_obj, key, w_value)
+
+        def setitem(self, w_dict, w_key, w_value):
+            space = self.space
+            if space.is_w(space.type(w_key), space.w_str):
+                self.setitem_str(w_dict, space.str_w(w_key), w_value)
+            else:
+                self.switch_to_object_strategy(w_dict)
+                w_dict.setitem(w_key, w_value)
+
+        def delitem(self, w_dict, w_key):
+            space = self.space
+            w_key_type = space.type(w_key)
+            if space.is_w(w_key_type, space.w_str):
+                delitem_str(self._inlined(), self.w_obj, space.str_w(w_key))
+            elif _is_sane_hash(space, w_key_type):
+                raise KeyError
+            else:
+                self.switch_to_object_strategy(w_dict)
+                w_dict.delitem(w_key)
+
+        def length(self, w_dict):
+            return length(self._inlined(), self.w_obj)
+
+        def iter(self, w_dict):
+            items = str_items(self._inlined(), self.w_obj)
+            return IndirectionIterImplementation(self.space, w_dict, items)
+
+        def clear(self, w_dict):
+            clear(self._inlined(), self.w_obj)
+
+        def switch_to_object_strategy(self, w_dict):
+            space = self.space
+            r_dict_content = r_dict(space.eq_w, space.hash_w)
+            for key, w_value in str_items(self._inlined(), self.w_obj):
+                r_dict_content[space.wrap(key)] = w_value
+            self.w_obj._clear_fields() # invalidate attributes on w_obj
+            w_dict.strategy = space.fromcache(ObjectDictStrategy)
+            w_dict.r_dict_content = r_dict_content
+
+    IndirectionDictStrategy.__name__ = ("IndirectionDictStrategy" +
+                                        strategycls.__name__)
 
     class InlineDictMixin(object):
 
@@ -70,14 +124,16 @@ def make_inlinedict_mixin(dictimplclass, attrname):
             self.space = space
             self.w__class__ = w_subtype
             self.w__dict__ = None
-            init_dictattributes(self, space)
+            init_storage(space.fromcache(strategycls), self)
             assert getattr(self, attrname) is not None
             self.user_setup_slots(w_subtype.nslots)
 
         def getdict(self):
             w__dict__ = self.w__dict__
             if w__dict__ is None:
-                w__dict__ = IndirectionDictImplementation(self.space, self)
+                space = self.space
+                w__dict__ = W_DictMultiObject(
+                    space, IndirectionDictStrategy(space, self))
                 self.w__dict__ = w__dict__
             assert isinstance(w__dict__, W_DictMultiObject)
             return w__dict__
@@ -87,7 +143,7 @@ def make_inlinedict_mixin(dictimplclass, attrname):
 
         def getdictvalue(self, space, attr):
             if self._inlined_dict_valid():
-                return self.impl_getitem_str(attr)
+                return getitem_str(space.fromcache(strategycls), self, attr)
             w_dict = self.getdict()
             return w_dict.getitem_str(attr)
 
@@ -99,16 +155,18 @@ def make_inlinedict_mixin(dictimplclass, attrname):
                 # XXX so far we ignore shadows_type, which is a small
                 # performance-degradation if the JIT is not used (i.e. shadow
                 # tracking does not work). Maybe we don't care.
-                self.impl_setitem_str(attr, w_value)
+                setitem_str(space.fromcache(strategycls), self, attr, w_value)
                 return True
             w_dict = self.getdict()
             w_dict.setitem_str(attr, w_value)
             return True
 
         def deldictvalue(self, space, w_attr):
-            if self._inlined_dict_valid():
+            if (self._inlined_dict_valid() and
+                    space.is_w(space.type(w_attr), space.w_str)):
                 try:
-                    self.impl_delitem(w_attr)
+                    delitem_str(space.fromcache(strategycls), self,
+                                space.str_w(w_attr))
                 except KeyError:
                     return False
                 return True
@@ -123,23 +181,11 @@ def make_inlinedict_mixin(dictimplclass, attrname):
             # if somebody asked for the __dict__, and it did not devolve, it
             # needs to stay valid even if we set a new __dict__ on this object
             if self.w__dict__ is not None and self._inlined_dict_valid():
-                make_rdict(self)
+                self.w__dict__.switch_to_object_strategy()
             self._clear_fields() # invalidate attributes on self
             self.w__dict__ = check_new_dictionary(space, w_dict)
 
-        def _as_rdict(self):
-            make_rdict(self)
-            return self.getdict()
-
-        def initialize_as_rdict(self):
-            return self.getdict().initialize_as_rdict()
-        
-        _clear_fields = clear_fields
-
-    for methname, _ in implementation_methods:
-        implname = "impl_" + methname
-        meth = func_with_new_name(getattr(dictimplclass, implname).im_func,
-                                  implname)
-        if not hasattr(InlineDictMixin, implname):
-            setattr(InlineDictMixin, implname, meth)
+        def _clear_fields(self):
+            clear_fields(self.space.fromcache(strategycls), self)
+
     return InlineDictMixin
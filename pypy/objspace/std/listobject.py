@@ -3,34 +3,726 @@ from pypy.objspace.std.register_all import register_all
 from pypy.objspace.std.multimethod import FailedToImplement
 from pypy.interpreter.error import OperationError, operationerrfmt
 from pypy.objspace.std.inttype import wrapint
+from pypy.objspace.std.intobject import W_IntObject
+from pypy.objspace.std.floatobject import W_FloatObject
 from pypy.objspace.std.listtype import get_list_index
 from pypy.objspace.std.sliceobject import W_SliceObject, normalize_simple_slice
 
 from pypy.objspace.std import slicetype
 from pypy.interpreter import gateway, baseobjspace
-from pypy.rlib.listsort import TimSort
+from pypy.rlib.listsort import TimSort, make_timsort_class
+from pypy.rlib.objectmodel import instantiate
+from pypy.rlib.rarithmetic import isnan
 from pypy.interpreter.argument import Signature
+from sys import maxint
 
 class W_ListObject(W_Object):
     from pypy.objspace.std.listtype import list_typedef as typedef
-    
-    def __init__(w_self, wrappeditems):
-        w_self.wrappeditems = wrappeditems
+
+    # The items are stored in exactly one of the following fields,
+    # depending on the strategy of the list (see ListStrategy below).
+    wrappeditems = None     # ObjectListStrategy: list of wrapped objects
+    intitems = None         # IntegerListStrategy: list of ints
+    floatitems = None       # FloatListStrategy: list of floats
+    stritems = None         # StringListStrategy: list of strings
+
+    def __init__(w_self, space, wrappeditems):
+        assert isinstance(wrappeditems, list)
+        w_self.init_from_list_w(space, wrappeditems)
 
     def __repr__(w_self):
         """ representation for debugging purposes """
-        return "%s(%s)" % (w_self.__class__.__name__, w_self.wrappeditems)
+        return "%s(%s, %s)" % (w_self.__class__.__name__,
+                               w_self.strategy.__class__.__name__,
+                               w_self.getitems())
 
     def unwrap(w_list, space):
-        items = [space.unwrap(w_item) for w_item in w_list.wrappeditems]# XXX generic mixed types unwrap
+        items = [space.unwrap(w_item) for w_item in w_list.getitems()]# XXX generic mixed types unwrap
         return list(items)
 
-    def append(w_list, w_item):
-        w_list.wrappeditems.append(w_item)
+    def init_from_list_w(w_self, space, list_w):
+        """Replace the content of the list with the wrapped objects in
+        'list_w', picking the best strategy for them."""
+        w_self._clear_storage()
+        w_self.strategy = get_strategy_from_list_objects(space, list_w)
+        w_self.strategy.init_from_list_w(w_self, list_w)
+
+    def _clear_storage(w_self):
+        w_self.wrappeditems = None
+        w_self.intitems = None
+        w_self.floatitems = None
+        w_self.stritems = None
+
+    def switch_to_object_strategy(w_self):
+        """Turn the list into a list of wrapped objects.  This is what
+        happens when an item that the current strategy cannot store is
+        added to the list."""
+        strategy = w_self.strategy
+        space = strategy.space
+        object_strategy = space.fromcache(ObjectListStrategy)
+        if strategy is object_strategy:
+            return
+        items_w = strategy.getitems(w_self)
+        w_self._clear_storage()
+        w_self.strategy = object_strategy
+        w_self.wrappeditems = items_w
+
+    # ___________________________________________________
+    # the following methods just forward to the strategy
+
+    def length(w_self):
+        return w_self.strategy.length(w_self)
+
+    def getitem(w_self, index):
+        """Returns the wrapped item at 'index'.  Raises IndexError."""
+        return w_self.strategy.getitem(w_self, index)
+
+    def getslice(w_self, start, stop, step, slicelength):
+        """Returns a new W_ListObject with the given slice of the items."""
+        return w_self.strategy.getslice(w_self, start, stop, step,
+                                        slicelength)
+
+    def getitems(w_self):
+        """Returns the items as a list of wrapped objects.  For lists of
+        wrapped objects this is the storage itself, so it must not be
+        modified by the caller."""
+        return w_self.strategy.getitems(w_self)
+
+    def getitems_copy(w_self):
+        """Returns a fresh list of the wrapped items."""
+        return w_self.strategy.getitems_copy(w_self)
+
+    def getitems_fixedsize(w_self):
+        """Returns a fresh list of the wrapped items, which must never
+        be resized."""
+        return w_self.strategy.getitems_fixedsize(w_self)
+
+    def append(w_self, w_item):
+        w_self.strategy.append(w_self, w_item)
+
+    def insert(w_self, index, w_item):
+        w_self.strategy.insert(w_self, index, w_item)
+
+    def extend(w_self, w_other):
+        assert isinstance(w_other, W_ListObject)
+        w_self.strategy.extend(w_self, w_other)
+
+    def extend_from_list_w(w_self, items_w):
+        w_self.strategy.extend_from_list_w(w_self, items_w)
+
+    def setitem(w_self, index, w_item):
+        """Raises IndexError."""
+        w_self.strategy.setitem(w_self, index, w_item)
+
+    def setslice(w_self, start, step, slicelength, sequence_w):
+        w_self.strategy.setslice(w_self, start, step, slicelength, sequence_w)
+
+    def deleteitem(w_self, index):
+        """Raises IndexError."""
+        w_self.strategy.deleteitem(w_self, index)
+
+    def deleteslice(w_self, start, step, slicelength):
+        w_self.strategy.deleteslice(w_self, start, step, slicelength)
+
+    def pop(w_self, index):
+        """Removes and returns the wrapped item at 'index'.  Raises
+        IndexError."""
+        return w_self.strategy.pop(w_self, index)
+
+    def clear(w_self):
+        w_self.init_from_list_w(w_self.strategy.space, [])
+
+    def inplace_mul(w_self, times):
+        w_self.strategy.inplace_mul(w_self, times)
+
+    def mul(w_self, times):
+        return w_self.strategy.mul(w_self, times)
+
+    def reverse(w_self):
+        w_self.strategy.reverse(w_self)
+
+    def sort(w_self, reverse):
+        """Sorts the list in place if the strategy knows how to do it
+        without calling app-level code.  Returns False otherwise."""
+        return w_self.strategy.sort(w_self, reverse)
+
+    def find(w_self, w_item, start=0, stop=maxint):
+        """Returns the index of the first item equal to w_item between
+        start and stop.  Raises ValueError if there is none."""
+        return w_self.strategy.find(w_self, w_item, start, stop)
+
+    def equal(w_self, w_other):
+        return w_self.strategy.equal(w_self, w_other)
 
 registerimplementation(W_ListObject)
 
 
+def get_strategy_from_list_objects(space, list_w):
+    if not space.config.objspace.std.withliststrategies:
+        return space.fromcache(ObjectListStrategy)
+    if not list_w:
+        return space.fromcache(EmptyListStrategy)
+    strategy = space.fromcache(IntegerListStrategy)
+    if strategy.is_correct_type_list(list_w):
+        return strategy
+    strategy = space.fromcache(FloatListStrategy)
+    if strategy.is_correct_type_list(list_w):
+        return strategy
+    strategy = space.fromcache(StringListStrategy)
+    if strategy.is_correct_type_list(list_w):
+        return strategy
+    return space.fromcache(ObjectListStrategy)
+
+def get_strategy_from_item(space, w_item):
+    strategy = space.fromcache(IntegerListStrategy)
+    if strategy.is_correct_type(w_item):
+        return strategy
+    strategy = space.fromcache(FloatListStrategy)
+    if strategy.is_correct_type(w_item):
+        return strategy
+    strategy = space.fromcache(StringListStrategy)
+    if strategy.is_correct_type(w_item):
+        return strategy
+    return space.fromcache(ObjectListStrategy)
+
+
+class ListStrategy(object):
+    """A strategy describes how the items of a W_ListObject are stored.
+    There is only one instance of every strategy per space; all the lists
+    using it point to it from their 'strategy' field.  The non-object
+    strategies keep the items unwrapped and switch the list to the
+    ObjectListStrategy as soon as an item of another type is stored."""
+
+    def __init__(self, space):
+        self.space = space
+
+    def init_from_list_w(self, w_list, list_w):
+        raise NotImplementedError("abstract base class")
+
+    def length(self, w_list):
+        raise NotImplementedError("abstract base class")
+
+    def getitem(self, w_list, index):
+        raise NotImplementedError("abstract base class")
+
+    def getslice(self, w_list, start, stop, step, slicelength):
+        raise NotImplementedError("abstract base class")
+
+    def getitems(self, w_list):
+        raise NotImplementedError("abstract base class")
+
+    def getitems_copy(self, w_list):
+        raise NotImplementedError("abstract base class")
+
+    def getitems_fixedsize(self, w_list):
+        raise NotImplementedError("abstract base class")
+
+    def copy_into(self, w_list, w_other):
+        """Makes w_other a copy of w_list, with the same strategy."""
+        raise NotImplementedError("abstract base class")
+
+    def append(self, w_list, w_item):
+        raise NotImplementedError("abstract base class")
+
+    def insert(self, w_list, index, w_item):
+        raise NotImplementedError("abstract base class")
+
+    def extend(self, w_list, w_other):
+        raise NotImplementedError("abstract base class")
+
+    def extend_from_list_w(self, w_list, items_w):
+        raise NotImplementedError("abstract base class")
+
+    def setitem(self, w_list, index, w_item):
+        raise NotImplementedError("abstract base class")
+
+    def setslice(self, w_list, start, step, slicelength, sequence_w):
+        raise NotImplementedError("abstract base class")
+
+    def deleteitem(self, w_list, index):
+        raise NotImplementedError("abstract base class")
+
+    def deleteslice(self, w_list, start, step, slicelength):
+        raise NotImplementedError("abstract base class")
+
+    def pop(self, w_list, index):
+        raise NotImplementedError("abstract base class")
+
+    def inplace_mul(self, w_list, times):
+        raise NotImplementedError("abstract base class")
+
+    def mul(self, w_list, times):
+        raise NotImplementedError("abstract base class")
+
+    def reverse(self, w_list):
+        raise NotImplementedError("abstract base class")
+
+    def sort(self, w_list, reverse):
+        return False
+
+    def find(self, w_list, w_item, start, stop):
+        # needs to be safe against eq_w() mutating the w_list behind our back
+        space = self.space
+        i = start
+        while i < stop and i < w_list.length():
+            if space.eq_w(w_list.getitem(i), w_item):
+                return i
+            i += 1
+        raise ValueError
+
+    def equal(self, w_list, w_other):
+        # needs to be safe against eq_w() mutating the w_lists behind our back
+        space = self.space
+        if w_list.length() != w_other.length():
+            return False
+        i = 0
+        while i < w_list.length() and i < w_other.length():
+            if not space.eq_w(w_list.getitem(i), w_other.getitem(i)):
+                return False
+            i += 1
+        return True
+
+
+class EmptyListStrategy(ListStrategy):
+    """Used for the empty lists.  Storing the first item switches the list
+    to the most specialized strategy that can hold it."""
+
+    def init_from_list_w(self, w_list, list_w):
+        assert len(list_w) == 0
+
+    def _switch_for_item(self, w_list, w_item):
+        strategy = get_strategy_from_item(self.space, w_item)
+        w_list.strategy = strategy
+        strategy.init_from_list_w(w_list, [])
+
+    def length(self, w_list):
+        return 0
+
+    def getitem(self, w_list, index):
+        raise IndexError
+
+    def getslice(self, w_list, start, stop, step, slicelength):
+        return W_ListObject(self.space, [])
+
+    def getitems(self, w_list):
+        return []
+
+    def getitems_copy(self, w_list):
+        return []
+
+    def getitems_fixedsize(self, w_list):
+        return []
+
+    def append(self, w_list, w_item):
+        self._switch_for_item(w_list, w_item)
+        w_list.append(w_item)
+
+    def insert(self, w_list, index, w_item):
+        assert index == 0
+        self.append(w_list, w_item)
+
+    def extend(self, w_list, w_other):
+        w_other.strategy.copy_into(w_other, w_list)
+
+    def extend_from_list_w(self, w_list, items_w):
+        w_list.init_from_list_w(self.space, items_w[:])
+
+    def setitem(self, w_list, index, w_item):
+        raise IndexError
+
+    def setslice(self, w_list, start, step, slicelength, sequence_w):
+        if not sequence_w:
+            return
+        strategy = get_strategy_from_list_objects(self.space, sequence_w)
+        w_list.strategy = strategy
+        strategy.init_from_list_w(w_list, [])
+        strategy.setslice(w_list, start, step, slicelength, sequence_w)
+
+    def deleteitem(self, w_list, index):
+        raise IndexError
+
+    def deleteslice(self, w_list, start, step, slicelength):
+        pass
+
+    def pop(self, w_list, index):
+        raise IndexError
+
+    def inplace_mul(self, w_list, times):
+        pass
+
+    def mul(self, w_list, times):
+        return W_ListObject(self.space, [])
+
+    def reverse(self, w_list):
+        pass
+
+    def sort(self, w_list, reverse):
+        return True
+
+    def find(self, w_list, w_item, start, stop):
+        raise ValueError
+
+    def copy_into(self, w_list, w_other):
+        pass
+
+
+class AbstractUnwrappedStrategy(object):
+    """Common implementation of the strategies that store the items in
+    an RPython list, in one of the storage fields of W_ListObject."""
+    _mixin_ = True
+
+    def wrap(self, unwrapped):
+        raise NotImplementedError
+
+    def unwrap(self, wrapped):
+        raise NotImplementedError
+
+    def is_correct_type(self, w_obj):
+        raise NotImplementedError
+
+    def get_storage(self, w_list):
+        raise NotImplementedError
+
+    def set_storage(self, w_list, storage):
+        raise NotImplementedError
+
+    def is_correct_type_list(self, list_w):
+        for w_item in list_w:
+            if not self.is_correct_type(w_item):
+                return False
+        return True
+
+    def _new_list(self, storage):
+        w_list = instantiate(W_ListObject)
+        w_list.strategy = self
+        self.set_storage(w_list, storage)
+        return w_list
+
+    def copy_into(self, w_list, w_other):
+        w_other._clear_storage()
+        w_other.strategy = self
+        self.set_storage(w_other, self.get_storage(w_list)[:])
+
+    def init_from_list_w(self, w_list, list_w):
+        self.set_storage(w_list, [self.unwrap(w_item) for w_item in list_w])
+
+    def length(self, w_list):
+        return len(self.get_storage(w_list))
+
+    def getitem(self, w_list, index):
+        l = self.get_storage(w_list)
+        try:
+            r = l[index]
+        except IndexError: # make RPython raise the exception
+            raise
+        return self.wrap(r)
+
+    def getitems(self, w_list):
+        return [self.wrap(item) for item in self.get_storage(w_list)]
+
+    def getitems_copy(self, w_list):
+        return [self.wrap(item) for item in self.get_storage(w_list)]
+
+    def getitems_fixedsize(self, w_list):
+        return [self.wrap(item) for item in self.get_storage(w_list)]
+
+    def getslice(self, w_list, start, stop, step, slicelength):
+        l = self.get_storage(w_list)
+        if step == 1 and 0 <= start <= stop:
+            return self._new_list(l[start:stop])
+        subitems = [self._none_value] * slicelength
+        for i in range(slicelength):
+            subitems[i] = l[start]
+            start += step
+        return self._new_list(subitems)
+
+    def append(self, w_list, w_item):
+        if self.is_correct_type(w_item):
+            self.get_storage(w_list).append(self.unwrap(w_item))
+            return
+        w_list.switch_to_object_strategy()
+        w_list.append(w_item)
+
+    def insert(self, w_list, index, w_item):
+        if self.is_correct_type(w_item):
+            self.get_storage(w_list).insert(index, self.unwrap(w_item))
+            return
+        w_list.switch_to_object_strategy()
+        w_list.insert(index, w_item)
+
+    def extend(self, w_list, w_other):
+        if w_other.strategy is self:
+            l = self.get_storage(w_list)
+            l += self.get_storage(w_other)
+        else:
+            self.extend_from_list_w(w_list, w_other.getitems())
+
+    def extend_from_list_w(self, w_list, items_w):
+        if self.is_correct_type_list(items_w):
+            l = self.get_storage(w_list)
+            for w_item in items_w:
+                l.append(self.unwrap(w_item))
+            return
+        w_list.switch_to_object_strategy()
+        w_list.extend_from_list_w(items_w)
+
+    def setitem(self, w_list, index, w_item):
+        if self.is_correct_type(w_item):
+            l = self.get_storage(w_list)
+            try:
+                l[index] = self.unwrap(w_item)
+            except IndexError:
+                raise
+            return
+        w_list.switch_to_object_strategy()
+        w_list.setitem(index, w_item)
+
+    def setslice(self, w_list, start, step, slicelength, sequence_w):
+        if not self.is_correct_type_list(sequence_w):
+            w_list.switch_to_object_strategy()
+            w_list.setslice(start, step, slicelength, sequence_w)
+            return
+        assert slicelength >= 0
+        items = self.get_storage(w_list)
+        oldsize = len(items)
+        len2 = len(sequence_w)
+        if step == 1:  # Support list resizing for non-extended slices
+            delta = slicelength - len2
+            if delta < 0:
+                delta = -delta
+                newsize = oldsize + delta
+                # XXX support this in rlist!
+                items += [self._none_value] * delta
+                lim = start+len2
+                i = newsize - 1
+                while i >= lim:
+                    items[i] = items[i-delta]
+                    i -= 1
+            elif start >= 0:
+                del items[start:start+delta]
+            else:
+                assert delta==0
+        elif len2 != slicelength:  # No resize for extended slices
+            raise operationerrfmt(self.space.w_ValueError, "attempt to "
+                  "assign sequence of size %d to extended slice of size %d",
+                  len2, slicelength)
+        for i in range(len2):
+            items[start] = self.unwrap(sequence_w[i])
+            start += step
+
+    def deleteitem(self, w_list, index):
+        l = self.get_storage(w_list)
+        try:
+            del l[index]
+        except IndexError:
+            raise
+
+    def deleteslice(self, w_list, start, step, slicelength):
+        items = self.get_storage(w_list)
+        if slicelength==0:
+            return
+
+        if step < 0:
+            start = start + step * (slicelength-1)
+            step = -step
+
+        if step == 1:
+            assert start >= 0
+            assert slicelength >= 0
+            del items[start:start+slicelength]
+        else:
+            n = len(items)
+            i = start
+
+            for discard in range(1, slicelength):
+                j = i+1
+                i += step
+                while j < i:
+                    items[j-discard] = items[j]
+                    j += 1
+
+            j = i+1
+            while j < n:
+                items[j-slicelength] = items[j]
+                j += 1
+            start = n - slicelength
+            assert start >= 0 # annotator hint
+            del items[start:]
+
+    def pop(self, w_list, index):
+        l = self.get_storage(w_list)
+        try:
+            item = l.pop(index)
+        except IndexError:
+            raise
+        return self.wrap(item)
+
+    def inplace_mul(self, w_list, times):
+        l = self.get_storage(w_list)
+        l *= times
+
+    def mul(self, w_list, times):
+        return self._new_list(self.get_storage(w_list) * times)
+
+    def reverse(self, w_list):
+        self.get_storage(w_list).reverse()
+
+    def sort(self, w_list, reverse):
+        l = self.get_storage(w_list)
+        # reverse before and after sorting, like listsort(), to keep
+        # equal items in their original order
+        if reverse:
+            l.reverse()
+        sorter = self._sorterclass(l, len(l))
+        sorter.sort()
+        if reverse:
+            l.reverse()
+        return True
+
+    def find(self, w_list, w_item, start, stop):
+        if self.is_correct_type(w_item):
+            # fast path: no app-level code can be called
+            obj = self.unwrap(w_item)
+            l = self.get_storage(w_list)
+            i = start
+            while i < stop and i < len(l):
+                if l[i] == obj:
+                    return i
+                i += 1
+            raise ValueError
+        return ListStrategy.find(self, w_list, w_item, start, stop)
+
+    def equal(self, w_list, w_other):
+        if w_other.strategy is self:
+            l1 = self.get_storage(w_list)
+            l2 = self.get_storage(w_other)
+            if len(l1) != len(l2):
+                return False
+            for i in range(len(l1)):
+                if l1[i] != l2[i]:
+                    return False
+            return True
+        return ListStrategy.equal(self, w_list, w_other)
+
+
+class ObjectListStrategy(AbstractUnwrappedStrategy, ListStrategy):
+    _none_value = None
+
+    def wrap(self, w_item):
+        return w_item
+
+    def unwrap(self, w_item):
+        return w_item
+
+    def is_correct_type(self, w_obj):
+        return True
+
+    def get_storage(self, w_list):
+        return w_list.wrappeditems
+
+    def set_storage(self, w_list, storage):
+        w_list.wrappeditems = storage
+
+    def init_from_list_w(self, w_list, list_w):
+        w_list.wrappeditems = list_w
+
+    def getitems(self, w_list):
+        return w_list.wrappeditems
+
+    def getitems_copy(self, w_list):
+        return w_list.wrappeditems[:]
+
+    def getitems_fixedsize(self, w_list):
+        return w_list.wrappeditems[:]
+
+    def extend_from_list_w(self, w_list, items_w):
+        w_list.wrappeditems += items_w
+
+    def sort(self, w_list, reverse):
+        return False
+
+    def find(self, w_list, w_item, start, stop):
+        return ListStrategy.find(self, w_list, w_item, start, stop)
+
+    def equal(self, w_list, w_other):
+        return ListStrategy.equal(self, w_list, w_other)
+
+
+class IntSort(make_timsort_class()):
+    pass
+
+class IntegerListStrategy(AbstractUnwrappedStrategy, ListStrategy):
+    _none_value = 0
+    _sorterclass = IntSort
+
+    def wrap(self, intval):
+        return wrapint(self.space, intval)
+
+    def unwrap(self, w_int):
+        assert isinstance(w_int, W_IntObject)
+        return w_int.intval
+
+    def is_correct_type(self, w_obj):
+        return type(w_obj) is W_IntObject
+
+    def get_storage(self, w_list):
+        return w_list.intitems
+
+    def set_storage(self, w_list, storage):
+        w_list.intitems = storage
+
+
+class FloatSort(make_timsort_class()):
+    pass
+
+class FloatListStrategy(AbstractUnwrappedStrategy, ListStrategy):
+    _none_value = 0.0
+    _sorterclass = FloatSort
+
+    def wrap(self, floatval):
+        return self.space.newfloat(floatval)
+
+    def unwrap(self, w_float):
+        assert isinstance(w_float, W_FloatObject)
+        return w_float.floatval
+
+    def is_correct_type(self, w_obj):
+        # NaNs are kept wrapped: they are not equal to themselves, so
+        # their identity is the only thing that can find them again
+        return type(w_obj) is W_FloatObject and not isnan(w_obj.floatval)
+
+    def get_storage(self, w_list):
+        return w_list.floatitems
+
+    def set_storage(self, w_list, storage):
+        w_list.floatitems = storage
+
+
+class StringSort(make_timsort_class()):
+    pass
+
+class StringListStrategy(AbstractUnwrappedStrategy, ListStrategy):
+    _none_value = ''
+    _sorterclass = StringSort
+
+    def wrap(self, stringval):
+        return self.space.wrap(stringval)
+
+    def unwrap(self, w_string):
+        return self.space.str_w(w_string)
+
+    def is_correct_type(self, w_obj):
+        return type(w_obj) is self.space.StringObjectCls
+
+    def get_storage(self, w_list):
+        return w_list.stritems
+
+    def set_storage(self, w_list, storage):
+        w_list.stritems = storage
+
+# ____________________________________________________________
+
+
 init_signature = Signature(['sequence'], None, None)
 init_defaults = [None]
 
@@ -38,17 +730,11 @@ def init__List(space, w_list, __args__):
     # this is on the silly side
     w_iterable, = __args__.parse_obj(
             None, 'list', init_signature, init_defaults)
-    #
-    # this is the old version of the loop at the end of this function:
-    #
-    #   w_list.wrappeditems = space.unpackiterable(w_iterable)
-    #
-    # This is commented out to avoid assigning a new RPython list to
-    # 'wrappeditems', which defeats the W_FastSeqIterObject optimization.
-    #
-    items_w = w_list.wrappeditems
-    del items_w[:]
+    w_list.clear()
     if w_iterable is not None:
+        if isinstance(w_iterable, W_ListObject):
+            w_list.extend(w_iterable)
+            return
         w_iterator = space.iter(w_iterable)
         while True:
             try:
@@ -57,65 +743,56 @@ def init__List(space, w_list, __args__):
                 if not e.match(space, space.w_StopIteration):
                     raise
                 break  # done
-            items_w.append(w_item)
+            w_list.append(w_item)
 
 def len__List(space, w_list):
-    result = len(w_list.wrappeditems)
+    result = w_list.length()
     return wrapint(space, result)
 
 def getitem__List_ANY(space, w_list, w_index):
     try:
-        return w_list.wrappeditems[get_list_index(space, w_index)]
+        return w_list.getitem(get_list_index(space, w_index))
     except IndexError:
         raise OperationError(space.w_IndexError,
                              space.wrap("list index out of range"))
 
 def getitem__List_Slice(space, w_list, w_slice):
     # XXX consider to extend rlist's functionality?
-    length = len(w_list.wrappeditems)
+    length = w_list.length()
     start, stop, step, slicelength = w_slice.indices4(space, length)
     assert slicelength >= 0
-    if step == 1 and 0 <= start <= stop:
-        return W_ListObject(w_list.wrappeditems[start:stop])
-    w_res = W_ListObject([None] * slicelength)
-    items_w = w_list.wrappeditems
-    subitems_w = w_res.wrappeditems
-    for i in range(slicelength):
-        subitems_w[i] = items_w[start]
-        start += step
-    return w_res
+    return w_list.getslice(start, stop, step, slicelength)
 
 def getslice__List_ANY_ANY(space, w_list, w_start, w_stop):
-    length = len(w_list.wrappeditems)
+    length = w_list.length()
     start, stop = normalize_simple_slice(space, length, w_start, w_stop)
-    return W_ListObject(w_list.wrappeditems[start:stop])
+    return w_list.getslice(start, stop, 1, stop - start)
 
 def setslice__List_ANY_ANY_ANY(space, w_list, w_start, w_stop, w_sequence):
-    length = len(w_list.wrappeditems)
+    length = w_list.length()
     start, stop = normalize_simple_slice(space, length, w_start, w_stop)
     _setitem_slice_helper(space, w_list, start, 1, stop-start, w_sequence)
 
 def delslice__List_ANY_ANY(space, w_list, w_start, w_stop):
-    length = len(w_list.wrappeditems)
+    length = w_list.length()
     start, stop = normalize_simple_slice(space, length, w_start, w_stop)
-    _delitem_slice_helper(space, w_list, start, 1, stop-start)
+    w_list.deleteslice(start, 1, stop-start)
 
 def contains__List_ANY(space, w_list, w_obj):
-    # needs to be safe against eq_w() mutating the w_list behind our back
-    i = 0
-    items_w = w_list.wrappeditems
-    while i < len(items_w): # intentionally always calling len!
-        if space.eq_w(items_w[i], w_obj):
-            return space.w_True
-        i += 1
-    return space.w_False
+    try:
+        w_list.find(w_obj)
+    except ValueError:
+        return space.w_False
+    return space.w_True
 
 def iter__List(space, w_list):
     from pypy.objspace.std import iterobject
-    return iterobject.W_FastListIterObject(w_list, w_list.wrappeditems)
+    return iterobject.W_FastListIterObject(w_list)
 
 def add__List_List(space, w_list1, w_list2):
-    return W_ListObject(w_list1.wrappeditems + w_list2.wrappeditems)
+    w_res = w_list1.mul(1)
+    w_res.extend(w_list2)
+    return w_res
 
 
 def inplace_add__List_ANY(space, w_list1, w_iterable2):
@@ -133,7 +810,7 @@ def mul_list_times(space, w_list, w_times):
         if e.match(space, space.w_TypeError):
             raise FailedToImplement
         raise
-    return W_ListObject(w_list.wrappeditems * times)
+    return w_list.mul(times)
 
 def mul__List_ANY(space, w_list, w_times):
     return mul_list_times(space, w_list, w_times)
@@ -148,63 +825,48 @@ def inplace_mul__List_ANY(space, w_list, w_times):
         if e.match(space, space.w_TypeError):
             raise FailedToImplement
         raise
-    w_list.wrappeditems *= times
+    w_list.inplace_mul(times)
     return w_list
 
 def eq__List_List(space, w_list1, w_list2):
-    # needs to be safe against eq_w() mutating the w_lists behind our back
-    items1_w = w_list1.wrappeditems
-    items2_w = w_list2.wrappeditems
-    return equal_wrappeditems(space, items1_w, items2_w)
+    return space.newbool(w_list1.equal(w_list2))
 
-def equal_wrappeditems(space, items1_w, items2_w):
-    if len(items1_w) != len(items2_w):
-        return space.w_False
-    i = 0
-    while i < len(items1_w) and i < len(items2_w):
-        if not space.eq_w(items1_w[i], items2_w[i]):
-            return space.w_False
-        i += 1
-    return space.w_True
-
-def lessthan_unwrappeditems(space, items1_w, items2_w):
+def lessthan_unwrappeditems(space, w_list1, w_list2):
     # needs to be safe against eq_w() mutating the w_lists behind our back
     # Search for the first index where items are different
     i = 0
-    while i < len(items1_w) and i < len(items2_w):
-        w_item1 = items1_w[i]
-        w_item2 = items2_w[i]
+    while i < w_list1.length() and i < w_list2.length():
+        w_item1 = w_list1.getitem(i)
+        w_item2 = w_list2.getitem(i)
         if not space.eq_w(w_item1, w_item2):
             return space.lt(w_item1, w_item2)
         i += 1
     # No more items to compare -- compare sizes
-    return space.newbool(len(items1_w) < len(items2_w))
+    return space.newbool(w_list1.length() < w_list2.length())
 
-def greaterthan_unwrappeditems(space, items1_w, items2_w):
+def greaterthan_unwrappeditems(space, w_list1, w_list2):
     # needs to be safe against eq_w() mutating the w_lists behind our back
     # Search for the first index where items are different
     i = 0
-    while i < len(items1_w) and i < len(items2_w):
-        w_item1 = items1_w[i]
-        w_item2 = items2_w[i]
+    while i < w_list1.length() and i < w_list2.length():
+        w_item1 = w_list1.getitem(i)
+        w_item2 = w_list2.getitem(i)
         if not space.eq_w(w_item1, w_item2):
             return space.gt(w_item1, w_item2)
         i += 1
     # No more items to compare -- compare sizes
-    return space.newbool(len(items1_w) > len(items2_w))
+    return space.newbool(w_list1.length() > w_list2.length())
 
 def lt__List_List(space, w_list1, w_list2):
-    return lessthan_unwrappeditems(space, w_list1.wrappeditems,
-        w_list2.wrappeditems)
+    return lessthan_unwrappeditems(space, w_list1, w_list2)
 
 def gt__List_List(space, w_list1, w_list2):
-    return greaterthan_unwrappeditems(space, w_list1.wrappeditems,
-        w_list2.wrappeditems)
+    return greaterthan_unwrappeditems(space, w_list1, w_list2)
 
 def delitem__List_ANY(space, w_list, w_idx):
     idx = get_list_index(space, w_idx)
     try:
-        del w_list.wrappeditems[idx]
+        w_list.deleteitem(idx)
     except IndexError:
         raise OperationError(space.w_IndexError,
                              space.wrap("list deletion index out of range"))
@@ -213,100 +875,29 @@ def delitem__List_ANY(space, w_list, w_idx):
 
 def delitem__List_Slice(space, w_list, w_slice):
     start, stop, step, slicelength = w_slice.indices4(space,
-                                                      len(w_list.wrappeditems))
-    _delitem_slice_helper(space, w_list, start, step, slicelength)
-
-def _delitem_slice_helper(space, w_list, start, step, slicelength):
-    if slicelength==0:
-        return
-
-    if step < 0:
-        start = start + step * (slicelength-1)
-        step = -step
-        
-    if step == 1:
-        assert start >= 0
-        assert slicelength >= 0
-        del w_list.wrappeditems[start:start+slicelength]
-    else:
-        items = w_list.wrappeditems
-        n = len(items)
-        i = start
-
-        for discard in range(1, slicelength):
-            j = i+1
-            i += step
-            while j < i:
-                items[j-discard] = items[j]
-                j += 1
-
-        j = i+1
-        while j < n:
-            items[j-slicelength] = items[j]
-            j += 1
-        start = n - slicelength
-        assert start >= 0 # annotator hint
-        del items[start:]
+                                                      w_list.length())
+    w_list.deleteslice(start, step, slicelength)
 
 def setitem__List_ANY_ANY(space, w_list, w_index, w_any):
     idx = get_list_index(space, w_index)
     try:
-        w_list.wrappeditems[idx] = w_any
+        w_list.setitem(idx, w_any)
     except IndexError:
         raise OperationError(space.w_IndexError,
                              space.wrap("list index out of range"))
     return space.w_None
 
 def setitem__List_Slice_ANY(space, w_list, w_slice, w_iterable):
-    oldsize = len(w_list.wrappeditems)
+    oldsize = w_list.length()
     start, stop, step, slicelength = w_slice.indices4(space, oldsize)
     _setitem_slice_helper(space, w_list, start, step, slicelength, w_iterable)
 
 def _setitem_slice_helper(space, w_list, start, step, slicelength, w_iterable):
-    sequence2 = space.listview(w_iterable)
-    assert slicelength >= 0
-    items = w_list.wrappeditems
-    oldsize = len(items)
-    len2 = len(sequence2)
-    if step == 1:  # Support list resizing for non-extended slices
-        delta = slicelength - len2
-        if delta < 0:
-            delta = -delta
-            newsize = oldsize + delta
-            # XXX support this in rlist!
-            items += [None] * delta
-            lim = start+len2
-            i = newsize - 1
-            while i >= lim:
-                items[i] = items[i-delta]
-                i -= 1
-        elif start >= 0:
-            del items[start:start+delta]
-        else:
-            assert delta==0
-    elif len2 != slicelength:  # No resize for extended slices
-        raise operationerrfmt(space.w_ValueError, "attempt to "
-              "assign sequence of size %d to extended slice of size %d",
-              len2, slicelength)
-
-    if sequence2 is items:
-        if step > 0:
-            # Always copy starting from the right to avoid
-            # having to make a shallow copy in the case where
-            # the source and destination lists are the same list.
-            i = len2 - 1
-            start += i*step
-            while i >= 0:
-                items[start] = sequence2[i]
-                start -= step
-                i -= 1
-            return
-        else:
-            # Make a shallow copy to more easily handle the reversal case
-            sequence2 = list(sequence2)
-    for i in range(len2):
-        items[start] = sequence2[i]
-        start += step
+    if w_iterable is w_list:
+        sequence2 = w_list.getitems_copy()
+    else:
+        sequence2 = space.listview(w_iterable)
+    w_list.setslice(start, step, slicelength, sequence2)
 
 app = gateway.applevel("""
     def listrepr(currently_in_repr, l):
@@ -322,12 +913,12 @@ app = gateway.applevel("""
                 del currently_in_repr[list_id]
             except:
                 pass
-""", filename=__file__) 
+""", filename=__file__)
 
 listrepr = app.interphook("listrepr")
 
 def repr__List(space, w_list):
-    if len(w_list.wrappeditems) == 0:
+    if w_list.length() == 0:
         return space.wrap('[]')
     ec = space.getexecutioncontext()
     w_currently_in_repr = ec._py_repr
@@ -337,80 +928,77 @@ def repr__List(space, w_list):
 
 def list_insert__List_ANY_ANY(space, w_list, w_where, w_any):
     where = space.int_w(w_where)
-    length = len(w_list.wrappeditems)
+    length = w_list.length()
     if where < 0:
         where += length
         if where < 0:
             where = 0
     elif where > length:
         where = length
-    w_list.wrappeditems.insert(where, w_any)
+    w_list.insert(where, w_any)
     return space.w_None
 
 def list_append__List_ANY(space, w_list, w_any):
-    w_list.wrappeditems.append(w_any)
+    w_list.append(w_any)
     return space.w_None
 
 def list_extend__List_List(space, w_list, w_other):
-    w_list.wrappeditems += w_other.wrappeditems
+    w_list.extend(w_other)
     return space.w_None
 
 def list_extend__List_ANY(space, w_list, w_any):
-    w_list.wrappeditems += space.listview(w_any)
+    w_list.extend_from_list_w(space.listview(w_any))
     return space.w_None
 
 # note that the default value will come back wrapped!!!
 def list_pop__List_ANY(space, w_list, w_idx=-1):
-    items = w_list.wrappeditems
-    if len(items)== 0:
+    if w_list.length() == 0:
         raise OperationError(space.w_IndexError,
                              space.wrap("pop from empty list"))
     idx = space.int_w(w_idx)
     try:
-        return items.pop(idx)
+        return w_list.pop(idx)
     except IndexError:
         raise OperationError(space.w_IndexError,
                              space.wrap("pop index out of range"))
 
 def list_remove__List_ANY(space, w_list, w_any):
     # needs to be safe against eq_w() mutating the w_list behind our back
-    items = w_list.wrappeditems
-    i = 0
-    while i < len(items):
-        if space.eq_w(items[i], w_any):
-            if i < len(items): # if this is wrong the list was changed
-                del items[i]
-            return space.w_None
-        i += 1
-    raise OperationError(space.w_ValueError,
-                         space.wrap("list.remove(x): x not in list"))
+    try:
+        i = w_list.find(w_any)
+    except ValueError:
+        raise OperationError(space.w_ValueError,
+                             space.wrap("list.remove(x): x not in list"))
+    if i < w_list.length(): # if this is wrong the list was changed
+        w_list.deleteitem(i)
+    return space.w_None
 
 def list_index__List_ANY_ANY_ANY(space, w_list, w_any, w_start, w_stop):
     # needs to be safe against eq_w() mutating the w_list behind our back
-    items = w_list.wrappeditems
-    size = len(items)
+    size = w_list.length()
     i = slicetype.adapt_bound(space, size, w_start)
     stop = slicetype.adapt_bound(space, size, w_stop)
-    while i < stop and i < len(items):
-        if space.eq_w(items[i], w_any):
-            return space.wrap(i)
-        i += 1
-    raise OperationError(space.w_ValueError,
-                         space.wrap("list.index(x): x not in list"))
+    try:
+        i = w_list.find(w_any, i, stop)
+    except ValueError:
+        raise OperationError(space.w_ValueError,
+                             space.wrap("list.index(x): x not in list"))
+    return space.wrap(i)
 
 def list_count__List_ANY(space, w_list, w_any):
     # needs to be safe against eq_w() mutating the w_list behind our back
     count = 0
     i = 0
-    items = w_list.wrappeditems
-    while i < len(items):
-        if space.eq_w(items[i], w_any):
-            count += 1
-        i += 1
+    while True:
+        try:
+            i = w_list.find(w_any, i) + 1
+        except ValueError:
+            break
+        count += 1
     return space.wrap(count)
 
 def list_reverse__List(space, w_list):
-    w_list.wrappeditems.reverse()
+    w_list.reverse()
     return space.w_None
 
 # ____________________________________________________________
@@ -465,18 +1053,23 @@ def list_sort__List_ANY_ANY_ANY(space, w_list, w_cmp, w_keyfunc, w_reverse):
     has_key = not space.is_w(w_keyfunc, space.w_None)
     has_reverse = space.is_true(w_reverse)
 
+    # lists of unwrapped items can be sorted without calling app-level code
+    if not has_cmp and not has_key:
+        if w_list.sort(has_reverse):
+            return space.w_None
+
     # create and setup a TimSort instance
-    if has_cmp: 
-        if has_key: 
+    if has_cmp:
+        if has_key:
             sorterclass = CustomKeyCompareSort
-        else: 
+        else:
             sorterclass = CustomCompareSort
-    else: 
-        if has_key: 
+    else:
+        if has_key:
             sorterclass = CustomKeySort
-        else: 
+        else:
             sorterclass = SimpleSort
-    items = w_list.wrappeditems
+    items = w_list.getitems()
     sorter = sorterclass(items, len(items))
     sorter.space = space
     sorter.w_cmp = w_cmp
@@ -485,8 +1078,8 @@ def list_sort__List_ANY_ANY_ANY(space, w_list, w_cmp, w_keyfunc, w_reverse):
         # The list is temporarily made empty, so that mutations performed
         # by comparison functions can't affect the slice of memory we're
         # sorting (allowing mutations during sorting is an IndexError or
-        # core-dump factory, since wrappeditems may change).
-        w_list.wrappeditems = []
+        # core-dump factory, since the storage of the list may change).
+        w_list.clear()
 
         # wrap each item in a KeyContainer if needed
         if has_key:
@@ -516,10 +1109,10 @@ def list_sort__List_ANY_ANY_ANY(space, w_list, w_cmp, w_keyfunc, w_reverse):
                     sorter.list[i] = w_obj.w_item
 
         # check if the user mucked with the list during the sort
-        mucked = len(w_list.wrappeditems) > 0
+        mucked = w_list.length() > 0
 
         # put the items back into the list
-        w_list.wrappeditems = sorter.list
+        w_list.init_from_list_w(space, sorter.list)
 
     if mucked:
         raise OperationError(space.w_ValueError,
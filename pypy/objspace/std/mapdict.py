@@ -0,0 +1,470 @@
+""" Maps (also called hidden classes) for the instances of user-defined
+classes.  All the instances that got the same attributes in the same order
+share one map, which knows at which position of the 'storage' list of the
+instance each attribute is stored.  Together with the JIT, reading an
+attribute becomes a guard on the map of the instance and a list read.
+
+The map takes care of the attributes of the __dict__, of the __slots__ and
+of the weakref lifeline of the instance, and the terminator of the chain of
+maps stores the class of the instance."""
+
+from pypy.rlib import jit
+from pypy.rlib.objectmodel import r_dict
+from pypy.rlib.debug import make_sure_not_resized
+from pypy.interpreter.error import OperationError
+from pypy.objspace.std.dictmultiobject import W_DictMultiObject
+from pypy.objspace.std.dictmultiobject import DictStrategy, ObjectDictStrategy
+from pypy.objspace.std.dictmultiobject import IteratorImplementation
+from pypy.objspace.std.dictmultiobject import _is_sane_hash
+
+# the second item of the selectors, which tells what kind of attribute
+# it is: attributes of the __dict__, special attributes ("dict" and
+# "weakref") and slots, which use SLOTS_STARTING_FROM + their index
+DICT = 0
+SPECIAL = 1
+SLOTS_STARTING_FROM = 2
+
+NUM_DIGITS = 4
+
+# ____________________________________________________________
+# attribute shapes
+
+class AbstractAttribute(object):
+    _immutable_fields_ = ['terminator']
+    cache_attrs = None
+    _size_estimate = 0
+
+    def __init__(self, space, terminator):
+        self.space = space
+        assert isinstance(terminator, Terminator)
+        self.terminator = terminator
+
+    def read(self, obj, selector):
+        index = self.index(selector)
+        if index == -1:
+            return self.terminator._read_terminator(obj, selector)
+        return obj._mapdict_read_storage(index)
+
+    def write(self, obj, selector, w_value):
+        index = self.index(selector)
+        if index == -1:
+            return self.terminator._write_terminator(obj, selector, w_value)
+        obj._mapdict_write_storage(index, w_value)
+        return True
+
+    def delete(self, obj, selector):
+        """Remove the attribute from obj.  Returns False if it was not
+        there."""
+        if self.index(selector) == -1:
+            return self.terminator._delete_terminator(obj, selector)
+        self.rebuild(obj, self.terminator, True, selector[0], selector[1])
+        return True
+
+    def index(self, selector):
+        if jit.we_are_jitted():
+            # the map is a constant for the jit (it is promoted when it is
+            # read from the object), but the selector is a new tuple every
+            # time: pass its items to a pure function separately
+            return self._index_jit_pure(selector[0], selector[1])
+        return self._index(selector)
+
+    @jit.purefunction
+    def _index_jit_pure(self, name, index):
+        return self._index((name, index))
+
+    def _index(self, selector):
+        attr = self
+        while isinstance(attr, PlainAttribute):
+            if (attr.selector[1] == selector[1] and
+                    attr.selector[0] == selector[0]):
+                return attr.position
+            attr = attr.back
+        return -1
+
+    def length(self):
+        raise NotImplementedError("abstract base class")
+
+    def size_estimate(self):
+        return self._size_estimate >> NUM_DIGITS
+
+    def search(self, attrtype):
+        """Return the most recent attribute of the given kind, or None."""
+        return None
+
+    @jit.purefunction
+    def _get_new_attr(self, name, index):
+        selector = name, index
+        cache = self.cache_attrs
+        if cache is None:
+            cache = self.cache_attrs = {}
+        attr = cache.get(selector, None)
+        if attr is None:
+            attr = PlainAttribute(selector, self)
+            cache[selector] = attr
+        return attr
+
+    @jit.unroll_safe
+    def add_attr(self, obj, selector, w_value):
+        attr = self._get_new_attr(selector[0], selector[1])
+        if not jit.we_are_jitted():
+            # the size estimate of a map is a moving average of the number
+            # of attributes that the instances with this map end up with
+            self._size_estimate += attr.size_estimate() - self.size_estimate()
+            assert self._size_estimate >= 0
+        if attr.length() > obj._mapdict_storage_length():
+            # note that attr.size_estimate() is always at least attr.length()
+            new_storage = [None] * attr.size_estimate()
+            for i in range(obj._mapdict_storage_length()):
+                new_storage[i] = obj._mapdict_read_storage(i)
+            obj._set_mapdict_storage_and_map(new_storage, attr)
+        else:
+            obj._set_mapdict_map(attr)
+        obj._mapdict_write_storage(attr.position, w_value)
+
+    def rebuild(self, obj, terminator, keep_dict_attributes,
+                removed_name=None, removed_index=-1):
+        """Give obj a new chain of maps, starting from 'terminator', with
+        the same attributes as now, apart from the removed one and (if
+        keep_dict_attributes is False) the attributes of the __dict__."""
+        attrs = []
+        attr = self
+        while isinstance(attr, PlainAttribute):
+            attrs.append(attr)
+            attr = attr.back
+        values_w = [obj._mapdict_read_storage(attr.position)
+                        for attr in attrs]
+        obj._init_empty(terminator)
+        i = len(attrs) - 1
+        while i >= 0:
+            attr = attrs[i]
+            name, index = attr.selector
+            if index == DICT and not keep_dict_attributes:
+                pass
+            elif index == removed_index and name == removed_name:
+                pass
+            else:
+                obj._get_mapdict_map().add_attr(obj, attr.selector,
+                                                values_w[i])
+            i -= 1
+
+    def __repr__(self):
+        return "<%s>" % (self.__class__.__name__,)
+
+
+class Terminator(AbstractAttribute):
+    _immutable_fields_ = ['w_cls']
+    has_dict = False
+
+    def __init__(self, space, w_cls):
+        AbstractAttribute.__init__(self, space, self)
+        self.w_cls = w_cls
+
+    def _read_terminator(self, obj, selector):
+        return None
+
+    def _write_terminator(self, obj, selector, w_value):
+        obj._get_mapdict_map().add_attr(obj, selector, w_value)
+        return True
+
+    def _delete_terminator(self, obj, selector):
+        return False
+
+    def length(self):
+        return 0
+
+    def get_terminator_for_class(self, w_cls):
+        return w_cls.terminator
+
+    def __repr__(self):
+        return "<%s w_cls=%s>" % (self.__class__.__name__, self.w_cls)
+
+class DictTerminator(Terminator):
+    """The terminator of the instances that have a __dict__."""
+    has_dict = True
+
+    def __init__(self, space, w_cls):
+        Terminator.__init__(self, space, w_cls)
+        self.devolved_dict_terminator = DevolvedDictTerminator(space, w_cls)
+
+class NoDictTerminator(Terminator):
+    """The terminator of the instances that only have __slots__."""
+
+    def _write_terminator(self, obj, selector, w_value):
+        if selector[1] == DICT:
+            return False
+        return Terminator._write_terminator(self, obj, selector, w_value)
+
+class DevolvedDictTerminator(Terminator):
+    """The terminator of the instances whose __dict__ stopped using the
+    map: the attributes of the __dict__ are then stored in the dict, which
+    is itself stored with the special selector ("dict", SPECIAL)."""
+    has_dict = True
+
+    def _read_terminator(self, obj, selector):
+        if selector[1] == DICT:
+            return self.space.finditem_str(obj.getdict(), selector[0])
+        return Terminator._read_terminator(self, obj, selector)
+
+    def _write_terminator(self, obj, selector, w_value):
+        if selector[1] == DICT:
+            self.space.setitem_str(obj.getdict(), selector[0], w_value)
+            return True
+        return Terminator._write_terminator(self, obj, selector, w_value)
+
+    def _delete_terminator(self, obj, selector):
+        if selector[1] == DICT:
+            space = self.space
+            try:
+                space.delitem(obj.getdict(), space.wrap(selector[0]))
+            except OperationError, ex:
+                if not ex.match(space, space.w_KeyError):
+                    raise
+                return False
+            return True
+        return Terminator._delete_terminator(self, obj, selector)
+
+    def get_terminator_for_class(self, w_cls):
+        terminator = w_cls.terminator
+        assert isinstance(terminator, DictTerminator)
+        return terminator.devolved_dict_terminator
+
+class PlainAttribute(AbstractAttribute):
+    _immutable_fields_ = ['selector', 'position', 'back']
+
+    def __init__(self, selector, back):
+        AbstractAttribute.__init__(self, back.space, back.terminator)
+        self.selector = selector
+        self.position = back.length()
+        self.back = back
+        self._size_estimate = self.length() << NUM_DIGITS
+
+    def length(self):
+        return self.position + 1
+
+    def search(self, attrtype):
+        if self.selector[1] == attrtype:
+            return self
+        return self.back.search(attrtype)
+
+    def __repr__(self):
+        return "<PlainAttribute %s %s %r>" % (self.selector, self.position,
+                                              self.back)
+
+# ____________________________________________________________
+# object implementation
+
+class BaseMapdictObject(object):
+    """The methods of the user subclasses of 'object' that store their
+    attributes with a map.  See interpreter/typedef.py."""
+    _mixin_ = True
+
+    def _init_empty(self, map):
+        raise NotImplementedError("abstract base class")
+
+    def _get_mapdict_map(self):
+        return jit.hint(self.map, promote=True)
+
+    def _set_mapdict_map(self, map):
+        self.map = map
+
+    # _____________________________________________
+    # objspace interface
+
+    def getdictvalue(self, space, attrname):
+        return self._get_mapdict_map().read(self, (attrname, DICT))
+
+    def setdictvalue(self, space, attrname, w_value, shadows_type=True):
+        return self._get_mapdict_map().write(self, (attrname, DICT), w_value)
+
+    def deldictvalue(self, space, w_name):
+        attrname = space.str_w(w_name)
+        return self._get_mapdict_map().delete(self, (attrname, DICT))
+
+    def getdict(self):
+        map = self._get_mapdict_map()
+        if not map.terminator.has_dict:
+            return None
+        w_dict = map.read(self, ("dict", SPECIAL))
+        if w_dict is not None:
+            assert isinstance(w_dict, W_DictMultiObject)
+            return w_dict
+        space = self.space
+        w_dict = W_DictMultiObject(space, space.fromcache(MapDictStrategy))
+        w_dict.w_obj = self
+        flag = map.write(self, ("dict", SPECIAL), w_dict)
+        assert flag
+        return w_dict
+
+    def setdict(self, space, w_dict):
+        from pypy.interpreter.typedef import check_new_dictionary
+        w_dict = check_new_dictionary(space, w_dict)
+        w_olddict = self.getdict()
+        assert w_olddict is not None
+        if isinstance(w_olddict.strategy, MapDictStrategy):
+            # move the attributes to the old dict, which must stay valid
+            w_olddict.switch_to_object_strategy()
+        flag = self._get_mapdict_map().write(self, ("dict", SPECIAL), w_dict)
+        assert flag
+
+    def getclass(self, space):
+        return self._get_mapdict_map().terminator.w_cls
+
+    def setclass(self, space, w_cls):
+        map = self._get_mapdict_map()
+        terminator = map.terminator.get_terminator_for_class(w_cls)
+        map.rebuild(self, terminator, True)
+
+    def user_setup(self, space, w_subtype):
+        self.space = space
+        assert not self.typedef.hasdict
+        self._init_empty(w_subtype.terminator)
+
+    def getslotvalue(self, index):
+        key = ("slot", SLOTS_STARTING_FROM + index)
+        return self._get_mapdict_map().read(self, key)
+
+    def setslotvalue(self, index, w_value):
+        key = ("slot", SLOTS_STARTING_FROM + index)
+        self._get_mapdict_map().write(self, key, w_value)
+
+    # used by _weakref implemenation
+
+    def getweakref(self):
+        from pypy.module._weakref.interp__weakref import WeakrefLifeline
+        lifeline = self._get_mapdict_map().read(self, ("weakref", SPECIAL))
+        if lifeline is None:
+            return None
+        assert isinstance(lifeline, WeakrefLifeline)
+        return lifeline
+
+    def setweakref(self, space, weakreflifeline):
+        from pypy.module._weakref.interp__weakref import WeakrefLifeline
+        assert isinstance(weakreflifeline, WeakrefLifeline)
+        self._get_mapdict_map().write(self, ("weakref", SPECIAL),
+                                      weakreflifeline)
+
+class ObjectMixin(object):
+    """The storage of the attributes: a list, whose length is estimated
+    by the map."""
+    _mixin_ = True
+
+    def _init_empty(self, map):
+        self.map = map
+        self.storage = make_sure_not_resized([None] * map.size_estimate())
+
+    def _mapdict_read_storage(self, index):
+        return self.storage[index]
+
+    def _mapdict_write_storage(self, index, value):
+        self.storage[index] = value
+
+    def _mapdict_storage_length(self):
+        return len(self.storage)
+
+    def _set_mapdict_storage_and_map(self, storage, map):
+        self.storage = storage
+        self.map = map
+
+# ____________________________________________________________
+# dict implementation
+
+class MapDictStrategy(DictStrategy):
+    """The strategy of the __dict__ of an instance that uses a map: the
+    attributes stay stored in the instance w_dict.w_obj."""
+
+    def init_storage(self, w_dict):
+        w_dict.w_obj = None
+
+    def getitem(self, w_dict, w_lookup):
+        space = self.space
+        w_lookup_type = space.type(w_lookup)
+        if space.is_w(w_lookup_type, space.w_str):
+            return self.getitem_str(w_dict, space.str_w(w_lookup))
+        elif _is_sane_hash(space, w_lookup_type):
+            return None
+        else:
+            self.switch_to_object_strategy(w_dict)
+            return w_dict.getitem(w_lookup)
+
+    def getitem_str(self, w_dict, key):
+        return w_dict.w_obj.getdictvalue(self.space, key)
+
+    def setitem_str(self, w_dict, key, w_value, shadows_type=True):
+        flag = w_dict.w_obj.setdictvalue(self.space, key, w_value,
+                                         shadows_type)
+        assert flag
+
+    def setitem(self, w_dict, w_key, w_value):
+        space = self.space
+        if space.is_w(space.type(w_key), space.w_str):
+            self.setitem_str(w_dict, space.str_w(w_key), w_value)
+        else:
+            self.switch_to_object_strategy(w_dict)
+            w_dict.setitem(w_key, w_value)
+
+    def delitem(self, w_dict, w_key):
+        space = self.space
+        w_key_type = space.type(w_key)
+        if space.is_w(w_key_type, space.w_str):
+            flag = w_dict.w_obj.deldictvalue(space, w_key)
+            if not flag:
+                raise KeyError
+        elif _is_sane_hash(space, w_key_type):
+            raise KeyError
+        else:
+            self.switch_to_object_strategy(w_dict)
+            w_dict.delitem(w_key)
+
+    def length(self, w_dict):
+        res = 0
+        curr = w_dict.w_obj._get_mapdict_map().search(DICT)
+        while curr is not None:
+            curr = curr.back.search(DICT)
+            res += 1
+        return res
+
+    def iter(self, w_dict):
+        return MapDictIteratorImplementation(self.space, w_dict)
+
+    def clear(self, w_dict):
+        w_obj = w_dict.w_obj
+        map = w_obj._get_mapdict_map()
+        map.rebuild(w_obj, map.terminator, False)
+
+    def switch_to_object_strategy(self, w_dict):
+        space = self.space
+        w_obj = w_dict.w_obj
+        map = w_obj._get_mapdict_map()
+        terminator = map.terminator
+        assert isinstance(terminator, DictTerminator)
+        r_dict_content = r_dict(space.eq_w, space.hash_w)
+        curr = map.search(DICT)
+        while curr is not None:
+            w_value = w_obj._mapdict_read_storage(curr.position)
+            r_dict_content[space.wrap(curr.selector[0])] = w_value
+            curr = curr.back.search(DICT)
+        w_dict.strategy = space.fromcache(ObjectDictStrategy)
+        w_dict.r_dict_content = r_dict_content
+        w_dict.w_obj = None
+        # from now on the attributes of the __dict__ are looked up in the
+        # dict, which stays stored in the instance
+        map.rebuild(w_obj, terminator.devolved_dict_terminator, False)
+
+class MapDictIteratorImplementation(IteratorImplementation):
+    def __init__(self, space, dictimplementation):
+        IteratorImplementation.__init__(self, space, dictimplementation)
+        w_obj = dictimplementation.w_obj
+        self.w_obj = w_obj
+        self.orig_map = self.curr_map = w_obj._get_mapdict_map()
+
+    def next_entry(self):
+        if self.orig_map is not self.w_obj._get_mapdict_map():
+            return None, None
+        if self.curr_map is not None:
+            curr_map = self.curr_map.search(DICT)
+            if curr_map is not None:
+                self.curr_map = curr_map.back
+                attr = curr_map.selector[0]
+                w_attr = self.space.wrap(attr)
+                return w_attr, self.w_obj.getdictvalue(self.space, attr)
+        return None, None
@@ -213,8 +213,10 @@ class StdObjSpace(ObjSpace, DescrOperation):
             return res
 
         if isinstance(x, frozenset):
-            wrappeditems = [self.wrap(item) for item in x]
-            return W_FrozensetObject(self, wrappeditems)
+            rdict_w = r_dict(self.eq_w, self.hash_w)
+            for item in x:
+                rdict_w[self.wrap(item)] = None
+            return W_FrozensetObject(self, rdict_w)
 
         if x is __builtin__.Ellipsis:
             # '__builtin__.Ellipsis' avoids confusion with special.Ellipsis
@@ -269,7 +271,7 @@ class StdObjSpace(ObjSpace, DescrOperation):
         return W_TupleObject(list_w)
 
     def newlist(self, list_w):
-        return W_ListObject(list_w)
+        return W_ListObject(self, list_w)
 
     def newdict(self, module=False, instance=False, classofinstance=None,
                 from_strdict_shared=None, strdict=False):
@@ -343,7 +345,7 @@ class StdObjSpace(ObjSpace, DescrOperation):
         if isinstance(w_obj, W_TupleObject):
             t = w_obj.wrappeditems[:]
         elif isinstance(w_obj, W_ListObject):
-            t = w_obj.wrappeditems[:]
+            t = w_obj.getitems_copy()
         else:
             return ObjSpace.unpackiterable(self, w_obj, expected_length)
         if expected_length != -1 and len(t) != expected_length:
@@ -356,7 +358,7 @@ class StdObjSpace(ObjSpace, DescrOperation):
         if isinstance(w_obj, W_TupleObject):
             t = w_obj.wrappeditems
         elif isinstance(w_obj, W_ListObject):
-            t = w_obj.wrappeditems[:]
+            t = w_obj.getitems_fixedsize()
         else:
             return ObjSpace.fixedview(self, w_obj, expected_length)
         if expected_length != -1 and len(t) != expected_length:
@@ -365,7 +367,7 @@ class StdObjSpace(ObjSpace, DescrOperation):
 
     def listview(self, w_obj, expected_length=-1):
         if isinstance(w_obj, W_ListObject):
-            t = w_obj.wrappeditems
+            t = w_obj.getitems()
         elif isinstance(w_obj, W_TupleObject):
             t = w_obj.wrappeditems[:]
         else:
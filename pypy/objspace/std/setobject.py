@@ -7,10 +7,19 @@ from pypy.interpreter import gateway
 from pypy.interpreter.argument import Signature
 from pypy.objspace.std.settype import set_typedef as settypedef
 from pypy.objspace.std.frozensettype import frozenset_typedef as frozensettypedef
+from pypy.objspace.std.inttype import wrapint
+from pypy.objspace.std.intobject import W_IntObject
+from pypy.objspace.std.dictmultiobject import _is_sane_hash, _never_equal_to_int
 
 class W_BaseSetObject(W_Object):
     typedef = None
 
+    # The keys are stored in one of the following fields, depending on the
+    # strategy of the set; the fields of the other strategies are None.
+    setdata = None      # r_dict of wrapped keys (ObjectSetStrategy)
+    intdata = None      # dict {int: None} (IntegerSetStrategy)
+    strdata = None      # dict {str: None} (StringSetStrategy)
+
     # make sure that Base is used for Set and Frozenset in multimethod
     # declarations
     @classmethod
@@ -22,25 +31,32 @@ class W_BaseSetObject(W_Object):
 
 
     def __init__(w_self, space, setdata=None):
+        """Initialize the set with a copy of 'setdata', an r_dict of
+        wrapped keys, if given."""
         if setdata is None:
-            w_self.setdata = r_dict(space.eq_w, space.hash_w)
-        else:
+            w_self.init_from_list_w(space, [])
+        elif not space.config.objspace.std.withsetstrategies:
+            w_self.strategy = space.fromcache(ObjectSetStrategy)
             w_self.setdata = setdata.copy()
+        else:
+            w_self.init_from_list_w(space, setdata.keys())
 
     def __repr__(w_self):
         """representation for debugging purposes"""
-        reprlist = [repr(w_item) for w_item in w_self.setdata.keys()]
+        reprlist = [repr(w_item) for w_item in w_self.getkeys()]
         return "<%s(%s)>" % (w_self.__class__.__name__, ', '.join(reprlist))
 
-    def _newobj(w_self, space, rdict_w=None):
-        #return space.call(space.type(w_self),W_SetIterObject(rdict_w))
+    def _newobj(w_self, space, w_set):
+        """Turn w_set, a new W_SetObject holding the result of an
+        operation, into a set of the same type as w_self."""
         objtype = type(w_self)
         if objtype is W_SetObject:
-            obj = W_SetObject(space, rdict_w)
+            obj = w_set
         elif objtype is W_FrozensetObject:
-            obj = W_FrozensetObject(space, rdict_w)
+            obj = W_FrozensetObject(space, None)
+            obj.update(w_set)
         else:
-            itemiterator = space.iter(W_SetIterObject(rdict_w))
+            itemiterator = space.iter(W_SetIterObject(w_set))
             obj = space.call_function(space.type(w_self),itemiterator)
         return obj
 
@@ -50,6 +66,81 @@ class W_BaseSetObject(W_Object):
     def setweakref(self, space, weakreflifeline):
         self._lifeline_ = weakreflifeline
 
+    # ___________________________________________________
+    # strategy-related methods
+
+    def init_from_list_w(w_self, space, list_w):
+        w_self._clear_storage()
+        strategy = get_strategy_from_list_objects(space, list_w)
+        w_self.strategy = strategy
+        strategy.init_from_list_w(w_self, list_w)
+
+    def _clear_storage(w_self):
+        w_self.setdata = None
+        w_self.intdata = None
+        w_self.strdata = None
+
+    def switch_to_object_strategy(w_self, space):
+        """Store the keys wrapped from now on.  Does nothing if the set
+        already uses the ObjectSetStrategy."""
+        if isinstance(w_self.strategy, ObjectSetStrategy):
+            return
+        keys_w = w_self.getkeys()
+        w_self._clear_storage()
+        strategy = space.fromcache(ObjectSetStrategy)
+        w_self.strategy = strategy
+        strategy.init_from_list_w(w_self, keys_w)
+
+    def length(w_self):
+        return w_self.strategy.length(w_self)
+
+    def clear(w_self):
+        w_self.strategy.clear(w_self)
+
+    def copy(w_self):
+        """Returns a new W_SetObject with the same keys and strategy."""
+        return w_self.strategy.copy(w_self)
+
+    def getkeys(w_self):
+        """Returns a fresh list of the wrapped keys."""
+        return w_self.strategy.getkeys(w_self)
+
+    def add(w_self, w_key):
+        w_self.strategy.add(w_self, w_key)
+
+    def remove(w_self, w_key):
+        """Removes w_key from the set.  Returns False if it was not there."""
+        return w_self.strategy.remove(w_self, w_key)
+
+    def has_key(w_self, w_key):
+        return w_self.strategy.has_key(w_self, w_key)
+
+    def popitem(w_self):
+        return w_self.strategy.popitem(w_self)
+
+    def iter(w_self):
+        return w_self.strategy.iter(w_self)
+
+    def update(w_self, w_other):
+        """Adds all the keys of the set w_other."""
+        w_self.strategy.update(w_self, w_other)
+
+    def difference_update(w_self, w_other):
+        w_self.strategy.difference_update(w_self, w_other)
+
+    def intersection_update(w_self, w_other):
+        w_self.strategy.intersection_update(w_self, w_other)
+
+    def symmetric_difference_update(w_self, w_other):
+        w_self.strategy.symmetric_difference_update(w_self, w_other)
+
+    def issubset(w_self, w_other):
+        return w_self.strategy.issubset(w_self, w_other)
+
+    def equals(w_self, w_other):
+        return w_self.strategy.equals(w_self, w_other)
+
+
 class W_SetObject(W_BaseSetObject):
     from pypy.objspace.std.settype import set_typedef as typedef
 
@@ -64,20 +155,478 @@ registerimplementation(W_BaseSetObject)
 registerimplementation(W_SetObject)
 registerimplementation(W_FrozensetObject)
 
+
+def get_strategy_from_list_objects(space, list_w):
+    if not space.config.objspace.std.withsetstrategies:
+        return space.fromcache(ObjectSetStrategy)
+    if not list_w:
+        return space.fromcache(EmptySetStrategy)
+    strategy = space.fromcache(IntegerSetStrategy)
+    if strategy.is_correct_type_list(list_w):
+        return strategy
+    strategy = space.fromcache(StringSetStrategy)
+    if strategy.is_correct_type_list(list_w):
+        return strategy
+    return space.fromcache(ObjectSetStrategy)
+
+class SetStrategy(object):
+    """A strategy describes how the keys of a set are stored, like the
+    strategies of W_ListObject.  The methods of this base class implement
+    the set operations between sets of different strategies, in terms of
+    wrapped keys; the strategies override them with faster versions for
+    the case where both sets use the same strategy."""
+
+    def __init__(self, space):
+        self.space = space
+
+    def init_from_list_w(self, w_set, list_w):
+        raise NotImplementedError("abstract base class")
+
+    def length(self, w_set):
+        raise NotImplementedError("abstract base class")
+
+    def clear(self, w_set):
+        w_set.init_from_list_w(self.space, [])
+
+    def copy(self, w_set):
+        raise NotImplementedError("abstract base class")
+
+    def copy_into(self, w_set, w_other):
+        """Makes w_other, an empty set, a copy of w_set."""
+        raise NotImplementedError("abstract base class")
+
+    def getkeys(self, w_set):
+        raise NotImplementedError("abstract base class")
+
+    def add(self, w_set, w_key):
+        raise NotImplementedError("abstract base class")
+
+    def remove(self, w_set, w_key):
+        raise NotImplementedError("abstract base class")
+
+    def has_key(self, w_set, w_key):
+        raise NotImplementedError("abstract base class")
+
+    def popitem(self, w_set):
+        raise NotImplementedError("abstract base class")
+
+    def iter(self, w_set):
+        raise NotImplementedError("abstract base class")
+
+    def may_contain_equal_elements(self, strategy):
+        """Returns False if no key of a set with this strategy can be equal
+        to a key of a set with the given strategy."""
+        return True
+
+    def update(self, w_set, w_other):
+        for w_key in w_other.getkeys():
+            w_set.add(w_key)
+
+    def difference_update(self, w_set, w_other):
+        if not self.may_contain_equal_elements(w_other.strategy):
+            return
+        del_list_w = []
+        for w_key in w_set.getkeys():
+            if w_other.has_key(w_key):
+                del_list_w.append(w_key)
+        for w_key in del_list_w:
+            w_set.remove(w_key)
+
+    def intersection_update(self, w_set, w_other):
+        if not self.may_contain_equal_elements(w_other.strategy):
+            w_set.clear()
+            return
+        del_list_w = []
+        for w_key in w_set.getkeys():
+            if not w_other.has_key(w_key):
+                del_list_w.append(w_key)
+        for w_key in del_list_w:
+            w_set.remove(w_key)
+
+    def symmetric_difference_update(self, w_set, w_other):
+        del_list_w = []
+        add_list_w = []
+        if self.may_contain_equal_elements(w_other.strategy):
+            for w_key in w_set.getkeys():
+                if w_other.has_key(w_key):
+                    del_list_w.append(w_key)
+            for w_key in w_other.getkeys():
+                if not w_set.has_key(w_key):
+                    add_list_w.append(w_key)
+        else:
+            add_list_w = w_other.getkeys()
+        for w_key in del_list_w:
+            w_set.remove(w_key)
+        for w_key in add_list_w:
+            w_set.add(w_key)
+
+    def issubset(self, w_set, w_other):
+        if w_set.length() > w_other.length():
+            return False
+        if w_set.length() == 0:
+            return True
+        if not self.may_contain_equal_elements(w_other.strategy):
+            return False
+        for w_key in w_set.getkeys():
+            if not w_other.has_key(w_key):
+                return False
+        return True
+
+    def equals(self, w_set, w_other):
+        if w_set.length() != w_other.length():
+            return False
+        return w_set.issubset(w_other)
+
+
+class EmptySetStrategy(SetStrategy):
+
+    def init_from_list_w(self, w_set, list_w):
+        assert len(list_w) == 0
+
+    def length(self, w_set):
+        return 0
+
+    def clear(self, w_set):
+        pass
+
+    def copy(self, w_set):
+        return W_SetObject(self.space, None)
+
+    def getkeys(self, w_set):
+        return []
+
+    def add(self, w_set, w_key):
+        w_set.init_from_list_w(self.space, [w_key])
+
+    def remove(self, w_set, w_key):
+        # still compute the hash, to raise TypeError for unhashable keys
+        self.space.hash_w(w_key)
+        return False
+
+    def has_key(self, w_set, w_key):
+        self.space.hash_w(w_key)
+        return False
+
+    def popitem(self, w_set):
+        raise KeyError
+
+    def iter(self, w_set):
+        return EmptyIteratorImplementation()
+
+    def may_contain_equal_elements(self, strategy):
+        return False
+
+    def copy_into(self, w_set, w_other):
+        w_other.clear()
+
+    def update(self, w_set, w_other):
+        w_other.strategy.copy_into(w_other, w_set)
+
+    def intersection_update(self, w_set, w_other):
+        pass
+
+
+class AbstractUnwrappedSetStrategy(object):
+    """Common implementation of the strategies that store the keys in an
+    RPython dict, in one of the storage fields of W_BaseSetObject."""
+    _mixin_ = True
+
+    def wrap(self, unwrapped):
+        raise NotImplementedError
+
+    def unwrap(self, wrapped):
+        raise NotImplementedError
+
+    def is_correct_type(self, w_obj):
+        raise NotImplementedError
+
+    def get_storage(self, w_set):
+        raise NotImplementedError
+
+    def set_storage(self, w_set, storage):
+        raise NotImplementedError
+
+    def get_empty_storage(self):
+        raise NotImplementedError
+
+    def never_equal(self, w_key):
+        """Returns True if w_key, of the wrong type, can never be equal to
+        a key stored by this strategy."""
+        raise NotImplementedError
+
+    def is_correct_type_list(self, list_w):
+        for w_item in list_w:
+            if not self.is_correct_type(w_item):
+                return False
+        return True
+
+    def init_from_list_w(self, w_set, list_w):
+        d = self.get_empty_storage()
+        for w_item in list_w:
+            d[self.unwrap(w_item)] = None
+        self.set_storage(w_set, d)
+
+    def copy_into(self, w_set, w_other):
+        w_other._clear_storage()
+        w_other.strategy = self
+        self.set_storage(w_other, self.get_storage(w_set).copy())
+
+    def length(self, w_set):
+        return len(self.get_storage(w_set))
+
+    def copy(self, w_set):
+        w_result = W_SetObject(self.space, None)
+        self.copy_into(w_set, w_result)
+        return w_result
+
+    def getkeys(self, w_set):
+        return [self.wrap(key) for key in self.get_storage(w_set)]
+
+    def add(self, w_set, w_key):
+        if self.is_correct_type(w_key):
+            self.get_storage(w_set)[self.unwrap(w_key)] = None
+        else:
+            w_set.switch_to_object_strategy(self.space)
+            w_set.add(w_key)
+
+    def remove(self, w_set, w_key):
+        if self.is_correct_type(w_key):
+            try:
+                del self.get_storage(w_set)[self.unwrap(w_key)]
+            except KeyError:
+                return False
+            return True
+        elif self.never_equal(w_key):
+            return False
+        w_set.switch_to_object_strategy(self.space)
+        return w_set.remove(w_key)
+
+    def has_key(self, w_set, w_key):
+        if self.is_correct_type(w_key):
+            return self.unwrap(w_key) in self.get_storage(w_set)
+        elif self.never_equal(w_key):
+            return False
+        w_set.switch_to_object_strategy(self.space)
+        return w_set.has_key(w_key)
+
+    def popitem(self, w_set):
+        d = self.get_storage(w_set)
+        keys = d.keys()
+        key = keys[0]
+        del d[key]
+        return self.wrap(key)
+
+    def update(self, w_set, w_other):
+        if w_other.strategy is self:
+            self.get_storage(w_set).update(self.get_storage(w_other))
+        else:
+            SetStrategy.update(self, w_set, w_other)
+
+    def difference_update(self, w_set, w_other):
+        if w_other.strategy is self:
+            d = self.get_storage(w_set)
+            d_other = self.get_storage(w_other)
+            del_list = []
+            for key in d:
+                if key in d_other:
+                    del_list.append(key)
+            for key in del_list:
+                del d[key]
+        else:
+            SetStrategy.difference_update(self, w_set, w_other)
+
+    def intersection_update(self, w_set, w_other):
+        if w_other.strategy is self:
+            d = self.get_storage(w_set)
+            d_other = self.get_storage(w_other)
+            del_list = []
+            for key in d:
+                if key not in d_other:
+                    del_list.append(key)
+            for key in del_list:
+                del d[key]
+        else:
+            SetStrategy.intersection_update(self, w_set, w_other)
+
+    def symmetric_difference_update(self, w_set, w_other):
+        if w_other.strategy is self:
+            d = self.get_storage(w_set)
+            d_other = self.get_storage(w_other)
+            del_list = []
+            add_list = []
+            for key in d:
+                if key in d_other:
+                    del_list.append(key)
+            for key in d_other:
+                if key not in d:
+                    add_list.append(key)
+            for key in del_list:
+                del d[key]
+            for key in add_list:
+                d[key] = None
+        else:
+            SetStrategy.symmetric_difference_update(self, w_set, w_other)
+
+    def issubset(self, w_set, w_other):
+        if w_other.strategy is self:
+            d = self.get_storage(w_set)
+            d_other = self.get_storage(w_other)
+            if len(d) > len(d_other):
+                return False
+            for key in d:
+                if key not in d_other:
+                    return False
+            return True
+        else:
+            return SetStrategy.issubset(self, w_set, w_other)
+
+
+class ObjectSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
+
+    def wrap(self, w_obj):
+        return w_obj
+
+    def unwrap(self, w_obj):
+        return w_obj
+
+    def is_correct_type(self, w_obj):
+        return True
+
+    def never_equal(self, w_key):
+        return False
+
+    def get_storage(self, w_set):
+        return w_set.setdata
+
+    def set_storage(self, w_set, storage):
+        w_set.setdata = storage
+
+    def get_empty_storage(self):
+        return r_dict(self.space.eq_w, self.space.hash_w)
+
+    def getkeys(self, w_set):
+        return w_set.setdata.keys()
+
+    def iter(self, w_set):
+        return ObjectIteratorImplementation(w_set.setdata)
+
+
+class IntegerSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
+
+    def wrap(self, intval):
+        return wrapint(self.space, intval)
+
+    def unwrap(self, w_int):
+        assert isinstance(w_int, W_IntObject)
+        return w_int.intval
+
+    def is_correct_type(self, w_obj):
+        return type(w_obj) is W_IntObject
+
+    def never_equal(self, w_key):
+        return _never_equal_to_int(self.space, self.space.type(w_key))
+
+    def get_storage(self, w_set):
+        return w_set.intdata
+
+    def set_storage(self, w_set, storage):
+        w_set.intdata = storage
+
+    def get_empty_storage(self):
+        return {}
+
+    def may_contain_equal_elements(self, strategy):
+        return not isinstance(strategy, StringSetStrategy) and \
+               not isinstance(strategy, EmptySetStrategy)
+
+    def iter(self, w_set):
+        return IntegerIteratorImplementation(self.space, w_set.intdata)
+
+
+class StringSetStrategy(AbstractUnwrappedSetStrategy, SetStrategy):
+
+    def wrap(self, stringval):
+        return self.space.wrap(stringval)
+
+    def unwrap(self, w_str):
+        return self.space.str_w(w_str)
+
+    def is_correct_type(self, w_obj):
+        return type(w_obj) is self.space.StringObjectCls
+
+    def never_equal(self, w_key):
+        return _is_sane_hash(self.space, self.space.type(w_key))
+
+    def get_storage(self, w_set):
+        return w_set.strdata
+
+    def set_storage(self, w_set, storage):
+        w_set.strdata = storage
+
+    def get_empty_storage(self):
+        return {}
+
+    def may_contain_equal_elements(self, strategy):
+        return not isinstance(strategy, IntegerSetStrategy) and \
+               not isinstance(strategy, EmptySetStrategy)
+
+    def iter(self, w_set):
+        return StringIteratorImplementation(self.space, w_set.strdata)
+
+
+class SetIteratorImplementation(object):
+    def next_entry(self):
+        """Returns the next wrapped key, or None when exhausted."""
+        raise NotImplementedError("abstract base class")
+
+class EmptyIteratorImplementation(SetIteratorImplementation):
+    def next_entry(self):
+        return None
+
+class ObjectIteratorImplementation(SetIteratorImplementation):
+    def __init__(self, setdata):
+        self.iterator = setdata.iterkeys()
+
+    def next_entry(self):
+        for w_key in self.iterator:
+            return w_key
+        else:
+            return None
+
+class IntegerIteratorImplementation(SetIteratorImplementation):
+    def __init__(self, space, intdata):
+        self.space = space
+        self.iterator = intdata.iterkeys()
+
+    def next_entry(self):
+        for key in self.iterator:
+            return wrapint(self.space, key)
+        else:
+            return None
+
+class StringIteratorImplementation(SetIteratorImplementation):
+    def __init__(self, space, strdata):
+        self.space = space
+        self.iterator = strdata.iterkeys()
+
+    def next_entry(self):
+        for key in self.iterator:
+            return self.space.wrap(key)
+        else:
+            return None
+
+
 class W_SetIterObject(W_Object):
     from pypy.objspace.std.settype import setiter_typedef as typedef
 
-    def __init__(w_self, setdata):
-        w_self.content = content = setdata
-        w_self.len = len(content)
+    def __init__(w_self, w_set):
+        w_self.w_set = w_set
+        w_self.len = w_set.length()
         w_self.pos = 0
-        w_self.iterator = w_self.content.iterkeys()
+        w_self.iterimplementation = w_set.iter()
 
     def next_entry(w_self):
-        for w_key in w_self.iterator:
-            return w_key
-        else:
-            return None
+        return w_self.iterimplementation.next_entry()
 
 registerimplementation(W_SetIterObject)
 
@@ -85,9 +634,9 @@ def iter__SetIterObject(space, w_setiter):
     return w_setiter
 
 def next__SetIterObject(space, w_setiter):
-    content = w_setiter.content
-    if content is not None:
-        if w_setiter.len != len(content):
+    w_set = w_setiter.w_set
+    if w_set is not None:
+        if w_setiter.len != w_set.length():
             w_setiter.len = -1   # Make this error state sticky
             raise OperationError(space.w_RuntimeError,
                      space.wrap("Set changed size during iteration"))
@@ -97,136 +646,57 @@ def next__SetIterObject(space, w_setiter):
             w_setiter.pos += 1
             return w_result
         # no more entries
-        w_setiter.content = None
+        w_setiter.w_set = None
     raise OperationError(space.w_StopIteration, space.w_None)
 
 # XXX __length_hint__()
 ##def len__SetIterObject(space, w_setiter):
-##    content = w_setiter.content
-##    if content is None or w_setiter.len == -1:
+##    w_set = w_setiter.w_set
+##    if w_set is None or w_setiter.len == -1:
 ##        return space.wrap(0)
 ##    return space.wrap(w_setiter.len - w_setiter.pos)
 
 # some helper functions
 
-def make_setdata_from_w_iterable(space, w_iterable=None):
-    data = r_dict(space.eq_w, space.hash_w)
-    if w_iterable is not None:
-        for w_item in space.listview(w_iterable):
-            data[w_item] = None
-    return data
+def make_set_from_w_iterable(space, w_iterable=None):
+    w_set = W_SetObject(space, None)
+    _initialize_set(space, w_set, w_iterable)
+    return w_set
 
 def _initialize_set(space, w_obj, w_iterable=None):
-    w_obj.setdata.clear()
-    if w_iterable is not None:
-        w_obj.setdata.update(make_setdata_from_w_iterable(space, w_iterable))
+    w_obj.clear()
+    if w_iterable is None:
+        return
+    if isinstance(w_iterable, W_BaseSetObject):
+        w_obj.update(w_iterable)
+    else:
+        w_obj.init_from_list_w(space, space.listview(w_iterable))
 
 def _convert_set_to_frozenset(space, w_obj):
     if space.is_true(space.isinstance(w_obj, space.w_set)):
-        return W_FrozensetObject(space,
-                                 make_setdata_from_w_iterable(space, w_obj))
+        assert isinstance(w_obj, W_BaseSetObject)
+        w_frozen = W_FrozensetObject(space, None)
+        w_frozen.update(w_obj)
+        return w_frozen
     else:
         return None
 
-# helper functions for set operation on dicts
-
 def _is_frozenset_exact(w_obj):
     if (w_obj is not None) and (type(w_obj) is W_FrozensetObject):
         return True
     else:
         return False
 
-def _is_eq(ld, rd):
-    if len(ld) != len(rd):
-        return False
-    for w_key in ld:
-        if w_key not in rd:
-            return False
-    return True
-
-def _union_dict(ldict, rdict, isupdate):
-    if isupdate:
-        ld = ldict
-    else:
-        ld = ldict.copy()
-    ld.update(rdict)
-    return ld, rdict
-
-def _difference_dict(ldict, rdict, isupdate):
-    if isupdate:
-        ld = ldict
-    else:
-        ld = ldict.copy()
-    del_list_w = []
-    for w_key in ld:
-        if w_key in rdict:
-            del_list_w.append(w_key)
-    for w_key in del_list_w:
-        del ld[w_key]
-
-    return ld, rdict
-
-def _intersection_dict(ldict, rdict, isupdate):
-    if isupdate:
-        ld = ldict
-    else:
-        ld = ldict.copy()
-    del_list_w = []
-    for w_key in ld:
-        if w_key not in rdict:
-            del_list_w.append(w_key)
-
-    for w_key in del_list_w:
-        del ld[w_key]
-
-    return ld, rdict
-
-
-def _symmetric_difference_dict(ldict, rdict, isupdate):
-    if isupdate:
-        ld = ldict
-    else:
-        ld = ldict.copy()
-    del_list_w = []
-    add_list_w = []
-    for w_key in ld:
-        if w_key in rdict:
-            del_list_w.append(w_key)
-
-    for w_key in rdict:
-        if w_key not in ld:
-            add_list_w.append(w_key)
-
-    for w_key in del_list_w:
-        del ld[w_key]
-
-    for w_key in add_list_w:
-        ld[w_key] = None
-
-    return ld, rdict
-
-def _issubset_dict(ldict, rdict):
-    if len(ldict) > len(rdict):
-        return False
-
-    for w_key in ldict:
-        if w_key not in rdict:
-            return False
-    return True
-
-
 #end helper functions
 
 def set_update__Set_BaseSet(space, w_left, w_other):
     # optimization only (the general case works too)
-    ld, rd = w_left.setdata, w_other.setdata
-    new_ld, rd = _union_dict(ld, rd, True)
+    w_left.update(w_other)
     return space.w_None
 
 def set_update__Set_ANY(space, w_left, w_other):
     """Update a set with the union of itself and another."""
-    ld, rd = w_left.setdata, make_setdata_from_w_iterable(space, w_other)
-    new_ld, rd = _union_dict(ld, rd, True)
+    w_left.update(make_set_from_w_iterable(space, w_other))
     return space.w_None
 
 def inplace_or__Set_Set(space, w_left, w_other):
@@ -240,11 +710,11 @@ def set_add__Set_ANY(space, w_left, w_other):
 
     This has no effect if the element is already present.
     """
-    w_left.setdata[w_other] = None
+    w_left.add(w_other)
     return space.w_None
 
 def set_copy__Set(space, w_set):
-    return w_set._newobj(space,w_set.setdata)
+    return w_set._newobj(space, w_set.copy())
 
 def frozenset_copy__Frozenset(space, w_left):
     if _is_frozenset_exact(w_left):
@@ -253,14 +723,14 @@ def frozenset_copy__Frozenset(space, w_left):
         return set_copy__Set(space,w_left)
 
 def set_clear__Set(space, w_left):
-    w_left.setdata.clear()
+    w_left.clear()
     return space.w_None
 
 def set_difference__Set_Set(space, w_left, w_other):
     # optimization only (the general case works too)
-    ld, rd = w_left.setdata, w_other.setdata
-    new_ld, rd = _difference_dict(ld, rd, False)
-    return w_left._newobj(space, new_ld)
+    w_result = w_left.copy()
+    w_result.difference_update(w_other)
+    return w_left._newobj(space, w_result)
 
 set_difference__Set_Frozenset = set_difference__Set_Set
 frozenset_difference__Frozenset_Set = set_difference__Set_Set
@@ -271,24 +741,22 @@ sub__Frozenset_Set = set_difference__Set_Set
 sub__Frozenset_Frozenset = set_difference__Set_Set
 
 def set_difference__Set_ANY(space, w_left, w_other):
-    ld, rd = w_left.setdata, make_setdata_from_w_iterable(space, w_other)
-    new_ld, rd = _difference_dict(ld, rd, False)
-    return w_left._newobj(space, new_ld)
+    w_result = w_left.copy()
+    w_result.difference_update(make_set_from_w_iterable(space, w_other))
+    return w_left._newobj(space, w_result)
 
 frozenset_difference__Frozenset_ANY = set_difference__Set_ANY
 
 
 def set_difference_update__Set_Set(space, w_left, w_other):
     # optimization only (the general case works too)
-    ld, rd = w_left.setdata, w_other.setdata
-    new_ld, rd = _difference_dict(ld, rd, True)
+    w_left.difference_update(w_other)
     return space.w_None
 
 set_difference_update__Set_Frozenset = set_difference_update__Set_Set
 
 def set_difference_update__Set_ANY(space, w_left, w_other):
-    ld, rd = w_left.setdata, make_setdata_from_w_iterable(space, w_other)
-    new_ld, rd = _difference_dict(ld, rd, True)
+    w_left.difference_update(make_set_from_w_iterable(space, w_other))
     return space.w_None
 
 def inplace_sub__Set_Set(space, w_left, w_other):
@@ -299,15 +767,15 @@ inplace_sub__Set_Frozenset = inplace_sub__Set_Set
 
 def eq__Set_Set(space, w_left, w_other):
     # optimization only (the general case is eq__Set_settypedef)
-    return space.wrap(_is_eq(w_left.setdata, w_other.setdata))
+    return space.wrap(w_left.equals(w_other))
 
 eq__Set_Frozenset = eq__Set_Set
 eq__Frozenset_Frozenset = eq__Set_Set
 eq__Frozenset_Set = eq__Set_Set
 
 def eq__Set_settypedef(space, w_left, w_other):
-    rd = make_setdata_from_w_iterable(space, w_other)
-    return space.wrap(_is_eq(w_left.setdata, rd))
+    w_other_as_set = make_set_from_w_iterable(space, w_other)
+    return space.wrap(w_left.equals(w_other_as_set))
 
 eq__Set_frozensettypedef = eq__Set_settypedef
 eq__Frozenset_settypedef = eq__Set_settypedef
@@ -321,15 +789,15 @@ def eq__Set_ANY(space, w_left, w_other):
 eq__Frozenset_ANY = eq__Set_ANY
 
 def ne__Set_Set(space, w_left, w_other):
-    return space.wrap(not _is_eq(w_left.setdata, w_other.setdata))
+    return space.wrap(not w_left.equals(w_other))
 
 ne__Set_Frozenset = ne__Set_Set
 ne__Frozenset_Frozenset = ne__Set_Set
 ne__Frozenset_Set = ne__Set_Set
 
 def ne__Set_settypedef(space, w_left, w_other):
-    rd = make_setdata_from_w_iterable(space, w_other)
-    return space.wrap(_is_eq(w_left.setdata, rd))
+    w_other_as_set = make_set_from_w_iterable(space, w_other)
+    return space.wrap(w_left.equals(w_other_as_set))
 
 ne__Set_frozensettypedef = ne__Set_settypedef
 ne__Frozenset_settypedef = ne__Set_settypedef
@@ -344,12 +812,12 @@ ne__Frozenset_ANY = ne__Set_ANY
 
 def contains__Set_ANY(space, w_left, w_other):
     try:
-        return space.newbool(w_other in w_left.setdata)
+        return space.newbool(w_left.has_key(w_other))
     except OperationError, e:
         if e.match(space, space.w_TypeError):
             w_f = _convert_set_to_frozenset(space, w_other)
             if w_f is not None:
-                return space.newbool(w_f in w_left.setdata)
+                return space.newbool(w_left.has_key(w_f))
         raise
 
 contains__Frozenset_ANY = contains__Set_ANY
@@ -358,8 +826,7 @@ def set_issubset__Set_Set(space, w_left, w_other):
     # optimization only (the general case works too)
     if space.is_w(w_left, w_other):
         return space.w_True
-    ld, rd = w_left.setdata, w_other.setdata
-    return space.wrap(_issubset_dict(ld, rd))
+    return space.wrap(w_left.issubset(w_other))
 
 set_issubset__Set_Frozenset = set_issubset__Set_Set
 frozenset_issubset__Frozenset_Set = set_issubset__Set_Set
@@ -369,8 +836,8 @@ def set_issubset__Set_ANY(space, w_left, w_other):
     if space.is_w(w_left, w_other):
         return space.w_True
 
-    ld, rd = w_left.setdata, make_setdata_from_w_iterable(space, w_other)
-    return space.wrap(_issubset_dict(ld, rd))
+    w_other_as_set = make_set_from_w_iterable(space, w_other)
+    return space.wrap(w_left.issubset(w_other_as_set))
 
 frozenset_issubset__Frozenset_ANY = set_issubset__Set_ANY
 
@@ -384,8 +851,7 @@ def set_issuperset__Set_Set(space, w_left, w_other):
     if space.is_w(w_left, w_other):
         return space.w_True
 
-    ld, rd = w_left.setdata, w_other.setdata
-    return space.wrap(_issubset_dict(rd, ld))
+    return space.wrap(w_other.issubset(w_left))
 
 set_issuperset__Set_Frozenset = set_issuperset__Set_Set
 set_issuperset__Frozenset_Set = set_issuperset__Set_Set
@@ -395,8 +861,8 @@ def set_issuperset__Set_ANY(space, w_left, w_other):
     if space.is_w(w_left, w_other):
         return space.w_True
 
-    ld, rd = w_left.setdata, make_setdata_from_w_iterable(space, w_other)
-    return space.wrap(_issubset_dict(rd, ld))
+    w_other_as_set = make_set_from_w_iterable(space, w_other)
+    return space.wrap(w_other_as_set.issubset(w_left))
 
 frozenset_issuperset__Frozenset_ANY = set_issuperset__Set_ANY
 
@@ -408,7 +874,7 @@ ge__Frozenset_Frozenset = set_issuperset__Set_Set
 # automatic registration of "lt(x, y)" as "not ge(y, x)" would not give the
 # correct answer here!
 def lt__Set_Set(space, w_left, w_other):
-    if _is_eq(w_left.setdata, w_other.setdata):
+    if w_left.equals(w_other):
         return space.w_False
     else:
         return le__Set_Set(space, w_left, w_other)
@@ -418,7 +884,7 @@ lt__Frozenset_Set = lt__Set_Set
 lt__Frozenset_Frozenset = lt__Set_Set
 
 def gt__Set_Set(space, w_left, w_other):
-    if _is_eq(w_left.setdata, w_other.setdata):
+    if w_left.equals(w_other):
         return space.w_False
     else:
         return ge__Set_Set(space, w_left, w_other)
@@ -436,9 +902,8 @@ def _discard_from_set(space, w_left, w_item):
     wasn't there is returned.
     """
     try:
-        del w_left.setdata[w_item]
-        return None
-    except KeyError:
+        if w_left.remove(w_item):
+            return None
         return w_item
     except OperationError, e:
         if not e.match(space, space.w_TypeError):
@@ -448,9 +913,8 @@ def _discard_from_set(space, w_left, w_item):
             raise
         
     try:
-        del w_left.setdata[w_f]
-        return None
-    except KeyError:
+        if w_left.remove(w_f):
+            return None
         return w_f
     except OperationError, e:
         if not e.match(space, space.w_TypeError):
@@ -470,8 +934,8 @@ def hash__Frozenset(space, w_set):
     if w_set.hash != -1:
         return space.wrap(w_set.hash)
     hash = 1927868237
-    hash *= (len(w_set.setdata) + 1)
-    for w_item in w_set.setdata:
+    hash *= (w_set.length() + 1)
+    for w_item in w_set.getkeys():
         h = space.hash_w(w_item)
         value = ((h ^ (h << 16) ^ 89869747)  * multi)
         hash = intmask(hash ^ value)
@@ -484,29 +948,25 @@ def hash__Frozenset(space, w_set):
     return space.wrap(hash)
 
 def set_pop__Set(space, w_left):
-    if len(w_left.setdata) == 0:
+    if w_left.length() == 0:
         raise OperationError(space.w_KeyError,
                                 space.wrap('pop from an empty set'))
-    w_keys = w_left.setdata.keys()
-    w_value = w_keys[0]
-    del w_left.setdata[w_value]
-
-    return w_value
+    return w_left.popitem()
 
 def set_intersection__Set_Set(space, w_left, w_other):
     # optimization only (the general case works too)
-    ld, rd = w_left.setdata, w_other.setdata
-    new_ld, rd = _intersection_dict(ld, rd, False)
-    return w_left._newobj(space,new_ld)
+    w_result = w_left.copy()
+    w_result.intersection_update(w_other)
+    return w_left._newobj(space, w_result)
 
 set_intersection__Set_Frozenset = set_intersection__Set_Set
 set_intersection__Frozenset_Frozenset = set_intersection__Set_Set
 set_intersection__Frozenset_Set = set_intersection__Set_Set
 
 def set_intersection__Set_ANY(space, w_left, w_other):
-    ld, rd = w_left.setdata, make_setdata_from_w_iterable(space, w_other)
-    new_ld, rd = _intersection_dict(ld, rd, False)
-    return w_left._newobj(space,new_ld)
+    w_result = w_left.copy()
+    w_result.intersection_update(make_set_from_w_iterable(space, w_other))
+    return w_left._newobj(space, w_result)
 
 frozenset_intersection__Frozenset_ANY = set_intersection__Set_ANY
 
@@ -517,15 +977,13 @@ and__Frozenset_Frozenset = set_intersection__Set_Set
 
 def set_intersection_update__Set_Set(space, w_left, w_other):
     # optimization only (the general case works too)
-    ld, rd = w_left.setdata, w_other.setdata
-    new_ld, rd = _intersection_dict(ld, rd, True)
+    w_left.intersection_update(w_other)
     return space.w_None
 
 set_intersection_update__Set_Frozenset = set_intersection_update__Set_Set
 
 def set_intersection_update__Set_ANY(space, w_left, w_other):
-    ld, rd = w_left.setdata, make_setdata_from_w_iterable(space, w_other)
-    new_ld, rd = _intersection_dict(ld, rd, True)
+    w_left.intersection_update(make_set_from_w_iterable(space, w_other))
     return space.w_None
 
 def inplace_and__Set_Set(space, w_left, w_other):
@@ -536,9 +994,9 @@ inplace_and__Set_Frozenset = inplace_and__Set_Set
 
 def set_symmetric_difference__Set_Set(space, w_left, w_other):
     # optimization only (the general case works too)
-    ld, rd = w_left.setdata, w_other.setdata
-    new_ld, rd = _symmetric_difference_dict(ld, rd, False)
-    return w_left._newobj(space, new_ld)
+    w_result = w_left.copy()
+    w_result.symmetric_difference_update(w_other)
+    return w_left._newobj(space, w_result)
 
 set_symmetric_difference__Set_Frozenset = set_symmetric_difference__Set_Set
 set_symmetric_difference__Frozenset_Set = set_symmetric_difference__Set_Set
@@ -552,25 +1010,25 @@ xor__Frozenset_Frozenset = set_symmetric_difference__Set_Set
 
 
 def set_symmetric_difference__Set_ANY(space, w_left, w_other):
-    ld, rd = w_left.setdata, make_setdata_from_w_iterable(space, w_other)
-    new_ld, rd = _symmetric_difference_dict(ld, rd, False)
-    return w_left._newobj(space, new_ld)
+    w_result = w_left.copy()
+    w_result.symmetric_difference_update(
+        make_set_from_w_iterable(space, w_other))
+    return w_left._newobj(space, w_result)
 
 frozenset_symmetric_difference__Frozenset_ANY = \
         set_symmetric_difference__Set_ANY
 
 def set_symmetric_difference_update__Set_Set(space, w_left, w_other):
     # optimization only (the general case works too)
-    ld, rd = w_left.setdata, w_other.setdata
-    new_ld, rd = _symmetric_difference_dict(ld, rd, True)
+    w_left.symmetric_difference_update(w_other)
     return space.w_None
 
 set_symmetric_difference_update__Set_Frozenset = \
                                     set_symmetric_difference_update__Set_Set
 
 def set_symmetric_difference_update__Set_ANY(space, w_left, w_other):
-    ld, rd = w_left.setdata, make_setdata_from_w_iterable(space, w_other)
-    new_ld, rd = _symmetric_difference_dict(ld, rd, True)
+    w_left.symmetric_difference_update(
+        make_set_from_w_iterable(space, w_other))
     return space.w_None
 
 def inplace_xor__Set_Set(space, w_left, w_other):
@@ -581,9 +1039,9 @@ inplace_xor__Set_Frozenset = inplace_xor__Set_Set
 
 def set_union__Set_Set(space, w_left, w_other):
     # optimization only (the general case works too)
-    ld, rd = w_left.setdata, w_other.setdata
-    new_ld, rd = _union_dict(ld, rd, False)
-    return w_left._newobj(space, new_ld)
+    w_result = w_left.copy()
+    w_result.update(w_other)
+    return w_left._newobj(space, w_result)
 
 set_union__Set_Frozenset = set_union__Set_Set
 set_union__Frozenset_Set = set_union__Set_Set
@@ -595,19 +1053,19 @@ or__Frozenset_Frozenset = set_union__Set_Set
 
 
 def set_union__Set_ANY(space, w_left, w_other):
-    ld, rd = w_left.setdata, make_setdata_from_w_iterable(space, w_other)
-    new_ld, rd = _union_dict(ld, rd, False)
-    return w_left._newobj(space, new_ld)
+    w_result = w_left.copy()
+    w_result.update(make_set_from_w_iterable(space, w_other))
+    return w_left._newobj(space, w_result)
 
 frozenset_union__Frozenset_ANY = set_union__Set_ANY
 
 def len__Set(space, w_left):
-    return space.newint(len(w_left.setdata))
+    return space.newint(w_left.length())
 
 len__Frozenset = len__Set
 
 def iter__Set(space, w_left):
-    return W_SetIterObject(w_left.setdata)
+    return W_SetIterObject(w_left)
 
 iter__Frozenset = iter__Set
 
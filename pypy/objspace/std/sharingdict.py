@@ -1,5 +1,5 @@
 from pypy.objspace.std.dictmultiobject import IteratorImplementation
-from pypy.objspace.std.dictmultiobject import W_DictMultiObject, _is_sane_hash
+from pypy.objspace.std.dictmultiobject import DictStrategy, _is_sane_hash
 from pypy.rlib.jit import purefunction_promote, we_are_jitted, unroll_safe
 from pypy.rlib.jit import purefunction
 from pypy.rlib.rweakref import RWeakValueDictionary
@@ -56,116 +56,122 @@ class State(object):
         self.emptylist = []
 
 
-class SharedDictImplementation(W_DictMultiObject):
+class SharedDictStrategy(DictStrategy):
+    """The strategy for instance dicts: the keys and their positions are
+    stored in a SharedStructure that is shared between all the dicts with
+    the same keys, and the values in the list 'entries' of every dict."""
 
-    def __init__(self, space):
-        self.space = space
-        self.structure = space.fromcache(State).empty_structure
-        self.entries = space.fromcache(State).emptylist
+    def init_storage(self, w_dict):
+        w_dict.structure = self.space.fromcache(State).empty_structure
+        w_dict.entries = self.space.fromcache(State).emptylist
 
-    def impl_getitem(self, w_lookup):
+    def getitem(self, w_dict, w_lookup):
         space = self.space
         w_lookup_type = space.type(w_lookup)
         if space.is_w(w_lookup_type, space.w_str):
-            return self.impl_getitem_str(space.str_w(w_lookup))
+            return self.getitem_str(w_dict, space.str_w(w_lookup))
         elif _is_sane_hash(space, w_lookup_type):
             return None
         else:
-            return self._as_rdict().getitem(w_lookup)
+            self.switch_to_object_strategy(w_dict)
+            return w_dict.getitem(w_lookup)
 
-    def impl_getitem_str(self, lookup):
-        i = self.structure.lookup_position(lookup)
+    def getitem_str(self, w_dict, lookup):
+        i = w_dict.structure.lookup_position(lookup)
         if i == -1:
             return None
-        return self.entries[i]
+        return w_dict.entries[i]
 
-    def impl_setitem(self, w_key, w_value):
+    def setitem(self, w_dict, w_key, w_value):
         space = self.space
         if space.is_w(space.type(w_key), space.w_str):
-            self.impl_setitem_str(self.space.str_w(w_key), w_value)
+            self.setitem_str(w_dict, self.space.str_w(w_key), w_value)
         else:
-            self._as_rdict().setitem(w_key, w_value)
+            self.switch_to_object_strategy(w_dict)
+            w_dict.setitem(w_key, w_value)
 
     @unroll_safe
-    def impl_setitem_str(self, key, w_value, shadows_type=True):
-        i = self.structure.lookup_position(key)
+    def setitem_str(self, w_dict, key, w_value, shadows_type=True):
+        i = w_dict.structure.lookup_position(key)
         if i != -1:
-            self.entries[i] = w_value
+            w_dict.entries[i] = w_value
             return
-        new_structure = self.structure.get_next_structure(key)
-        if new_structure.length > len(self.entries):
+        new_structure = w_dict.structure.get_next_structure(key)
+        if new_structure.length > len(w_dict.entries):
             new_entries = [None] * new_structure.size_estimate()
-            for i in range(len(self.entries)):
-                new_entries[i] = self.entries[i]
-            self.entries = new_entries
-
-        self.entries[new_structure.length - 1] = w_value
-        assert self.structure.length + 1 == new_structure.length
-        self.structure = new_structure
-            
-    def impl_delitem(self, w_key):
+            for i in range(len(w_dict.entries)):
+                new_entries[i] = w_dict.entries[i]
+            w_dict.entries = new_entries
+
+        w_dict.entries[new_structure.length - 1] = w_value
+        assert w_dict.structure.length + 1 == new_structure.length
+        w_dict.structure = new_structure
+
+    def delitem(self, w_dict, w_key):
         space = self.space
         w_key_type = space.type(w_key)
         if space.is_w(w_key_type, space.w_str):
-            key = space.str_w(w_key)
-            pos = self.structure.lookup_position(key)
-            if pos == -1:
-                raise KeyError
-            struct_len = self.structure.length
-            num_back = struct_len - pos - 1
-
-            if num_back > 0:
-                for i in range(pos, struct_len - 1):
-                    self.entries[i] = self.entries[i + 1]
-            # don't make the entries list shorter, new keys might be added soon
-            self.entries[struct_len - 1] = None
-            structure = self.structure
-            keys = [None] * num_back
-            for i in range(num_back):
-                keys[i] = structure.last_key
-                structure = structure.back_struct
-            # go back the structure that contains the deleted key
-            structure = structure.back_struct
-            for i in range(num_back - 1, -1, -1):
-                structure = structure.get_next_structure(keys[i])
-            self.structure = structure
+            self.delitem_str(w_dict, space.str_w(w_key))
         elif _is_sane_hash(space, w_key_type):
             raise KeyError
         else:
-            self._as_rdict().delitem(w_key)
+            self.switch_to_object_strategy(w_dict)
+            w_dict.delitem(w_key)
+
+    def delitem_str(self, w_dict, key):
+        pos = w_dict.structure.lookup_position(key)
+        if pos == -1:
+            raise KeyError
+        struct_len = w_dict.structure.length
+        num_back = struct_len - pos - 1
+
+        if num_back > 0:
+            for i in range(pos, struct_len - 1):
+                w_dict.entries[i] = w_dict.entries[i + 1]
+        # don't make the entries list shorter, new keys might be added soon
+        w_dict.entries[struct_len - 1] = None
+        structure = w_dict.structure
+        keys = [None] * num_back
+        for i in range(num_back):
+            keys[i] = structure.last_key
+            structure = structure.back_struct
+        # go back the structure that contains the deleted key
+        structure = structure.back_struct
+        for i in range(num_back - 1, -1, -1):
+            structure = structure.get_next_structure(keys[i])
+        w_dict.structure = structure
         
-    def impl_length(self):
-        return self.structure.length
+    def length(self, w_dict):
+        return w_dict.structure.length
 
-    def impl_iter(self):
-        return SharedIteratorImplementation(self.space, self)
+    def iter(self, w_dict):
+        return SharedIteratorImplementation(self.space, w_dict)
 
-    def impl_keys(self):
+    def keys(self, w_dict):
         space = self.space
         return [space.wrap(key)
-                    for (key, item) in self.structure.keys.iteritems()]
+                    for (key, item) in w_dict.structure.keys.iteritems()]
 
-    def impl_values(self):
-        return self.entries[:self.structure.length]
+    def values(self, w_dict):
+        return w_dict.entries[:w_dict.structure.length]
 
-    def impl_items(self):
+    def items(self, w_dict):
         space = self.space
-        return [space.newtuple([space.wrap(key), self.entries[item]])
-                    for (key, item) in self.structure.keys.iteritems()]
-    def impl_clear(self):
+        return [space.newtuple([space.wrap(key), w_dict.entries[item]])
+                    for (key, item) in w_dict.structure.keys.iteritems()]
+
+    def str_items(self, w_dict):
+        return [(key, w_dict.entries[item])
+                    for (key, item) in w_dict.structure.keys.iteritems()]
+
+    def clear(self, w_dict):
         space = self.space
-        self.structure = space.fromcache(State).empty_structure
-        self.entries = space.fromcache(State).emptylist
-    def _as_rdict(self):
-        r_dict_content = self.initialize_as_rdict()
-        for k, i in self.structure.keys.items():
-            r_dict_content[self.space.wrap(k)] = self.entries[i]
-        self._clear_fields()
-        return self
-
-    def _clear_fields(self):
-        self.structure = None
-        self.entries = None
+        w_dict.structure = space.fromcache(State).empty_structure
+        w_dict.entries = space.fromcache(State).emptylist
+
+    def clear_fields(self, w_dict):
+        w_dict.structure = None
+        w_dict.entries = None
 
 class SharedIteratorImplementation(IteratorImplementation):
     def __init__(self, space, dictimplementation):
@@ -174,7 +180,6 @@ class SharedIteratorImplementation(IteratorImplementation):
 
     def next_entry(self):
         implementation = self.dictimplementation
-        assert isinstance(implementation, SharedDictImplementation)
         for key, index in self.iterator:
             w_value = implementation.entries[index]
             return self.space.wrap(key), w_value
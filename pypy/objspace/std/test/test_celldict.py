@@ -1,6 +1,7 @@
 import py
 from pypy.conftest import gettestobjspace, option
-from pypy.objspace.std.celldict import ModuleCell, ModuleDictImplementation
+from pypy.objspace.std.celldict import ModuleCell, ModuleDictStrategy
+from pypy.objspace.std.dictmultiobject import W_DictMultiObject
 from pypy.objspace.std.test.test_dictmultiobject import FakeSpace
 from pypy.interpreter import gateway
 
@@ -8,13 +9,14 @@ space = FakeSpace()
 
 class TestCellDict(object):
     def test_basic_property(self):
-        d = ModuleDictImplementation(space)
+        strategy = ModuleDictStrategy(space)
+        d = W_DictMultiObject(space, strategy)
         d.setitem("a", 1)
-        assert d.getcell("a", False) is d.getcell("a", False)
-        acell = d.getcell("a", False)
+        assert strategy.getcell(d, "a", False) is strategy.getcell(d, "a", False)
+        acell = strategy.getcell(d, "a", False)
         d.setitem("b", 2)
-        assert d.getcell("b", False) is d.getcell("b", False)
-        assert d.getcell("c", True) is d.getcell("c", True)
+        assert strategy.getcell(d, "b", False) is strategy.getcell(d, "b", False)
+        assert strategy.getcell(d, "c", True) is strategy.getcell(d, "c", True)
 
         assert d.getitem("a") == 1
         assert d.getitem("b") == 2
@@ -22,10 +24,10 @@ class TestCellDict(object):
         d.delitem("a")
         py.test.raises(KeyError, d.delitem, "a")
         assert d.getitem("a") is None
-        assert d.getcell("a", False) is acell
+        assert strategy.getcell(d, "a", False) is acell
         assert d.length() == 1
 
         d.clear()
         assert d.getitem("a") is None
-        assert d.getcell("a", False) is acell
+        assert strategy.getcell(d, "a", False) is acell
         assert d.length() == 0
@@ -1,10 +1,10 @@
 from pypy.interpreter.error import OperationError
 from pypy.objspace.std.dictmultiobject import \
      W_DictMultiObject, setitem__DictMulti_ANY_ANY, getitem__DictMulti_ANY, \
-     StrDictImplementation
+     StrDictStrategy, EmptyDictStrategy, ObjectDictStrategy, IntDictStrategy
 
-from pypy.objspace.std.celldict import ModuleDictImplementation
-from pypy.objspace.std.sharingdict import SharedDictImplementation
+from pypy.objspace.std.celldict import ModuleDictStrategy
+from pypy.objspace.std.sharingdict import SharedDictStrategy
 from pypy.conftest import gettestobjspace
 
 
@@ -542,7 +542,7 @@ class AppTestModuleDict(object):
         cls.w_impl_used = cls.space.appexec([], """():
             import __pypy__
             def impl_used(obj):
-                assert "ModuleDictImplementation" in __pypy__.internal_repr(obj)
+                assert "ModuleDictStrategy" in __pypy__.internal_repr(obj)
             return impl_used
         """)
 
@@ -655,7 +655,8 @@ class BaseTestRDictImplementation:
         self.impl = self.get_impl()
 
     def get_impl(self):
-        return self.ImplementionClass(self.fakespace)
+        return W_DictMultiObject(self.fakespace,
+                                 self.StrategyClass(self.fakespace))
 
     def fill_impl(self):
         self.impl.setitem(self.string, 1000)
@@ -663,6 +664,7 @@ class BaseTestRDictImplementation:
 
     def check_not_devolved(self):
         assert self.impl.r_dict_content is None
+        assert not isinstance(self.impl.strategy, ObjectDictStrategy)
 
     def test_setitem(self):
         self.impl.setitem(self.string, 1000)
@@ -727,9 +729,10 @@ class BaseTestRDictImplementation:
             impl.setitem(self.fakespace.str_w(str(x)), x)
             impl.setitem(x, x)
         assert impl.r_dict_content is not None
+        assert isinstance(impl.strategy, ObjectDictStrategy)
 
 class TestStrDictImplementation(BaseTestRDictImplementation):
-    ImplementionClass = StrDictImplementation
+    StrategyClass = StrDictStrategy
 
     def test_str_shortcut(self):
         self.fill_impl()
@@ -738,47 +741,126 @@ class TestStrDictImplementation(BaseTestRDictImplementation):
         assert s.unwrapped
 
 ## class TestMeasuringDictImplementation(BaseTestRDictImplementation):
-##     ImplementionClass = MeasuringDictImplementation
-##     DevolvedClass = MeasuringDictImplementation
+##     StrategyClass = MeasuringDictStrategy
+##     
 
 class TestModuleDictImplementation(BaseTestRDictImplementation):
-    ImplementionClass = ModuleDictImplementation
+    StrategyClass = ModuleDictStrategy
 
 class TestModuleDictImplementationWithBuiltinNames(BaseTestRDictImplementation):
-    ImplementionClass = ModuleDictImplementation
+    StrategyClass = ModuleDictStrategy
 
     string = "int"
     string2 = "isinstance"
 
 class TestSharedDictImplementation(BaseTestRDictImplementation):
-    ImplementionClass = SharedDictImplementation
+    StrategyClass = SharedDictStrategy
 
 
 class BaseTestDevolvedDictImplementation(BaseTestRDictImplementation):
     def fill_impl(self):
         BaseTestRDictImplementation.fill_impl(self)
-        self.impl._as_rdict()
+        self.impl.switch_to_object_strategy()
 
     def check_not_devolved(self):
         pass
 
 class TestDevolvedStrDictImplementation(BaseTestDevolvedDictImplementation):
-    ImplementionClass = StrDictImplementation
+    StrategyClass = StrDictStrategy
 
 class TestDevolvedModuleDictImplementation(BaseTestDevolvedDictImplementation):
-    ImplementionClass = ModuleDictImplementation
+    StrategyClass = ModuleDictStrategy
 
 class TestDevolvedModuleDictImplementationWithBuiltinNames(BaseTestDevolvedDictImplementation):
-    ImplementionClass = ModuleDictImplementation
+    StrategyClass = ModuleDictStrategy
 
     string = "int"
     string2 = "isinstance"
 
 class TestDevolvedSharedDictImplementation(BaseTestDevolvedDictImplementation):
-    ImplementionClass = SharedDictImplementation
+    StrategyClass = SharedDictStrategy
 
 def test_module_uses_strdict():
     fakespace = FakeSpace()
     d = fakespace.newdict(module=True)
-    assert isinstance(d, StrDictImplementation)
+    assert isinstance(d.strategy, StrDictStrategy)
 
+
+class TestEmptyDictStrategy:
+    def setup_method(self, method):
+        self.fakespace = FakeSpace()
+
+    def test_picks_strategy_on_first_setitem(self):
+        d = self.fakespace.newdict()
+        assert isinstance(d.strategy, EmptyDictStrategy)
+        assert d.length() == 0
+        assert d.getitem("a") is None
+        raises(KeyError, d.delitem, "a")
+        d.setitem("a", 1)
+        assert isinstance(d.strategy, StrDictStrategy)
+        assert d.content == {"a": 1}
+
+        d = self.fakespace.newdict()
+        d.setitem((1, 2), 1)
+        assert isinstance(d.strategy, ObjectDictStrategy)
+        assert d.getitem((1, 2)) == 1
+
+    def test_instance_dicts_start_empty(self):
+        d = self.fakespace.newdict(instance=True)
+        assert isinstance(d.strategy, EmptyDictStrategy)
+        d.setitem_str("a", 1)
+        assert isinstance(d.strategy, StrDictStrategy)
+        assert d.getitem_str("a") == 1
+
+class TestIntDictStrategy:
+    def setup_class(cls):
+        cls.space = gettestobjspace()
+
+    def test_int_keys(self):
+        space = self.space
+        w = space.wrap
+        w_d = space.newdict()
+        space.setitem(w_d, w(1), w("a"))
+        space.setitem(w_d, w(2), w("b"))
+        assert isinstance(w_d.strategy, IntDictStrategy)
+        assert w_d.intcontent.keys() == [1, 2]
+        assert space.eq_w(space.getitem(w_d, w(2)), w("b"))
+        assert space.finditem(w_d, w("a")) is None
+        assert space.finditem(w_d, w(None)) is None
+        assert isinstance(w_d.strategy, IntDictStrategy)
+
+    def test_switch_to_object(self):
+        space = self.space
+        w = space.wrap
+        w_d = space.newdict()
+        space.setitem(w_d, w(1), w("a"))
+        assert space.eq_w(space.getitem(w_d, w(1.0)), w("a"))
+        assert isinstance(w_d.strategy, ObjectDictStrategy)
+        assert w_d.intcontent is None
+        space.setitem(w_d, w("x"), w("b"))
+        assert space.int_w(space.len(w_d)) == 2
+
+class AppTestIntDictStrategy:
+    def test_int_keys(self):
+        d = {}
+        for i in range(10):
+            d[i] = i * 2
+        assert d[5] == 10
+        assert d.get(1.0) == 2
+        assert 11 not in d
+        assert "x" not in d
+        assert sorted(d.keys()) == range(10)
+        del d[3]
+        raises(KeyError, "del d[3]")
+        d["x"] = 3
+        assert len(d) == 10
+        assert d.pop(4) == 8
+
+    def test_empty(self):
+        d = {}
+        raises(TypeError, "d[[]]")
+        raises(KeyError, "d[1]")
+        assert d.items() == []
+        d.clear()
+        d[True] = 1
+        assert d[1] == 1
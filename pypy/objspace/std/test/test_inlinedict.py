@@ -1,16 +1,16 @@
 import py
 from pypy.conftest import gettestobjspace
 from pypy.objspace.std.inlinedict import make_inlinedict_mixin
-from pypy.objspace.std.dictmultiobject import StrDictImplementation
+from pypy.objspace.std.dictmultiobject import StrDictStrategy
 from pypy.objspace.std.test.test_dictmultiobject import FakeSpace
 from pypy.objspace.std.test.test_dictmultiobject import BaseTestRDictImplementation
-from pypy.objspace.std.sharingdict import SharedDictImplementation
+from pypy.objspace.std.sharingdict import SharedDictStrategy
 
 class FakeSubtype:
     nslots = 0
 
 class TestMixin(object):
-    Mixin = make_inlinedict_mixin(StrDictImplementation, "content")
+    Mixin = make_inlinedict_mixin(StrDictStrategy, "content")
     class FakeObject(Mixin):
         def user_setup_slots(self, nslots):
             pass
@@ -115,13 +115,13 @@ class TestMixin(object):
 
 
 class TestMixinShared(TestMixin):
-    Mixin = make_inlinedict_mixin(SharedDictImplementation, "structure")
+    Mixin = make_inlinedict_mixin(SharedDictStrategy, "structure")
     class FakeObject(Mixin):
         def user_setup_slots(self, nslots):
             pass
 
 class TestIndirectDict(BaseTestRDictImplementation):
-    Mixin = make_inlinedict_mixin(StrDictImplementation, "content")
+    Mixin = make_inlinedict_mixin(StrDictStrategy, "content")
     class FakeObject(Mixin):
         def user_setup_slots(self, nslots):
             pass
@@ -133,7 +133,7 @@ class TestIndirectDict(BaseTestRDictImplementation):
 
 
 class TestIndirectDictShared(TestIndirectDict):
-    Mixin = make_inlinedict_mixin(SharedDictImplementation, "structure")
+    Mixin = make_inlinedict_mixin(SharedDictStrategy, "structure")
     class FakeObject(Mixin):
         def user_setup_slots(self, nslots):
             pass
@@ -0,0 +1,235 @@
+from pypy.objspace.std.listobject import W_ListObject, EmptyListStrategy, \
+     ObjectListStrategy, IntegerListStrategy, FloatListStrategy, \
+     StringListStrategy
+from pypy.objspace.std.test.test_listobject import AppTestW_ListObject
+from pypy.conftest import gettestobjspace
+
+
+class TestW_ListStrategies(object):
+
+    def setup_class(cls):
+        cls.space = gettestobjspace(**{"objspace.std.withliststrategies": True})
+
+    def test_check_strategy(self):
+        space = self.space
+        w = space.wrap
+        assert isinstance(W_ListObject(space, []).strategy, EmptyListStrategy)
+        assert isinstance(W_ListObject(space, [w(1), w('a')]).strategy,
+                          ObjectListStrategy)
+        assert isinstance(W_ListObject(space, [w(1), w(2), w(3)]).strategy,
+                          IntegerListStrategy)
+        assert isinstance(W_ListObject(space, [w(1.5), w(2.5)]).strategy,
+                          FloatListStrategy)
+        assert isinstance(W_ListObject(space, [w('a'), w('b')]).strategy,
+                          StringListStrategy)
+        assert isinstance(W_ListObject(space, [w(1), w(2.5)]).strategy,
+                          ObjectListStrategy)
+        # bools are not unwrapped as integers
+        assert isinstance(W_ListObject(space, [w(1), w(True)]).strategy,
+                          ObjectListStrategy)
+
+    def test_storage(self):
+        space = self.space
+        w = space.wrap
+        l = W_ListObject(space, [w(1), w(2)])
+        assert l.intitems == [1, 2]
+        assert l.wrappeditems is None
+        l = W_ListObject(space, [w('a')])
+        assert l.stritems == ['a']
+        l = W_ListObject(space, [w(1.5)])
+        assert l.floatitems == [1.5]
+
+    def test_empty_to_any(self):
+        space = self.space
+        w = space.wrap
+        l = W_ListObject(space, [])
+        assert isinstance(l.strategy, EmptyListStrategy)
+        l.append(w((1,3)))
+        assert isinstance(l.strategy, ObjectListStrategy)
+
+        l = W_ListObject(space, [])
+        l.append(w(1))
+        assert isinstance(l.strategy, IntegerListStrategy)
+
+        l = W_ListObject(space, [])
+        l.append(w('a'))
+        assert isinstance(l.strategy, StringListStrategy)
+
+        l = W_ListObject(space, [])
+        l.append(w(1.2))
+        assert isinstance(l.strategy, FloatListStrategy)
+
+    def test_int_to_any(self):
+        space = self.space
+        w = space.wrap
+        l = W_ListObject(space, [w(1), w(2), w(3)])
+        assert isinstance(l.strategy, IntegerListStrategy)
+        l.append(w(4))
+        assert isinstance(l.strategy, IntegerListStrategy)
+        l.append(w('a'))
+        assert isinstance(l.strategy, ObjectListStrategy)
+        assert l.intitems is None
+        assert space.eq_w(l.getitem(3), w(4))
+        assert space.eq_w(l.getitem(4), w('a'))
+
+    def test_float_nan_stays_wrapped(self):
+        space = self.space
+        w = space.wrap
+        l = W_ListObject(space, [w(1.5)])
+        w_nan = w(float('nan'))
+        l.append(w_nan)
+        assert isinstance(l.strategy, ObjectListStrategy)
+        assert l.getitem(1) is w_nan
+
+    def test_setitem(self):
+        space = self.space
+        w = space.wrap
+        l = W_ListObject(space, [w(1), w(2), w(3)])
+        l.setitem(0, w(5))
+        assert isinstance(l.strategy, IntegerListStrategy)
+        assert l.intitems == [5, 2, 3]
+        l.setitem(0, w('b'))
+        assert isinstance(l.strategy, ObjectListStrategy)
+        assert space.eq_w(l.getitem(0), w('b'))
+
+    def test_insert(self):
+        space = self.space
+        w = space.wrap
+        l = W_ListObject(space, [w(1), w(2), w(3)])
+        l.insert(1, w(5))
+        assert l.intitems == [1, 5, 2, 3]
+        l.insert(0, w(None))
+        assert isinstance(l.strategy, ObjectListStrategy)
+        assert l.length() == 5
+
+    def test_setslice(self):
+        space = self.space
+        w = space.wrap
+        l = W_ListObject(space, [])
+        l.setslice(0, 1, 0, [w(1), w(2), w(3)])
+        assert isinstance(l.strategy, IntegerListStrategy)
+        assert l.intitems == [1, 2, 3]
+        l.setslice(0, 1, 2, [w(4)])
+        assert l.intitems == [4, 3]
+        l.setslice(0, 1, 1, [w('a')])
+        assert isinstance(l.strategy, ObjectListStrategy)
+        assert l.length() == 2
+
+    def test_extend(self):
+        space = self.space
+        w = space.wrap
+        l = W_ListObject(space, [])
+        l.extend(W_ListObject(space, [w(1), w(2)]))
+        assert isinstance(l.strategy, IntegerListStrategy)
+        assert l.intitems == [1, 2]
+        l.extend(W_ListObject(space, [w(3)]))
+        assert l.intitems == [1, 2, 3]
+        l.extend(W_ListObject(space, [w('a')]))
+        assert isinstance(l.strategy, ObjectListStrategy)
+        assert l.length() == 4
+
+    def test_getslice_keeps_strategy(self):
+        space = self.space
+        w = space.wrap
+        l = W_ListObject(space, [w(1), w(2), w(3), w(4)])
+        l2 = l.getslice(0, 4, 2, 2)
+        assert isinstance(l2.strategy, IntegerListStrategy)
+        assert l2.intitems == [1, 3]
+        l3 = l.mul(2)
+        assert isinstance(l3.strategy, IntegerListStrategy)
+        assert l3.intitems == [1, 2, 3, 4] * 2
+
+    def test_clear_returns_to_empty(self):
+        space = self.space
+        w = space.wrap
+        l = W_ListObject(space, [w(1), w('a')])
+        l.clear()
+        assert isinstance(l.strategy, EmptyListStrategy)
+        assert l.wrappeditems is None
+
+    def test_find(self):
+        space = self.space
+        w = space.wrap
+        l = W_ListObject(space, [w(1), w(2), w(3)])
+        assert l.find(w(2)) == 1
+        assert l.find(w(2.0)) == 1
+        raises(ValueError, l.find, w(4))
+        raises(ValueError, l.find, w(1), 1)
+
+
+class TestW_ListObjectWithoutStrategies(object):
+
+    def test_always_object_strategy(self):
+        space = self.space
+        w = space.wrap
+        l = W_ListObject(space, [])
+        assert isinstance(l.strategy, ObjectListStrategy)
+        l.append(w(1))
+        assert isinstance(l.strategy, ObjectListStrategy)
+        l = W_ListObject(space, [w(1), w(2)])
+        assert isinstance(l.strategy, ObjectListStrategy)
+
+
+class AppTestW_ListObjectWithStrategies(AppTestW_ListObject):
+
+    def setup_class(cls):
+        cls.space = gettestobjspace(**{"objspace.std.withliststrategies": True})
+
+    def test_switch_strategies(self):
+        l = [1, 2, 3]
+        l.append('x')
+        assert l == [1, 2, 3, 'x']
+        l = [1.5, 2.5]
+        l.insert(0, 1)
+        assert l == [1, 1.5, 2.5]
+        l = ['a', 'b']
+        l[1:1] = [1, 2]
+        assert l == ['a', 1, 2, 'b']
+        l = []
+        l += (1, 2)
+        l += ['x']
+        assert l == [1, 2, 'x']
+
+    def test_sort_unwrapped(self):
+        l = [3, 1, 2]
+        l.sort()
+        assert l == [1, 2, 3]
+        l.sort(reverse=True)
+        assert l == [3, 2, 1]
+        l = ['b', 'c', 'a']
+        l.sort()
+        assert l == ['a', 'b', 'c']
+        l = [2.5, -1.0, 0.0]
+        l.sort(key=abs)
+        assert l == [0.0, -1.0, 2.5]
+        l.append('x')
+        assert l == [0.0, -1.0, 2.5, 'x']
+
+    def test_sort_unwrapped_reverse_stable(self):
+        # 0.0 and -0.0 compare equal: their order must be kept
+        zero, negzero = float("0.0"), float("-0.0")
+        l = [zero, negzero, 1.0]
+        l.sort(reverse=True)
+        assert [str(x) for x in l] == ['1.0', '0.0', '-0.0']
+        l = [negzero, zero, -1.0]
+        l.sort(reverse=True)
+        assert [str(x) for x in l] == ['-0.0', '0.0', '-1.0']
+
+    def test_contains_other_types(self):
+        l = [1, 2, 3]
+        assert 2.0 in l
+        assert 'x' not in l
+        assert l.index(3.0) == 2
+        assert l.count(1) == 1
+        assert [1.5, 2.5].count(1.5) == 1
+        class Equal(object):
+            def __eq__(self, other):
+                return True
+        assert Equal() in l
+        assert l == [1.0, 2.0, 3.0]
+        assert ['a', 'b'] != ['a', 'c']
+
+    def test_nan(self):
+        nan = float('nan')
+        l = [1.5, nan]
+        assert l[1] is nan
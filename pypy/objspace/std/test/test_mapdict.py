@@ -0,0 +1,276 @@
+from pypy.conftest import gettestobjspace
+from pypy.interpreter.baseobjspace import W_Root
+from pypy.objspace.std.test.test_dictmultiobject import FakeSpace
+from pypy.objspace.std.test.test_userobject import AppTestUserObject
+from pypy.objspace.std.dictmultiobject import ObjectDictStrategy
+from pypy.objspace.std.mapdict import *
+
+space = FakeSpace()
+
+class Class(object):
+    def __init__(self, hasdict=True):
+        self.hasdict = hasdict
+        if hasdict:
+            self.terminator = DictTerminator(space, self)
+        else:
+            self.terminator = NoDictTerminator(space, self)
+
+    def instantiate(self, sp=None):
+        if sp is None:
+            sp = space
+        result = Object()
+        result.user_setup(sp, self)
+        return result
+
+class Object(ObjectMixin, BaseMapdictObject, W_Root):
+    class typedef:
+        hasdict = False
+
+
+def test_plain_attribute():
+    cls = Class()
+    obj1 = cls.instantiate()
+    obj1.setdictvalue(space, "a", 10)
+    obj1.setdictvalue(space, "b", 20)
+    assert obj1.getdictvalue(space, "a") == 10
+    assert obj1.getdictvalue(space, "b") == 20
+    assert obj1.getdictvalue(space, "c") is None
+    assert obj1.map.length() == 2
+    assert obj1.map.index(("b", DICT)) == 1
+    assert obj1.storage[:2] == [10, 20]
+
+    obj2 = cls.instantiate()
+    obj2.setdictvalue(space, "a", 30)
+    obj2.setdictvalue(space, "b", 40)
+    assert obj2.map is obj1.map
+    assert obj2.storage[:2] == [30, 40]
+
+    obj3 = cls.instantiate()
+    obj3.setdictvalue(space, "b", 50)
+    assert obj3.map is not obj1.map
+    assert obj3.getdictvalue(space, "b") == 50
+
+def test_class():
+    cls1 = Class()
+    cls2 = Class()
+    obj = cls1.instantiate()
+    obj.setdictvalue(space, "a", 10)
+    assert obj.getclass(space) is cls1
+    obj.setclass(space, cls2)
+    assert obj.getclass(space) is cls2
+    assert obj.getdictvalue(space, "a") == 10
+    assert obj.map.terminator is cls2.terminator
+
+def test_size_estimate():
+    cls = Class()
+    for i in range(100):
+        obj = cls.instantiate()
+        for name in "abcdef":
+            obj.setdictvalue(space, name, i)
+    assert cls.terminator.size_estimate() == 6
+    obj = cls.instantiate()
+    assert len(obj.storage) == 6
+
+def test_delete():
+    cls = Class()
+    obj = cls.instantiate()
+    obj.setdictvalue(space, "a", 10)
+    obj.setdictvalue(space, "b", 20)
+    obj.setdictvalue(space, "c", 30)
+    assert obj.deldictvalue(space, "b")
+    assert not obj.deldictvalue(space, "b")
+    assert obj.getdictvalue(space, "a") == 10
+    assert obj.getdictvalue(space, "b") is None
+    assert obj.getdictvalue(space, "c") == 30
+    assert obj.map.length() == 2
+    obj2 = cls.instantiate()
+    obj2.setdictvalue(space, "a", 40)
+    obj2.setdictvalue(space, "c", 50)
+    assert obj2.map is obj.map
+
+def test_slots():
+    cls = Class(hasdict=False)
+    obj = cls.instantiate()
+    obj.setslotvalue(0, 50)
+    obj.setslotvalue(1, 60)
+    assert obj.getslotvalue(0) == 50
+    assert obj.getslotvalue(1) == 60
+    assert not obj.setdictvalue(space, "a", 10)
+    assert obj.getdictvalue(space, "a") is None
+    assert obj.getdict() is None
+    obj.setslotvalue(0, None)
+    assert obj.getslotvalue(0) is None
+
+def test_slots_and_dict():
+    cls = Class()
+    obj = cls.instantiate()
+    obj.setslotvalue(0, 50)
+    obj.setdictvalue(space, "a", 10)
+    assert obj.getslotvalue(0) == 50
+    assert obj.getdictvalue(space, "a") == 10
+    assert obj.deldictvalue(space, "a")
+    assert obj.getslotvalue(0) == 50
+
+
+class TestMapDict(object):
+    def setup_class(cls):
+        cls.space = gettestobjspace(**{"objspace.std.withmapdict": True})
+
+    def instantiate(self):
+        return self.space.appexec([], """():
+            class A(object):
+                pass
+            a = A()
+            a.x = 12
+            a.y = 13
+            return a
+        """)
+
+    def test_attributes_stored_in_instance(self):
+        w_a = self.instantiate()
+        assert isinstance(w_a.map, PlainAttribute)
+        assert self.space.int_w(w_a.getdictvalue(self.space, "x")) == 12
+        assert self.space.int_w(w_a.storage[1]) == 13
+
+    def test_dict(self):
+        space = self.space
+        w_a = self.instantiate()
+        w_dict = w_a.getdict()
+        assert isinstance(w_dict.strategy, MapDictStrategy)
+        assert w_a.getdict() is w_dict
+        assert w_dict.length() == 2
+        assert space.int_w(w_dict.getitem_str("x")) == 12
+        w_dict.setitem_str("z", space.wrap(14))
+        assert space.int_w(w_a.getdictvalue(space, "z")) == 14
+
+    def test_dict_devolves(self):
+        space = self.space
+        w_a = self.instantiate()
+        w_dict = w_a.getdict()
+        w_dict.setitem(space.wrap(1), space.wrap(2))
+        assert isinstance(w_dict.strategy, ObjectDictStrategy)
+        assert isinstance(w_a.map.terminator, DevolvedDictTerminator)
+        assert w_dict.length() == 3
+        assert space.int_w(w_a.getdictvalue(space, "x")) == 12
+        w_a.setdictvalue(space, "x", space.wrap(15))
+        assert space.int_w(space.getitem(w_dict, space.wrap("x"))) == 15
+        assert w_a.deldictvalue(space, space.wrap("y"))
+        assert w_dict.length() == 2
+
+
+class AppTestWithMapDict(object):
+    def setup_class(cls):
+        cls.space = gettestobjspace(**{"objspace.std.withmapdict": True})
+
+    def test_simple(self):
+        class A(object):
+            pass
+        a = A()
+        a.x = 5
+        a.y = 6
+        a.zz = 7
+        assert a.x == 5
+        assert a.y == 6
+        assert a.zz == 7
+        assert a.__dict__ == {"x": 5, "y": 6, "zz": 7}
+        del a.y
+        assert a.__dict__ == {"x": 5, "zz": 7}
+        raises(AttributeError, "a.y")
+        raises(AttributeError, "del a.y")
+
+    def test_dict_iteration_and_clear(self):
+        class A(object):
+            pass
+        a = A()
+        a.x = 5
+        a.y = 6
+        assert sorted(a.__dict__.items()) == [("x", 5), ("y", 6)]
+        assert sorted(a.__dict__) == ["x", "y"]
+        a.__dict__.clear()
+        raises(AttributeError, "a.x")
+        a.z = 1
+        assert a.__dict__ == {"z": 1}
+
+    def test_non_string_key(self):
+        class A(object):
+            pass
+        a = A()
+        a.x = 5
+        d = a.__dict__
+        d[1] = 2
+        assert a.x == 5
+        a.y = 6
+        assert d == {1: 2, "x": 5, "y": 6}
+        del a.x
+        assert d == {1: 2, "y": 6}
+
+    def test_setdict(self):
+        class A(object):
+            pass
+        a = A()
+        a.x = 5
+        d = a.__dict__
+        a.__dict__ = {"y": 6}
+        assert d == {"x": 5}
+        assert a.y == 6
+        raises(AttributeError, "a.x")
+        a.z = 7
+        assert a.__dict__ == {"y": 6, "z": 7}
+        assert d == {"x": 5}
+
+    def test_slots(self):
+        class A(object):
+            __slots__ = ["x", "y"]
+        a = A()
+        a.x = 1
+        assert a.x == 1
+        raises(AttributeError, "a.y")
+        raises(AttributeError, "a.z = 2")
+        del a.x
+        raises(AttributeError, "a.x")
+
+        class B(A):
+            pass
+        b = B()
+        b.x = 1
+        b.z = 2
+        assert b.__dict__ == {"z": 2}
+        assert b.x == 1
+
+    def test_weakref(self):
+        import weakref
+        class A(object):
+            pass
+        a = A()
+        a.x = 1
+        r = weakref.ref(a)
+        assert r() is a
+        assert weakref.ref(a) is r
+        assert a.__dict__ == {"x": 1}
+
+    def test_change_class(self):
+        class A(object):
+            pass
+        class B(object):
+            pass
+        a = A()
+        a.x = 1
+        a.__class__ = B
+        assert type(a) is B
+        assert a.x == 1
+
+    def test_del(self):
+        seen = []
+        class A(object):
+            def __del__(self):
+                seen.append(self.x)
+        a = A()
+        a.x = 42
+        del a
+        import gc
+        gc.collect()
+        assert seen == [42]
+
+
+class AppTestUserObjectWithMapDict(AppTestUserObject):
+    OPTIONS = {"objspace.std.withmapdict": True}
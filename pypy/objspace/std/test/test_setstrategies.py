@@ -0,0 +1,168 @@
+from pypy.objspace.std.setobject import W_SetObject, W_FrozensetObject
+from pypy.objspace.std.setobject import EmptySetStrategy, ObjectSetStrategy, \
+     IntegerSetStrategy, StringSetStrategy
+from pypy.objspace.std.setobject import _initialize_set
+from pypy.objspace.std.setobject import set_intersection__Set_Set, \
+     set_union__Set_Set, set_difference__Set_Set, \
+     set_symmetric_difference__Set_Set, set_issubset__Set_Set
+from pypy.objspace.std.test.test_setobject import AppTestAppSetTest
+from pypy.conftest import gettestobjspace
+
+
+class TestW_SetStrategies(object):
+
+    def setup_class(cls):
+        cls.space = gettestobjspace(**{"objspace.std.withsetstrategies": True})
+
+    def newset(self, items):
+        space = self.space
+        w_set = W_SetObject(space, None)
+        _initialize_set(space, w_set, space.newlist([space.wrap(item)
+                                                     for item in items]))
+        return w_set
+
+    def test_check_strategy(self):
+        assert isinstance(self.newset([]).strategy, EmptySetStrategy)
+        assert isinstance(self.newset([1, 2]).strategy, IntegerSetStrategy)
+        assert isinstance(self.newset(['a', 'b']).strategy, StringSetStrategy)
+        assert isinstance(self.newset([1, 'a']).strategy, ObjectSetStrategy)
+        assert isinstance(self.newset([1.5]).strategy, ObjectSetStrategy)
+        assert isinstance(self.newset([True]).strategy, ObjectSetStrategy)
+
+    def test_storage(self):
+        s = self.newset([1, 2, 1])
+        assert s.intdata == {1: None, 2: None}
+        assert s.setdata is None
+        s = self.newset(['a'])
+        assert s.strdata == {'a': None}
+
+    def test_switch_to_object(self):
+        space = self.space
+        s = self.newset([1, 2])
+        s.add(space.wrap(3))
+        assert isinstance(s.strategy, IntegerSetStrategy)
+        s.add(space.wrap('x'))
+        assert isinstance(s.strategy, ObjectSetStrategy)
+        assert s.intdata is None
+        assert s.length() == 4
+        assert s.has_key(space.wrap(3))
+
+    def test_empty_add(self):
+        space = self.space
+        s = self.newset([])
+        s.add(space.wrap('a'))
+        assert isinstance(s.strategy, StringSetStrategy)
+        s.clear()
+        assert isinstance(s.strategy, EmptySetStrategy)
+
+    def test_has_key_does_not_switch_for_other_types(self):
+        space = self.space
+        s = self.newset([1, 2])
+        assert not s.has_key(space.wrap('a'))
+        assert not s.has_key(space.w_None)
+        assert isinstance(s.strategy, IntegerSetStrategy)
+        s = self.newset(['a'])
+        assert not s.has_key(space.wrap(1))
+        assert not s.remove(space.wrap(1.5))
+        assert isinstance(s.strategy, StringSetStrategy)
+
+    def test_operations_keep_strategy(self):
+        space = self.space
+        s1 = self.newset([1, 2, 3])
+        s2 = self.newset([2, 3, 4])
+        r = set_intersection__Set_Set(space, s1, s2)
+        assert r.intdata == {2: None, 3: None}
+        r = set_union__Set_Set(space, s1, s2)
+        assert r.intdata == dict.fromkeys([1, 2, 3, 4])
+        r = set_difference__Set_Set(space, s1, s2)
+        assert r.intdata == {1: None}
+        r = set_symmetric_difference__Set_Set(space, s1, s2)
+        assert r.intdata == {1: None, 4: None}
+        assert space.is_true(set_issubset__Set_Set(space, r, s1)) is False
+        # the arguments are not modified
+        assert s1.intdata == dict.fromkeys([1, 2, 3])
+        assert s2.intdata == dict.fromkeys([2, 3, 4])
+
+    def test_operations_between_strategies(self):
+        space = self.space
+        s1 = self.newset([1, 2])
+        s2 = self.newset(['a', 'b'])
+        r = set_intersection__Set_Set(space, s1, s2)
+        assert r.length() == 0
+        r = set_difference__Set_Set(space, s1, s2)
+        assert r.intdata == {1: None, 2: None}
+        r = set_union__Set_Set(space, s1, s2)
+        assert isinstance(r.strategy, ObjectSetStrategy)
+        assert r.length() == 4
+        assert isinstance(s2.strategy, StringSetStrategy)
+
+    def test_frozenset(self):
+        space = self.space
+        s = W_FrozensetObject(space, None)
+        _initialize_set(space, s, space.wrap('abcb'))
+        assert isinstance(s.strategy, StringSetStrategy)
+        assert s.length() == 3
+
+
+class TestW_SetObjectWithoutStrategies(object):
+
+    def test_always_object_strategy(self):
+        space = self.space
+        s = W_SetObject(space, None)
+        assert isinstance(s.strategy, ObjectSetStrategy)
+        s.add(space.wrap(1))
+        assert isinstance(s.strategy, ObjectSetStrategy)
+
+
+class AppTestAppSetTestWithStrategies(AppTestAppSetTest):
+
+    def setup_class(cls):
+        cls.space = gettestobjspace(**{"objspace.std.withsetstrategies": True})
+
+    def test_mixed_types(self):
+        s = set([1, 2, 3])
+        assert 1.0 in s
+        assert True in s
+        assert 'a' not in s
+        s.discard(2.0)
+        assert s == set([1, 3])
+        s = set(['a', 'b'])
+        assert u'a' in s
+        s.remove(u'b')
+        assert s == set(['a'])
+
+    def test_operations(self):
+        a = set([1, 2, 3])
+        b = frozenset([2, 3, 4])
+        assert a & b == set([2, 3])
+        assert a | b == set([1, 2, 3, 4])
+        assert a - b == set([1])
+        assert a ^ b == set([1, 4])
+        assert type(b & a) is frozenset
+        assert a & set([2.0, 'x']) == set([2])
+        assert a - set([2.0, 'x']) == set([1, 3])
+        assert a ^ set(['x']) == set([1, 2, 3, 'x'])
+        assert set([1, 2]) <= set([1.0, 2.0, 'x'])
+        assert not set([1, 2]) <= set(['a', 'b'])
+        assert set(['a']) == frozenset([u'a'])
+        a |= set(['x'])
+        assert a == set([1, 2, 3, 'x'])
+
+    def test_iter_and_pop(self):
+        s = set([1, 2, 3])
+        assert sorted(s) == [1, 2, 3]
+        items = [s.pop(), s.pop(), s.pop()]
+        assert sorted(items) == [1, 2, 3]
+        raises(KeyError, s.pop)
+        s = set('abc')
+        it = iter(s)
+        it.next()
+        s.add('d')
+        raises(RuntimeError, it.next)
+
+    def test_unhashable(self):
+        s = set([1, 2])
+        raises(TypeError, "[] in s")
+        raises(TypeError, "[] in set()")
+        assert set([1]) not in s
+        assert frozenset([1]) in set([frozenset([1])])
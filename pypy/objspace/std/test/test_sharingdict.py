@@ -1,7 +1,8 @@
 import py
 from pypy.conftest import gettestobjspace
-from pypy.objspace.std.sharingdict import SharedStructure, NUM_DIGITS, SharedDictImplementation
+from pypy.objspace.std.sharingdict import SharedStructure, NUM_DIGITS, SharedDictStrategy
 from pypy.interpreter import gateway
+from pypy.objspace.std.dictmultiobject import W_DictMultiObject
 from pypy.objspace.std.test.test_dictmultiobject import FakeSpace
 
 def instance_with_keys(structure, *keys):
@@ -32,7 +33,7 @@ def test_size_estimate2():
 
 def test_delete():
     space = FakeSpace()
-    d = SharedDictImplementation(space)
+    d = W_DictMultiObject(space, SharedDictStrategy(space))
     d.setitem_str("a", 1)
     d.setitem_str("b", 2)
     d.setitem_str("c", 3)
@@ -53,7 +54,7 @@ def test_delete():
     assert d.entries == [None, None, None]
     assert d.structure.keys == {}
 
-    d = SharedDictImplementation(space)
+    d = W_DictMultiObject(space, SharedDictStrategy(space))
     d.setitem_str("a", 1)
     d.setitem_str("b", 2)
     d.setitem_str("c", 3)
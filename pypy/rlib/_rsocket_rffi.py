@@ -421,13 +421,17 @@ timeval = cConfig.timeval
 #    eci = ExternalCompilationInfo(includes=includes, libraries=libraries,
 #                                  separate_module_sources=sources)
 
-def external(name, args, result):
+# Only the functions that can block (waiting for the network, for a peer
+# or for a name lookup) release the GIL; the other ones return at once,
+# and releasing and re-acquiring the GIL around them would cost more
+# than the call itself.
+def external(name, args, result, blocking=False):
     return rffi.llexternal(name, args, result, compilation_info=eci,
-                           calling_conv=calling_conv)
+                           calling_conv=calling_conv, threadsafe=blocking)
 
 def external_c(name, args, result):
     return rffi.llexternal(name, args, result, compilation_info=eci,
-                           calling_conv='c')
+                           calling_conv='c', threadsafe=False)
 
 if _POSIX:
     dup = external('dup', [socketfd_type], socketfd_type)
@@ -442,18 +446,22 @@ if _POSIX:
 socket = external('socket', [rffi.INT, rffi.INT, rffi.INT], socketfd_type)
 
 if WIN32:
-    socketclose = external('closesocket', [socketfd_type], rffi.INT)
+    socketclose = external('closesocket', [socketfd_type], rffi.INT,
+                           blocking=True)
 else:
-    socketclose = external('close', [socketfd_type], rffi.INT)
+    socketclose = external('close', [socketfd_type], rffi.INT, blocking=True)
 
-socketconnect = external('connect', [socketfd_type, sockaddr_ptr, socklen_t], rffi.INT)
+socketconnect = external('connect', [socketfd_type, sockaddr_ptr, socklen_t],
+                         rffi.INT, blocking=True)
 
 getaddrinfo = external('getaddrinfo', [CCHARP, CCHARP,
                         addrinfo_ptr,
-                        lltype.Ptr(rffi.CArray(addrinfo_ptr))], rffi.INT)
+                        lltype.Ptr(rffi.CArray(addrinfo_ptr))], rffi.INT,
+                       blocking=True)
 freeaddrinfo = external('freeaddrinfo', [addrinfo_ptr], lltype.Void)
 getnameinfo = external('getnameinfo', [sockaddr_ptr, socklen_t, CCHARP,
-                       size_t, CCHARP, size_t, rffi.INT], rffi.INT)
+                       size_t, CCHARP, size_t, rffi.INT], rffi.INT,
+                       blocking=True)
 
 htonl = external('htonl', [rffi.UINT], rffi.UINT)
 htons = external('htons', [rffi.USHORT], rffi.USHORT)
@@ -476,7 +484,7 @@ if _POSIX:
 inet_addr = external('inet_addr', [rffi.CCHARP], rffi.UINT)
 socklen_t_ptr = lltype.Ptr(rffi.CFixedArray(socklen_t, 1))
 socketaccept = external('accept', [socketfd_type, sockaddr_ptr,
-                              socklen_t_ptr], socketfd_type)
+                              socklen_t_ptr], socketfd_type, blocking=True)
 socketbind = external('bind', [socketfd_type, sockaddr_ptr, socklen_t],
                               rffi.INT)
 socketlisten = external('listen', [socketfd_type, rffi.INT], rffi.INT)
@@ -489,21 +497,27 @@ socketgetsockopt = external('getsockopt', [socketfd_type, rffi.INT,
 socketsetsockopt = external('setsockopt', [socketfd_type, rffi.INT,
                                    rffi.INT, rffi.VOIDP, socklen_t], rffi.INT)
 socketrecv = external('recv', [socketfd_type, rffi.VOIDP, rffi.INT,
-                                      rffi.INT], ssize_t)
+                                      rffi.INT], ssize_t, blocking=True)
 recvfrom = external('recvfrom', [socketfd_type, rffi.VOIDP, size_t,
-                           rffi.INT, sockaddr_ptr, socklen_t_ptr], rffi.INT)
+                           rffi.INT, sockaddr_ptr, socklen_t_ptr], rffi.INT,
+                    blocking=True)
 send = external('send', [socketfd_type, rffi.CCHARP, size_t, rffi.INT],
-                       ssize_t)
+                       ssize_t, blocking=True)
 sendto = external('sendto', [socketfd_type, rffi.VOIDP, size_t, rffi.INT,
-                                    sockaddr_ptr, socklen_t], ssize_t)
+                                    sockaddr_ptr, socklen_t], ssize_t,
+                  blocking=True)
 socketshutdown = external('shutdown', [socketfd_type, rffi.INT], rffi.INT)
 gethostname = external('gethostname', [rffi.CCHARP, rffi.INT], rffi.INT)
 gethostbyname = external('gethostbyname', [rffi.CCHARP],
-                                lltype.Ptr(cConfig.hostent))
-gethostbyaddr = external('gethostbyaddr', [rffi.VOIDP, rffi.INT, rffi.INT], lltype.Ptr(cConfig.hostent))
-getservbyname = external('getservbyname', [rffi.CCHARP, rffi.CCHARP], lltype.Ptr(cConfig.servent))
-getservbyport = external('getservbyport', [rffi.INT, rffi.CCHARP], lltype.Ptr(cConfig.servent))
-getprotobyname = external('getprotobyname', [rffi.CCHARP], lltype.Ptr(cConfig.protoent))
+                                lltype.Ptr(cConfig.hostent), blocking=True)
+gethostbyaddr = external('gethostbyaddr', [rffi.VOIDP, rffi.INT, rffi.INT],
+                         lltype.Ptr(cConfig.hostent), blocking=True)
+getservbyname = external('getservbyname', [rffi.CCHARP, rffi.CCHARP],
+                         lltype.Ptr(cConfig.servent), blocking=True)
+getservbyport = external('getservbyport', [rffi.INT, rffi.CCHARP],
+                         lltype.Ptr(cConfig.servent), blocking=True)
+getprotobyname = external('getprotobyname', [rffi.CCHARP],
+                          lltype.Ptr(cConfig.protoent), blocking=True)
 
 if _POSIX:
     fcntl = external('fcntl', [socketfd_type, rffi.INT, rffi.INT], rffi.INT)
@@ -519,7 +533,7 @@ if _WIN32:
 select = external('select',
                   [rffi.INT, fd_set, fd_set,
                    fd_set, lltype.Ptr(timeval)],
-                  rffi.INT)
+                  rffi.INT, blocking=True)
 
 FD_CLR = external_c('pypy_macro_wrapper_FD_CLR', [rffi.INT, fd_set], lltype.Void)
 FD_ISSET = external_c('pypy_macro_wrapper_FD_ISSET', [rffi.INT, fd_set], rffi.INT)
@@ -529,7 +543,7 @@ FD_ZERO = external_c('pypy_macro_wrapper_FD_ZERO', [fd_set], lltype.Void)
 if _POSIX:
     pollfdarray = rffi.CArray(pollfd)
     poll = external('poll', [lltype.Ptr(pollfdarray), nfds_t, rffi.INT],
-                    rffi.INT)
+                    rffi.INT, blocking=True)
     
 elif WIN32:
     #
@@ -548,7 +562,7 @@ elif WIN32:
     WSAWaitForMultipleEvents = external('WSAWaitForMultipleEvents',
                                         [rffi.LONG, lltype.Ptr(WSAEVENT_ARRAY),
                                          rffi.INT, rffi.LONG, rffi.INT],
-                                        rffi.ULONG)
+                                        rffi.ULONG, blocking=True)
 
     WSAEnumNetworkEvents = external('WSAEnumNetworkEvents',
                                     [socketfd_type, WSAEVENT,
@@ -224,7 +224,8 @@ class JitHintError(Exception):
     """Inconsistency in the JIT hints."""
 
 OPTIMIZER_SIMPLE = 0
-OPTIMIZER_FULL = 1
+OPTIMIZER_NO_UNROLL = 1
+OPTIMIZER_FULL = 2
 
 DEBUG_OFF = 0
 DEBUG_PROFILE = 1
@@ -236,6 +237,7 @@ PARAMETERS = {'threshold': 1000,
               'trace_limit': 10000,
               'inlining': False,
               'optimizer': OPTIMIZER_FULL,
+              'loop_longevity': 1000,
               'debug' : DEBUG_STEPS,
               }
 unroll_parameters = unrolling_iterable(PARAMETERS.keys())
@@ -253,7 +255,9 @@ class JitDriver:
     
     def __init__(self, greens=None, reds=None, virtualizables=None,
                  get_jitcell_at=None, set_jitcell_at=None,
-                 get_printable_location=None, confirm_enter_jit=None):
+                 get_printable_location=None, confirm_enter_jit=None,
+                 get_threshold=None, should_always_inline=None,
+                 threshold_reached=None):
         if greens is not None:
             self.greens = greens
         if reds is not None:
@@ -270,6 +274,17 @@ class JitDriver:
         self.set_jitcell_at = set_jitcell_at
         self.get_printable_location = get_printable_location
         self.confirm_enter_jit = confirm_enter_jit
+        # get_threshold(*greens) returns the threshold to use for this
+        # position instead of the 'threshold' parameter: 0 means the
+        # default, and a negative value means "never trace from here".
+        self.get_threshold = get_threshold
+        # should_always_inline(*greens) returns True if calls to the
+        # portal with these greens should be inlined even if the
+        # 'inlining' parameter is off.
+        self.should_always_inline = should_always_inline
+        # threshold_reached(*greens) is called once when the counter of
+        # this position reaches the threshold, just before tracing it.
+        self.threshold_reached = threshold_reached
 
     def _freeze_(self):
         return True
@@ -344,6 +359,10 @@ class JitDriver:
 class BaseJitCell(object):
     __slots__ = ()
 
+    def invalidate_increment(self):
+        """Call this when the result of the jitdriver's get_threshold()
+        changes for this cell."""
+
 
 class ExtEnterLeaveMarker(ExtRegistryEntry):
     # Replace a call to myjitdriver.jit_merge_point(**livevars)
@@ -0,0 +1,110 @@
+"""
+RPython bindings for the epoll interface of Linux, based on rffi.
+Unlike poll(), the set of interesting file descriptors is kept by the
+kernel, so that waiting for events does not cost anything proportional
+to the number of registered file descriptors.
+"""
+
+from pypy.rpython.lltypesystem import lltype, rffi
+from pypy.rpython.tool import rffi_platform
+from pypy.translator.tool.cbuild import ExternalCompilationInfo
+from pypy.rlib.rposix import get_errno
+
+eci = ExternalCompilationInfo(
+    includes = ['sys/epoll.h', 'sys/select.h'],
+)
+
+class CConfig:
+    _compilation_info_ = eci
+
+CConfig.epoll_data = rffi_platform.Struct('union epoll_data',
+                                          [('fd', rffi.INT)])
+CConfig.epoll_event = rffi_platform.Struct('struct epoll_event',
+                                           [('events', rffi.UINT),
+                                            ('data', CConfig.epoll_data)])
+
+# ____________________________________________________________
+# events
+#
+eventnames = '''EPOLLIN EPOLLOUT EPOLLPRI EPOLLERR EPOLLHUP EPOLLET
+                EPOLLONESHOT EPOLLRDNORM EPOLLRDBAND EPOLLWRNORM
+                EPOLLWRBAND EPOLLMSG'''.split()
+
+for name in eventnames:
+    setattr(CConfig, name, rffi_platform.DefinedConstantInteger(name))
+for name in ['EPOLL_CTL_ADD', 'EPOLL_CTL_MOD', 'EPOLL_CTL_DEL',
+             'FD_SETSIZE']:
+    setattr(CConfig, name, rffi_platform.ConstantInteger(name))
+
+cconfig = rffi_platform.configure(CConfig)
+
+eventnames = [name for name in eventnames if cconfig[name] is not None]
+for name in eventnames:
+    globals()[name] = cconfig[name]
+
+EPOLL_CTL_ADD = cconfig['EPOLL_CTL_ADD']
+EPOLL_CTL_MOD = cconfig['EPOLL_CTL_MOD']
+EPOLL_CTL_DEL = cconfig['EPOLL_CTL_DEL']
+FD_SETSIZE = cconfig['FD_SETSIZE']
+
+epoll_event = cconfig['epoll_event']
+EPOLL_EVENT_ARRAY = rffi.CArray(epoll_event)
+
+# only epoll_wait() can block and needs to release the GIL
+def external(name, args, result, blocking=False):
+    return rffi.llexternal(name, args, result, compilation_info=eci,
+                           threadsafe=blocking)
+
+c_epoll_create = external('epoll_create', [rffi.INT], rffi.INT)
+c_epoll_ctl = external('epoll_ctl',
+                       [rffi.INT, rffi.INT, rffi.INT, lltype.Ptr(epoll_event)],
+                       rffi.INT)
+c_epoll_wait = external('epoll_wait',
+                        [rffi.INT, lltype.Ptr(EPOLL_EVENT_ARRAY), rffi.INT,
+                         rffi.INT],
+                        rffi.INT, blocking=True)
+
+# ____________________________________________________________
+
+def epoll_create(sizehint):
+    """Return a new epoll file descriptor.  'sizehint' must be positive."""
+    epfd = rffi.cast(lltype.Signed, c_epoll_create(sizehint))
+    if epfd < 0:
+        raise OSError(get_errno(), "epoll_create failed")
+    return epfd
+
+def epoll_ctl(epfd, op, fd, events):
+    """Add, modify or remove (depending on 'op') the file descriptor
+    'fd' in the interest set of 'epfd'."""
+    ev = lltype.malloc(epoll_event, flavor='raw')
+    try:
+        rffi.setintfield(ev, 'c_events', events)
+        rffi.setintfield(ev.c_data, 'c_fd', fd)
+        res = rffi.cast(lltype.Signed, c_epoll_ctl(epfd, op, fd, ev))
+    finally:
+        lltype.free(ev, flavor='raw')
+    if res < 0:
+        raise OSError(get_errno(), "epoll_ctl failed")
+
+def alloc_events(maxevents):
+    return lltype.malloc(EPOLL_EVENT_ARRAY, maxevents, flavor='raw')
+
+def free_events(events):
+    lltype.free(events, flavor='raw')
+
+def epoll_wait(epfd, events, maxevents, timeout):
+    """Wait for at most 'timeout' milliseconds (-1 for infinite) and fill
+    the array 'events', which must have room for 'maxevents' entries.
+    Returns the list [(fd, events)] of the ready file descriptors.
+    Only the ready file descriptors are looked at, not the whole set."""
+    count = rffi.cast(lltype.Signed,
+                      c_epoll_wait(epfd, events, maxevents, timeout))
+    if count < 0:
+        raise OSError(get_errno(), "epoll_wait failed")
+    retval = []
+    for i in range(count):
+        ev = events[i]
+        fd = rffi.cast(lltype.Signed, ev.c_data.c_fd)
+        revents = rffi.cast(lltype.Signed, ev.c_events)
+        retval.append((fd, revents))
+    return retval
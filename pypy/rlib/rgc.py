@@ -204,6 +204,39 @@ class DumpHeapEntry(ExtRegistryEntry):
         hop.exception_is_here()
         return hop.genop('gc_heap_stats', [], resulttype=hop.r_result)
 
+def _heap_histogram():
+    raise NotImplementedError # can't be run directly
+
+class HeapHistogramEntry(ExtRegistryEntry):
+    _about_ = _heap_histogram
+
+    def compute_result_annotation(self):
+        from pypy.annotation import model as annmodel
+        from pypy.rpython.memory.gc.base import HEAP_HISTOGRAM
+        from pypy.rpython.lltypesystem import lltype
+        return annmodel.SomePtr(lltype.Ptr(HEAP_HISTOGRAM))
+
+    def specialize_call(self, hop):
+        hop.exception_is_here()
+        return hop.genop('gc_heap_histogram', [], resulttype=hop.r_result)
+
+def _get_collection_events():
+    raise NotImplementedError # can't be run directly
+
+class GetCollectionEventsEntry(ExtRegistryEntry):
+    _about_ = _get_collection_events
+
+    def compute_result_annotation(self):
+        from pypy.annotation import model as annmodel
+        from pypy.rpython.memory.gc.base import GC_EVENTS
+        from pypy.rpython.lltypesystem import lltype
+        return annmodel.SomePtr(lltype.Ptr(GC_EVENTS))
+
+    def specialize_call(self, hop):
+        hop.exception_is_here()
+        return hop.genop('gc_get_collection_events', [],
+                         resulttype=hop.r_result)
+
 def malloc_nonmovable(TP, n=None, zero=False):
     """ Allocate a non-moving buffer or return nullptr.
     When running directly, will pretend that gc is always
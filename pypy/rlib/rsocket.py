@@ -856,17 +856,23 @@ class RSocket(object):
         until at least one byte is available or until the remote end is closed.
         When the remote end is closed and all data is read, return the empty
         string."""
+        raw_buf, gc_buf = rffi.alloc_buffer(buffersize)
+        try:
+            read_bytes = self.recv_raw(raw_buf, buffersize, flags)
+            return rffi.str_from_buffer(raw_buf, gc_buf, buffersize, read_bytes)
+        finally:
+            rffi.keep_buffer_alive_until_here(raw_buf, gc_buf)
+
+    def recv_raw(self, dataptr, nbytes, flags=0):
+        """Receive up to nbytes bytes into a CCHARP buffer, without
+        copying them.  Returns the number of bytes received."""
         timeout = self._select(False)
         if timeout == 1:
             raise SocketTimeout
         elif timeout == 0:
-            raw_buf, gc_buf = rffi.alloc_buffer(buffersize)
-            try:
-                read_bytes = _c.socketrecv(self.fd, raw_buf, buffersize, flags)
-                if read_bytes >= 0:
-                    return rffi.str_from_buffer(raw_buf, gc_buf, buffersize, read_bytes)
-            finally:
-                rffi.keep_buffer_alive_until_here(raw_buf, gc_buf)
+            read_bytes = _c.socketrecv(self.fd, dataptr, nbytes, flags)
+            if read_bytes >= 0:
+                return rffi.cast(lltype.Signed, read_bytes)
         raise self.error_handler()
 
     def recvinto(self, rwbuffer, nbytes, flags=0):
@@ -877,30 +883,36 @@ class RSocket(object):
     def recvfrom(self, buffersize, flags=0):
         """Like recv(buffersize, flags) but also return the sender's
         address."""
+        raw_buf, gc_buf = rffi.alloc_buffer(buffersize)
+        try:
+            read_bytes, address = self.recvfrom_raw(raw_buf, buffersize, flags)
+            data = rffi.str_from_buffer(raw_buf, gc_buf, buffersize, read_bytes)
+            return (data, address)
+        finally:
+            rffi.keep_buffer_alive_until_here(raw_buf, gc_buf)
+
+    def recvfrom_raw(self, dataptr, nbytes, flags=0):
+        """Like recv_raw(dataptr, nbytes, flags) but also return the
+        sender's address."""
         read_bytes = -1
         timeout = self._select(False)
         if timeout == 1:
             raise SocketTimeout
         elif timeout == 0:
-            raw_buf, gc_buf = rffi.alloc_buffer(buffersize)
+            address, addr_p, addrlen_p = self._addrbuf()
             try:
-                address, addr_p, addrlen_p = self._addrbuf()
-                try:
-                    read_bytes = _c.recvfrom(self.fd, raw_buf, buffersize, flags,
-                                             addr_p, addrlen_p)
-                    addrlen = rffi.cast(lltype.Signed, addrlen_p[0])
-                finally:
-                    lltype.free(addrlen_p, flavor='raw')
-                    address.unlock()
-                if read_bytes >= 0:
-                    if addrlen:
-                        address.addrlen = addrlen
-                    else:
-                        address = None
-                    data = rffi.str_from_buffer(raw_buf, gc_buf, buffersize, read_bytes)
-                    return (data, address)
+                read_bytes = _c.recvfrom(self.fd, dataptr, nbytes, flags,
+                                         addr_p, addrlen_p)
+                addrlen = rffi.cast(lltype.Signed, addrlen_p[0])
             finally:
-                rffi.keep_buffer_alive_until_here(raw_buf, gc_buf)
+                lltype.free(addrlen_p, flavor='raw')
+                address.unlock()
+            if read_bytes >= 0:
+                if addrlen:
+                    address.addrlen = addrlen
+                else:
+                    address = None
+                return (rffi.cast(lltype.Signed, read_bytes), address)
         raise self.error_handler()
 
     def recvfrom_into(self, rwbuffer, nbytes, flags=0):
@@ -4,6 +4,7 @@ from pypy.rlib.unroll import unrolling_iterable
 from pypy.rlib.rsre import rsre_char
 from pypy.tool.sourcetools import func_with_new_name
 from pypy.rlib.objectmodel import we_are_translated
+from pypy.rlib import jit
 
 
 OPCODE_FAILURE            = 0
@@ -97,7 +98,9 @@ class AbstractMatchContext(object):
 
     def pat(self, index):
         check_nonneg(index)
-        result = self.pattern[index]
+        # when jitted, the pattern is a constant, so that reading from it
+        # with a constant 'index' is constant-folded
+        result = _read_pattern(jit.hint(self.pattern, promote=True), index)
         # Check that we only return non-negative integers from this helper.
         # It is possible that self.pattern contains negative integers
         # (see set_charset() and set_bigcharset() in rsre_char.py)
@@ -158,6 +161,10 @@ class AbstractMatchContext(object):
     def fresh_copy(self, start):
         raise NotImplementedError
 
+@jit.purefunction
+def _read_pattern(pattern, index):
+    return pattern[index]
+
 class StrMatchContext(AbstractMatchContext):
     """Concrete subclass for matching in a plain string."""
 
@@ -238,6 +245,7 @@ class BranchMatchResult(MatchResult):
         self.start_ptr = ptr
         self.start_marks = marks
 
+    @jit.unroll_safe     # the loop is over the branches of the pattern
     def find_first_result(self, ctx):
         ppos = self.ppos
         while ctx.pat(ppos):
@@ -429,6 +437,7 @@ class MinUntilMatchResult(AbstractUntilMatchResult):
 # ____________________________________________________________
 
 @specializectx
+@jit.unroll_safe     # the loop is over the pattern, which is a constant
 def sre_match(ctx, ppos, ptr, marks):
     """Returns either None or a MatchResult object.  Usually we only need
     the first result, but there is the case of REPEAT...UNTIL where we
@@ -888,13 +897,18 @@ def search_context(ctx):
             return fast_search(ctx)
     return regular_search(ctx)
 
+@specializectx
 def regular_search(ctx):
     start = ctx.match_start
     while start <= ctx.end:
+        ctx.jitdriver_RegularSearch.jit_merge_point(ctx=ctx, start=start,
+                                                    pattern=ctx.pattern)
         if sre_match(ctx, 0, start, None) is not None:
             ctx.match_start = start
             return True
         start += 1
+        ctx.jitdriver_RegularSearch.can_enter_jit(ctx=ctx, start=start,
+                                                  pattern=ctx.pattern)
     return False
 
 @specializectx
@@ -903,44 +917,63 @@ def fast_search(ctx):
     # an optimization info block
     # <INFO> <1=skip> <2=flags> <3=min> <4=...>
     #        <5=length> <6=skip> <7=prefix data> <overlap data>
-    flags = ctx.pat(2)
+    #
+    # The loop below has a single jit_merge_point, at which 'i' (the
+    # number of characters of the prefix matched so far) is green: all
+    # the values read from the pattern are constant-folded.
+    string_position = ctx.match_start
+    if string_position >= ctx.end:
+        return False
     prefix_len = ctx.pat(5)
     assert prefix_len >= 0
-    prefix_skip = ctx.pat(6)
-    assert prefix_skip >= 0
-    overlap_offset = 7 + prefix_len - 1
-    assert overlap_offset >= 0
-    pattern_offset = ctx.pat(1) + 1
-    ppos_start = pattern_offset + 2 * prefix_skip
-    assert ppos_start >= 0
     i = 0
-    string_position = ctx.match_start
-    end = ctx.end
-    while string_position < end:
-        while True:
-            char_ord = ctx.str(string_position)
-            if char_ord != ctx.pat(7 + i):
-                if i == 0:
-                    break
-                else:
-                    i = ctx.pat(overlap_offset + i)
-            else:
-                i += 1
-                if i == prefix_len:
-                    # found a potential match
-                    start = string_position + 1 - prefix_len
-                    assert start >= 0
-                    ptr = start + prefix_skip
-                    if flags & rsre_char.SRE_INFO_LITERAL:
-                        # matched all of pure literal pattern
-                        ctx.match_start = start
-                        ctx.match_end = ptr
-                        ctx.match_marks = None
-                        return True
-                    if sre_match(ctx, ppos_start, ptr, None) is not None:
-                        ctx.match_start = start
-                        return True
-                    i = ctx.pat(overlap_offset + i)
-                break
+    while True:
+        ctx.jitdriver_FastSearch.jit_merge_point(ctx=ctx,
+                string_position=string_position, i=i, prefix_len=prefix_len,
+                pattern=ctx.pattern)
+        char_ord = ctx.str(string_position)
+        if char_ord != ctx.pat(7 + i):
+            if i > 0:
+                overlap_offset = prefix_len + (7 - 1)
+                i = ctx.pat(overlap_offset + i)
+                continue
+        else:
+            i += 1
+            if i == prefix_len:
+                # found a potential match
+                start = string_position + 1 - prefix_len
+                assert start >= 0
+                prefix_skip = ctx.pat(6)
+                ptr = start + prefix_skip
+                flags = ctx.pat(2)
+                if flags & rsre_char.SRE_INFO_LITERAL:
+                    # matched all of pure literal pattern
+                    ctx.match_start = start
+                    ctx.match_end = ptr
+                    ctx.match_marks = None
+                    return True
+                pattern_offset = ctx.pat(1) + 1
+                ppos_start = pattern_offset + 2 * prefix_skip
+                if sre_match(ctx, ppos_start, ptr, None) is not None:
+                    ctx.match_start = start
+                    return True
+                overlap_offset = prefix_len + (7 - 1)
+                i = ctx.pat(overlap_offset + i)
         string_position += 1
-    return False
+        if string_position >= ctx.end:
+            return False
+        ctx.jitdriver_FastSearch.can_enter_jit(ctx=ctx,
+                string_position=string_position, i=i, prefix_len=prefix_len,
+                pattern=ctx.pattern)
+
+# ____________________________________________________________
+
+from pypy.rlib.rsre.rsre_jit import install_jitdriver_spec
+install_jitdriver_spec('RegularSearch',
+                       greens=['pattern'],
+                       reds=['start', 'ctx'],
+                       debugprint=(0,))
+install_jitdriver_spec('FastSearch',
+                       greens=['i', 'prefix_len', 'pattern'],
+                       reds=['string_position', 'ctx'],
+                       debugprint=(2, 0))
@@ -0,0 +1,32 @@
+from pypy.rlib.jit import JitDriver
+
+
+class RSreJitDriver(JitDriver):
+
+    def __init__(self, name, debugprint, **kwds):
+        JitDriver.__init__(self, **kwds)
+        #
+        def get_printable_location(*args):
+            # we print based on indices in 'args'.  We first print
+            # the size of the pattern from the arg number debugprint[0],
+            # then possibly the number from the arg number debugprint[1].
+            pattern = args[debugprint[0]]
+            if len(debugprint) > 1:
+                info = ' at %d' % (args[debugprint[1]],)
+            else:
+                info = ''
+            return 're %s%s (%d codes)' % (name, info, len(pattern))
+        #
+        self.get_printable_location = get_printable_location
+
+
+def install_jitdriver_spec(name, **kwds):
+    """Install one JitDriver called 'jitdriver_<name>' on each concrete
+    subclass of AbstractMatchContext.  It must be used from a function
+    decorated with @specializectx, as 'ctx.jitdriver_<name>'."""
+    from pypy.rlib.rsre.rsre_core import StrMatchContext
+    from pypy.rlib.rsre.rsre_core import UnicodeMatchContext
+    for prefix, concreteclass in [('Str', StrMatchContext),
+                                  ('Uni', UnicodeMatchContext)]:
+        jitdriver = RSreJitDriver(prefix + name, **kwds)
+        setattr(concreteclass, 'jitdriver_' + name, jitdriver)
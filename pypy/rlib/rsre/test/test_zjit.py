@@ -0,0 +1,58 @@
+from pypy.jit.metainterp.test import test_basic
+from pypy.rlib.rsre.test.test_match import get_code
+from pypy.rlib.rsre import rsre_core
+
+
+def get_int_code(regexp):
+    # the codes produced by some versions of sre_compile contain longs
+    return [int(c) for c in get_code(regexp)]
+
+
+def meta_interp_search(self, regexp, string, **kwds):
+    # (two patterns, otherwise 'ctx.pattern' is a constant for the annotator)
+    patterns = [get_int_code(regexp), get_int_code(r"x")]
+    strings = [string, "x"]
+    def entrypoint(n):
+        ctx = rsre_core.search(patterns[n], strings[n])
+        if ctx is None:
+            return -1
+        return ctx.match_start * 1000 + ctx.match_end
+    return self.meta_interp(entrypoint, [0], listcomp=True, **kwds)
+
+
+class TestJitRSre(test_basic.LLJitMixin):
+    meta_interp_search = meta_interp_search
+
+    def test_regular_search(self):
+        res = self.meta_interp_search(r"<[a-z]+>", "ab" * 20 + "<foo>x")
+        assert res == 40 * 1000 + 45
+        self.check_tree_loop_count(1)
+        # the opcodes of the pattern are constant-folded
+        self.check_loops(call_pure=0, getarrayitem_gc=0)
+
+    def test_regular_search_no_match(self):
+        res = self.meta_interp_search(r"<[a-z]+>", "ab" * 20)
+        assert res == -1
+        self.check_tree_loop_count(1)
+
+    def test_fast_search(self):
+        res = self.meta_interp_search(r"<foo\w+>", "x" * 30 + "<foobar>")
+        assert res == 30 * 1000 + 38
+        self.check_loops(call_pure=0)
+
+    def test_fast_search_literal(self):
+        res = self.meta_interp_search(r"foobar", "foo" * 20 + "foobar")
+        assert res == 60 * 1000 + 66
+        self.check_loops(call_pure=0)
+
+    def test_unicode(self):
+        patterns = [get_int_code(u"<[a-z]+>"), get_int_code(u"x")]
+        strings = [u"ab" * 20 + u"<foo>", u"x"]
+        def entrypoint(n):
+            ctx = rsre_core.UnicodeMatchContext(patterns[n], strings[n], 0,
+                                                len(strings[n]), 0)
+            if not rsre_core.search_context(ctx):
+                return -1
+            return ctx.match_start
+        res = self.meta_interp(entrypoint, [0], listcomp=True)
+        assert res == 40
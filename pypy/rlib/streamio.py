@@ -5,6 +5,7 @@ Based on sio.py from Guido van Rossum.
 - This module contains various stream classes which provide a subset of the
   classic Python I/O API: read(n), write(s), tell(), seek(offset, whence=0),
   readall(), readline(), truncate(size), flush(), close(), peek(),
+  readinto_raw(dataptr, n),
   flushable(), try_to_find_file_descriptor().
 
 - This is not for general usage:
@@ -41,6 +42,8 @@ import os, sys
 from pypy.rlib.objectmodel import specialize
 from pypy.rlib.rarithmetic import r_longlong, intmask
 from pypy.rlib import rposix
+from pypy.rpython.lltypesystem import lltype, rffi
+from pypy.translator.tool.cbuild import ExternalCompilationInfo
 
 from os import O_RDONLY, O_WRONLY, O_RDWR, O_CREAT, O_TRUNC
 O_BINARY = getattr(os, "O_BINARY", 0)
@@ -274,6 +277,34 @@ class Stream(object):
     def getnewlines(self):
         return 0
 
+    def readinto_raw(self, dataptr, n):
+        """Read at most n bytes into the raw memory at 'dataptr' (a CCHARP)
+        and return the number of bytes read, like read(n).  The default
+        implementation copies the string returned by read(); basis and
+        buffering streams may read directly into the target memory."""
+        data = self.read(n)
+        count = len(data)
+        for i in range(count):
+            dataptr[i] = data[i]
+        return count
+
+
+if sys.platform == "win32":
+    _read_eci = ExternalCompilationInfo(includes=['io.h'])
+    _c_read = rffi.llexternal('_read', [rffi.INT, rffi.CCHARP, rffi.UINT],
+                              rffi.INT, compilation_info=_read_eci)
+else:
+    _read_eci = ExternalCompilationInfo(includes=['unistd.h'])
+    _c_read = rffi.llexternal('read', [rffi.INT, rffi.CCHARP, rffi.SIZE_T],
+                              rffi.SSIZE_T, compilation_info=_read_eci)
+
+def read_raw(fd, dataptr, n):
+    """Like os.read(), but reads into raw memory instead of a new string."""
+    got = rffi.cast(lltype.Signed, _c_read(fd, dataptr, n))
+    if got < 0:
+        raise OSError(rposix.get_errno(), "read failed")
+    return got
+
 
 class DiskFile(Stream):
 
@@ -292,6 +323,9 @@ class DiskFile(Stream):
         assert isinstance(n, int)
         return os.read(self.fd, n)
 
+    def readinto_raw(self, dataptr, n):
+        return read_raw(self.fd, dataptr, n)
+
     def write(self, data):
         while data:
             n = os.write(self.fd, data)
@@ -576,6 +610,14 @@ class BufferingInputStream(Stream):
             return
         raise StreamError("whence should be 0, 1 or 2")
 
+    def readinto_raw(self, dataptr, n):
+        assert n >= 0
+        if not self.lines and not self.buf and n >= self.bufsize:
+            # nothing buffered and a big read: bypass the buffer and let
+            # the underlying stream fill the target memory directly
+            return self.base.readinto_raw(dataptr, n)
+        return Stream.readinto_raw(self, dataptr, n)
+
     def readall(self):
         self.lines.reverse()
         self.lines.append(self.buf)
@@ -779,6 +821,11 @@ class BufferingOutputStream(Stream):
     readline   = PassThrough("readline", flush_buffers=True)
     seek       = PassThrough("seek",     flush_buffers=True)
     truncate   = PassThrough("truncate", flush_buffers=True)
+
+    def readinto_raw(self, dataptr, n):
+        self.flush_buffers()
+        return self.base.readinto_raw(dataptr, n)
+
     flush      = PassThrough("flush",    flush_buffers=True)
     close      = PassThrough("close",    flush_buffers=True)
     try_to_find_file_descriptor = PassThrough("try_to_find_file_descriptor",
@@ -0,0 +1,43 @@
+import os, sys, py
+from pypy.rpython.test.test_llinterp import interpret
+
+if not sys.platform.startswith('linux'):
+    py.test.skip("epoll is only available on Linux")
+
+from pypy.rlib.repoll import *
+
+def test_simple():
+    epfd = epoll_create(10)
+    readend, writeend = os.pipe()
+    events = alloc_events(4)
+    try:
+        epoll_ctl(epfd, EPOLL_CTL_ADD, readend, EPOLLIN)
+        epoll_ctl(epfd, EPOLL_CTL_ADD, writeend, EPOLLOUT)
+        assert epoll_wait(epfd, events, 4, 0) == [(writeend, EPOLLOUT)]
+        os.write(writeend, 'x')
+        res = epoll_wait(epfd, events, 4, 100)
+        res.sort()
+        assert res == [(readend, EPOLLIN), (writeend, EPOLLOUT)]
+        assert len(epoll_wait(epfd, events, 1, 0)) == 1
+        epoll_ctl(epfd, EPOLL_CTL_DEL, writeend, 0)
+        assert epoll_wait(epfd, events, 4, 0) == [(readend, EPOLLIN)]
+        py.test.raises(OSError, epoll_ctl, epfd, EPOLL_CTL_DEL, writeend, 0)
+    finally:
+        free_events(events)
+        os.close(epfd)
+        os.close(readend)
+        os.close(writeend)
+
+def test_translates():
+    def f(maxevents):
+        epfd = epoll_create(10)
+        events = alloc_events(maxevents)
+        try:
+            epoll_ctl(epfd, EPOLL_CTL_ADD, epfd, EPOLLIN)
+        except OSError:
+            pass
+        res = epoll_wait(epfd, events, maxevents, 0)
+        free_events(events)
+        return len(res)
+    res = interpret(f, [4])
+    assert res == 0
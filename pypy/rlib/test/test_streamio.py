@@ -6,6 +6,7 @@ import random
 from pypy.tool.udir import udir
 
 from pypy.rlib import streamio
+from pypy.rpython.lltypesystem import lltype, rffi
 
 from pypy.rpython.test.tool import BaseRtypingTest, LLRtypeMixin, OORtypeMixin
 
@@ -441,6 +442,40 @@ class TestBufferedRead:
         for want, got, pos in self.source.chunks:
             assert want >= 4
 
+class TestReadintoRaw:
+
+    def readinto(self, stream, n):
+        buf = lltype.malloc(rffi.CCHARP.TO, n, flavor='raw')
+        try:
+            count = stream.readinto_raw(buf, n)
+            return rffi.charpsize2str(buf, count)
+        finally:
+            lltype.free(buf, flavor='raw')
+
+    def test_default(self):
+        base = TSource(["ab", "cdef"])
+        assert self.readinto(base, 3) == "ab"
+        assert self.readinto(base, 3) == "cde"
+
+    def test_diskfile(self):
+        fn = str(udir.join('readinto_raw'))
+        f = open(fn, 'wb')
+        f.write('0123456789' * 2000)
+        f.close()
+        fd = os.open(fn, os.O_RDONLY)
+        try:
+            stream = streamio.BufferingInputStream(streamio.DiskFile(fd), 8)
+            assert stream.read(3) == '012'
+            # buffered data is returned first
+            assert self.readinto(stream, 5) == '34567'
+            # then big reads go directly to the file
+            assert self.readinto(stream, 20000) == ('89' +
+                                                    '0123456789' * 1999)
+            assert stream.tell() == 20000
+            assert self.readinto(stream, 10) == ''
+        finally:
+            os.close(fd)
+
 class BaseTestBufferingOutputStream(BaseRtypingTest):
 
     def test_write(self):
@@ -833,6 +833,12 @@ class LLFrame(object):
     def op_gc_heap_stats(self):
         raise NotImplementedError
 
+    def op_gc_heap_histogram(self):
+        raise NotImplementedError
+
+    def op_gc_get_collection_events(self):
+        raise NotImplementedError
+
     def op_gc_obtain_free_space(self, size):
         raise NotImplementedError
 
@@ -925,6 +931,9 @@ class LLFrame(object):
     def op_get_write_barrier_failing_case(self):
         raise NotImplementedError("get_write_barrier_failing_case")
 
+    def op_get_write_barrier_from_array_failing_case(self):
+        raise NotImplementedError("get_write_barrier_from_array_failing_case")
+
     def op_yield_current_frame_to_caller(self):
         raise NotImplementedError("yield_current_frame_to_caller")
 
@@ -317,7 +317,9 @@ def arena_reserve(addr, size, check_alignment=True):
     this is used to know what type of lltype object to allocate."""
     from pypy.rpython.memory.lltypelayout import memory_alignment
     addr = getfakearenaaddress(addr)
-    if check_alignment and (addr.offset & (memory_alignment-1)) != 0:
+    if llmemory.raw_malloc_usage(size) == 1:
+        pass    # byte-sized objects, e.g. the GC's card marking bytes
+    elif check_alignment and (addr.offset & (memory_alignment-1)) != 0:
         raise ArenaError("object at offset %d would not be correctly aligned"
                          % (addr.offset,))
     addr.arena.allocate_object(addr.offset, size)
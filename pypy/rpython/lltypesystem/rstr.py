@@ -326,6 +326,7 @@ class LLHelpers(AbstractLLHelpers):
         s1.copy_contents(s1, newstr, 0, 0, len1)
         s1.copy_contents(s2, newstr, 0, len1, len2)
         return newstr
+    ll_strconcat.oopspec = 'stroruni.concat(s1, s2)'
 
     @purefunction
     def ll_strip(s, ch, left, right):
@@ -702,6 +703,7 @@ class LLHelpers(AbstractLLHelpers):
         assert start >= 0
         s1.copy_contents(s1, newstr, start, 0, lgt)
         return newstr
+    ll_stringslice_startonly.oopspec = 'stroruni.slice_startonly(s1, start)'
 
     @purefunction
     def ll_stringslice_startstop(s1, start, stop):
@@ -715,6 +717,8 @@ class LLHelpers(AbstractLLHelpers):
         assert lgt >= 0
         s1.copy_contents(s1, newstr, start, 0, lgt)
         return newstr
+    ll_stringslice_startstop.oopspec = (
+        'stroruni.slice_startstop(s1, start, stop)')
 
     @purefunction
     def ll_stringslice_minusone(s1):
@@ -11,6 +11,48 @@ TYPEID_MAP = lltype.GcStruct('TYPEID_MAP', ('count', lltype.Signed),
                              ('links', lltype.Array(lltype.Signed)))
 ARRAY_TYPEID_MAP = lltype.GcArray(lltype.Ptr(TYPEID_MAP))
 
+# the result of heap_histogram(): the live objects per type (indexed by
+# member index), and the bytes used by the various parts of the heap
+HISTOGRAM_ENTRY = lltype.Struct('HISTOGRAM_ENTRY', ('count', lltype.Signed),
+                                ('size', lltype.Signed),
+                                ('nursery_count', lltype.Signed),
+                                ('nursery_size', lltype.Signed),
+                                ('external_count', lltype.Signed),
+                                ('external_size', lltype.Signed))
+HEAP_HISTOGRAM = lltype.GcStruct('HEAP_HISTOGRAM',
+                                 ('nursery_bytes', lltype.Signed),
+                                 ('space_bytes', lltype.Signed),
+                                 ('rawmalloced_bytes', lltype.Signed),
+                                 ('types', lltype.Array(HISTOGRAM_ENTRY)))
+
+# the per-type counters from which heap_histogram() is computed, kept up
+# to date by the GC in a raw array: the objects in the semispace outside
+# the nursery, and the external (raw-malloced) objects
+TYPE_COUNTER = lltype.Struct('TYPE_COUNTER', ('count', lltype.Signed),
+                             ('size', lltype.Signed),
+                             ('external_count', lltype.Signed),
+                             ('external_size', lltype.Signed))
+TYPE_COUNTERS = lltype.Array(TYPE_COUNTER)
+
+# the collection events recorded by the GC: their kind, the time at which
+# they started and their duration in seconds, and the size of the part of
+# the heap collected, before and after.  The GC keeps up to MAX_GC_EVENTS
+# of them in a raw buffer, and get_collection_events() returns and
+# removes them in a GC_EVENTS structure.
+GC_EVENT_MINOR = 0          # nursery collection
+GC_EVENT_MAJOR = 1          # full collection of the semispaces
+GC_EVENT_FULL = 2           # full collection including the gen3 objects
+GC_EVENT_SWEEP = 3          # incremental sweeping step
+MAX_GC_EVENTS = 1000
+GC_EVENT = lltype.Struct('GC_EVENT', ('kind', lltype.Signed),
+                         ('start', lltype.Float),
+                         ('duration', lltype.Float),
+                         ('size_before', lltype.Signed),
+                         ('size_after', lltype.Signed))
+GC_EVENT_BUFFER = lltype.Array(GC_EVENT)
+GC_EVENTS = lltype.GcStruct('GC_EVENTS', ('lost', lltype.Signed),
+                            ('events', lltype.Array(GC_EVENT)))
+
 class GCBase(object):
     _alloc_flavor_ = "raw"
     moving_gc = False
@@ -194,6 +236,39 @@ class GCBase(object):
                 length -= 1
     trace._annspecialcase_ = 'specialize:arg(2)'
 
+    def trace_partial(self, obj, start, stop, callback, arg):
+        """Like trace(), but only walk the array part, for indices in
+        range(start, stop).  Must only be called if has_gcptr_in_varsize().
+        """
+        length = stop - start
+        typeid = self.get_type_id(obj)
+        if self.is_gcarrayofgcptr(typeid):
+            # a performance shortcut for GcArray(gcptr)
+            item = obj + llmemory.gcarrayofptr_itemsoffset
+            item += llmemory.gcarrayofptr_singleitemoffset * start
+            while length > 0:
+                if self.points_to_valid_gc_object(item):
+                    callback(item, arg)
+                item += llmemory.gcarrayofptr_singleitemoffset
+                length -= 1
+            return
+        ll_assert(self.has_gcptr_in_varsize(typeid),
+                  "trace_partial() on object without has_gcptr_in_varsize()")
+        item = obj + self.varsize_offset_to_variable_part(typeid)
+        offsets = self.varsize_offsets_to_gcpointers_in_var_part(typeid)
+        itemlength = self.varsize_item_sizes(typeid)
+        item += itemlength * start
+        while length > 0:
+            j = 0
+            while j < len(offsets):
+                itemobj = item + offsets[j]
+                if self.points_to_valid_gc_object(itemobj):
+                    callback(itemobj, arg)
+                j += 1
+            item += itemlength
+            length -= 1
+    trace_partial._annspecialcase_ = 'specialize:arg(4)'
+
     def points_to_valid_gc_object(self, addr):
         return self.is_valid_gc_object(addr.address[0])
 
@@ -1,8 +1,8 @@
-import sys
+import sys, time
 from pypy.rpython.memory.gc.semispace import SemiSpaceGC
 from pypy.rpython.memory.gc.semispace import GCFLAG_EXTERNAL, GCFLAG_FORWARDED
 from pypy.rpython.memory.gc.semispace import GC_HASH_TAKEN_ADDR
-from pypy.rpython.memory.gc.base import read_from_env
+from pypy.rpython.memory.gc.base import read_from_env, GC_EVENT_MINOR
 from pypy.rpython.lltypesystem.llmemory import NULL, raw_malloc_usage
 from pypy.rpython.lltypesystem import lltype, llmemory, llarena
 from pypy.rpython.memory.support import DEFAULT_CHUNK_SIZE
@@ -28,6 +28,18 @@ GCFLAG_NO_YOUNG_PTRS = SemiSpaceGC.first_unused_gcflag << 0
 # 'last_generation_root_objects'.
 GCFLAG_NO_HEAP_PTRS = SemiSpaceGC.first_unused_gcflag << 1
 
+# The following flag is set on old arrays that have "cards" (see
+# HybridGC): one bit per 'card_page_indices' items of the array, stored
+# in bytes just before the GC header.  When a young pointer is written
+# into such an array, the write barrier only sets the bit of the card
+# and leaves GCFLAG_NO_YOUNG_PTRS alone, so that the next minor
+# collection only needs to look at the items of the marked cards.
+GCFLAG_HAS_CARDS = SemiSpaceGC.first_unused_gcflag << 2
+
+# The following flag is set on the objects with cards that are listed in
+# 'old_objects_with_cards_set', i.e. that have at least one card marked.
+GCFLAG_CARDS_SET = SemiSpaceGC.first_unused_gcflag << 3
+
 class GenerationGC(SemiSpaceGC):
     """A basic generational GC: it's a SemiSpaceGC with an additional
     nursery for young objects.  A write barrier is used to ensure that
@@ -38,7 +50,7 @@ class GenerationGC(SemiSpaceGC):
     inline_simple_malloc_varsize = True
     needs_write_barrier = True
     prebuilt_gc_objects_are_static_roots = False
-    first_unused_gcflag = SemiSpaceGC.first_unused_gcflag << 2
+    first_unused_gcflag = SemiSpaceGC.first_unused_gcflag << 4
 
     # the following values override the default arguments of __init__ when
     # translating to a real backend.
@@ -54,7 +66,8 @@ class GenerationGC(SemiSpaceGC):
                  min_nursery_size=32*WORD,
                  auto_nursery_size=False,
                  space_size=1024*WORD,
-                 max_space_size=sys.maxint//2+1):
+                 max_space_size=sys.maxint//2+1,
+                 card_page_indices=0):
         SemiSpaceGC.__init__(self, config, chunk_size = chunk_size,
                              space_size = space_size,
                              max_space_size = max_space_size)
@@ -63,6 +76,17 @@ class GenerationGC(SemiSpaceGC):
         self.auto_nursery_size = auto_nursery_size
         self.min_nursery_size = min_nursery_size
 
+        # Card marking: 0 to disable it, or a power of two which is the
+        # number of array items per card.  Only the objects that have the
+        # GCFLAG_HAS_CARDS use it.
+        self.card_page_indices = card_page_indices
+        self.card_page_shift = 0
+        if card_page_indices > 0:
+            while (1 << self.card_page_shift) < card_page_indices:
+                self.card_page_shift += 1
+            assert (1 << self.card_page_shift) == card_page_indices, (
+                "card_page_indices must be a power of two")
+
         # define nursery fields
         self.reset_nursery()
         self._setup_wb()
@@ -82,6 +106,9 @@ class GenerationGC(SemiSpaceGC):
         # may contain static prebuilt objects as well.  More precisely,
         # it lists exactly the old and static objects whose
         # GCFLAG_NO_YOUNG_PTRS bit is not set.
+        self.old_objects_with_cards_set = self.AddressStack()
+        # ^^^ the objects with GCFLAG_HAS_CARDS that have some cards
+        # marked, i.e. exactly the ones with GCFLAG_CARDS_SET.
         self.young_objects_with_weakrefs = self.AddressStack()
 
         self.last_generation_root_objects = self.AddressStack()
@@ -163,10 +190,11 @@ class GenerationGC(SemiSpaceGC):
             #     second comparison as well.
             ll_assert(not contains_weakptr, "wrong case for mallocing weakref")
             # "non-simple" case or object too big: don't use the nursery
-            return SemiSpaceGC.malloc_fixedsize_clear(self, typeid, size,
-                                                      can_collect,
-                                                      has_finalizer,
-                                                      contains_weakptr)
+            result = SemiSpaceGC.malloc_fixedsize_clear(self, typeid, size,
+                                                        can_collect,
+                                                        has_finalizer,
+                                                        contains_weakptr)
+            return self.count_old_object(result)
         size_gc_header = self.gcheaderbuilder.size_gc_header
         totalsize = size_gc_header + size
         result = self.nursery_free
@@ -208,9 +236,11 @@ class GenerationGC(SemiSpaceGC):
             #     but it can be constant-folded if 'size' is a constant; then
             #     it almost always folds down to False, which kills the
             #     second comparison as well.
-            return SemiSpaceGC.malloc_varsize_clear(self, typeid, length, size,
-                                                    itemsize, offset_to_length,
-                                                    can_collect)
+            result = SemiSpaceGC.malloc_varsize_clear(self, typeid, length,
+                                                      size, itemsize,
+                                                      offset_to_length,
+                                                      can_collect)
+            return self.count_old_object(result)
         # with the above checks we know now that totalsize cannot be more
         # than about half of the nursery size; in particular, the + and *
         # cannot overflow
@@ -226,6 +256,15 @@ class GenerationGC(SemiSpaceGC):
         self.nursery_free = result + llarena.round_up_for_allocation(totalsize)
         return llmemory.cast_adr_to_ptr(result+size_gc_header, llmemory.GCREF)
 
+    def count_old_object(self, gcref):
+        # the objects allocated directly in the semispace, outside the
+        # nursery, are counted at once (see SemiSpaceGC.count_in_space())
+        obj = llmemory.cast_ptr_to_adr(gcref)
+        totalsize = self.size_gc_header() + self.get_size_incl_hash(obj)
+        self.count_in_space(obj, raw_malloc_usage(totalsize))
+        return gcref
+    count_old_object._dont_inline_ = True
+
     # override the init_gc_object methods to change the default value of 'flags',
     # used by objects that are directly created outside the nursery by the SemiSpaceGC.
     # These objects must have the GCFLAG_NO_YOUNG_PTRS flag set immediately.
@@ -282,6 +321,11 @@ class GenerationGC(SemiSpaceGC):
             obj = oldlist.pop()
             hdr = self.header(obj)
             hdr.tid |= GCFLAG_NO_YOUNG_PTRS
+        # the same with the cards, which we can simply clear
+        oldlist = self.old_objects_with_cards_set
+        while oldlist.non_empty():
+            obj = oldlist.pop()
+            self.clear_cards(obj)
 
     def weakrefs_grow_older(self):
         while self.young_objects_with_weakrefs.non_empty():
@@ -333,11 +377,13 @@ class GenerationGC(SemiSpaceGC):
             ll_assert(self.nursery_size <= self.top_of_space - self.free,
                          "obtain_free_space failed to do its job")
         if self.nursery:
+            start_time = time.time()
             debug_start("gc-minor")
             debug_print("--- minor collect ---")
             debug_print("nursery:", self.nursery, "to", self.nursery_top)
             # a nursery-only collection
             scan = beginning = self.free
+            self.collect_cardrefs_to_nursery()
             self.collect_oldrefs_to_nursery()
             self.collect_roots_in_nursery()
             scan = self.scan_objects_just_copied_out_of_nursery(scan)
@@ -352,6 +398,9 @@ class GenerationGC(SemiSpaceGC):
             debug_print("survived (fraction of the size):",
                         float(scan - beginning) / self.nursery_size)
             debug_stop("gc-minor")
+            self.record_gc_event(GC_EVENT_MINOR, start_time,
+                                 self.nursery_free - self.nursery,
+                                 scan - beginning)
             #self.debug_check_consistency()   # -- quite expensive
         else:
             # no nursery - this occurs after a full collect, triggered either
@@ -392,6 +441,46 @@ class GenerationGC(SemiSpaceGC):
             self.trace_and_drag_out_of_nursery(obj)
         debug_print("collect_oldrefs_to_nursery", count)
 
+    def collect_cardrefs_to_nursery(self):
+        # Follow the old_objects_with_cards_set list and move the young
+        # objects out of the nursery, looking only at the items of the
+        # cards that are marked.
+        count = 0
+        oldlist = self.old_objects_with_cards_set
+        while oldlist.non_empty():
+            count += 1
+            obj = oldlist.pop()
+            if self.header(obj).tid & GCFLAG_NO_YOUNG_PTRS:
+                self.trace_cards_and_drag_out_of_nursery(obj)
+            else:
+                # the object is also in old_objects_pointing_to_young,
+                # so it is going to be traced completely anyway
+                self.clear_cards(obj)
+        debug_print("collect_cardrefs_to_nursery", count)
+
+    def trace_cards_and_drag_out_of_nursery(self, obj):
+        # also clears the cards and GCFLAG_CARDS_SET
+        self.header(obj).tid &= ~GCFLAG_CARDS_SET
+        length = self.get_length(obj)
+        bytes = self.card_marking_bytes_for_length(length)
+        byteindex = 0
+        while byteindex < bytes:
+            addr_byte = self.get_card(obj, byteindex)
+            byte = ord(addr_byte.char[0])
+            if byte:
+                addr_byte.char[0] = '\x00'
+                start = byteindex << (self.card_page_shift + 3)
+                while byte:
+                    if byte & 1:
+                        stop = start + self.card_page_indices
+                        if stop > length:
+                            stop = length
+                        self.trace_partial(obj, start, stop,
+                                           self._trace_drag_out, None)
+                    start += self.card_page_indices
+                    byte >>= 1
+            byteindex += 1
+
     def collect_roots_in_nursery(self):
         # we don't need to trace prebuilt GcStructs during a minor collect:
         # if a prebuilt GcStruct contains a pointer to a young object,
@@ -456,6 +545,11 @@ class GenerationGC(SemiSpaceGC):
         if self.header(addr_struct).tid & GCFLAG_NO_YOUNG_PTRS:
             self.remember_young_pointer(addr_struct, newvalue)
 
+    def write_barrier_from_array(self, newvalue, addr_array, index):
+        if self.header(addr_array).tid & GCFLAG_NO_YOUNG_PTRS:
+            self.remember_young_pointer_from_array(addr_array, index,
+                                                   newvalue)
+
     def _setup_wb(self):
         # The purpose of attaching remember_young_pointer to the instance
         # instead of keeping it as a regular method is to help the JIT call it.
@@ -484,6 +578,69 @@ class GenerationGC(SemiSpaceGC):
             self.write_into_last_generation_obj(addr_struct, addr)
         remember_young_pointer._dont_inline_ = True
         self.remember_young_pointer = remember_young_pointer
+        #
+        # The same for arrays, with the index of the item written to.
+        # If the array has cards, we mark the card containing the item;
+        # the JIT assumes that this is all that is needed if
+        # GCFLAG_CARDS_SET is already set (see JIT_WB_CARDS_SET below).
+        def remember_young_pointer_from_array(addr_array, index, addr):
+            objhdr = self.header(addr_array)
+            if not (objhdr.tid & GCFLAG_HAS_CARDS):
+                remember_young_pointer(addr_array, addr)
+                return
+            if (self.config.taggedpointers and
+                not self.is_valid_gc_object(addr)):
+                return
+            if self.is_in_nursery(addr):
+                index >>= self.card_page_shift
+                addr_byte = self.get_card(addr_array, index >> 3)
+                bitmask = 1 << (index & 7)
+                byte = ord(addr_byte.char[0])
+                if not (byte & bitmask):
+                    addr_byte.char[0] = chr(byte | bitmask)
+                if not (objhdr.tid & GCFLAG_CARDS_SET):
+                    self.old_objects_with_cards_set.append(addr_array)
+                    objhdr.tid |= GCFLAG_CARDS_SET
+            elif (not self.config.taggedpointers and
+                  not self.is_valid_gc_object(addr)):
+                return
+            # NB. a young 'addr' is never in the last generation, so an
+            # object with GCFLAG_CARDS_SET never has GCFLAG_NO_HEAP_PTRS.
+            self.write_into_last_generation_obj(addr_array, addr)
+        remember_young_pointer_from_array._dont_inline_ = True
+        self.remember_young_pointer_from_array = (
+            remember_young_pointer_from_array)
+
+    # for the JIT: if GCFLAG_CARDS_SET is already set on an array that
+    # has GCFLAG_NO_YOUNG_PTRS, it is enough to set the bit of the card
+    # (see get_card()) instead of calling remember_young_pointer_from_array
+    JIT_WB_CARDS_SET = GCFLAG_CARDS_SET
+
+    def card_marking_bytes_for_length(self, length):
+        # the number of bytes needed to store one bit per card
+        num_cards = (length + self.card_page_indices - 1) >> (
+            self.card_page_shift)
+        return (num_cards + 7) >> 3
+
+    def get_card(self, obj, byteindex):
+        # The cards are stored in bytes just before the GC header, in
+        # reverse order: the first byte is at 'header - 1'.  Card number
+        # N is the bit (1 << (N & 7)) of the byte number (N >> 3).
+        size_gc_header = self.gcheaderbuilder.size_gc_header
+        addr_byte = obj - size_gc_header
+        return llarena.getfakearenaaddress(addr_byte) + (~byteindex)
+
+    def clear_cards(self, obj):
+        self.header(obj).tid &= ~GCFLAG_CARDS_SET
+        bytes = self.card_marking_bytes_for_length(self.get_length(obj))
+        byteindex = 0
+        while byteindex < bytes:
+            self.get_card(obj, byteindex).char[0] = '\x00'
+            byteindex += 1
+
+    def get_length(self, obj):
+        typeid = self.get_type_id(obj)
+        return (obj + self.varsize_offset_to_length(typeid)).signed[0]
 
     def write_into_last_generation_obj(self, addr_struct, addr):
         objhdr = self.header(addr_struct)
@@ -512,7 +669,8 @@ class GenerationGC(SemiSpaceGC):
         if dest_hdr.tid & GCFLAG_NO_YOUNG_PTRS == 0:
             return True
         # ^^^ a fast path of write-barrier
-        if source_hdr.tid & GCFLAG_NO_YOUNG_PTRS == 0:
+        if (source_hdr.tid & (GCFLAG_NO_YOUNG_PTRS | GCFLAG_CARDS_SET) !=
+                GCFLAG_NO_YOUNG_PTRS):
             # there might be an object in source that is in nursery
             self.old_objects_pointing_to_young.append(dest_addr)
             dest_hdr.tid &= ~GCFLAG_NO_YOUNG_PTRS
@@ -567,6 +725,19 @@ class GenerationGC(SemiSpaceGC):
     def _track_heap_ext(self, adr, ignored):
         self.trace(adr, self.track_heap_parent, adr)
 
+    def uncounted_area_start(self):
+        return self.nursery
+
+    def uncounted_area_stop(self):
+        return self.nursery_free
+
+    def heap_histogram_totals(self, histogram):
+        space_bytes = self.free - self.tospace
+        if self.nursery:
+            histogram.nursery_bytes = self.nursery_free - self.nursery
+            space_bytes -= self.nursery_size
+        histogram.space_bytes = space_bytes
+
     def debug_check_object(self, obj):
         """Check the invariants about 'obj' that should be true
         between collections."""
@@ -575,7 +746,8 @@ class GenerationGC(SemiSpaceGC):
         if tid & GCFLAG_NO_YOUNG_PTRS:
             ll_assert(not self.is_in_nursery(obj),
                       "nursery object with GCFLAG_NO_YOUNG_PTRS")
-            self.trace(obj, self._debug_no_nursery_pointer, None)
+            if not (tid & GCFLAG_CARDS_SET):
+                self.trace(obj, self._debug_no_nursery_pointer, None)
         elif not self.is_in_nursery(obj):
             ll_assert(self._d_oopty.contains(obj),
                       "missing from old_objects_pointing_to_young")
@@ -604,6 +776,8 @@ class GenerationGC(SemiSpaceGC):
             self._d_lgro.delete()
             self.old_objects_pointing_to_young.foreach(
                 self._debug_check_flag_1, None)
+            self.old_objects_with_cards_set.foreach(
+                self._debug_check_flag_3, None)
             self.last_generation_root_objects.foreach(
                 self._debug_check_flag_2, None)
 
@@ -613,6 +787,12 @@ class GenerationGC(SemiSpaceGC):
     def _debug_check_flag_2(self, obj, ignored):
         ll_assert(not (self.header(obj).tid & GCFLAG_NO_HEAP_PTRS),
                   "unexpected GCFLAG_NO_HEAP_PTRS")
+    def _debug_check_flag_3(self, obj, ignored):
+        tid = self.header(obj).tid
+        ll_assert(bool(tid & GCFLAG_HAS_CARDS), "missing GCFLAG_HAS_CARDS")
+        ll_assert(bool(tid & GCFLAG_CARDS_SET), "missing GCFLAG_CARDS_SET")
+        ll_assert(not (tid & GCFLAG_NO_HEAP_PTRS),
+                  "GCFLAG_CARDS_SET with GCFLAG_NO_HEAP_PTRS")
 
     def debug_check_can_copy(self, obj):
         if self.is_in_nursery(obj):
@@ -1,10 +1,14 @@
-import sys
+import sys, time
 from pypy.rpython.memory.gc.semispace import SemiSpaceGC
 from pypy.rpython.memory.gc.generation import GenerationGC, WORD
+from pypy.rpython.memory.gc.base import read_from_env
+from pypy.rpython.memory.gc.base import GC_EVENT_MAJOR, GC_EVENT_FULL
+from pypy.rpython.memory.gc.base import GC_EVENT_SWEEP
 from pypy.rpython.memory.gc.semispace import GCFLAG_EXTERNAL, GCFLAG_FORWARDED
 from pypy.rpython.memory.gc.semispace import GCFLAG_HASHMASK
 from pypy.rpython.memory.gc.generation import GCFLAG_NO_YOUNG_PTRS
 from pypy.rpython.memory.gc.generation import GCFLAG_NO_HEAP_PTRS
+from pypy.rpython.memory.gc.generation import GCFLAG_HAS_CARDS
 from pypy.rpython.memory.gc.semispace import GC_HASH_TAKEN_ADDR
 from pypy.rpython.memory.gc.semispace import GC_HASH_HASFIELD
 from pypy.rpython.lltypesystem import lltype, llmemory, llarena
@@ -49,6 +53,13 @@ from pypy.rpython.lltypesystem import rffi
 # A malloc_varsize() of large objects returns objects that are external
 # but initially of generation 2.  Old objects from the semispaces are
 # moved to external objects directly as generation 3.
+#
+# If 'card_page_indices' is not zero, the large arrays containing GC
+# pointers are allocated with room for "cards" before the GC header and
+# get GCFLAG_HAS_CARDS (see GenerationGC.write_barrier_from_array()).
+# Writing a young pointer in them only marks the card of the item, and
+# the next minor collection only looks at the items of the marked cards
+# instead of at the whole array.
 
 # The "age" of an object is the number of times it survived a full
 # collections, without counting the step that moved it out of the nursery.
@@ -72,6 +83,18 @@ while GCFLAG_AGE_MASK < GCFLAG_AGE_MAX:
 # number of calls to semispace_collect():
 GENERATION3_COLLECT_THRESHOLD = 20
 
+# After a collection of the 3rd generation, the raw_malloc'ed objects
+# of generation 3 are not all swept immediately: they are put aside in
+# 'gen3_objects_to_sweep', and each following minor collection sweeps
+# about 'gen3_sweep_bytes' bytes of them.  This splits the cost of
+# sweeping a big generation 3 in bounded steps.  The budget is in bytes
+# rather than in objects because freeing and visiting a large object
+# costs more; a step stops after the object that reaches the budget.
+# The objects that remain to be swept are either surviving gen3 objects
+# or unreachable objects with GCFLAG_UNVISITED; the latter are never
+# seen again by the program, so they can safely wait.  A value of 0
+# means "sweep everything at once".
+
 class HybridGC(GenerationGC):
     """A two-generations semi-space GC like the GenerationGC,
     except that objects above a certain size are handled separately:
@@ -86,6 +109,10 @@ class HybridGC(GenerationGC):
     TRANSLATION_PARAMS['large_object'] = 6*1024    # XXX adjust
     TRANSLATION_PARAMS['large_object_gcptrs'] = 31*1024    # XXX adjust
     TRANSLATION_PARAMS['min_nursery_size'] = 128*1024
+    # large arrays of GC pointers get one card bit per 128 items
+    TRANSLATION_PARAMS['card_page_indices'] = 128
+    # sweep about this number of bytes of generation 3 per minor collect
+    TRANSLATION_PARAMS['gen3_sweep_bytes'] = 8*1024*1024
     # condition: large_object <= large_object_gcptrs < min_nursery_size/4
 
     def __init__(self, *args, **kwds):
@@ -93,6 +120,7 @@ class HybridGC(GenerationGC):
         large_object_gcptrs = kwds.pop('large_object_gcptrs', 8*WORD)
         self.generation3_collect_threshold = kwds.pop(
             'generation3_collect_threshold', GENERATION3_COLLECT_THRESHOLD)
+        self.gen3_sweep_bytes = kwds.pop('gen3_sweep_bytes', 0)
         GenerationGC.__init__(self, *args, **kwds)
 
         # Objects whose total size is at least 'large_object' bytes are
@@ -117,10 +145,18 @@ class HybridGC(GenerationGC):
         self._initial_trigger = self.large_objects_collect_trigger
         self.rawmalloced_objects_to_trace = self.AddressStack()
         self.count_semispaceonly_collects = 0
+        self._swept_alive_size = 0
+        self._swept_dead_size = 0
 
         self.gen2_rawmalloced_objects = self.AddressStack()
         self.gen3_rawmalloced_objects = self.AddressStack()
+        self.gen3_objects_to_sweep = self.AddressStack()
         GenerationGC.setup(self)
+        # reading the environment allocates strings, so it can only be
+        # done once the GC is set up
+        newbytes = gen3_sweep_bytes_from_env()
+        if newbytes >= 0:
+            self.gen3_sweep_bytes = newbytes
 
     def set_max_heap_size(self, size):
         raise NotImplementedError
@@ -131,9 +167,11 @@ class HybridGC(GenerationGC):
     def malloc_varsize_clear(self, typeid, length, size, itemsize,
                              offset_to_length, can_collect):
         if not can_collect:
-            return SemiSpaceGC.malloc_varsize_clear(self, typeid, length, size,
-                                                    itemsize, offset_to_length,
-                                                    can_collect)
+            result = SemiSpaceGC.malloc_varsize_clear(self, typeid, length,
+                                                      size, itemsize,
+                                                      offset_to_length,
+                                                      can_collect)
+            return self.count_old_object(result)
         size_gc_header = self.gcheaderbuilder.size_gc_header
         nonvarsize = size_gc_header + size
 
@@ -190,13 +228,20 @@ class HybridGC(GenerationGC):
         else:
             nonlarge_max = self.nonlarge_max
         if force_nonmovable or raw_malloc_usage(totalsize) > nonlarge_max:
-            result = self.malloc_varsize_marknsweep(totalsize)
             flags = self.GCFLAGS_FOR_NEW_EXTERNAL_OBJECTS | GCFLAG_UNVISITED
+            if self.card_page_indices > 0 and self.has_gcptr_in_varsize(typeid):
+                cardheadersize = self.card_header_size(length)
+                flags |= GCFLAG_HAS_CARDS
+            else:
+                cardheadersize = 0
+            result = self.malloc_varsize_marknsweep(totalsize, cardheadersize)
         else:
             result = self.malloc_varsize_collecting_nursery(totalsize)
             flags = self.GCFLAGS_FOR_NEW_YOUNG_OBJECTS
         self.init_gc_object(result, typeid, flags)
         (result + size_gc_header + offset_to_length).signed[0] = length
+        if flags & GCFLAG_EXTERNAL:
+            self.count_external(result + size_gc_header, 1)
         return llmemory.cast_adr_to_ptr(result+size_gc_header, llmemory.GCREF)
 
     malloc_varsize_slowpath._dont_inline_ = True
@@ -235,17 +280,28 @@ class HybridGC(GenerationGC):
             self.semispace_collect()
             debug_stop("gc-rawsize-collect")
 
-    def malloc_varsize_marknsweep(self, totalsize):
+    def card_header_size(self, length):
+        # the number of bytes reserved for the cards in front of the GC
+        # header of an array of the given length, rounded up to a WORD
+        bytes = self.card_marking_bytes_for_length(length)
+        return (bytes + (WORD - 1)) & ~(WORD - 1)
+
+    def malloc_varsize_marknsweep(self, totalsize, cardheadersize=0):
         # In order to free the large objects from time to time, we
         # arbitrarily force a full collect() if none occurs when we have
         # allocated self.space_size + rawmalloced bytes of large objects.
-        self._check_rawsize_alloced(raw_malloc_usage(totalsize))
-        result = self.allocate_external_object(totalsize)
-        if not result:
-            raise MemoryError()
-        # The parent classes guarantee zero-filled allocations, so we
-        # need to follow suit.
-        llmemory.raw_memclear(result, totalsize)
+        self._check_rawsize_alloced(raw_malloc_usage(totalsize) +
+                                    cardheadersize)
+        if cardheadersize:
+            result = self.allocate_external_object_with_cards(totalsize,
+                                                              cardheadersize)
+        else:
+            result = self.allocate_external_object(totalsize)
+            if not result:
+                raise MemoryError()
+            # The parent classes guarantee zero-filled allocations, so we
+            # need to follow suit.
+            llmemory.raw_memclear(result, totalsize)
         size_gc_header = self.gcheaderbuilder.size_gc_header
         self.gen2_rawmalloced_objects.append(result + size_gc_header)
         return result
@@ -255,6 +311,40 @@ class HybridGC(GenerationGC):
         # If so, we'd also use arena_reset() in malloc_varsize_marknsweep().
         return llmemory.raw_malloc(totalsize)
 
+    def allocate_external_object_with_cards(self, totalsize, cardheadersize):
+        # The cards are stored in 'cardheadersize' bytes just before the
+        # GC header (see GenerationGC.get_card()), so we allocate the
+        # whole thing as an arena, zero-filled.
+        allocsize = cardheadersize + raw_malloc_usage(totalsize)
+        arena = llarena.arena_malloc(allocsize, True)
+        if not arena:
+            raise MemoryError()
+        i = 0
+        while i < cardheadersize:
+            llarena.arena_reserve(arena + i, llmemory.sizeof(lltype.Char))
+            i += 1
+        result = arena + cardheadersize
+        llarena.arena_reserve(result, totalsize)
+        return result
+
+    def count_external(self, obj, delta):
+        # the rawmalloced objects are counted from their allocation until
+        # they are freed (see SemiSpaceGC.count_in_space())
+        counter = self._type_counter(obj)
+        totalsize = self.size_gc_header() + self.get_size_incl_hash(obj)
+        counter.external_count += delta
+        counter.external_size += delta * raw_malloc_usage(totalsize)
+
+    def free_external_object(self, obj):
+        self.count_external(obj, -1)
+        addr = obj - self.gcheaderbuilder.size_gc_header
+        if self.header(obj).tid & GCFLAG_HAS_CARDS:
+            cardheadersize = self.card_header_size(self.get_length(obj))
+            arena = llarena.getfakearenaaddress(addr) - cardheadersize
+            llarena.arena_free(arena)
+        else:
+            llmemory.raw_free(addr)
+
     def init_gc_object_immortal(self, addr, typeid,
                                 flags=(GCFLAG_NO_YOUNG_PTRS |
                                        GCFLAG_NO_HEAP_PTRS |
@@ -271,6 +361,20 @@ class HybridGC(GenerationGC):
         if gen > 1:
             self.count_semispaceonly_collects = self.generation3_collect_threshold
         GenerationGC.collect(self, gen)
+        if gen > 1:
+            # an explicit full collection frees everything immediately
+            self.finish_gen3_sweep()
+
+    def collect_nursery(self):
+        result = GenerationGC.collect_nursery(self)
+        if self.gen3_objects_to_sweep.non_empty():
+            start_time = time.time()
+            self.sweep_gen3_step(self.gen3_sweep_bytes)
+            alive_size = self._swept_alive_size
+            self.record_gc_event(GC_EVENT_SWEEP, start_time,
+                                 alive_size + self._swept_dead_size,
+                                 alive_size)
+        return result
 
     def is_collecting_gen3(self):
         count = self.count_semispaceonly_collects
@@ -279,12 +383,19 @@ class HybridGC(GenerationGC):
     # ___________________________________________________________________
     # the following methods are hook into SemiSpaceGC.semispace_collect()
 
+    def full_collect_event_kind(self):
+        if self.is_collecting_gen3():
+            return GC_EVENT_FULL
+        return GC_EVENT_MAJOR
+
     def starting_full_collect(self):
         # At the start of a collection, the GCFLAG_UNVISITED bit is set
         # exactly on the objects in gen2_rawmalloced_objects.  Only
         # raw_malloc'ed objects can ever have this bit set.
         self.count_semispaceonly_collects += 1
         if self.is_collecting_gen3():
+            # the previous sweep of generation 3 must be completed first
+            self.finish_gen3_sweep()
             # set the GCFLAG_UNVISITED on all rawmalloced generation-3 objects
             # as well, to let them be recorded by visit_external_object()
             self.gen3_rawmalloced_objects.foreach(self._set_gcflag_unvisited,
@@ -389,6 +500,7 @@ class HybridGC(GenerationGC):
         self.gen3_rawmalloced_objects.append(newobj)
         self.last_generation_root_objects.append(newobj)
         self.rawmalloced_objects_to_trace.append(newobj)   # visit me
+        self.count_external(newobj, 1)
         return newobj
 
     def scan_copied(self, scan):
@@ -411,42 +523,29 @@ class HybridGC(GenerationGC):
         debug_print("| [hybrid] made nonmoving:         ",
                     self._nonmoving_copy_size, "bytes in",
                     self._nonmoving_copy_count, "objs")
-        rawmalloced_trigger = 0
-        # sweep the nonmarked rawmalloced objects
+        # sweep the nonmarked rawmalloced objects.  The generation 3
+        # objects are only put aside here, and swept by sweep_gen3_step()
+        # which also adds the size of the survivors to the trigger.
         if self.is_collecting_gen3():
-            rawmalloced_trigger += self.sweep_rawmalloced_objects(generation=3)
-        rawmalloced_trigger += self.sweep_rawmalloced_objects(generation=2)
+            self.start_gen3_sweep()
+        rawmalloced_trigger = self.sweep_gen2_rawmalloced_objects()
         self.large_objects_collect_trigger = (rawmalloced_trigger +
                                               self.space_size)
         if self.is_collecting_gen3():
             self.count_semispaceonly_collects = 0
         self._initial_trigger = self.large_objects_collect_trigger
-
-    def sweep_rawmalloced_objects(self, generation):
-        # free all the rawmalloced objects of the specified generation
-        # that have not been marked
-        if generation == 2:
-            objects = self.gen2_rawmalloced_objects
-            # generation 2 sweep: if A points to an object object B that
-            # moves from gen2 to gen3, it's possible that A no longer points
-            # to any gen2 object.  In this case, A remains a bit too long in
-            # last_generation_root_objects, but this will be fixed by the
-            # next collect_last_generation_roots().
-        elif generation == 3:
-            objects = self.gen3_rawmalloced_objects
-            # generation 3 sweep: remove from last_generation_root_objects
-            # all the objects that we are about to free
-            gen3roots = self.last_generation_root_objects
-            newgen3roots = self.AddressStack()
-            while gen3roots.non_empty():
-                obj = gen3roots.pop()
-                if not (self.header(obj).tid & GCFLAG_UNVISITED):
-                    newgen3roots.append(obj)
-            gen3roots.delete()
-            self.last_generation_root_objects = newgen3roots
-        else:
-            ll_assert(False, "bogus 'generation'")
-            return 0 # to please the flowspace
+        if self.gen3_sweep_bytes <= 0:
+            self.finish_gen3_sweep()
+
+    def sweep_gen2_rawmalloced_objects(self):
+        # free all the rawmalloced objects of generation 2 that have not
+        # been marked.  Generation 3 is swept by sweep_gen3_step().
+        objects = self.gen2_rawmalloced_objects
+        # generation 2 sweep: if A points to an object object B that
+        # moves from gen2 to gen3, it's possible that A no longer points
+        # to any gen2 object.  In this case, A remains a bit too long in
+        # last_generation_root_objects, but this will be fixed by the
+        # next collect_last_generation_roots().
 
         surviving_objects = self.AddressStack()
         # Help the flow space
@@ -459,43 +558,99 @@ class HybridGC(GenerationGC):
                 if debug:
                     dead_count+=1
                     dead_size+=raw_malloc_usage(self.get_size_incl_hash(obj))
-                addr = obj - self.gcheaderbuilder.size_gc_header
-                llmemory.raw_free(addr)
+                self.free_external_object(obj)
             else:
                 if debug:
                     alive_count+=1
                 alive_size+=raw_malloc_usage(self.get_size_incl_hash(obj))
-                if generation == 3:
+                ll_assert((tid & GCFLAG_AGE_MASK) < GCFLAG_AGE_MAX,
+                          "wrong age for generation 2 object")
+                tid += GCFLAG_AGE_ONE
+                if (tid & GCFLAG_AGE_MASK) == GCFLAG_AGE_MAX:
+                    # the object becomes part of generation 3
+                    self.gen3_rawmalloced_objects.append(obj)
+                    # GCFLAG_NO_HEAP_PTRS not set yet, conservatively
+                    self.last_generation_root_objects.append(obj)
+                else:
+                    # the object stays in generation 2
+                    tid |= GCFLAG_UNVISITED
                     surviving_objects.append(obj)
-                elif generation == 2:
-                    ll_assert((tid & GCFLAG_AGE_MASK) < GCFLAG_AGE_MAX,
-                              "wrong age for generation 2 object")
-                    tid += GCFLAG_AGE_ONE
-                    if (tid & GCFLAG_AGE_MASK) == GCFLAG_AGE_MAX:
-                        # the object becomes part of generation 3
-                        self.gen3_rawmalloced_objects.append(obj)
-                        # GCFLAG_NO_HEAP_PTRS not set yet, conservatively
-                        self.last_generation_root_objects.append(obj)
-                    else:
-                        # the object stays in generation 2
-                        tid |= GCFLAG_UNVISITED
-                        surviving_objects.append(obj)
-                    self.header(obj).tid = tid
+                self.header(obj).tid = tid
         objects.delete()
-        if generation == 2:
-            self.gen2_rawmalloced_objects = surviving_objects
-        elif generation == 3:
-            self.gen3_rawmalloced_objects = surviving_objects
-        debug_print("| [hyb] gen", generation,
-                    "nonmoving now alive: ",
+        self.gen2_rawmalloced_objects = surviving_objects
+        debug_print("| [hyb] gen 2 nonmoving now alive: ",
                     alive_size, "bytes in",
                     alive_count, "objs")
-        debug_print("| [hyb] gen", generation,
-                    "nonmoving freed:     ",
+        debug_print("| [hyb] gen 2 nonmoving freed:     ",
                     dead_size, "bytes in",
                     dead_count, "objs")
         return alive_size
 
+    def start_gen3_sweep(self):
+        ll_assert(not self.gen3_objects_to_sweep.non_empty(),
+                  "start_gen3_sweep: previous sweep not finished")
+        # remove from last_generation_root_objects all the objects that
+        # we are about to free
+        gen3roots = self.last_generation_root_objects
+        newgen3roots = self.AddressStack()
+        while gen3roots.non_empty():
+            obj = gen3roots.pop()
+            if not (self.header(obj).tid & GCFLAG_UNVISITED):
+                newgen3roots.append(obj)
+        gen3roots.delete()
+        self.last_generation_root_objects = newgen3roots
+        # put all the current gen3 objects aside; the surviving ones are
+        # moved back to gen3_rawmalloced_objects by sweep_gen3_step(),
+        # where the objects that reach generation 3 in the meantime are
+        # also added.
+        self.gen3_objects_to_sweep.delete()
+        self.gen3_objects_to_sweep = self.gen3_rawmalloced_objects
+        self.gen3_rawmalloced_objects = self.AddressStack()
+
+    def finish_gen3_sweep(self):
+        if self.gen3_objects_to_sweep.non_empty():
+            self.sweep_gen3_step(0)
+
+    def sweep_gen3_step(self, maxbytes):
+        # free the nonmarked objects among the next objects of
+        # gen3_objects_to_sweep, until we visited 'maxbytes' bytes of
+        # them, or among all of them if maxbytes <= 0
+        debug_start("gc-sweep-step")
+        objects = self.gen3_objects_to_sweep
+        # Help the flow space
+        alive_count = alive_size = dead_count = dead_size = 0
+        debug = have_debug_prints()
+        while objects.non_empty():
+            if maxbytes > 0 and alive_size + dead_size >= maxbytes:
+                break
+            obj = objects.pop()
+            hdr = self.header(obj)
+            size = raw_malloc_usage(self.get_size_incl_hash(obj))
+            if hdr.tid & GCFLAG_UNVISITED:
+                if debug:
+                    dead_count+=1
+                dead_size+=size
+                self.free_external_object(obj)
+            else:
+                if debug:
+                    alive_count+=1
+                alive_size+=size
+                self.gen3_rawmalloced_objects.append(obj)
+        self.large_objects_collect_trigger += alive_size
+        self._initial_trigger += alive_size
+        debug_print("| [hyb] gen 3 nonmoving still alive: ",
+                    alive_size, "bytes in",
+                    alive_count, "objs")
+        debug_print("| [hyb] gen 3 nonmoving freed:       ",
+                    dead_size, "bytes in",
+                    dead_count, "objs")
+        debug_print("| [hyb] gen 3 sweep finished:       ",
+                    not objects.non_empty())
+        debug_stop("gc-sweep-step")
+        # not returned as a tuple, which would be a GC malloc
+        self._swept_alive_size = alive_size
+        self._swept_dead_size = dead_size
+
     def id(self, ptr):
         obj = llmemory.cast_ptr_to_adr(ptr)
 
@@ -529,14 +684,27 @@ class HybridGC(GenerationGC):
         if tid & GCFLAG_UNVISITED:
             ll_assert(self._d_gen2ro.contains(obj),
                       "GCFLAG_UNVISITED on non-gen2 object")
+        # a reachable object must not be freed by the pending gen3 sweep
+        ll_assert(not self._d_gen3dead.contains(obj),
+                  "reachable object left for the gen3 sweep to free")
 
     def debug_check_consistency(self):
         if self.DEBUG:
             self._d_gen2ro = self.gen2_rawmalloced_objects.stack2dict()
+            self._d_gen3dead = self.AddressDict()
+            self.gen3_objects_to_sweep.foreach(self._debug_collect_gen3dead,
+                                               self._d_gen3dead)
             GenerationGC.debug_check_consistency(self)
             self._d_gen2ro.delete()
+            self._d_gen3dead.delete()
             self.gen2_rawmalloced_objects.foreach(self._debug_check_gen2, None)
             self.gen3_rawmalloced_objects.foreach(self._debug_check_gen3, None)
+            self.gen3_objects_to_sweep.foreach(self._debug_check_gen3_to_sweep,
+                                               None)
+
+    def _debug_collect_gen3dead(self, obj, d_gen3dead):
+        if self.header(obj).tid & GCFLAG_UNVISITED:
+            d_gen3dead.add(obj)
 
     def _debug_check_gen2(self, obj, ignored):
         tid = self.header(obj).tid
@@ -559,5 +727,21 @@ class HybridGC(GenerationGC):
         ll_assert((tid & GCFLAG_AGE_MASK) == GCFLAG_AGE_MAX,
                   "gen3: wrong age field")
 
+    def _debug_check_gen3_to_sweep(self, obj, ignored):
+        # either a survivor of the last gen3 collection, or an unreachable
+        # object that still has GCFLAG_UNVISITED
+        tid = self.header(obj).tid
+        ll_assert(bool(tid & GCFLAG_EXTERNAL),
+                  "gen3 to sweep: missing GCFLAG_EXTERNAL")
+        ll_assert(bool(tid & GC_HASH_TAKEN_ADDR),
+                  "gen3 to sweep: missing GC_HASH_TAKEN_ADDR")
+        ll_assert((tid & GCFLAG_AGE_MASK) == GCFLAG_AGE_MAX,
+                  "gen3 to sweep: wrong age field")
+
     def can_malloc_nonmovable(self):
         return True
+
+# ____________________________________________________________
+
+def gen3_sweep_bytes_from_env():
+    return read_from_env('PYPY_HYBRIDGC_SWEEP_BYTES')
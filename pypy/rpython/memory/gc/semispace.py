@@ -5,15 +5,17 @@ from pypy.rpython.memory.support import DEFAULT_CHUNK_SIZE
 from pypy.rpython.memory.support import get_address_stack, get_address_deque
 from pypy.rpython.memory.support import AddressDict
 from pypy.rpython.lltypesystem import lltype, llmemory, llarena, rffi, llgroup
-from pypy.rlib.objectmodel import free_non_gc_object
+from pypy.rlib.objectmodel import free_non_gc_object, we_are_translated
 from pypy.rlib.debug import ll_assert, have_debug_prints
 from pypy.rlib.debug import debug_print, debug_start, debug_stop
 from pypy.rpython.lltypesystem.lloperation import llop
 from pypy.rlib.rarithmetic import ovfcheck, LONG_BIT
 from pypy.rpython.memory.gc.base import MovingGCBase, ARRAY_TYPEID_MAP,\
-     TYPEID_MAP
+     TYPEID_MAP, HEAP_HISTOGRAM, TYPE_COUNTERS
+from pypy.rpython.memory.gc.base import GC_EVENT_BUFFER, GC_EVENTS
+from pypy.rpython.memory.gc.base import MAX_GC_EVENTS, GC_EVENT_MAJOR
 
-import sys, os
+import sys, os, time
 
 first_gcflag = 1 << (LONG_BIT//2)
 GCFLAG_FORWARDED = first_gcflag
@@ -64,6 +66,9 @@ class SemiSpaceGC(MovingGCBase):
         self.param_space_size = space_size
         self.param_max_space_size = max_space_size
         MovingGCBase.__init__(self, config, chunk_size)
+        # the buffer of events is prebuilt: it doesn't need to be freed
+        self.gc_events = lltype.malloc(GC_EVENT_BUFFER, MAX_GC_EVENTS,
+                                       flavor='raw', immortal=True)
 
     def setup(self):
         #self.total_collection_time = 0.0
@@ -80,14 +85,20 @@ class SemiSpaceGC(MovingGCBase):
         self.fromspace = llarena.arena_malloc(self.space_size, True)
         ll_assert(bool(self.fromspace), "couldn't allocate fromspace")
         self.free = self.tospace
+        # see count_in_space()
+        self.type_counters = lltype.malloc(TYPE_COUNTERS, 0, flavor='raw')
+        self.uncounted_start = self.free
         MovingGCBase.setup(self)
         self.objects_with_finalizers = self.AddressDeque()
         self.objects_with_weakrefs = self.AddressStack()
+        self.gc_events_count = 0
+        self.gc_events_lost = 0
 
     def _teardown(self):
         debug_print("Teardown")
         llarena.arena_free(self.fromspace)
         llarena.arena_free(self.tospace)
+        lltype.free(self.type_counters, flavor='raw')
 
     # This class only defines the malloc_{fixed,var}size_clear() methods
     # because the spaces are filled with zeroes in advance.
@@ -137,6 +148,12 @@ class SemiSpaceGC(MovingGCBase):
             totalsmallersize = (
                 size_gc_header + self.fixed_size(typeid) +
                 self.varsize_item_sizes(typeid) * smallerlength)
+            if not (self.uncounted_area_start() <= addr <
+                    self.uncounted_area_stop()):
+                counter = self._type_counter(addr)
+                counter.size -= raw_malloc_usage(size_gc_header +
+                                                 self.get_size(addr))
+                counter.size += raw_malloc_usage(totalsmallersize)
             llarena.arena_shrink_obj(addr - size_gc_header, totalsmallersize)
             #
             offset_to_length = self.varsize_offset_to_length(typeid)
@@ -245,7 +262,7 @@ class SemiSpaceGC(MovingGCBase):
         start_usage = self.free - self.tospace
         debug_print("| used before collection:          ",
                     start_usage, "bytes")
-        #start_time = time.time()
+        start_time = time.time()
         #llop.debug_print(lltype.Void, 'semispace_collect', int(size_changing))
 
         # Switch the spaces.  We copy everything over to the empty space
@@ -258,7 +275,9 @@ class SemiSpaceGC(MovingGCBase):
         self.tospace = tospace
         self.top_of_space = tospace + self.space_size
         scan = self.free = tospace
+        self.reset_space_counters()
         self.starting_full_collect()
+        event_kind = self.full_collect_event_kind()
         self.collect_roots()
         if self.run_finalizers.non_empty():
             self.update_run_finalizers()
@@ -268,11 +287,15 @@ class SemiSpaceGC(MovingGCBase):
         if self.objects_with_weakrefs.non_empty():
             self.invalidate_weakrefs()
         self.update_objects_with_id()
+        self.uncounted_start = self.free
         self.finished_full_collect()
         self.debug_check_consistency()
         if not size_changing:
             llarena.arena_reset(fromspace, self.space_size, True)
             self.record_red_zone()
+        self.record_gc_event(event_kind, start_time, start_usage,
+                             self.free - self.tospace)
+        if not size_changing:
             self.execute_finalizers()
         #llop.debug_print(lltype.Void, 'collected', self.space_size, size_changing, self.top_of_space - self.free)
         if have_debug_prints():
@@ -309,6 +332,54 @@ class SemiSpaceGC(MovingGCBase):
     def finished_full_collect(self):
         pass    # hook for the HybridGC
 
+    def full_collect_event_kind(self):
+        return GC_EVENT_MAJOR    # hook for the HybridGC
+
+    def record_gc_event(self, kind, start_time, size_before, size_after):
+        # called at the end of a collection, but before the finalizers run
+        if self.gc_events_count == MAX_GC_EVENTS:
+            self.gc_events_lost += 1
+            return
+        event = self.gc_events[self.gc_events_count]
+        event.kind = kind
+        event.start = start_time
+        event.duration = time.time() - start_time
+        event.size_before = size_before
+        event.size_after = size_after
+        self.gc_events_count += 1
+
+    def get_collection_events(self):
+        """Return and forget the events recorded so far, or NULL if there
+        are none."""
+        count = self.gc_events_count
+        if count == 0 and self.gc_events_lost == 0:
+            return lltype.nullptr(GC_EVENTS)
+        result = lltype.malloc(GC_EVENTS, count, zero=True)
+        # the malloc() above may have recorded more events; keep them
+        i = 0
+        while i < count:
+            src = self.gc_events[i]
+            dst = result.events[i]
+            dst.kind = src.kind
+            dst.start = src.start
+            dst.duration = src.duration
+            dst.size_before = src.size_before
+            dst.size_after = src.size_after
+            i += 1
+        while i < self.gc_events_count:
+            src = self.gc_events[i]
+            event = self.gc_events[i - count]
+            event.kind = src.kind
+            event.start = src.start
+            event.duration = src.duration
+            event.size_before = src.size_before
+            event.size_after = src.size_after
+            i += 1
+        self.gc_events_count -= count
+        result.lost = self.gc_events_lost
+        self.gc_events_lost = 0
+        return result
+
     def record_red_zone(self):
         # red zone: if the space is more than 80% full, the next collection
         # should double its size.  If it is more than 66% full twice in a row,
@@ -391,6 +462,7 @@ class SemiSpaceGC(MovingGCBase):
         newhdr = llmemory.cast_adr_to_ptr(newaddr, lltype.Ptr(self.HDR))
         newhdr.tid = tid
         newobj = newaddr + self.size_gc_header()
+        self.count_in_space(newobj, raw_malloc_usage(totalsize))
         return newobj
 
     def make_a_copy(self, obj, objsize):
@@ -715,3 +787,122 @@ class SemiSpaceGC(MovingGCBase):
         self._ll_typeid_map = lltype.nullptr(ARRAY_TYPEID_MAP)
         self._tracked_dict.delete()
         return ll_typeid_map
+
+    # The per-type counters: the objects copied into the semispace by a
+    # collection are counted in self.type_counters, and these counts are
+    # reset at the start of each full collection.  The objects allocated
+    # since then are not counted yet; they are all in the area between
+    # uncounted_area_start() and uncounted_area_stop().  The subclasses
+    # also count there the objects that they allocate outside this area,
+    # and the external objects until they are freed.  So the counts
+    # include the objects that died since the last collection that
+    # could have freed them, like the bytes used by the semispace.
+
+    def _type_counter(self, obj):
+        idx = self.get_member_index(self.get_type_id(obj))
+        if idx >= len(self.type_counters):
+            self._grow_type_counters(idx + 1)
+        return self.type_counters[idx]
+
+    def _grow_type_counters(self, minlength):
+        old = self.type_counters
+        newlength = len(old) * 2
+        if newlength < minlength:
+            newlength = minlength
+        new = lltype.malloc(TYPE_COUNTERS, newlength, flavor='raw')
+        i = 0
+        while i < len(old):
+            new[i].count = old[i].count
+            new[i].size = old[i].size
+            new[i].external_count = old[i].external_count
+            new[i].external_size = old[i].external_size
+            i += 1
+        while i < newlength:
+            new[i].count = 0
+            new[i].size = 0
+            new[i].external_count = 0
+            new[i].external_size = 0
+            i += 1
+        lltype.free(old, flavor='raw')
+        self.type_counters = new
+    _grow_type_counters._dont_inline_ = True
+
+    def count_in_space(self, obj, size):
+        counter = self._type_counter(obj)
+        counter.count += 1
+        counter.size += size
+
+    def reset_space_counters(self):
+        counters = self.type_counters
+        i = 0
+        while i < len(counters):
+            counters[i].count = 0
+            counters[i].size = 0
+            i += 1
+
+    def uncounted_area_start(self):
+        return self.uncounted_start
+
+    def uncounted_area_stop(self):
+        return self.free
+
+    # The heap histogram is a lighter version of heap_stats(): no links
+    # between types, and no walk of the heap.  It copies the per-type
+    # counters and only visits the objects of the uncounted area, i.e.
+    # the nursery for the GenerationGC.
+
+    def _histogram_discount(self, histogram, start, stop):
+        obj = llmemory.cast_ptr_to_adr(histogram)
+        totsize = self.size_gc_header() + self.get_size_incl_hash(obj)
+        size = raw_malloc_usage(totsize)
+        entry = histogram.types[self.get_member_index(self.get_type_id(obj))]
+        entry.count -= 1
+        entry.size -= size
+        if start <= obj < stop:
+            if self.is_in_nursery(obj):
+                entry.nursery_count -= 1
+                entry.nursery_size -= size
+        elif not (self.tospace <= obj < self.free):
+            entry.external_count -= 1
+            entry.external_size -= size
+            histogram.rawmalloced_bytes -= size
+
+    def heap_histogram_totals(self, histogram):
+        histogram.space_bytes = self.free - self.tospace
+
+    def heap_histogram(self):
+        max_tid = self.root_walker.gcdata.max_type_id
+        histogram = lltype.malloc(HEAP_HISTOGRAM, max_tid, zero=True)
+        counters = self.type_counters
+        i = 0
+        while i < len(counters) and i < max_tid:
+            entry = histogram.types[i]
+            counter = counters[i]
+            entry.count = counter.count + counter.external_count
+            entry.size = counter.size + counter.external_size
+            entry.external_count = counter.external_count
+            entry.external_size = counter.external_size
+            histogram.rawmalloced_bytes += counter.external_size
+            i += 1
+        size_gc_header = self.size_gc_header()
+        start = self.uncounted_area_start()
+        stop = self.uncounted_area_stop()
+        addr = start
+        while addr < stop:
+            obj = addr + size_gc_header
+            totsize = size_gc_header + self.get_size_incl_hash(obj)
+            idx = self.get_member_index(self.get_type_id(obj))
+            entry = histogram.types[idx]
+            size = raw_malloc_usage(totsize)
+            entry.count += 1
+            entry.size += size
+            if self.is_in_nursery(obj):
+                entry.nursery_count += 1
+                entry.nursery_size += size
+            addr += llarena.round_up_for_allocation(totsize)
+        # the histogram itself is not counted, wherever it was allocated
+        # (when not translated, it is not allocated by this GC at all)
+        if we_are_translated():
+            self._histogram_discount(histogram, start, stop)
+        self.heap_histogram_totals(histogram)
+        return histogram
@@ -95,7 +95,10 @@ class DirectGCTest(object):
         if self.gc.needs_write_barrier:
             newaddr = llmemory.cast_ptr_to_adr(newvalue)
             addr_struct = llmemory.cast_ptr_to_adr(p)
-            self.gc.write_barrier(newaddr, addr_struct)
+            if hasattr(self.gc, 'write_barrier_from_array'):
+                self.gc.write_barrier_from_array(newaddr, addr_struct, index)
+            else:
+                self.gc.write_barrier(newaddr, addr_struct)
         p[index] = newvalue
 
     def malloc(self, TYPE, n=None):
@@ -345,6 +348,78 @@ class TestSemiSpaceGC(DirectGCTest):
         for i in range(1):
             assert p1.v[i] == chr(50 + i)
 
+    def test_heap_histogram(self):
+        self.stackroots.append(self.malloc(S))
+        for i in range(16):
+            p = self.malloc(S)
+            self.write(p, 'next', self.stackroots[0])
+            self.stackroots[0] = p
+        self.malloc(S)      # unreachable, counted until a collection frees it
+        self.stackroots.append(self.malloc(VAR, 3))
+        for i in range(3):
+            p = self.malloc(S)
+            self.writearray(self.stackroots[1], i, p)
+        class FakeGCData:
+            max_type_id = len(self.layoutbuilder.type_info_group.members)
+        self.rootwalker.gcdata = FakeGCData()
+        hist = self.gc.heap_histogram()
+        entry = hist.types[self.get_type_id(S).index]
+        size = llmemory.raw_malloc_usage(self.gc.size_gc_header() +
+                                         llmemory.sizeof(S))
+        dead = entry.count - 20     # 0 if a minor collection freed it
+        assert dead in (0, 1)
+        assert entry.size == entry.count * size
+        assert entry.nursery_count + entry.external_count <= entry.count
+        assert entry.nursery_size + entry.external_size <= entry.size
+        assert hist.types[self.get_type_id(VAR).index].count == 1
+        assert sum([hist.types[i].count
+                    for i in range(len(hist.types))]) == 21 + dead
+        #
+        self.gc.collect()
+        hist = self.gc.heap_histogram()
+        entry = hist.types[self.get_type_id(S).index]
+        assert entry.count == 20
+        assert entry.size == 20 * size
+        assert entry.nursery_count == 0
+        assert sum([hist.types[i].count
+                    for i in range(len(hist.types))]) == 21
+        #
+        # the counters follow the objects allocated and copied afterwards
+        self.stackroots.append(self.malloc(S))
+        self.gc.collect()
+        hist = self.gc.heap_histogram()
+        assert hist.types[self.get_type_id(S).index].count == 21
+        del self.stackroots[:]
+        self.gc.collect()
+        hist = self.gc.heap_histogram()
+        assert sum([hist.types[i].count
+                    for i in range(len(hist.types))]) == 0
+        assert hist.rawmalloced_bytes == 0
+
+    def test_collection_events(self):
+        from pypy.rpython.memory.gc.base import GC_EVENT_MAJOR, MAX_GC_EVENTS
+        gc = self.gc
+        self.stackroots.append(self.malloc(S))
+        gc.get_collection_events()
+        assert not gc.get_collection_events()
+        gc.collect(1)
+        gc.collect(1)
+        result = gc.get_collection_events()
+        majors = [event for event in result.events
+                        if event.kind == GC_EVENT_MAJOR]
+        assert len(majors) == 2
+        for event in majors:
+            assert event.duration >= 0.0
+            assert event.size_after >= llmemory.raw_malloc_usage(
+                llmemory.sizeof(S))
+        assert result.lost == 0
+        assert not gc.get_collection_events()
+        #
+        gc.gc_events_count = MAX_GC_EVENTS
+        gc.collect(1)
+        assert gc.gc_events_count == MAX_GC_EVENTS
+        assert gc.gc_events_lost == 1
+
 
 class TestGenerationGC(TestSemiSpaceGC):
     from pypy.rpython.memory.gc.generation import GenerationGC as GCClass
@@ -391,6 +466,19 @@ class TestGenerationGC(TestSemiSpaceGC):
 
         assert s0.next.x == 1
 
+    def test_collection_events_minor(self):
+        from pypy.rpython.memory.gc.base import GC_EVENT_MINOR
+        gc = self.gc
+        self.stackroots.append(self.malloc(S))
+        gc.get_collection_events()
+        gc.collect(0)
+        result = gc.get_collection_events()
+        [event] = result.events
+        assert event.kind == GC_EVENT_MINOR
+        size = llmemory.raw_malloc_usage(llmemory.sizeof(S))
+        assert event.size_before >= size
+        assert event.size_after >= size
+
 
 class TestHybridGC(TestGenerationGC):
     from pypy.rpython.memory.gc.hybrid import HybridGC as GCClass
@@ -441,6 +529,231 @@ class TestHybridGC(TestGenerationGC):
     def test_identityhash(self):
         py.test.skip("does not support raw_mallocs(sizeof(S)+sizeof(hash))")
 
+    def test_heap_histogram_external(self):
+        self.stackroots.append(self.malloc(VAR, 10))   # rawmalloced
+        self.stackroots.append(self.malloc(S))
+        class FakeGCData:
+            max_type_id = len(self.layoutbuilder.type_info_group.members)
+        self.rootwalker.gcdata = FakeGCData()
+        self.gc.collect()
+        hist = self.gc.heap_histogram()
+        var_entry = hist.types[self.get_type_id(VAR).index]
+        assert var_entry.count == var_entry.external_count == 1
+        assert var_entry.size == var_entry.external_size
+        assert hist.rawmalloced_bytes == var_entry.external_size
+        # the S object is copied until it gets old enough to be moved
+        # out of the semispace, and stays counted once
+        for i in range(10):
+            self.gc.collect(1)
+            hist = self.gc.heap_histogram()
+            assert hist.types[self.get_type_id(S).index].count == 1
+        s_entry = hist.types[self.get_type_id(S).index]
+        assert s_entry.external_count == 1
+        assert hist.rawmalloced_bytes == (var_entry.external_size +
+                                          s_entry.external_size)
+        # the counts drop when the rawmalloced objects are freed
+        del self.stackroots[:]
+        self.gc.collect()
+        hist = self.gc.heap_histogram()
+        assert sum([hist.types[i].count
+                    for i in range(len(hist.types))]) == 0
+        assert hist.rawmalloced_bytes == 0
+
+
+class TestHybridGCWithCards(TestHybridGC):
+    GC_PARAMS = TestHybridGC.GC_PARAMS.copy()
+    GC_PARAMS['card_page_indices'] = 4
+
+    def test_card_marking(self):
+        from pypy.rpython.memory.gc import generation
+        gc = self.gc
+        a = self.malloc(VAR, 100)     # large: allocated with cards
+        self.stackroots.append(a)
+        addr_a = llmemory.cast_ptr_to_adr(a)
+        tid = gc.header(addr_a).tid
+        assert tid & generation.GCFLAG_HAS_CARDS
+        assert tid & generation.GCFLAG_NO_YOUNG_PTRS
+        for index in [5, 6, 41, 99]:
+            s = self.malloc(S)
+            s.x = index
+            self.writearray(a, index, s)
+        # the array still has GCFLAG_NO_YOUNG_PTRS, but its cards 1, 10
+        # and 24 are marked
+        a = self.stackroots[0]
+        tid = gc.header(addr_a).tid
+        assert tid & generation.GCFLAG_NO_YOUNG_PTRS
+        assert tid & generation.GCFLAG_CARDS_SET
+        cards = [ord(gc.get_card(addr_a, i).char[0]) for i in range(4)]
+        assert cards == [1 << 1, 1 << 2, 0, 1 << 0]
+        assert gc.old_objects_with_cards_set.non_empty()
+        #
+        gc.collect(0)
+        a = self.stackroots[0]
+        for index in range(100):
+            if index in [5, 6, 41, 99]:
+                assert a[index].x == index
+                assert not gc.is_in_nursery(llmemory.cast_ptr_to_adr(a[index]))
+            else:
+                assert not a[index]
+        tid = gc.header(addr_a).tid
+        assert not (tid & generation.GCFLAG_CARDS_SET)
+        cards = [ord(gc.get_card(addr_a, i).char[0]) for i in range(4)]
+        assert cards == [0, 0, 0, 0]
+        assert not gc.old_objects_with_cards_set.non_empty()
+    test_card_marking.GC_PARAMS = {'space_size': 96*WORD,
+                                   'min_nursery_size': 24*WORD,
+                                   'nursery_size': 24*WORD}
+
+    def test_card_marking_full_collect(self):
+        gc = self.gc
+        a = self.malloc(VAR, 50)
+        self.stackroots.append(a)
+        for index in range(0, 50, 7):
+            s = self.malloc(S)
+            s.x = index
+            self.writearray(a, index, s)
+        gc.collect()
+        a = self.stackroots[0]
+        for index in range(50):
+            if index % 7 == 0:
+                assert a[index].x == index
+            else:
+                assert not a[index]
+        assert not gc.old_objects_with_cards_set.non_empty()
+        # the array dies and is freed together with its cards
+        self.stackroots.pop()
+        gc.collect()
+
+
+class TestHybridGCIncrementalSweep(TestHybridGC):
+    GC_PARAMS = TestHybridGC.GC_PARAMS.copy()
+    GC_PARAMS['gen3_sweep_bytes'] = 1     # one object per step
+
+    def test_gen3_incremental_sweep(self):
+        gc = self.gc
+        for i in range(3):
+            self.stackroots.append(self.malloc(VAR, 20 + i))
+        for i in range(4):
+            gc.collect(1)
+        # now the three arrays are in generation 3
+        addrs = [llmemory.cast_ptr_to_adr(p) for p in self.stackroots]
+        for addr in addrs:
+            assert gc.is_last_generation(addr)
+        del self.stackroots[1:]
+        freed = []
+        orig_free_external_object = gc.free_external_object
+        def free_external_object(obj):
+            freed.append(gc.get_length(obj))
+            orig_free_external_object(obj)
+        gc.free_external_object = free_external_object
+        #
+        gc.count_semispaceonly_collects = gc.generation3_collect_threshold
+        gc.collect(1)
+        assert gc.count_semispaceonly_collects == 0
+        # nothing was freed yet, but the gen3 objects were put aside
+        assert freed == []
+        assert gc.gen3_objects_to_sweep.non_empty()
+        assert not gc.gen3_rawmalloced_objects.non_empty()
+        # each minor collection sweeps one of them
+        for i in range(3):
+            gc.collect(0)
+        assert not gc.gen3_objects_to_sweep.non_empty()
+        assert sorted(freed) == [21, 22]
+        stack = gc.gen3_rawmalloced_objects
+        assert stack.pop() == addrs[0]
+        assert not stack.non_empty()
+        stack.append(addrs[0])
+
+    def test_gen3_sweep_budget_in_bytes(self):
+        from pypy.rpython.lltypesystem.llmemory import raw_malloc_usage
+        gc = self.gc
+        self.stackroots.append(self.malloc(VAR, 200))
+        for i in range(4):
+            self.stackroots.append(self.malloc(VAR, 20))
+        for i in range(4):
+            gc.collect(1)
+        sizes = {}
+        for p in self.stackroots:
+            addr = llmemory.cast_ptr_to_adr(p)
+            assert gc.is_last_generation(addr)
+            sizes[gc.get_length(addr)] = raw_malloc_usage(
+                gc.get_size_incl_hash(addr))
+        del self.stackroots[:]
+        # a budget of two small objects
+        budget = gc.gen3_sweep_bytes = 2 * sizes[20]
+        assert sizes[200] > budget
+        steps = []
+        orig_free_external_object = gc.free_external_object
+        def free_external_object(obj):
+            steps[-1].append(gc.get_length(obj))
+            orig_free_external_object(obj)
+        gc.free_external_object = free_external_object
+        gc.count_semispaceonly_collects = gc.generation3_collect_threshold
+        gc.collect(1)
+        while gc.gen3_objects_to_sweep.non_empty():
+            steps.append([])
+            gc.collect(0)
+        assert sorted(sum(steps, [])) == [20, 20, 20, 20, 200]
+        # a step stops as soon as it visited 'budget' bytes
+        for step in steps:
+            assert sum([sizes[length] for length in step[:-1]]) < budget
+        assert len(steps) < 5
+        assert [200] in steps or [20, 200] in steps
+
+    def test_gen3_sweep_debug_check(self):
+        from pypy.rpython.memory.gc.hybrid import GCFLAG_UNVISITED
+        gc = self.gc
+        for i in range(3):
+            self.stackroots.append(self.malloc(VAR, 20))
+        for i in range(4):
+            gc.collect(1)
+        del self.stackroots[1:]
+        gc.count_semispaceonly_collects = gc.generation3_collect_threshold
+        gc.collect(1)
+        assert gc.gen3_objects_to_sweep.non_empty()
+        gc.debug_check_consistency()
+        # pretend that the surviving object was not marked
+        addr = llmemory.cast_ptr_to_adr(self.stackroots[0])
+        gc.header(addr).tid |= GCFLAG_UNVISITED
+        py.test.raises(AssertionError, gc.debug_check_consistency)
+        gc.header(addr).tid &= ~GCFLAG_UNVISITED
+
+    def test_gen3_sweep_finished_by_full_collect(self):
+        gc = self.gc
+        for i in range(3):
+            self.stackroots.append(self.malloc(VAR, 20))
+        for i in range(4):
+            gc.collect(1)
+        del self.stackroots[:]
+        gc.count_semispaceonly_collects = gc.generation3_collect_threshold
+        gc.collect(1)
+        assert gc.gen3_objects_to_sweep.non_empty()
+        gc.collect()
+        assert not gc.gen3_objects_to_sweep.non_empty()
+        assert not gc.gen3_rawmalloced_objects.non_empty()
+
+    def test_collection_events_sweep(self):
+        from pypy.rpython.memory.gc.base import GC_EVENT_FULL, GC_EVENT_SWEEP
+        gc = self.gc
+        for i in range(3):
+            self.stackroots.append(self.malloc(VAR, 20))
+        for i in range(4):
+            gc.collect(1)
+        del self.stackroots[1:]
+        gc.count_semispaceonly_collects = gc.generation3_collect_threshold
+        gc.get_collection_events()
+        gc.collect(1)
+        for i in range(3):
+            gc.collect(0)
+        result = gc.get_collection_events()
+        kinds = [event.kind for event in result.events]
+        assert kinds[0] == GC_EVENT_FULL
+        sweeps = [event for event in result.events
+                        if event.kind == GC_EVENT_SWEEP]
+        assert len(sweeps) == 3
+        freed = [event.size_before - event.size_after for event in sweeps]
+        assert len([size for size in freed if size > 0]) == 2
+
 
 class TestMarkCompactGC(DirectGCTest):
     from pypy.rpython.memory.gc.markcompact import MarkCompactGC as GCClass
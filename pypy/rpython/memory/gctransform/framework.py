@@ -132,6 +132,27 @@ def find_clean_setarrayitems(collect_analyzer, graph):
                 cache = set()
     return result
 
+def get_index_in_var_part(op):
+    """For a setarrayitem or setinteriorfield that writes into the
+    variable-sized part of a GC object, return the variable containing
+    the index of the item.  Return None for all other sets.
+    """
+    TYPE = op.args[0].concretetype.TO
+    if op.opname == 'setarrayitem':
+        return op.args[1]
+    if op.opname == 'setinteriorfield':
+        offsets = op.args[1:-1]
+        if isinstance(TYPE, lltype.Struct) and TYPE._arrayfld is not None:
+            # skip the name of the field that is the inlined array
+            if offsets[0].value != TYPE._arrayfld:
+                return None
+            offsets = offsets[1:]
+        elif not isinstance(TYPE, lltype.Array):
+            return None
+        if offsets and offsets[0].concretetype == lltype.Signed:
+            return offsets[0]
+    return None
+
 class FrameworkGCTransformer(GCTransformer):
     use_stackless = False
     root_stack_depth = 163840
@@ -139,6 +160,8 @@ class FrameworkGCTransformer(GCTransformer):
     def __init__(self, translator):
         from pypy.rpython.memory.gc.base import choose_gc_from_config
         from pypy.rpython.memory.gc.base import ARRAY_TYPEID_MAP
+        from pypy.rpython.memory.gc.base import HEAP_HISTOGRAM
+        from pypy.rpython.memory.gc.base import GC_EVENTS
         super(FrameworkGCTransformer, self).__init__(translator, inline=True)
         if hasattr(self, 'GC_PARAMS'):
             # for tests: the GC choice can be specified as class attributes
@@ -305,6 +328,17 @@ class FrameworkGCTransformer(GCTransformer):
                 [s_gc, annmodel.SomeInteger(knowntype=llgroup.r_halfword)],
                 annmodel.SomeInteger())
 
+        if hasattr(GCClass, 'heap_histogram'):
+            self.heap_histogram_ptr = getfn(GCClass.heap_histogram.im_func,
+                    [s_gc], annmodel.SomePtr(lltype.Ptr(HEAP_HISTOGRAM)),
+                    minimal_transform=False)
+
+        if hasattr(GCClass, 'get_collection_events'):
+            self.get_collection_events_ptr = getfn(
+                GCClass.get_collection_events.im_func,
+                [s_gc], annmodel.SomePtr(lltype.Ptr(GC_EVENTS)),
+                minimal_transform=False)
+
         if hasattr(GCClass, 'writebarrier_before_copy'):
             self.wb_before_copy_ptr = \
                     getfn(GCClass.writebarrier_before_copy.im_func,
@@ -408,8 +442,27 @@ class FrameworkGCTransformer(GCTransformer):
                                                [annmodel.SomeAddress(),
                                                 annmodel.SomeAddress()],
                                                annmodel.s_None)
+            if getattr(gcdata.gc, 'card_page_indices', 0) > 0:
+                self.write_barrier_from_array_ptr = getfn(
+                    GCClass.write_barrier_from_array.im_func,
+                    [s_gc,
+                     annmodel.SomeAddress(),
+                     annmodel.SomeAddress(),
+                     annmodel.SomeInteger(nonneg=True)],
+                    annmodel.s_None,
+                    inline=True)
+                func = gcdata.gc.remember_young_pointer_from_array
+                assert isinstance(func, types.FunctionType)
+                self.wb_from_array_failing_case_ptr = getfn(func,
+                                               [annmodel.SomeAddress(),
+                                                annmodel.SomeInteger(),
+                                                annmodel.SomeAddress()],
+                                               annmodel.s_None)
+            else:
+                self.write_barrier_from_array_ptr = None
         else:
             self.write_barrier_ptr = None
+            self.write_barrier_from_array_ptr = None
         self.statistics_ptr = getfn(GCClass.statistics.im_func,
                                     [s_gc, annmodel.SomeInteger()],
                                     annmodel.SomeInteger())
@@ -684,6 +737,25 @@ class FrameworkGCTransformer(GCTransformer):
                   resultvar=op.result)
         self.pop_roots(hop, livevars)
 
+    def gct_gc_heap_histogram(self, hop):
+        if not hasattr(self, 'heap_histogram_ptr'):
+            return GCTransformer.gct_gc_heap_histogram(self, hop)
+        op = hop.spaceop
+        livevars = self.push_roots(hop)
+        hop.genop("direct_call", [self.heap_histogram_ptr, self.c_const_gc],
+                  resultvar=op.result)
+        self.pop_roots(hop, livevars)
+
+    def gct_gc_get_collection_events(self, hop):
+        if not hasattr(self, 'get_collection_events_ptr'):
+            return GCTransformer.gct_gc_get_collection_events(self, hop)
+        op = hop.spaceop
+        livevars = self.push_roots(hop)
+        hop.genop("direct_call", [self.get_collection_events_ptr,
+                                  self.c_const_gc],
+                  resultvar=op.result)
+        self.pop_roots(hop, livevars)
+
     def gct_get_member_index(self, hop):
         op = hop.spaceop
         v_typeid = op.args[0]
@@ -766,6 +838,12 @@ class FrameworkGCTransformer(GCTransformer):
                   [self.write_barrier_failing_case_ptr],
                   resultvar=op.result)
 
+    def gct_get_write_barrier_from_array_failing_case(self, hop):
+        op = hop.spaceop
+        hop.genop("same_as",
+                  [self.wb_from_array_failing_case_ptr],
+                  resultvar=op.result)
+
     def gct_zero_gc_pointers_inside(self, hop):
         if not self.malloc_zero_filled:
             v_ob = hop.spaceop.args[0]
@@ -915,10 +993,20 @@ class FrameworkGCTransformer(GCTransformer):
                                    resulttype = llmemory.Address)
             v_structaddr = hop.genop("cast_ptr_to_adr", [v_struct],
                                      resulttype = llmemory.Address)
-            hop.genop("direct_call", [self.write_barrier_ptr,
-                                      self.c_const_gc,
-                                      v_newvalue,
-                                      v_structaddr])
+            v_index = None
+            if self.write_barrier_from_array_ptr is not None:
+                v_index = get_index_in_var_part(hop.spaceop)
+            if v_index is not None:
+                hop.genop("direct_call", [self.write_barrier_from_array_ptr,
+                                          self.c_const_gc,
+                                          v_newvalue,
+                                          v_structaddr,
+                                          v_index])
+            else:
+                hop.genop("direct_call", [self.write_barrier_ptr,
+                                          self.c_const_gc,
+                                          v_newvalue,
+                                          v_structaddr])
         hop.rename('bare_' + opname)
 
     def transform_getfield_typeptr(self, hop):
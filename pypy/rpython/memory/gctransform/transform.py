@@ -404,6 +404,18 @@ class BaseGCTransformer(object):
         return hop.cast_result(rmodel.inputconst(lltype.Ptr(ARRAY_TYPEID_MAP),
                                         lltype.nullptr(ARRAY_TYPEID_MAP)))
 
+    def gct_gc_heap_histogram(self, hop):
+        from pypy.rpython.memory.gc.base import HEAP_HISTOGRAM
+
+        return hop.cast_result(rmodel.inputconst(lltype.Ptr(HEAP_HISTOGRAM),
+                                        lltype.nullptr(HEAP_HISTOGRAM)))
+
+    def gct_gc_get_collection_events(self, hop):
+        from pypy.rpython.memory.gc.base import GC_EVENTS
+
+        return hop.cast_result(rmodel.inputconst(lltype.Ptr(GC_EVENTS),
+                                        lltype.nullptr(GC_EVENTS)))
+
 class MinimalGCTransformer(BaseGCTransformer):
     def __init__(self, parenttransformer):
         BaseGCTransformer.__init__(self, parenttransformer.translator)
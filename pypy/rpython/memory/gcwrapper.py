@@ -78,13 +78,21 @@ class GCManagedHeap(object):
         ARRAY = lltype.typeOf(array).TO
         addr = llmemory.cast_ptr_to_adr(array)
         addr += llmemory.itemoffsetof(ARRAY, index)
-        self.setinterior(array, addr, ARRAY.OF, newitem)
+        self.setinterior(array, addr, ARRAY.OF, newitem, index)
 
-    def setinterior(self, toplevelcontainer, inneraddr, INNERTYPE, newvalue):
+    def setinterior(self, toplevelcontainer, inneraddr, INNERTYPE, newvalue,
+                    index=-1):
         if (lltype.typeOf(toplevelcontainer).TO._gckind == 'gc' and
             isinstance(INNERTYPE, lltype.Ptr) and INNERTYPE.TO._gckind == 'gc'):
-            self.gc.write_barrier(llmemory.cast_ptr_to_adr(newvalue),
-                                  llmemory.cast_ptr_to_adr(toplevelcontainer))
+            if index >= 0 and hasattr(self.gc, 'write_barrier_from_array'):
+                self.gc.write_barrier_from_array(
+                    llmemory.cast_ptr_to_adr(newvalue),
+                    llmemory.cast_ptr_to_adr(toplevelcontainer),
+                    index)
+            else:
+                self.gc.write_barrier(
+                    llmemory.cast_ptr_to_adr(newvalue),
+                    llmemory.cast_ptr_to_adr(toplevelcontainer))
         llheap.setinterior(toplevelcontainer, inneraddr, INNERTYPE, newvalue)
 
     def collect(self, *gen):
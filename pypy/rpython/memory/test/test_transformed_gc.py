@@ -135,8 +135,11 @@ class GCTest(object):
         gct = db.gctransformer
 
         if self.__class__.__dict__.get('_used', False):
+            # the teardown frees raw memory that the previous runner's
+            # interpreter allocated, so this one cannot track it
             teardowngraph = gct.frameworkgc__teardown_ptr.value._obj.graph
-            llinterp.eval_graph(teardowngraph, [])
+            LLInterpreter(self.rtyper, malloc_check=False).eval_graph(
+                teardowngraph, [])
         self.__class__._used = True
 
         # FIIIIISH
@@ -855,6 +858,70 @@ class GenericMovingGCTests(GenericGCTests):
         # ^^^ a crude assumption that totsize - varsize would be dividable by 4
         #     (and give fixedsize)
 
+    def define_gc_heap_histogram(cls):
+        S = lltype.GcStruct('S', ('x', lltype.Signed))
+        T = lltype.GcStruct('T', ('y', lltype.Signed))
+
+        def f():
+            l1 = []
+            for i in range(17):
+                l1.append(lltype.malloc(S))
+            llop.gc__collect(lltype.Void)
+            t = lltype.malloc(T)
+            t.y = 42
+            hist = rgc._heap_histogram()
+            if not hist:
+                return -1
+            a = 0
+            b = 0
+            for i in range(len(hist.types)):
+                entry = hist.types[i]
+                if entry.count == 17 and entry.size >= 17 * 2 * WORD:
+                    a += 1
+                if (entry.nursery_count + entry.external_count > entry.count
+                    or entry.nursery_size + entry.external_size > entry.size):
+                    b += 1
+            c = int(hist.space_bytes > 0)
+            return a * 100 + b * 10 + c + t.y - 42 + len(l1) - 17
+        return f
+
+    def test_gc_heap_histogram(self):
+        run = self.runner("gc_heap_histogram")
+        res = run([])
+        GCClass = self.gcpolicy.transformerclass.GCClass
+        if hasattr(GCClass, 'heap_histogram'):
+            assert res == 101
+        else:
+            assert res == -1
+
+    def define_collection_events(cls):
+        S = lltype.GcStruct('S', ('x', lltype.Signed))
+        def f():
+            s = lltype.malloc(S)
+            s.x = 42
+            rgc._get_collection_events()
+            llop.gc__collect(lltype.Void)
+            llop.gc__collect(lltype.Void)
+            result = rgc._get_collection_events()
+            if not result:
+                return -1
+            count = 0
+            for i in range(len(result.events)):
+                event = result.events[i]
+                if event.duration >= 0.0 and event.size_after > 0:
+                    count += 1
+            return count + s.x - 42
+        return f
+
+    def test_collection_events(self):
+        run = self.runner("collection_events")
+        res = run([])
+        GCClass = self.gcpolicy.transformerclass.GCClass
+        if hasattr(GCClass, 'get_collection_events'):
+            assert res >= 2
+        else:
+            assert res == -1
+
     def define_writebarrier_before_copy(cls):
         S = lltype.GcStruct('S')
         TP = lltype.GcArray(lltype.Ptr(S))
@@ -1414,6 +1481,26 @@ class TestHybridGC(TestGenerationGC):
         res = run([100, 100])
         assert res == 200
 
+    def define_gc_heap_histogram_rawmalloced(cls):
+        A = lltype.GcArray(lltype.Signed)
+        def f():
+            a = lltype.malloc(A, 50)
+            a[49] = 42
+            hist = rgc._heap_histogram()
+            found = 0
+            for i in range(len(hist.types)):
+                entry = hist.types[i]
+                if entry.external_size >= 50 * WORD:
+                    found += 1
+            raw = int(hist.rawmalloced_bytes >= 50 * WORD)
+            return found * 10 + raw + a[49] - 42
+        return f
+
+    def test_gc_heap_histogram_rawmalloced(self):
+        run = self.runner("gc_heap_histogram_rawmalloced")
+        res = run([])
+        assert res == 11
+
     def define_assume_young_pointers(cls):
         from pypy.rlib import rgc
         S = lltype.GcForwardReference()
@@ -1444,6 +1531,93 @@ class TestHybridGC(TestGenerationGC):
     def test_malloc_nonmovable_fixsize(self):
         py.test.skip("not supported")
 
+
+class TestHybridGCWithCards(TestHybridGC):
+    gcname = "hybrid"
+
+    class gcpolicy(gc.FrameworkGcPolicy):
+        class transformerclass(framework.FrameworkGCTransformer):
+            from pypy.rpython.memory.gc.hybrid import HybridGC as GCClass
+            GC_PARAMS = {'space_size': 512*WORD,
+                         'nursery_size': 32*WORD,
+                         'large_object': 8*WORD,
+                         'card_page_indices': 4}
+            root_stack_depth = 200
+
+    def define_card_marking(cls):
+        S = lltype.GcStruct('S', ('x', lltype.Signed))
+        A = lltype.GcArray(lltype.Ptr(S))
+        def f():
+            a = lltype.malloc(A, 200)    # a large array, with cards
+            rgc.collect()
+            i = 0
+            while i < 200:
+                s = lltype.malloc(S)
+                s.x = i
+                a[i] = s
+                i += 3
+            rgc.collect(0)
+            total = 0
+            i = 0
+            while i < 200:
+                if a[i]:
+                    total += a[i].x
+                i += 1
+            return total
+        return f
+
+    def test_card_marking(self):
+        run = self.runner("card_marking")
+        res = run([])
+        assert res == sum(range(0, 200, 3))
+
+class TestHybridGCIncrementalSweep(TestHybridGC):
+    gcname = "hybrid"
+
+    class gcpolicy(gc.FrameworkGcPolicy):
+        class transformerclass(framework.FrameworkGCTransformer):
+            from pypy.rpython.memory.gc.hybrid import HybridGC as GCClass
+            GC_PARAMS = {'space_size': 512*WORD,
+                         'nursery_size': 32*WORD,
+                         'large_object': 8*WORD,
+                         'generation3_collect_threshold': 2,
+                         'gen3_sweep_bytes': 16*WORD}
+            root_stack_depth = 200
+
+    def define_gen3_incremental_sweep(cls):
+        S = lltype.GcStruct('S', ('x', lltype.Signed))
+        A = lltype.GcArray(lltype.Ptr(S))
+        def f():
+            lst = []
+            i = 0
+            while i < 10:
+                a = lltype.malloc(A, 20)    # a large array
+                s = lltype.malloc(S)
+                s.x = i
+                a[0] = s
+                lst.append(a)
+                i += 1
+            i = 0
+            while i < 6:     # the arrays go to generation 3
+                rgc.collect(1)
+                i += 1
+            lst = [lst[1], lst[3], lst[5], lst[7], lst[9]]
+            rgc.collect(1)   # collects generation 3, without sweeping it
+            i = 0
+            while i < 200:   # minor collections sweep it incrementally
+                lltype.malloc(S)
+                i += 1
+            total = 0
+            for a in lst:
+                total += a[0].x
+            return total
+        return f
+
+    def test_gen3_incremental_sweep(self):
+        run = self.runner("gen3_incremental_sweep")
+        res = run([])
+        assert res == 1 + 3 + 5 + 7 + 9
+
 # ________________________________________________________________
 # tagged pointers
 
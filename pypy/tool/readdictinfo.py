@@ -1,5 +1,5 @@
 # this is for use with a pypy-c build with multidicts and using the
-# MeasuringDictImplementation -- it will create a file called
+# MeasuringDictStrategy -- it will create a file called
 # 'dictinfo.txt' in the local directory and this file will turn the
 # contents back into DictInfo objects.
 
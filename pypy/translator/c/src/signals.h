@@ -65,6 +65,11 @@ void pypysig_setflag(int signum); /* signal will set a flag which can be
 /* utility to poll for signals that arrived */
 int pypysig_poll(void);   /* => signum or -1 */
 
+/* utilities to delay the delivery of a signal to the calling thread,
+   e.g. around a blocking wait that it would interrupt with EINTR */
+void pypysig_block(int signum);
+void pypysig_unblock(int signum);
+
 /* When a signal is received, the high bit of pypysig_occurred is set.
    After all signals are processed by pypysig_poll(), the high bit is
    cleared again.  The variable is exposed and RPython code is free to
@@ -169,6 +174,31 @@ int pypysig_poll(void)
     return -1;  /* no pending signal */
 }
 
+#ifdef SIG_BLOCK
+/* sigprocmask() only changes the mask of the calling thread on the
+   systems that support threads */
+static void pypysig_setmask(int how, int signum)
+{
+    sigset_t mask;
+    sigemptyset(&mask);
+    sigaddset(&mask, signum);
+    sigprocmask(how, &mask, NULL);
+}
+
+void pypysig_block(int signum)
+{
+    pypysig_setmask(SIG_BLOCK, signum);
+}
+
+void pypysig_unblock(int signum)
+{
+    pypysig_setmask(SIG_UNBLOCK, signum);
+}
+#else
+void pypysig_block(int signum) { }
+void pypysig_unblock(int signum) { }
+#endif
+
 #endif
 
 #endif
@@ -35,6 +35,8 @@ DWORD EnterNonRecursiveMutex(PNRMUTEX mutex, BOOL wait);
 BOOL LeaveNonRecursiveMutex(PNRMUTEX mutex);
 void RPyOpaqueDealloc_ThreadLock(struct RPyOpaque_ThreadLock *lock);
 int RPyThreadAcquireLock(struct RPyOpaque_ThreadLock *lock, int waitflag);
+int RPyThreadAcquireLockTimed(struct RPyOpaque_ThreadLock *lock,
+			      long microseconds);
 void RPyThreadReleaseLock(struct RPyOpaque_ThreadLock *lock);
 long RPyThreadGetStackSize(void);
 long RPyThreadSetStackSize(long);
@@ -192,6 +194,16 @@ int RPyThreadAcquireLock(struct RPyOpaque_ThreadLock *lock, int waitflag)
 	return EnterNonRecursiveMutex(lock, (waitflag != 0 ? INFINITE : 0)) == WAIT_OBJECT_0;
 }
 
+/*
+ * The NonRecursiveMutex cannot give up waiting: the thread that gave
+ * up would still be counted in 'owned'.  Wait until the lock is acquired.
+ */
+int RPyThreadAcquireLockTimed(struct RPyOpaque_ThreadLock *lock,
+			      long microseconds)
+{
+	return RPyThreadAcquireLock(lock, 1);
+}
+
 void RPyThreadReleaseLock(struct RPyOpaque_ThreadLock *lock)
 {
 	if (!LeaveNonRecursiveMutex(lock))
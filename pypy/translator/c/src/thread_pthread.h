@@ -12,6 +12,7 @@
 #include <signal.h>
 #include <stdio.h>
 #include <errno.h>
+#include <sys/time.h>
 
 /* The following is hopefully equivalent to what CPython does
    (which is trying to compile a snippet of code using it) */
@@ -95,6 +96,8 @@ long RPyThreadStart(void (*func)(void));
 int RPyThreadLockInit(struct RPyOpaque_ThreadLock *lock);
 void RPyOpaqueDealloc_ThreadLock(struct RPyOpaque_ThreadLock *lock);
 int RPyThreadAcquireLock(struct RPyOpaque_ThreadLock *lock, int waitflag);
+int RPyThreadAcquireLockTimed(struct RPyOpaque_ThreadLock *lock,
+			      long microseconds);
 void RPyThreadReleaseLock(struct RPyOpaque_ThreadLock *lock);
 long RPyThreadGetStackSize(void);
 long RPyThreadSetStackSize(long);
@@ -235,6 +238,19 @@ long RPyThreadSetStackSize(long newsize)
 #endif
 }
 
+/* the absolute time, as needed by sem_timedwait() and
+   pthread_cond_timedwait(), 'microseconds' from now */
+static void rpythread_deadline(struct timespec *deadline, long microseconds)
+{
+	struct timeval now;
+	long usec;
+
+	gettimeofday(&now, NULL);
+	usec = now.tv_usec + microseconds % 1000000;
+	deadline->tv_sec = now.tv_sec + microseconds / 1000000 + usec / 1000000;
+	deadline->tv_nsec = (usec % 1000000) * 1000;
+}
+
 /************************************************************/
 #ifdef USE_SEMAPHORES
 /************************************************************/
@@ -299,6 +315,26 @@ int RPyThreadAcquireLock(struct RPyOpaque_ThreadLock *lock, int waitflag)
 	return success;
 }
 
+/* like RPyThreadAcquireLock(lock, 1), but gives up after 'microseconds' */
+int RPyThreadAcquireLockTimed(struct RPyOpaque_ThreadLock *lock,
+			      long microseconds)
+{
+	sem_t *thelock = &lock->sem;
+	struct timespec deadline;
+	int status, error = 0;
+
+	rpythread_deadline(&deadline, microseconds);
+	do {
+		status = rpythread_fix_status(sem_timedwait(thelock,
+							    &deadline));
+	} while (status == EINTR); /* Retry if interrupted by a signal */
+
+	if (status != ETIMEDOUT) {
+		CHECK_STATUS("sem_timedwait");
+	}
+	return (status == 0) ? 1 : 0;
+}
+
 void RPyThreadReleaseLock(struct RPyOpaque_ThreadLock *lock)
 {
 	sem_t *thelock = &lock->sem;
@@ -377,6 +413,34 @@ int RPyThreadAcquireLock(struct RPyOpaque_ThreadLock *lock, int waitflag)
 	return success;
 }
 
+/* like RPyThreadAcquireLock(lock, 1), but gives up after 'microseconds' */
+int RPyThreadAcquireLockTimed(struct RPyOpaque_ThreadLock *lock,
+			      long microseconds)
+{
+	int success;
+	int status, error = 0;
+	struct timespec deadline;
+
+	rpythread_deadline(&deadline, microseconds);
+	status = pthread_mutex_lock( &lock->mut );
+	CHECK_STATUS("pthread_mutex_lock[2]");
+
+	while ( lock->locked && !error ) {
+		status = pthread_cond_timedwait(&lock->lock_released,
+						&lock->mut, &deadline);
+		if (status == ETIMEDOUT)
+			break;
+		CHECK_STATUS("pthread_cond_timedwait");
+	}
+	success = lock->locked == 0;
+	if (success) lock->locked = 1;
+	status = pthread_mutex_unlock( &lock->mut );
+	CHECK_STATUS("pthread_mutex_unlock[2]");
+
+	if (error) success = 0;
+	return success;
+}
+
 void RPyThreadReleaseLock(struct RPyOpaque_ThreadLock *lock)
 {
 	int status, error = 0;
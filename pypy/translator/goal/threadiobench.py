@@ -0,0 +1,91 @@
+# Measures how well threads that are blocked in I/O run in parallel.
+# Each thread repeatedly waits for a short time in a blocking call
+# (select() on a pipe that never becomes readable, or recv() with a
+# timeout on a socket that never receives anything).  As long as the
+# GIL is released while blocked, N threads should do close to N times
+# as many waits per second as a single thread.
+import os, sys, time, thread, select, socket
+
+USAGE = """threadiobench [--threads=N,N,N..] [--duration=SECONDS] [--wait=MS]"""
+
+def wait_select(wait, stop):
+    r, w = os.pipe()
+    count = 0
+    try:
+        while time.time() < stop:
+            select.select([r], [], [], wait)
+            count += 1
+    finally:
+        os.close(r)
+        os.close(w)
+    return count
+
+def wait_socket(wait, stop):
+    serv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    serv.bind(('127.0.0.1', 0))
+    serv.listen(1)
+    cli = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    cli.connect(serv.getsockname())
+    conn, addr = serv.accept()
+    cli.settimeout(wait)
+    count = 0
+    try:
+        while time.time() < stop:
+            try:
+                cli.recv(1)
+            except socket.timeout:
+                pass
+            count += 1
+    finally:
+        cli.close()
+        conn.close()
+        serv.close()
+    return count
+
+def run(waitfunc, nthreads, duration, wait):
+    lock = thread.allocate_lock()
+    results = []
+    stop = time.time() + duration
+    def worker():
+        count = waitfunc(wait, stop)
+        lock.acquire()
+        results.append(count)
+        lock.release()
+    for i in range(nthreads):
+        thread.start_new_thread(worker, ())
+    while True:
+        time.sleep(0.05)
+        lock.acquire()
+        done = len(results)
+        lock.release()
+        if done == nthreads:
+            break
+    return sum(results) / float(duration)
+
+def entry_point(argv):
+    threads = [1, 2, 4, 8, 16]
+    duration = 2.0
+    wait = 0.005
+    for arg in argv[1:]:
+        if arg.startswith('--threads='):
+            threads = [int(s) for s in arg[len('--threads='):].split(',')]
+        elif arg.startswith('--duration='):
+            duration = float(arg[len('--duration='):])
+        elif arg.startswith('--wait='):
+            wait = float(arg[len('--wait='):]) / 1000.0
+        else:
+            print USAGE
+            return 2
+    for name, waitfunc in [('select', wait_select), ('socket', wait_socket)]:
+        print '%s, %.1f ms per wait:' % (name, wait * 1000.0)
+        base = None
+        for n in threads:
+            rate = run(waitfunc, n, duration, wait)
+            if base is None:
+                base = rate / n
+            print '  %3d threads: %8.1f waits/s, scaling %5.2f (ideal %d)' % (
+                n, rate, rate / base, n)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(entry_point(sys.argv))